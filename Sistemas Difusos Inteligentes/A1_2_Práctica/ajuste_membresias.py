@@ -0,0 +1,451 @@
+"""
+A1.2 Práctica - Ajuste Automático de Funciones de Membresía
+Evolución diferencial con evaluación vectorizada de poblaciones completas
+
+Descripción:
+Los puntos de quiebre de los conjuntos ([0, 0, 5], [3, 5, 7], ...) se
+eligieron a mano. A partir de datos etiquetados (entradas N x k y salida
+esperada N) este módulo ajusta los parámetros de los conjuntos triangulares
+y trapezoidales de una definición JSON y, opcionalmente, el término
+consecuente de cada regla, minimizando el error cuadrático medio.
+
+- Restricciones: los parámetros de cada conjunto se mantienen ordenados
+  (a <= b <= c <= d) y dentro del universo; la cobertura (todo punto del
+  universo pertenece a algún término con grado >= 'cobertura') se impone
+  con una penalización.
+- Evaluación: una generación completa (P candidatos x N muestras) se evalúa
+  con una sola cadena de operaciones NumPy: grados P x T x N con la fórmula
+  cerrada de cada conjunto, fuerzas P x R x N, cortes P x C x N y centroide
+  sobre el universo de salida. Los candidatos se procesan en trozos para
+  acotar la memoria y, con procesos > 1, los trozos se reparten entre
+  procesos.
+- Al terminar, los parámetros se redondean a la rejilla del universo: el
+  sistema compilado muestrea las curvas en el universo y, con los puntos
+  de quiebre en la rejilla, reproduce exactamente el error informado en
+  'rmse_rejilla'.
+- La pérdida que se minimiza es RMSE + penalización de cobertura; el
+  resultado informa ambos términos por separado ('rmse_*' y
+  'penalizacion_*', ya escalada al rango de la salida) además de su suma
+  ('perdida_*').
+
+Uso:
+    espacio = EspacioParametros(cargar_definicion('definiciones/satisfaccion.json'))
+    resultado = ajustar(espacio, X, y, generaciones=150, procesos=4)
+    guardar_definicion('satisfaccion_ajustada.json', resultado['definicion'])
+"""
+
+import copy
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from definicion_difusa import compilar, guardar_definicion, universo_variable
+from motor_vectorizado import grados_grupos, pesos_centroide
+
+_AJUSTABLES = {'trimf': 3, 'trapmf': 4}
+
+# Elementos como máximo del conjunto agregado P x N x U de un trozo
+_ELEMENTOS_POR_TROZO = 1 << 22
+
+
+# ---------------------------------------------------------
+# Trapecio (o triángulo con b == c) evaluado para P
+# candidatos a la vez: params P x 4, x M -> P x M. Los
+# hombros (a == b o c == d) valen 1 en el borde, como en
+# skfuzzy.
+# ---------------------------------------------------------
+def _trapecio(x, params):
+    a, b, c, d = (params[:, i, None] for i in range(4))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        subida = np.where(b > a, (x - a) / (b - a), (x >= a).astype(float))
+        bajada = np.where(d > c, (d - x) / (d - c), (x <= d).astype(float))
+    return np.clip(np.minimum(subida, bajada), 0.0, 1.0)
+
+
+def _como_trapecio(params):
+    if params.shape[1] == 3:
+        return params[:, [0, 1, 1, 2]]
+    return params
+
+
+class EspacioParametros(object):
+    """
+    Vector de parámetros de una definición: los puntos de quiebre de cada
+    conjunto trimf/trapmf (de entradas y de la salida ajustada) seguidos,
+    si ajustar_consecuentes, de un gen por regla con el índice de su
+    término de salida. Los conjuntos de otros tipos quedan fijos.
+    """
+
+    def __init__(self, definicion, salida=None, ajustar_consecuentes=True, cobertura=0.1,
+                 peso_cobertura=1.0):
+        self.definicion = definicion
+        self.compilado = compilar(definicion)
+        self.salida = salida or self.compilado.salidas[0]
+        self.entradas = self.compilado.entradas
+        self.cobertura = cobertura
+        self.peso_cobertura = peso_cobertura
+
+        tablas = self.compilado.tablas(self.salida)
+        self.indices_reglas = tablas['indices_reglas']
+        self.reglas_or = tablas['reglas_or']
+        self.grupos_or = tablas['grupos_or']
+        self.pesos_consecuentes = tablas['pesos_consecuentes']
+        self.terminos_salida = tablas['terminos_salida']
+        self.universo_salida = tablas['universo_salida']
+        self.membresia_salida = tablas['membresia_salida']
+        self._pesos_area, self._pesos_momento = pesos_centroide(self.universo_salida)
+        self.n_terminos = sum(len(t) for t in tablas['terminos'])
+        self._posicion_regla = [[regla.get('nombre', 'regla{}'.format(r + 1))
+                                 for r, regla in enumerate(definicion['reglas'])].index(nombre)
+                                for nombre in tablas['nombres_reglas']]
+
+        # Conjuntos: uno por término, ajustable o fijo (curva muestreada)
+        self.conjuntos = []
+        inferior = []
+        superior = []
+        x0 = []
+        for seccion, nombres in (('entradas', self.entradas), ('salidas', [self.salida])):
+            for variable in nombres:
+                datos = definicion[seccion][variable]
+                universo = universo_variable(datos)
+                for t, (termino, conjunto) in enumerate(datos['conjuntos'].items()):
+                    info = {'seccion': seccion, 'variable': variable, 'termino': termino,
+                            'indice': t, 'universo': universo, 'tipo': conjunto['tipo']}
+                    if conjunto['tipo'] in _AJUSTABLES:
+                        info['desde'] = len(x0)
+                        info['hasta'] = len(x0) + _AJUSTABLES[conjunto['tipo']]
+                        x0.extend(float(p) for p in conjunto['params'])
+                        inferior.extend([universo[0]] * _AJUSTABLES[conjunto['tipo']])
+                        superior.extend([universo[-1]] * _AJUSTABLES[conjunto['tipo']])
+                    else:
+                        info['curva'] = self.compilado.membresias[variable][t]
+                    self.conjuntos.append(info)
+        self.n_continuos = len(x0)
+
+        # Genes de consecuente: reglas con un único término de salida
+        self.reglas_ajustables = []
+        if ajustar_consecuentes:
+            for r, fila in enumerate(self.pesos_consecuentes):
+                if np.count_nonzero(fila) == 1:
+                    self.reglas_ajustables.append(r)
+                    x0.append(float(np.flatnonzero(fila)[0]))
+                    inferior.append(-0.49)
+                    superior.append(len(self.terminos_salida) - 0.51)
+
+        self.x0 = np.array(x0)
+        self.inferior = np.array(inferior)
+        self.superior = np.array(superior)
+        if self.x0.size == 0:
+            raise ValueError("La definición no tiene parámetros ajustables")
+
+    @property
+    def dimension(self):
+        return self.x0.size
+
+    # -----------------------------------------------------
+    # Parámetros de un conjunto para toda la población:
+    # ordenados y dentro del universo (P x 3 o P x 4)
+    # -----------------------------------------------------
+    def _parametros(self, poblacion, info):
+        params = np.sort(poblacion[:, info['desde']:info['hasta']], axis=1)
+        return np.clip(params, info['universo'][0], info['universo'][-1])
+
+    def _curvas(self, poblacion, info, x):
+        if 'curva' in info:
+            curva = np.interp(x, info['universo'], info['curva'])
+            return np.broadcast_to(curva, (poblacion.shape[0], x.size))
+        return _trapecio(x, _como_trapecio(self._parametros(poblacion, info)))
+
+    def _consecuentes(self, poblacion):
+        pesos = np.broadcast_to(self.pesos_consecuentes,
+                                (poblacion.shape[0],) + self.pesos_consecuentes.shape).copy()
+        for g, r in enumerate(self.reglas_ajustables):
+            termino = np.rint(poblacion[:, self.n_continuos + g]).astype(np.intp)
+            termino = np.clip(termino, 0, len(self.terminos_salida) - 1)
+            peso = self.pesos_consecuentes[r].max()
+            pesos[:, r, :] = 0.0
+            pesos[np.arange(poblacion.shape[0]), r, termino] = peso
+        return pesos
+
+    # -----------------------------------------------------
+    # Salida de P candidatos sobre N muestras (P x N). NaN
+    # donde no dispara ninguna regla.
+    # -----------------------------------------------------
+    def evaluar(self, poblacion, X):
+        poblacion = np.atleast_2d(np.asarray(poblacion, dtype=float))
+        X = np.asarray(X, dtype=float)
+        p, n, t = poblacion.shape[0], X.shape[0], self.n_terminos
+
+        # Grados extendidos [μ (T) | 1 - μ (T) | 1 | 0 | grupos (G)]: P x (2T + 2 + G) x N
+        extendidos = np.empty((p, 2 * t + 2 + self.grupos_or.shape[0], n))
+        columna = 0
+        curvas_salida = np.empty((p, len(self.terminos_salida), self.universo_salida.size))
+        for info in self.conjuntos:
+            if info['seccion'] == 'entradas':
+                x = X[:, self.entradas.index(info['variable'])]
+                extendidos[:, columna] = self._curvas(poblacion, info, x)
+                columna += 1
+            else:
+                curvas_salida[:, info['indice']] = self._curvas(poblacion, info,
+                                                                self.universo_salida)
+        np.subtract(1.0, extendidos[:, :t], out=extendidos[:, t:2 * t])
+        extendidos[:, 2 * t] = 1.0
+        extendidos[:, 2 * t + 1] = 0.0
+        grados_grupos(extendidos, self.grupos_or, t)
+
+        # Fuerzas P x R x N (mismo recorrido que MotorMamdani.activaciones)
+        indices = self.indices_reglas
+        y_reglas = ~self.reglas_or[None, :, None]
+        o_reglas = self.reglas_or[None, :, None]
+        fuerza = extendidos[:, indices[:, 0]]
+        for h in range(1, indices.shape[1]):
+            hoja = extendidos[:, indices[:, h]]
+            np.minimum(fuerza, hoja, out=fuerza, where=y_reglas)
+            np.maximum(fuerza, hoja, out=fuerza, where=o_reglas)
+
+        # Cortes P x C x N y conjunto agregado P x N x U
+        pesos = self._consecuentes(poblacion)
+        agregada = np.zeros((p, n, self.universo_salida.size))
+        recorte = np.empty_like(agregada)
+        for c in range(len(self.terminos_salida)):
+            corte = (fuerza * pesos[:, :, c, None]).max(axis=1)
+            np.minimum(corte[:, :, None], curvas_salida[:, c, None, :], out=recorte)
+            np.maximum(agregada, recorte, out=agregada)
+
+        area = agregada @ self._pesos_area
+        momento = agregada @ self._pesos_momento
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(area > 0, momento / area, np.nan)
+
+    # -----------------------------------------------------
+    # Penalización de cobertura (P): falta media de grado
+    # por debajo de 'cobertura' en el universo de cada variable
+    # -----------------------------------------------------
+    def penalizacion_cobertura(self, poblacion):
+        poblacion = np.atleast_2d(np.asarray(poblacion, dtype=float))
+        penalizacion = np.zeros(poblacion.shape[0])
+        if not self.cobertura:
+            return penalizacion
+        por_variable = {}
+        for info in self.conjuntos:
+            curva = self._curvas(poblacion, info, info['universo'])
+            clave = info['variable']
+            por_variable[clave] = curva if clave not in por_variable \
+                else np.maximum(por_variable[clave], curva)
+        for maximo in por_variable.values():
+            penalizacion += np.clip(self.cobertura - maximo, 0.0, None).mean(axis=1) \
+                / self.cobertura
+        return penalizacion
+
+    # -----------------------------------------------------
+    # RMSE de P candidatos (las muestras sin regla activa
+    # cuentan como error igual al rango de la salida)
+    # -----------------------------------------------------
+    def rmse(self, poblacion, X, y):
+        poblacion = np.atleast_2d(np.asarray(poblacion, dtype=float))
+        rango = self.universo_salida[-1] - self.universo_salida[0]
+        trozo = max(1, _ELEMENTOS_POR_TROZO // (len(y) * self.universo_salida.size))
+        errores = np.empty(poblacion.shape[0])
+        for inicio in range(0, poblacion.shape[0], trozo):
+            parte = poblacion[inicio:inicio + trozo]
+            error = np.abs(self.evaluar(parte, X) - y)
+            error = np.where(np.isnan(error), rango, error)
+            errores[inicio:inicio + trozo] = np.sqrt((error ** 2).mean(axis=1))
+        return errores
+
+    # -----------------------------------------------------
+    # Término de cobertura que se suma a la pérdida: la
+    # penalización escalada al rango de la salida
+    # -----------------------------------------------------
+    def termino_cobertura(self, poblacion):
+        rango = self.universo_salida[-1] - self.universo_salida[0]
+        return self.peso_cobertura * rango * self.penalizacion_cobertura(poblacion)
+
+    # -----------------------------------------------------
+    # Pérdida de P candidatos: RMSE + término de cobertura
+    # -----------------------------------------------------
+    def perdidas(self, poblacion, X, y):
+        return self.rmse(poblacion, X, y) + self.termino_cobertura(poblacion)
+
+    # -----------------------------------------------------
+    # Vector -> definición JSON (copia). Con a_rejilla los
+    # parámetros se redondean al paso del universo.
+    # -----------------------------------------------------
+    def definicion_para(self, vector, a_rejilla=True):
+        vector = np.atleast_2d(np.asarray(vector, dtype=float))
+        definicion = copy.deepcopy(self.definicion)
+        for info in self.conjuntos:
+            if 'curva' in info:
+                continue
+            params = self._parametros(vector, info)[0]
+            if a_rejilla:
+                universo = info['universo']
+                paso = universo[1] - universo[0]
+                params = universo[0] + np.rint((params - universo[0]) / paso) * paso
+            variable = definicion[info['seccion']][info['variable']]
+            variable['conjuntos'][info['termino']]['params'] = \
+                [round(float(v), 6) for v in params]
+
+        pesos = self._consecuentes(vector)[0]
+        for r in self.reglas_ajustables:
+            regla = definicion['reglas'][self._posicion_regla[r]]
+            regla['entonces'][self.salida] = self.terminos_salida[int(np.argmax(pesos[r]))]
+        return definicion
+
+    def vector_de(self, definicion):
+        return EspacioParametros(definicion, self.salida, bool(self.reglas_ajustables),
+                                 self.cobertura, self.peso_cobertura).x0
+
+
+# ---------------------------------------------------------
+# Reparto de una población entre procesos: cada proceso
+# recibe el espacio y los datos una sola vez
+# ---------------------------------------------------------
+_estado = {}
+
+
+def _inicializar(espacio, X, y):
+    _estado['espacio'] = espacio
+    _estado['X'] = X
+    _estado['y'] = y
+
+
+def _perdidas_trozo(poblacion):
+    return _estado['espacio'].perdidas(poblacion, _estado['X'], _estado['y'])
+
+
+# ---------------------------------------------------------
+# Evolución diferencial (rand/1/bin). La población inicial
+# es la definición original más perturbaciones de ella.
+# Devuelve dict con la mejor definición, su vector, la
+# pérdida inicial, final y en la rejilla (y por separado su
+# RMSE y su penalización) y el historial de la pérdida por
+# generación.
+# ---------------------------------------------------------
+def ajustar(espacio, X, y, generaciones=100, tamano_poblacion=40, mutacion=0.5,
+            cruce=0.3, dispersion_inicial=0.05, procesos=None, semilla=0, informar=None):
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y, dtype=float)
+    rng = np.random.default_rng(semilla)
+    d = espacio.dimension
+    rango = espacio.superior - espacio.inferior
+
+    poblacion = espacio.x0 + rng.normal(0.0, dispersion_inicial, (tamano_poblacion, d)) * rango
+    poblacion[0] = espacio.x0
+    poblacion = np.clip(poblacion, espacio.inferior, espacio.superior)
+
+    ejecutor = None
+    if procesos and procesos > 1:
+        ejecutor = ProcessPoolExecutor(procesos, initializer=_inicializar,
+                                       initargs=(espacio, X, y))
+
+    def evaluar(candidatos):
+        if ejecutor is None:
+            return espacio.perdidas(candidatos, X, y)
+        trozos = np.array_split(candidatos, procesos)
+        return np.concatenate(list(ejecutor.map(_perdidas_trozo, trozos)))
+
+    try:
+        perdidas = evaluar(poblacion)
+        historial = []
+        for generacion in range(generaciones):
+            # Tres individuos distintos entre sí y del objetivo
+            a, b, c = (np.empty(tamano_poblacion, dtype=np.intp) for _ in range(3))
+            for i in range(tamano_poblacion):
+                a[i], b[i], c[i] = rng.choice(np.delete(np.arange(tamano_poblacion), i), 3,
+                                              replace=False)
+            mutantes = poblacion[a] + mutacion * (poblacion[b] - poblacion[c])
+            cruzar = rng.random((tamano_poblacion, d)) < cruce
+            cruzar[np.arange(tamano_poblacion), rng.integers(0, d, tamano_poblacion)] = True
+            pruebas = np.clip(np.where(cruzar, mutantes, poblacion),
+                              espacio.inferior, espacio.superior)
+
+            perdidas_pruebas = evaluar(pruebas)
+            mejora = perdidas_pruebas <= perdidas
+            poblacion[mejora] = pruebas[mejora]
+            perdidas[mejora] = perdidas_pruebas[mejora]
+            historial.append(float(perdidas.min()))
+            if informar:
+                informar(generacion, historial[-1])
+    finally:
+        if ejecutor is not None:
+            ejecutor.shutdown()
+
+    mejor = poblacion[np.argmin(perdidas)]
+    definicion = espacio.definicion_para(mejor)
+    resultado = {
+        'definicion': definicion,
+        'vector': mejor,
+        'historial': historial,
+    }
+    for etapa, vector in (('inicial', espacio.x0), ('final', mejor),
+                          ('rejilla', espacio.vector_de(definicion))):
+        error = float(espacio.rmse(vector, X, y)[0])
+        penalizacion = float(espacio.termino_cobertura(vector)[0])
+        resultado['rmse_' + etapa] = error
+        resultado['penalizacion_' + etapa] = penalizacion
+        resultado['perdida_' + etapa] = error + penalizacion
+    return resultado
+
+
+# ---------------------------------------------------------
+# Datos etiquetados desde CSV con cabecera: una columna por
+# entrada y otra con el nombre de la salida
+# ---------------------------------------------------------
+def cargar_datos(ruta, entradas, salida):
+    datos = np.genfromtxt(ruta, delimiter=',', names=True)
+    return np.column_stack([datos[nombre] for nombre in entradas]), np.asarray(datos[salida])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from definicion_difusa import cargar_definicion
+    from modelo_satisfaccion import RUTA_DEFINICION
+
+    parser = argparse.ArgumentParser(description="Ajusta conjuntos y consecuentes a datos.")
+    parser.add_argument('--definicion', default=RUTA_DEFINICION)
+    parser.add_argument('--datos', help="CSV con las entradas y la salida (por defecto, datos "
+                                        "sintéticos de una versión modificada del sistema)")
+    parser.add_argument('--generaciones', type=int, default=100)
+    parser.add_argument('--poblacion', type=int, default=40)
+    parser.add_argument('--procesos', type=int, default=os.cpu_count())
+    parser.add_argument('--guardar', help="ruta del JSON ajustado")
+    args = parser.parse_args()
+
+    definicion = cargar_definicion(args.definicion)
+    espacio = EspacioParametros(definicion)
+
+    if args.datos:
+        X, y = cargar_datos(args.datos, espacio.entradas, espacio.salida)
+    else:
+        # Etiquetas de un sistema "real" distinto del de partida
+        objetivo = copy.deepcopy(definicion)
+        objetivo['entradas']['tiempo_espera']['conjuntos']['medio']['params'] = [15, 25, 40]
+        objetivo['entradas']['calidad']['conjuntos']['regular']['params'] = [2, 5, 8]
+        objetivo['reglas'][2]['entonces']['satisfaccion'] = 'baja'
+        rng = np.random.default_rng(1)
+        X = np.column_stack([rng.uniform(0, 10, 2000), rng.uniform(0, 60, 2000)])
+        y = compilar(objetivo).motor().evaluar(X)
+        X, y = X[~np.isnan(y)], y[~np.isnan(y)]
+
+    print(f"{espacio.dimension} parámetros, {len(y)} muestras, población {args.poblacion}, "
+          f"{args.procesos} procesos")
+    inicio = time.perf_counter()
+    resultado = ajustar(espacio, X, y, args.generaciones, args.poblacion, procesos=args.procesos,
+                        informar=lambda g, p: print(f"  generación {g + 1}: pérdida {p:.3f}")
+                        if (g + 1) % 10 == 0 else None)
+    segundos = time.perf_counter() - inicio
+    evaluaciones = args.poblacion * (args.generaciones + 1) * len(y)
+    for termino, clave in (('RMSE', 'rmse'), ('Penalización de cobertura', 'penalizacion'),
+                           ('Pérdida', 'perdida')):
+        print(f"{termino} inicial {resultado[clave + '_inicial']:.3f} -> final "
+              f"{resultado[clave + '_final']:.3f} (en la rejilla {resultado[clave + '_rejilla']:.3f})")
+    print(f"{segundos:.1f} s, {evaluaciones / segundos:,.0f} inferencias/s")
+    for nombre, variable in resultado['definicion']['entradas'].items():
+        for termino, conjunto in variable['conjuntos'].items():
+            print(f"  {nombre}['{termino}'] = {conjunto['params']}")
+    if args.guardar:
+        guardar_definicion(args.guardar, resultado['definicion'])
@@ -0,0 +1,390 @@
+"""
+A1.2 Práctica - Caché de Inferencias
+Memoización de resultados con entradas cuantizadas y desalojo LRU
+
+Descripción:
+En producción las entradas se repiten mucho (calidad es un entero 0-10 y el
+tiempo de espera suele venir en minutos enteros), así que la misma pareja se
+evalúa una y otra vez. CacheInferencia se coloca delante de la inferencia:
+- Cuantiza cada entrada a una resolución configurable (por defecto 1) y usa
+  la tupla de enteros como clave; el valor guardado es la salida evaluada en
+  el punto cuantizado, de modo que un acierto y un fallo dan lo mismo.
+- Guarda como máximo 'capacidad' resultados y desaloja el menos usado (LRU).
+- Cuenta aciertos, fallos y desalojos.
+- Se invalida sola si cambian las funciones de membresía o las reglas: en
+  cada llamada compara una versión barata del sistema (CRC32 de los arreglos
+  e identidad de reglas y términos) y cada verificar_cada llamadas, y en cada
+  lote, una firma SHA-256 completa. invalidar() la vacía a mano.
+- Es segura con varios hilos: el diccionario se protege con un candado y la
+  inferencia de los fallos se hace fuera de él. Cada vaciado avanza una
+  generación; un fallo calculado en una generación anterior no se guarda,
+  así que una invalidación concurrente no se deshace con valores viejos.
+  skfuzzy guarda estado dentro del propio ControlSystem, así que sus
+  inferencias (y el cálculo de la firma) se serializan con un segundo
+  candado; los aciertos no lo esperan.
+
+Uso:
+    cache = CacheInferencia.para_control_system(sistema_control)
+    satisfaccion = cache(9, 10)                       # una entrada
+    z = cache.evaluar(np.column_stack([calidades, tiempos]))  # un lote
+    print(cache.estadisticas())
+"""
+
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+
+# ---------------------------------------------------------
+# Reglas de un ctrl.ControlSystem en el orden en que se
+# agregaron. Iterar sistema.rules ordena el grafo con
+# networkx en cada llamada (varios ms); aquí basta el orden
+# de inserción de los nodos.
+# ---------------------------------------------------------
+def _reglas(sistema_control):
+    from skfuzzy.control import Rule
+
+    return [nodo for nodo in sistema_control.graph.nodes() if isinstance(nodo, Rule)]
+
+
+# ---------------------------------------------------------
+# Variables de un ctrl.ControlSystem ordenadas por nombre
+# ---------------------------------------------------------
+def _variables(reglas):
+    variables = {}
+    for regla in reglas:
+        for termino in regla.antecedent_terms:
+            variables[termino.parent.label] = termino.parent
+        for consecuente in regla.consequent:
+            variables[consecuente.term.parent.label] = consecuente.term.parent
+    return [variables[nombre] for nombre in sorted(variables)]
+
+
+# ---------------------------------------------------------
+# Firma del sistema: cambia si cambia cualquier universo,
+# función de membresía, regla o consecuente.
+# Admite MotorMamdani, MotorSugeno y ctrl.ControlSystem.
+# ---------------------------------------------------------
+def firma_sistema(sistema):
+    h = hashlib.sha256()
+
+    def agregar(valor):
+        if isinstance(valor, np.ndarray):
+            h.update(str(valor.dtype).encode())
+            h.update(np.ascontiguousarray(valor).tobytes())
+        else:
+            h.update(repr(valor).encode('utf-8'))
+
+    if hasattr(sistema, 'coeficientes'):
+        agregar(sistema.coeficientes)
+        sistema = sistema.antecedentes
+    if hasattr(sistema, 'tablas'):
+        for nombre, valor in sorted(sistema.tablas().items()):
+            agregar(nombre)
+            for elemento in (valor if isinstance(valor, list) else [valor]):
+                agregar(elemento)
+        return h.hexdigest()
+
+    # ctrl.ControlSystem
+    reglas = _reglas(sistema)
+    for regla in reglas:
+        agregar(str(regla))
+        agregar([(c.term.label, c.weight) for c in regla.consequent])
+    for variable in _variables(reglas):
+        agregar(variable.label)
+        agregar(np.asarray(variable.universe, dtype=float))
+        agregar(getattr(variable, 'defuzzify_method', None))
+        for etiqueta, termino in variable.terms.items():
+            agregar(etiqueta)
+            agregar(np.asarray(termino.mf, dtype=float))
+    return h.hexdigest()
+
+
+# ---------------------------------------------------------
+# Versión barata del sistema para comprobar en cada llamada:
+# CRC32 de todos los arreglos numéricos (detecta ediciones
+# en el lugar de membresías, universos, pesos, ...) más la
+# identidad de los objetos de la estructura (reglas,
+# antecedentes y términos). No sustituye a la firma, que
+# también ve cambios dentro de un antecedente; la caché
+# compara la firma cada verificar_cada llamadas.
+# ---------------------------------------------------------
+def version_sistema(sistema):
+    crc = 0
+    estructura = []
+    if hasattr(sistema, 'coeficientes'):
+        crc = zlib.crc32(np.ascontiguousarray(sistema.coeficientes), crc)
+        sistema = sistema.antecedentes
+    if hasattr(sistema, 'tablas'):
+        for valor in sistema.tablas().values():
+            for elemento in (valor if isinstance(valor, list) else [valor]):
+                if isinstance(elemento, np.ndarray):
+                    crc = zlib.crc32(np.ascontiguousarray(elemento), crc)
+                else:
+                    estructura.append(elemento if isinstance(elemento, str) else id(elemento))
+        return crc, tuple(estructura)
+
+    # ctrl.ControlSystem
+    reglas = _reglas(sistema)
+    for regla in reglas:
+        estructura.append(id(regla.antecedent))
+        estructura.extend((id(c.term), c.weight) for c in regla.consequent)
+    for variable in _variables(reglas):
+        crc = zlib.crc32(np.ascontiguousarray(variable.universe), crc)
+        estructura.append(getattr(variable, 'defuzzify_method', None))
+        for termino in variable.terms.values():
+            estructura.append(id(termino))
+            crc = zlib.crc32(np.ascontiguousarray(termino.mf), crc)
+    return crc, tuple(estructura)
+
+
+# ---------------------------------------------------------
+# Evaluador por lotes sobre ControlSystemSimulation. skfuzzy
+# no es seguro entre hilos (ni con una simulación por hilo):
+# las llamadas se serializan con 'candado'.
+# ---------------------------------------------------------
+def evaluador_skfuzzy(sistema_control, entradas, salida, candado=None):
+    from skfuzzy import control as ctrl
+
+    # Sin la caché interna de skfuzzy: no se entera de cambios en el sistema
+    simulacion = ctrl.ControlSystemSimulation(sistema_control, cache=False)
+    candado = candado or threading.Lock()
+
+    def evaluar(matriz):
+        resultado = np.empty(matriz.shape[0])
+        with candado:
+            for i, fila in enumerate(matriz.tolist()):
+                for nombre, valor in zip(entradas, fila):
+                    simulacion.input[nombre] = valor
+                simulacion.compute()
+                resultado[i] = simulacion.output[salida]
+        return resultado
+
+    return evaluar
+
+
+class CacheInferencia(object):
+    """
+    evaluador: función (matriz N x k) -> N salidas
+    entradas:  nombres de las k entradas, en el orden de las columnas
+    resolucion: paso de cuantización (escalar, secuencia o dict por nombre)
+    capacidad: número máximo de resultados guardados
+    sistema:   objeto del que se calcula la firma para invalidar la caché
+               (None: sin invalidación automática)
+    verificar_cada: cada cuántas llamadas se compara la firma completa
+    verificar_version: comparar version_sistema() en cada llamada
+    candado_sistema: candado que se toma al calcular la firma (el mismo
+               que serializa al evaluador si este no es seguro entre hilos)
+    """
+
+    def __init__(self, evaluador, entradas, resolucion=1.0, capacidad=100000,
+                 sistema=None, verificar_cada=1000, candado_sistema=None,
+                 verificar_version=True):
+        if capacidad < 1:
+            raise ValueError("La capacidad debe ser al menos 1")
+        self.evaluador = evaluador
+        self.entradas = list(entradas)
+        self.capacidad = capacidad
+        if isinstance(resolucion, dict):
+            resolucion = [resolucion[nombre] for nombre in self.entradas]
+        self.resolucion = np.broadcast_to(np.asarray(resolucion, dtype=float),
+                                          (len(self.entradas),)).copy()
+        if (self.resolucion <= 0).any():
+            raise ValueError("La resolución debe ser positiva")
+
+        self._resolucion_lista = self.resolucion.tolist()
+
+        self.sistema = sistema
+        self.verificar_cada = verificar_cada
+        self.verificar_version = verificar_version
+        self._candado_sistema = candado_sistema or threading.Lock()
+        self._firma = self._calcular_firma()
+        self._version = self._calcular_version()
+        self._llamadas = 0
+
+        self._datos = OrderedDict()
+        self._generacion = 0
+        self._candado = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.invalidaciones = 0
+
+    @classmethod
+    def para_motor(cls, motor, **opciones):
+        opciones.setdefault('sistema', motor)
+        return cls(motor.evaluar, motor.entradas, **opciones)
+
+    @classmethod
+    def para_control_system(cls, sistema_control, **opciones):
+        from motor_vectorizado import tablas_desde_control_system
+
+        tablas = tablas_desde_control_system(sistema_control)
+        opciones.setdefault('sistema', sistema_control)
+        candado = threading.Lock()
+        evaluador = evaluador_skfuzzy(sistema_control, tablas['entradas'], tablas['salida'],
+                                      candado)
+        return cls(evaluador, tablas['entradas'], candado_sistema=candado, **opciones)
+
+    # -----------------------------------------------------
+    # Cuantización: claves enteras N x k y puntos representativos
+    # -----------------------------------------------------
+    def cuantizar(self, matriz):
+        claves = np.rint(np.asarray(matriz, dtype=float) / self.resolucion).astype(np.int64)
+        return claves, claves * self.resolucion
+
+    # -----------------------------------------------------
+    # Invalidación
+    # -----------------------------------------------------
+    def invalidar(self):
+        with self._candado:
+            self._vaciar()
+
+    # Con self._candado tomado
+    def _vaciar(self):
+        self._datos.clear()
+        self._generacion += 1
+        self.invalidaciones += 1
+
+    def _calcular_firma(self):
+        if self.sistema is None:
+            return None
+        with self._candado_sistema:
+            return firma_sistema(self.sistema)
+
+    def _calcular_version(self):
+        if self.sistema is None or not self.verificar_version:
+            return None
+        with self._candado_sistema:
+            return version_sistema(self.sistema)
+
+    # -----------------------------------------------------
+    # completa=False solo compara la versión barata; si esta
+    # cambió se recalcula también la firma
+    # -----------------------------------------------------
+    def verificar(self, completa=True):
+        if self.sistema is None:
+            return
+        version = self._calcular_version()
+        if not completa and version == self._version:
+            return
+        firma = self._calcular_firma()
+        with self._candado:
+            if version != self._version or firma != self._firma:
+                self._version = version
+                self._firma = firma
+                self._vaciar()
+
+    def _contar_llamada(self, forzar=False):
+        with self._candado:
+            self._llamadas += 1
+            completa = forzar or bool(self.verificar_cada
+                                      and self._llamadas % self.verificar_cada == 0)
+        self.verificar(completa)
+
+    # -----------------------------------------------------
+    # Una entrada: cache(calidad, tiempo_espera)
+    # -----------------------------------------------------
+    def __call__(self, *valores):
+        self._contar_llamada()
+        # Misma cuantización que cuantizar() (round redondea a par,
+        # igual que np.rint), sin crear arreglos en los aciertos
+        clave = tuple(int(round(v / r)) for v, r in zip(valores, self._resolucion_lista))
+        with self._candado:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return self._datos[clave]
+            self.fallos += 1
+            generacion = self._generacion
+
+        puntos = np.array([clave], dtype=float) * self.resolucion
+        resultado = float(self.evaluador(puntos)[0])
+        self._guardar([(clave, resultado)], generacion)
+        return resultado
+
+    # -----------------------------------------------------
+    # Un lote N x k: los fallos se evalúan juntos en una sola
+    # llamada al evaluador (una vez por clave distinta). Se
+    # cuenta por fila: las filas repetidas de una clave que no
+    # estaba en la caché son fallos, no aciertos.
+    # -----------------------------------------------------
+    def evaluar(self, matriz):
+        self._contar_llamada(forzar=True)
+        claves, puntos = self.cuantizar(matriz)
+        unicas, posicion, inversa = np.unique(claves, axis=0, return_index=True,
+                                              return_inverse=True)
+        tuplas = [tuple(fila) for fila in unicas.tolist()]
+        filas_por_clave = np.bincount(inversa.ravel(), minlength=len(tuplas))
+
+        valores = np.empty(len(tuplas))
+        faltantes = []
+        with self._candado:
+            for i, clave in enumerate(tuplas):
+                if clave in self._datos:
+                    self._datos.move_to_end(clave)
+                    valores[i] = self._datos[clave]
+                else:
+                    faltantes.append(i)
+            filas_faltantes = int(filas_por_clave[faltantes].sum())
+            self.fallos += filas_faltantes
+            self.aciertos += claves.shape[0] - filas_faltantes
+            generacion = self._generacion
+
+        if faltantes:
+            calculados = self.evaluador(puntos[posicion[faltantes]])
+            valores[faltantes] = calculados
+            self._guardar([(tuplas[i], float(v)) for i, v in zip(faltantes, calculados)],
+                          generacion)
+        return valores[inversa.ravel()]
+
+    # -----------------------------------------------------
+    # Guarda resultados calculados en la generación dada; si
+    # la caché se vació mientras tanto se descartan
+    # -----------------------------------------------------
+    def _guardar(self, pares, generacion):
+        with self._candado:
+            if generacion != self._generacion:
+                return
+            for clave, valor in pares:
+                self._datos[clave] = valor
+                self._datos.move_to_end(clave)
+            while len(self._datos) > self.capacidad:
+                self._datos.popitem(last=False)
+                self.desalojos += 1
+
+    def estadisticas(self):
+        with self._candado:
+            total = self.aciertos + self.fallos
+            return {
+                'entradas': len(self._datos),
+                'capacidad': self.capacidad,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': self.aciertos / total if total else 0.0,
+                'desalojos': self.desalojos,
+                'invalidaciones': self.invalidaciones,
+            }
+
+
+if __name__ == "__main__":
+    import time
+
+    from modelo_satisfaccion import construir_sistema_control
+
+    sistema_control = construir_sistema_control()
+    cache = CacheInferencia.para_control_system(sistema_control, resolucion=(1, 1))
+
+    # Entradas repetitivas: calidad entera, tiempo en minutos enteros
+    rng = np.random.default_rng(0)
+    entradas = np.column_stack([rng.integers(0, 11, 20000), rng.integers(0, 61, 20000)])
+
+    inicio = time.perf_counter()
+    for calidad, tiempo in entradas.tolist():
+        cache(calidad, tiempo)
+    segundos = time.perf_counter() - inicio
+    print(f"{len(entradas)} inferencias con caché: {segundos:.2f} s")
+    print(cache.estadisticas())
@@ -0,0 +1,135 @@
+"""
+A1.2 Práctica - Generador de Carga
+Cliente asyncio para medir el servicio de puntuación
+
+Descripción:
+Abre varias conexiones persistentes contra servicio_puntuacion.py y, en cada
+una, envía peticiones POST /puntuar una tras otra (una entrada aleatoria por
+petición) durante un tiempo fijo. Al final informa peticiones por segundo y
+latencias p50/p90/p99/máx medidas desde el cliente.
+
+Uso:
+    python cliente_carga.py --puerto 8080 --conexiones 64 --segundos 10
+    python cliente_carga.py --unix /tmp/satisfaccion.sock --conexiones 128
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import numpy as np
+
+
+async def _abrir(host, puerto, unix):
+    if unix:
+        return await asyncio.open_unix_connection(unix)
+    return await asyncio.open_connection(host, puerto)
+
+
+async def _leer_respuesta(lector):
+    estado = int((await lector.readline()).split()[1])
+    largo = 0
+    while True:
+        cabecera = await lector.readline()
+        if cabecera in (b'\r\n', b'\n', b''):
+            break
+        nombre, _, valor = cabecera.decode('latin-1').partition(':')
+        if nombre.strip().lower() == 'content-length':
+            largo = int(valor)
+    return estado, await lector.readexactly(largo)
+
+
+# ---------------------------------------------------------
+# Una conexión: peticiones secuenciales hasta 'fin'.
+# Devuelve la lista de latencias (s) y el número de errores.
+# ---------------------------------------------------------
+async def _trabajador(host, puerto, unix, fin, semilla):
+    rng = random.Random(semilla)
+    lector, escritor = await _abrir(host, puerto, unix)
+    latencias = []
+    errores = 0
+    try:
+        while time.perf_counter() < fin:
+            cuerpo = json.dumps({'calidad': rng.randint(0, 10),
+                                 'tiempo_espera': rng.randint(0, 60)}).encode('utf-8')
+            peticion = ('POST /puntuar HTTP/1.1\r\nHost: local\r\n'
+                        'Content-Type: application/json\r\nContent-Length: {}\r\n\r\n'
+                        .format(len(cuerpo)).encode('latin-1') + cuerpo)
+            inicio = time.perf_counter()
+            escritor.write(peticion)
+            await escritor.drain()
+            estado, _ = await _leer_respuesta(lector)
+            latencias.append(time.perf_counter() - inicio)
+            if estado != 200:
+                errores += 1
+    finally:
+        escritor.close()
+    return latencias, errores
+
+
+async def _estadisticas_servidor(host, puerto, unix):
+    lector, escritor = await _abrir(host, puerto, unix)
+    escritor.write(b'GET /estadisticas HTTP/1.1\r\nHost: local\r\nConnection: close\r\n\r\n')
+    await escritor.drain()
+    _, cuerpo = await _leer_respuesta(lector)
+    escritor.close()
+    return json.loads(cuerpo)
+
+
+async def generar_carga(host='127.0.0.1', puerto=8080, unix=None, conexiones=64, segundos=10.0):
+    inicio = time.perf_counter()
+    fin = inicio + segundos
+    resultados = await asyncio.gather(*[_trabajador(host, puerto, unix, fin, i)
+                                        for i in range(conexiones)])
+    duracion = time.perf_counter() - inicio
+
+    latencias_ms = np.concatenate([np.asarray(l) for l, _ in resultados]) * 1000.0
+    resumen = {
+        'conexiones': conexiones,
+        'peticiones': int(latencias_ms.size),
+        'errores': sum(e for _, e in resultados),
+        'segundos': duracion,
+        'peticiones_por_s': latencias_ms.size / duracion,
+    }
+    if latencias_ms.size:
+        resumen.update({
+            'p50_ms': float(np.percentile(latencias_ms, 50)),
+            'p90_ms': float(np.percentile(latencias_ms, 90)),
+            'p99_ms': float(np.percentile(latencias_ms, 99)),
+            'max_ms': float(latencias_ms.max()),
+        })
+    resumen['servidor'] = await _estadisticas_servidor(host, puerto, unix)
+    return resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador de carga para servicio_puntuacion.py")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8080)
+    parser.add_argument('--unix', help="ruta del socket Unix del servicio")
+    parser.add_argument('--conexiones', type=int, default=64, help="conexiones concurrentes")
+    parser.add_argument('--segundos', type=float, default=10.0, help="duración de la prueba")
+    parser.add_argument('--json', action='store_true', help="imprimir el resumen como JSON")
+    args = parser.parse_args()
+
+    resumen = asyncio.run(generar_carga(args.host, args.puerto, args.unix,
+                                        args.conexiones, args.segundos))
+    if args.json:
+        print(json.dumps(resumen, indent=2))
+        return
+
+    print(f"Conexiones: {resumen['conexiones']}   Peticiones: {resumen['peticiones']}   "
+          f"Errores: {resumen['errores']}")
+    print(f"Rendimiento: {resumen['peticiones_por_s']:,.0f} peticiones/s")
+    if resumen['peticiones']:
+        print(f"Latencia p50: {resumen['p50_ms']:.2f} ms   p90: {resumen['p90_ms']:.2f} ms   "
+              f"p99: {resumen['p99_ms']:.2f} ms   máx: {resumen['max_ms']:.2f} ms")
+    servidor = resumen['servidor']
+    print(f"Servidor: {servidor['lotes']} lotes, {servidor['filas_por_lote']:.1f} filas por lote "
+          f"(máx. {servidor['mayor_lote']})")
+
+
+if __name__ == "__main__":
+    main()
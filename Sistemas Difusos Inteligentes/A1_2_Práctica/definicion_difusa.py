@@ -0,0 +1,429 @@
+"""
+A1.2 Práctica - Definición Declarativa de Sistemas Difusos
+Carga, compilación y caché de sistemas descritos en JSON
+
+Descripción:
+Un sistema difuso se describe una sola vez en un archivo JSON (ver
+definiciones/satisfaccion.json):
+
+    {
+      "nombre": "...",
+      "entradas": {"<variable>": {"universo": {"inicio": 0, "fin": 10, "paso": 1},
+                                  "conjuntos": {"<término>": {"tipo": "trimf",
+                                                              "params": [0, 0, 5]}}}},
+      "salidas":  {"<variable>": {... igual que las entradas ...,
+                                  "defuzzificacion": "centroid"}},
+      "reglas":   [{"nombre": "regla1",
+                    "si": {"<entrada>": "<término>", "<entrada>": {"no": "<término>"},
+                           "<entrada>": ["<término>", {"no": "<término>"}]},
+                    "conector": "and",
+                    "entonces": {"<salida>": "<término>"},
+                    "peso": 1.0}]
+    }
+
+"conector" ("and" u "or"), "peso", "nombre" y "defuzzificacion" son opcionales.
+Una lista de términos en "si" es un OR dentro de esa variable: con el conector
+"and", {"calidad": "buena", "tiempo_espera": ["medio", "largo"]} es
+buena & (medio | largo), la forma de las reglas fusionadas por
+minimizacion_reglas.
+Los tipos de conjunto son funciones de membresía de skfuzzy (trimf y trapmf
+reciben la lista de parámetros; gaussmf, gbellmf, sigmf, etc. los reciben
+como argumentos sueltos).
+
+compilar() convierte la definición en un SistemaCompilado: tablas de membresía
+precalculadas (términos x universo) y la matriz de reglas del motor
+vectorizado. cargar_compilado() guarda ese resultado en disco (.npz) con el
+hash SHA-256 del archivo como clave, de modo que un arranque en caliente no
+construye nada: ni skfuzzy, ni Antecedent/Consequent/Rule/ControlSystem.
+
+Uso:
+    compilado = cargar_compilado('definiciones/satisfaccion.json')
+    motor = compilado.motor()
+    z = motor.evaluar(puntos)
+
+    sistema_control, variables = construir_control_system(compilado.definicion)
+"""
+
+import functools
+import hashlib
+import json
+import operator
+import os
+
+import numpy as np
+
+from motor_vectorizado import MotorMamdani, _aplanar_antecedente, matriz_reglas
+
+# Cambia si cambia el contenido del .npz (invalida la caché)
+VERSION_FORMATO = b'definicion-difusa-2'
+
+# Funciones de membresía que reciben los parámetros como lista
+_PARAMETROS_EN_LISTA = ('trimf', 'trapmf')
+
+DIRECTORIO_DEFINICIONES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                       'definiciones')
+
+
+# ---------------------------------------------------------
+# Lectura y validación
+# ---------------------------------------------------------
+def cargar_definicion(ruta):
+    with open(ruta, encoding='utf-8') as archivo:
+        definicion = json.load(archivo)
+    validar_definicion(definicion)
+    return definicion
+
+
+def guardar_definicion(ruta, definicion):
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(definicion, archivo, ensure_ascii=False, indent=2)
+
+
+def validar_definicion(definicion):
+    for seccion in ('entradas', 'salidas'):
+        if not definicion.get(seccion):
+            raise ValueError("La definición debe tener al menos una variable en '{}'"
+                             .format(seccion))
+        for nombre, variable in definicion[seccion].items():
+            universo_variable(variable)
+            if not variable.get('conjuntos'):
+                raise ValueError("La variable '{}' no tiene conjuntos".format(nombre))
+            for termino, conjunto in variable['conjuntos'].items():
+                if 'tipo' not in conjunto or 'params' not in conjunto:
+                    raise ValueError("El conjunto '{}' de '{}' necesita 'tipo' y 'params'"
+                                     .format(termino, nombre))
+
+    for r, regla in enumerate(definicion.get('reglas', [])):
+        nombre = regla.get('nombre', 'regla{}'.format(r + 1))
+        if regla.get('conector', 'and') not in ('and', 'or'):
+            raise ValueError("{}: el conector debe ser 'and' u 'or'".format(nombre))
+        if not regla.get('si') or not regla.get('entonces'):
+            raise ValueError("{}: la regla necesita 'si' y 'entonces'".format(nombre))
+        for seccion, parte in (('entradas', regla['si']), ('salidas', regla['entonces'])):
+            for variable, terminos in parte.items():
+                if seccion == 'entradas' and isinstance(terminos, list):
+                    if not terminos:
+                        raise ValueError("{}: la lista de términos de '{}' está vacía"
+                                         .format(nombre, variable))
+                else:
+                    terminos = [terminos]
+                conjuntos = definicion[seccion].get(variable, {}).get('conjuntos', {})
+                for termino in terminos:
+                    if isinstance(termino, dict):
+                        termino = termino.get('no')
+                    if termino not in conjuntos:
+                        raise ValueError("{}: '{}' no es un término de '{}'"
+                                         .format(nombre, termino, variable))
+
+
+# ---------------------------------------------------------
+# Universo discreto inicio..fin (incluido) con el paso dado
+# ---------------------------------------------------------
+def universo_variable(variable):
+    universo = variable.get('universo', {})
+    try:
+        inicio, fin, paso = universo['inicio'], universo['fin'], universo['paso']
+    except KeyError:
+        raise ValueError("El universo necesita 'inicio', 'fin' y 'paso': {}".format(universo))
+    if paso <= 0 or fin <= inicio:
+        raise ValueError("Universo vacío: {}".format(universo))
+    return np.linspace(inicio, fin, int(round((fin - inicio) / paso)) + 1)
+
+
+def membresia(universo, conjunto):
+    import skfuzzy as fuzz
+
+    funcion = getattr(fuzz, conjunto['tipo'], None)
+    if funcion is None:
+        raise ValueError("Función de membresía desconocida: {}".format(conjunto['tipo']))
+    if conjunto['tipo'] in _PARAMETROS_EN_LISTA:
+        return np.asarray(funcion(universo, list(conjunto['params'])), dtype=float)
+    return np.asarray(funcion(universo, *conjunto['params']), dtype=float)
+
+
+def _literal(variable, termino):
+    if isinstance(termino, dict):
+        return (variable, termino['no'], True)
+    return (variable, termino, False)
+
+
+# ---------------------------------------------------------
+# Hojas del antecedente (formato de matriz_reglas): un
+# literal por variable o, si la variable trae una lista,
+# la lista de literales del grupo OR
+# ---------------------------------------------------------
+def _hojas(regla):
+    hojas = []
+    for variable, terminos in regla['si'].items():
+        if not isinstance(terminos, list):
+            hojas.append(_literal(variable, terminos))
+        elif len(terminos) == 1:
+            hojas.append(_literal(variable, terminos[0]))
+        elif regla.get('conector', 'and') == 'or':
+            # Con el conector OR el grupo se une al resto de hojas
+            hojas.extend(_literal(variable, termino) for termino in terminos)
+        else:
+            hojas.append([_literal(variable, termino) for termino in terminos])
+    return hojas
+
+
+class SistemaCompilado(object):
+    """
+    Forma compilada de una definición: universos y tablas de membresía de
+    cada variable y la matriz de reglas (mismo formato que MotorMamdani).
+    Las reglas se guardan sobre los términos de todas las salidas
+    concatenados; tablas(salida) selecciona los de una sola.
+    """
+
+    def __init__(self, definicion, universos, membresias, indices_reglas, reglas_or,
+                 pesos_consecuentes, grupos_or):
+        self.definicion = definicion
+        self.nombre = definicion.get('nombre', '')
+        self.entradas = list(definicion['entradas'])
+        self.salidas = list(definicion['salidas'])
+        self.universos = universos
+        self.membresias = membresias
+        self.terminos = {}
+        for seccion in ('entradas', 'salidas'):
+            for nombre, variable in definicion[seccion].items():
+                self.terminos[nombre] = list(variable['conjuntos'])
+
+        reglas = definicion.get('reglas', [])
+        self.nombres_reglas = [regla.get('nombre', 'regla{}'.format(r + 1))
+                               for r, regla in enumerate(reglas)]
+        self.indices_reglas = indices_reglas
+        self.reglas_or = reglas_or
+        self.pesos_consecuentes = pesos_consecuentes
+        self.grupos_or = grupos_or
+
+    # -----------------------------------------------------
+    # Tablas de MotorMamdani para una variable de salida
+    # (por defecto la primera). Solo entran las reglas que
+    # tienen algún consecuente sobre esa salida.
+    # -----------------------------------------------------
+    def tablas(self, salida=None):
+        salida = salida or self.salidas[0]
+        if not self.nombres_reglas:
+            raise ValueError("La definición '{}' no tiene reglas".format(self.nombre))
+
+        inicio = sum(len(self.terminos[s]) for s in self.salidas[:self.salidas.index(salida)])
+        fin = inicio + len(self.terminos[salida])
+        pesos = self.pesos_consecuentes[:, inicio:fin]
+        filas = np.flatnonzero(pesos.max(axis=1) > 0)
+        if filas.size == 0:
+            raise ValueError("Ninguna regla tiene consecuentes sobre '{}'".format(salida))
+
+        return {
+            'entradas': self.entradas,
+            'universos': [self.universos[n] for n in self.entradas],
+            'terminos': [self.terminos[n] for n in self.entradas],
+            'membresias': [self.membresias[n] for n in self.entradas],
+            'salida': salida,
+            'terminos_salida': self.terminos[salida],
+            'universo_salida': self.universos[salida],
+            'membresia_salida': self.membresias[salida],
+            'metodo': self.definicion['salidas'][salida].get('defuzzificacion', 'centroid'),
+            'nombres_reglas': [self.nombres_reglas[r] for r in filas],
+            'indices_reglas': self.indices_reglas[filas],
+            'reglas_or': self.reglas_or[filas],
+            'pesos_consecuentes': pesos[filas],
+            'grupos_or': self.grupos_or,
+        }
+
+    def motor(self, salida=None, **opciones):
+        return MotorMamdani.desde_tablas(self.tablas(salida), **opciones)
+
+    # -----------------------------------------------------
+    # Persistencia en .npz (sin pickle). La escritura es
+    # atómica: se escribe en un temporal y se renombra.
+    # -----------------------------------------------------
+    def guardar(self, ruta):
+        arreglos = {
+            'definicion': np.array(json.dumps(self.definicion, ensure_ascii=False)),
+            'indices_reglas': self.indices_reglas,
+            'reglas_or': self.reglas_or,
+            'pesos_consecuentes': self.pesos_consecuentes,
+            'grupos_or': self.grupos_or,
+        }
+        for i, nombre in enumerate(self.entradas + self.salidas):
+            arreglos['universo_{}'.format(i)] = self.universos[nombre]
+            arreglos['membresia_{}'.format(i)] = self.membresias[nombre]
+
+        temporal = '{}.{}.tmp'.format(ruta, os.getpid())
+        with open(temporal, 'wb') as archivo:
+            np.savez(archivo, **arreglos)
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, ruta):
+        with np.load(ruta, allow_pickle=False) as datos:
+            definicion = json.loads(str(datos['definicion']))
+            nombres = list(definicion['entradas']) + list(definicion['salidas'])
+            universos = {n: datos['universo_{}'.format(i)] for i, n in enumerate(nombres)}
+            membresias = {n: datos['membresia_{}'.format(i)] for i, n in enumerate(nombres)}
+            return cls(definicion, universos, membresias, datos['indices_reglas'],
+                       datos['reglas_or'], datos['pesos_consecuentes'], datos['grupos_or'])
+
+
+# ---------------------------------------------------------
+# Definición (dict) -> SistemaCompilado
+# ---------------------------------------------------------
+def compilar(definicion):
+    validar_definicion(definicion)
+
+    universos = {}
+    membresias = {}
+    for seccion in ('entradas', 'salidas'):
+        for nombre, variable in definicion[seccion].items():
+            universo = universo_variable(variable)
+            universos[nombre] = universo
+            membresias[nombre] = np.array([membresia(universo, conjunto)
+                                           for conjunto in variable['conjuntos'].values()])
+
+    # Columnas de grados de las entradas y términos de salida concatenados
+    columnas = {}
+    for nombre, variable in definicion['entradas'].items():
+        for termino in variable['conjuntos']:
+            columnas[(nombre, termino)] = len(columnas)
+    terminos_salida = [(nombre, termino) for nombre, variable in definicion['salidas'].items()
+                       for termino in variable['conjuntos']]
+
+    reglas = definicion.get('reglas', [])
+    if reglas:
+        antecedentes = [(regla.get('conector', 'and'), _hojas(regla)) for regla in reglas]
+        consecuentes = [[((variable, termino), regla.get('peso', 1.0))
+                         for variable, termino in regla['entonces'].items()]
+                        for regla in reglas]
+        indices, reglas_or, pesos, grupos_or = matriz_reglas(antecedentes, consecuentes,
+                                                             columnas, terminos_salida)
+    else:
+        indices = np.empty((0, 0), dtype=np.intp)
+        reglas_or = np.zeros(0, dtype=bool)
+        pesos = np.zeros((0, len(terminos_salida)))
+        grupos_or = np.empty((0, 1), dtype=np.intp)
+
+    return SistemaCompilado(definicion, universos, membresias, indices, reglas_or, pesos,
+                            grupos_or)
+
+
+# ---------------------------------------------------------
+# Carga un archivo de definición usando la caché en disco.
+# La clave es el SHA-256 del contenido del archivo (y de la
+# versión del formato): si el archivo cambia, se recompila.
+# Por defecto la caché vive en <carpeta del archivo>/.cache.
+# ---------------------------------------------------------
+def cargar_compilado(ruta, directorio_cache=None):
+    with open(ruta, 'rb') as archivo:
+        contenido = archivo.read()
+    clave = hashlib.sha256(VERSION_FORMATO + contenido).hexdigest()
+
+    if directorio_cache is None:
+        directorio_cache = os.path.join(os.path.dirname(os.path.abspath(ruta)), '.cache')
+    ruta_cache = os.path.join(directorio_cache, clave + '.npz')
+
+    if os.path.exists(ruta_cache):
+        return SistemaCompilado.cargar(ruta_cache)
+
+    compilado = compilar(json.loads(contenido.decode('utf-8')))
+    os.makedirs(directorio_cache, exist_ok=True)
+    compilado.guardar(ruta_cache)
+    return compilado
+
+
+# ---------------------------------------------------------
+# Construye el ctrl.ControlSystem equivalente (para usar
+# ControlSystemSimulation o las gráficas de skfuzzy).
+# Devuelve (sistema_control, {nombre: Antecedent/Consequent}).
+# ---------------------------------------------------------
+def construir_control_system(definicion):
+    from skfuzzy import control as ctrl
+
+    validar_definicion(definicion)
+
+    variables = {}
+    for seccion, clase in (('entradas', ctrl.Antecedent), ('salidas', ctrl.Consequent)):
+        for nombre, especificacion in definicion[seccion].items():
+            variable = clase(universo_variable(especificacion), nombre)
+            for termino, conjunto in especificacion['conjuntos'].items():
+                variable[termino] = membresia(variable.universe, conjunto)
+            if seccion == 'salidas':
+                variable.defuzzify_method = especificacion.get('defuzzificacion', 'centroid')
+            variables[nombre] = variable
+
+    def literal(variable, termino, negado):
+        hoja = variables[variable][termino]
+        return ~hoja if negado else hoja
+
+    reglas = []
+    for r, regla in enumerate(definicion.get('reglas', [])):
+        antecedente = None
+        for hojas in _hojas(regla):
+            if isinstance(hojas, list):
+                hoja = functools.reduce(operator.or_, [literal(*h) for h in hojas])
+            else:
+                hoja = literal(*hojas)
+            if antecedente is None:
+                antecedente = hoja
+            elif regla.get('conector', 'and') == 'or':
+                antecedente = antecedente | hoja
+            else:
+                antecedente = antecedente & hoja
+
+        peso = regla.get('peso', 1.0)
+        consecuente = [variables[variable][termino] if peso == 1.0
+                       else variables[variable][termino] % peso
+                       for variable, termino in regla['entonces'].items()]
+        reglas.append(ctrl.Rule(antecedente, consecuente,
+                                label=regla.get('nombre', 'regla{}'.format(r + 1))))
+
+    return ctrl.ControlSystem(reglas), variables
+
+
+# ---------------------------------------------------------
+# ctrl.Rule -> regla de la definición JSON (inverso de
+# construir_control_system). Admite la forma de
+# _aplanar_antecedente: un solo conector o un AND de grupos
+# OR de una misma variable, y un mismo peso en todos los
+# consecuentes.
+# ---------------------------------------------------------
+def regla_a_json(regla):
+    conector, hojas = _aplanar_antecedente(regla.antecedent)
+    si = {}
+    for hoja in hojas:
+        literales = hoja if isinstance(hoja, list) else [hoja]
+        variable = literales[0][0]
+        if variable in si and conector == 'and':
+            raise ValueError("{}: '{}' aparece en dos hojas del AND".format(regla.label, variable))
+        si.setdefault(variable, []).extend({'no': termino} if negado else termino
+                                           for _, termino, negado in literales)
+
+    pesos = set(float(c.weight) for c in regla.consequent)
+    if len(pesos) != 1:
+        raise ValueError("{}: los consecuentes tienen pesos distintos".format(regla.label))
+
+    resultado = {
+        'nombre': str(regla.label),
+        'si': {variable: terminos[0] if len(terminos) == 1 else terminos
+               for variable, terminos in si.items()},
+        'entonces': {c.term.parent.label: c.term.label for c in regla.consequent},
+    }
+    if conector == 'or':
+        resultado['conector'] = 'or'
+    peso = pesos.pop()
+    if peso != 1.0:
+        resultado['peso'] = peso
+    return resultado
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    rutas = sys.argv[1:] or [os.path.join(DIRECTORIO_DEFINICIONES, 'satisfaccion.json')]
+    for ruta in rutas:
+        for intento in ('primera carga', 'segunda carga'):
+            inicio = time.perf_counter()
+            compilado = cargar_compilado(ruta)
+            segundos = time.perf_counter() - inicio
+            print(f"{compilado.nombre} ({intento}): {segundos * 1000:.2f} ms, "
+                  f"{len(compilado.entradas)} entradas, {len(compilado.nombres_reglas)} reglas")
@@ -0,0 +1,230 @@
+"""
+A1.2 Práctica - Defuzzificación Analítica
+Centroide, bisector y media de máximos sin universo discreto
+
+Descripción:
+Si todos los conjuntos de salida son triangulares o trapezoidales (fuzz.trimf /
+fuzz.trapmf), el conjunto agregado max_c(min(corte_c, μ_c(x))) es lineal a
+trozos. Sus puntos de quiebre se conocen de forma cerrada:
+- los vértices a, b, c, d de cada conjunto,
+- los cruces de cada flanco con cada nivel de corte,
+- los cruces entre flancos de conjuntos distintos,
+así que entre dos puntos consecutivos la función es una recta y las integrales
+se calculan exactamente. El costo depende solo del número de conjuntos de
+salida, no de la resolución de np.arange(0, 101, 1).
+
+Los parámetros se expresan siempre como trapecio [a, b, c, d]; un triángulo
+[a, b, c] equivale a [a, b, b, c].
+"""
+
+import numpy as np
+
+
+# ---------------------------------------------------------
+# Normaliza [a, b, c] o [a, b, c, d] a una matriz C x 4
+# ---------------------------------------------------------
+def como_trapecios(formas):
+    filas = []
+    for forma in formas:
+        forma = [float(v) for v in forma]
+        if len(forma) == 3:
+            forma = [forma[0], forma[1], forma[1], forma[2]]
+        if len(forma) != 4 or not forma[0] <= forma[1] <= forma[2] <= forma[3]:
+            raise ValueError("Forma no válida (se espera a <= b <= c <= d): {}".format(forma))
+        filas.append(forma)
+    return np.array(filas)
+
+
+# ---------------------------------------------------------
+# Recupera [a, b, c, d] de una función de membresía muestreada
+# (por ejemplo term.mf de skfuzzy). Devuelve None si la curva no
+# es exactamente un triángulo o trapecio sobre ese universo.
+# ---------------------------------------------------------
+def forma_trapezoidal(universo, mf):
+    x = np.asarray(universo, dtype=float)
+    mf = np.asarray(mf, dtype=float)
+
+    meseta = np.flatnonzero(np.isclose(mf, 1.0))
+    if meseta.size == 0:
+        return None
+    ib, ic = meseta[0], meseta[-1]
+    b, c = x[ib], x[ic]
+
+    # Flanco de subida: se extrapola la recta de los dos puntos previos a b
+    if ib == 0 or mf[ib - 1] <= 0.0:
+        a = x[ib - 1] if ib > 0 and mf[ib - 1] <= 0.0 else b
+    else:
+        a = b - (x[ib] - x[ib - 1]) / (mf[ib] - mf[ib - 1])
+
+    # Flanco de bajada: igual, con los dos puntos posteriores a c
+    if ic == x.size - 1 or mf[ic + 1] <= 0.0:
+        d = x[ic + 1] if ic < x.size - 1 and mf[ic + 1] <= 0.0 else c
+    else:
+        d = c + (x[ic + 1] - x[ic]) / (mf[ic] - mf[ic + 1])
+
+    forma = np.array([a, b, c, d])
+    if not np.allclose(evaluar_trapecios(x, forma[None, :])[0], mf, atol=1e-9):
+        return None
+    return forma
+
+
+# ---------------------------------------------------------
+# μ de C trapecios sobre puntos x de cualquier forma:
+# devuelve un arreglo de forma (C,) + x.shape
+# Los hombros degenerados (a == b o c == d) valen 1 en el borde.
+# ---------------------------------------------------------
+def evaluar_trapecios(x, trapecios):
+    x = np.asarray(x, dtype=float)
+    mu = np.empty((trapecios.shape[0],) + x.shape)
+    bajada = np.empty(x.shape)
+    for i, (a, b, c, d) in enumerate(trapecios):
+        subida = mu[i]
+        if b > a:
+            np.subtract(x, a, out=subida)
+            np.divide(subida, b - a, out=subida)
+        else:
+            np.greater_equal(x, a, out=subida, casting='unsafe')
+        if d > c:
+            np.subtract(d, x, out=bajada)
+            np.divide(bajada, d - c, out=bajada)
+        else:
+            np.less_equal(x, d, out=bajada, casting='unsafe')
+        np.minimum(subida, bajada, out=subida)
+        np.clip(subida, 0.0, 1.0, out=subida)
+    return mu
+
+
+# ---------------------------------------------------------
+# Puntos de quiebre ordenados (N x K) del conjunto agregado y su
+# valor en cada punto. Entre dos puntos consecutivos la función
+# es lineal, por lo que las integrales por trapecios son exactas.
+# ---------------------------------------------------------
+def puntos_quiebre(trapecios, cortes, limites=None):
+    cortes = np.atleast_2d(np.asarray(cortes, dtype=float))
+    a, b, c, d = (trapecios[:, i] for i in range(4))
+    if limites is None:
+        limites = (a.min(), d.max())
+
+    # Flancos no degenerados como rectas y = m x + q
+    subida = b > a
+    bajada = d > c
+    pendientes = np.concatenate([1.0 / (b[subida] - a[subida]),
+                                 -1.0 / (d[bajada] - c[bajada])])
+    ordenadas = np.concatenate([-a[subida] / (b[subida] - a[subida]),
+                                d[bajada] / (d[bajada] - c[bajada])])
+
+    # Puntos fijos: vértices, límites y cruces entre flancos
+    fijos = [trapecios.ravel(), np.asarray(limites, dtype=float)]
+    dm = pendientes[:, None] - pendientes[None, :]
+    dq = ordenadas[None, :] - ordenadas[:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cruces = dq / dm
+    fijos.append(cruces[np.isfinite(cruces)])
+    fijos = np.concatenate(fijos)
+    fijos = np.unique(fijos[(fijos >= limites[0]) & (fijos <= limites[1])])
+
+    # Puntos por fila: cruce de cada flanco con cada nivel de corte
+    por_fila = (cortes[:, :, None] - ordenadas[None, None, :]) / pendientes[None, None, :]
+    por_fila = por_fila.reshape(cortes.shape[0], -1)
+
+    xs = np.concatenate([np.broadcast_to(fijos, (cortes.shape[0], fijos.size)), por_fila],
+                        axis=1)
+    np.clip(xs, limites[0], limites[1], out=xs)
+    xs.sort(axis=1)
+
+    # Valor del conjunto agregado en cada punto: N x K
+    mu = evaluar_trapecios(xs, trapecios)            # C x N x K
+    ys = np.minimum(mu, cortes.T[:, :, None]).max(axis=0)
+    return xs, ys
+
+
+# ---------------------------------------------------------
+# Área y momento exactos por segmento
+# ---------------------------------------------------------
+def _segmentos(xs, ys):
+    x1, x2 = xs[:, :-1], xs[:, 1:]
+    y1, y2 = ys[:, :-1], ys[:, 1:]
+    dx = x2 - x1
+    area = dx * (y1 + y2) / 2.0
+    momento = dx * (x1 * (2.0 * y1 + y2) + x2 * (y1 + 2.0 * y2)) / 6.0
+    return area, momento
+
+
+# ---------------------------------------------------------
+# Centroide exacto. trapecios: C x 4; cortes: N x C.
+# Las filas sin área devuelven NaN.
+# ---------------------------------------------------------
+def centroide(trapecios, cortes, limites=None):
+    xs, ys = puntos_quiebre(trapecios, cortes, limites)
+    area, momento = _segmentos(xs, ys)
+    area = area.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(area > 0, momento.sum(axis=1) / area, np.nan)
+
+
+# ---------------------------------------------------------
+# Bisector exacto: punto que divide el área en dos mitades.
+# Dentro del segmento que contiene la mitad se resuelve la
+# ecuación cuadrática del área de un trapecio parcial.
+# ---------------------------------------------------------
+def bisector(trapecios, cortes, limites=None):
+    xs, ys = puntos_quiebre(trapecios, cortes, limites)
+    area, _ = _segmentos(xs, ys)
+    acumulada = np.cumsum(area, axis=1)
+    total = acumulada[:, -1]
+    mitad = total / 2.0
+
+    filas = np.arange(xs.shape[0])
+    j = np.argmax(acumulada >= mitad[:, None], axis=1)
+    previa = np.where(j > 0, acumulada[filas, j - 1], 0.0)
+    resto = mitad - previa
+
+    x1, x2 = xs[filas, j], xs[filas, j + 1]
+    y1, y2 = ys[filas, j], ys[filas, j + 1]
+    dx = x2 - x1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pendiente = (y2 - y1) / dx
+        lineal = np.where(y1 > 0, resto / y1, 0.0)
+        # El discriminante vale 0 en teoría cuando la mitad cae justo donde
+        # un flanco llega a 0 (cortes [1, 0, 1]); el redondeo puede dejarlo
+        # apenas negativo
+        discriminante = np.maximum(y1 * y1 + 2.0 * pendiente * resto, 0.0)
+        cuadratica = (np.sqrt(discriminante) - y1) / pendiente
+        t = np.where(np.abs(pendiente) > 1e-12, cuadratica, lineal)
+        t = np.where(dx > 0, np.clip(t, 0.0, dx), 0.0)
+    return np.where(total > 0, x1 + t, np.nan)
+
+
+# ---------------------------------------------------------
+# Media de máximos (MOM): promedio del conjunto de puntos donde
+# el agregado alcanza su máximo. Si hay mesetas se pondera por su
+# longitud; si solo hay picos aislados se promedian los picos.
+# ---------------------------------------------------------
+def media_maximos(trapecios, cortes, limites=None):
+    xs, ys = puntos_quiebre(trapecios, cortes, limites)
+    maximo = ys.max(axis=1, keepdims=True)
+    en_maximo = np.isclose(ys, maximo) & (maximo > 0)
+
+    # Mesetas en el máximo
+    meseta = en_maximo[:, :-1] & en_maximo[:, 1:]
+    dx = np.diff(xs, axis=1) * meseta
+    largo = dx.sum(axis=1)
+    centro = (dx * (xs[:, :-1] + xs[:, 1:]) / 2.0).sum(axis=1)
+
+    # Picos aislados (sin contar puntos repetidos)
+    distinto = np.ones_like(en_maximo)
+    distinto[:, 1:] = np.diff(xs, axis=1) > 0
+    picos = en_maximo & distinto
+    n_picos = picos.sum(axis=1)
+    suma_picos = (xs * picos).sum(axis=1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        resultado = np.where(largo > 0, centro / largo, suma_picos / n_picos)
+    return np.where(maximo[:, 0] > 0, resultado, np.nan)
+
+
+METODOS = {
+    'centroid': centroide,
+    'bisector': bisector,
+    'mom': media_maximos,
+}
@@ -0,0 +1,158 @@
+"""
+A1.2 Práctica - Gráficas Diferidas
+Reporte de figuras sin ventanas que no bloquea el cálculo
+
+Descripción:
+Los scripts llamaban a plt.show() después de cada figura y forzaban un backend
+interactivo al importarse, lo que impide usarlos en nodos sin pantalla y deja
+el cálculo esperando a que se cierre cada ventana. ReporteDiferido separa las
+dos cosas:
+- Modo sin ventanas (por defecto): cada figura se dibuja fuera de pantalla con
+  el backend Agg y se guarda como imagen en un hilo de fondo, mientras el
+  programa sigue calculando.
+- Modo interactivo: se comporta como antes (backend de ventanas, la figura se
+  guarda y se muestra con plt.show()). backend=None usa el backend por
+  defecto de matplotlib en lugar de forzar uno.
+matplotlib solo se importa cuando se pide la primera figura, así que una
+ejecución que solo puntúa no paga su costo de arranque.
+
+Las funciones de dibujo reciben una figura ya creada (fig) y los datos ya
+calculados; no deben depender de objetos que el programa siga modificando.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+class ReporteDiferido(object):
+
+    def __init__(self, directorio='.', dpi=200, interactivo=False, backend='TkAgg'):
+        self.directorio = directorio
+        self.dpi = dpi
+        self.interactivo = interactivo
+        self.backend = backend
+        self._hilo = None
+        self._pendientes = []
+        self._mostradas = []
+
+    # -----------------------------------------------------
+    # Registra una figura: dibujar(fig) la construye y se
+    # guarda en <directorio>/<archivo>
+    # -----------------------------------------------------
+    def agregar(self, archivo, dibujar, tamano=(10, 7)):
+        ruta = os.path.join(self.directorio, archivo)
+        if self.interactivo:
+            self._mostrar(ruta, dibujar, tamano)
+            return
+        if self._hilo is None:
+            self._hilo = ThreadPoolExecutor(max_workers=1)
+        self._pendientes.append(self._hilo.submit(self._renderizar, ruta, dibujar, tamano))
+
+    # -----------------------------------------------------
+    # Espera a que se escriban todas las imágenes pendientes y
+    # devuelve las rutas guardadas desde la llamada anterior,
+    # también las del modo interactivo (propaga cualquier
+    # error de dibujo)
+    # -----------------------------------------------------
+    def esperar(self):
+        rutas = self._mostradas + [pendiente.result() for pendiente in self._pendientes]
+        self._mostradas = []
+        self._pendientes = []
+        if self._hilo is not None:
+            self._hilo.shutdown()
+            self._hilo = None
+        return rutas
+
+    def _renderizar(self, ruta, dibujar, tamano):
+        # Se usa la API orientada a objetos (sin pyplot ni backend global)
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=tamano)
+        FigureCanvasAgg(fig)
+        dibujar(fig)
+        fig.savefig(ruta, dpi=self.dpi, bbox_inches='tight')
+        return ruta
+
+    def _mostrar(self, ruta, dibujar, tamano):
+        import matplotlib
+        if self.backend:
+            matplotlib.use(self.backend)
+        import matplotlib.pyplot as plt
+
+        fig = plt.figure(figsize=tamano)
+        dibujar(fig)
+        fig.savefig(ruta, dpi=self.dpi, bbox_inches='tight')
+        self._mostradas.append(ruta)
+        plt.show()
+
+
+# ---------------------------------------------------------
+# Funciones de membresía de una variable de skfuzzy en un eje
+# (equivalente a variable.view(), pero sobre el eje indicado)
+# ---------------------------------------------------------
+def dibujar_variable(ax, variable, titulo=None):
+    for etiqueta, termino in variable.terms.items():
+        ax.plot(variable.universe, termino.mf, linewidth=1.5, label=etiqueta)
+    ax.set_xlim(variable.universe.min(), variable.universe.max())
+    ax.set_ylim(0, 1.01)
+    ax.set_xlabel(variable.label)
+    ax.set_ylabel('Membership')
+    ax.legend(loc='upper right')
+    ax.grid(True, alpha=0.3)
+    if titulo:
+        ax.set_title(titulo, fontsize=12, fontweight='bold')
+
+
+# ---------------------------------------------------------
+# Varias variables, una debajo de otra
+# ---------------------------------------------------------
+def dibujar_variables(fig, variables, titulos=None):
+    titulos = titulos or [None] * len(variables)
+    ejes = fig.subplots(len(variables), 1)
+    for ax, variable, titulo in zip(np.atleast_1d(ejes), variables, titulos):
+        dibujar_variable(ax, variable, titulo)
+    fig.tight_layout()
+
+
+# ---------------------------------------------------------
+# Resultado difuso de una entrada (equivalente a
+# satisfaccion.view(sim=sistema)) a partir del motor vectorizado
+# ---------------------------------------------------------
+def dibujar_resultado(fig, motor, entrada, titulo=None):
+    matriz = np.asarray(entrada, dtype=float).reshape(1, -1)
+    cortes = motor.cortes(motor.activaciones(motor.fuzzificar(matriz)))
+    agregada = motor.agregar(cortes)
+    valor = motor.defuzzificar(agregada)[0]
+
+    ax = fig.add_subplot(111)
+    universo = motor.universo_salida
+    for etiqueta, mf in zip(motor.terminos_salida, motor.membresia_salida):
+        ax.plot(universo, mf, linewidth=1, label=etiqueta)
+    ax.fill_between(universo, 0, agregada[0], alpha=0.4)
+    ax.plot([valor, valor], [0, max(np.interp(valor, universo, agregada[0]), 0.1)],
+            color='k', lw=3, label='crisp value')
+    ax.set_ylim(0, 1.01)
+    ax.set_xlabel(motor.salida)
+    ax.set_ylabel('Membership')
+    ax.legend(framealpha=0.5)
+    if titulo:
+        ax.set_title(titulo)
+
+
+# ---------------------------------------------------------
+# Superficie de control 3D (mismo plot_surface de los scripts)
+# ---------------------------------------------------------
+def dibujar_superficie(fig, x, y, z, titulo, etiquetas, barra_color=False, **estilo):
+    import mpl_toolkits.mplot3d  # noqa: F401  (registra la proyección '3d')
+
+    ax = fig.add_subplot(111, projection='3d')
+    surf = ax.plot_surface(x, y, z, cmap='viridis', antialiased=True, **estilo)
+    ax.set_xlabel(etiquetas[0], fontsize=11, fontweight='bold')
+    ax.set_ylabel(etiquetas[1], fontsize=11, fontweight='bold')
+    ax.set_zlabel(etiquetas[2], fontsize=11, fontweight='bold')
+    ax.set_title(titulo, fontsize=13, fontweight='bold')
+    if barra_color:
+        fig.colorbar(surf, ax=ax, shrink=0.5, aspect=5, label=etiquetas[2])
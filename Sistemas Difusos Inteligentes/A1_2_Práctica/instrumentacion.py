@@ -0,0 +1,320 @@
+"""
+A1.2 Práctica - Instrumentación del Pipeline de Inferencia
+Tiempos por etapa, contadores y memoria, exportables como métricas y trazas
+
+Descripción:
+Cuando sistema.compute() es lento no se ve qué etapa domina. Perfilador
+envuelve, solo mientras está activo, las funciones de cada etapa:
+
+- skfuzzy (instrumentar_skfuzzy): compute > fuzzificacion, orden_reglas,
+  evaluacion_reglas, defuzzificacion > agregacion, centroide, y reinicio >
+  orden_reglas. orden_reglas es el orden de cálculo de las reglas que
+  skfuzzy recalcula con networkx cada vez que recorre ctrl.rules; reinicio,
+  el vaciado del estado tras cada compute() con cache=False.
+- MotorMamdani (instrumentar_motor): evaluar > fuzzificar, activaciones,
+  cortes, agregar, defuzzificar
+- Funciones de membresía del robot (instrumentar_funciones sobre membresia.py
+  y main.py): evaluar_familia > evaluar_conjuntos, ...
+
+Por etapa se registran llamadas, tiempo total y propio (sin las etapas
+anidadas) y, con memoria=True, el pico de memoria reservado (tracemalloc).
+Además cuenta las reglas disparadas por punto evaluado. Sin activar no hay ningún coste: las
+funciones originales no se tocan; al salir del bloque 'with' se restauran.
+
+metricas() devuelve un dict (JSON) y pila_plegada() el formato "a;b;c valor"
+de flamegraph.pl y speedscope (valor: microsegundos de tiempo propio).
+
+Uso:
+    with Perfilador(memoria=True) as perfil:
+        instrumentar_skfuzzy(perfil)
+        for calidad, tiempo in entradas:
+            ...; sistema.compute()
+    perfil.guardar('perfil.json', 'perfil.folded')
+    print(perfil.resumen())
+"""
+
+import functools
+import json
+import threading
+import time
+import tracemalloc
+
+
+class Perfilador(object):
+
+    def __init__(self, memoria=False):
+        self.memoria = memoria
+        self._etapas = {}
+        self.contadores = {}
+        self._local = threading.local()
+        self._candado = threading.Lock()
+        self._parches = []
+        self._inicio_tracemalloc = False
+
+    # -----------------------------------------------------
+    # Activación: el bloque 'with' restaura todo al salir
+    # -----------------------------------------------------
+    def __enter__(self):
+        if self.memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._inicio_tracemalloc = True
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        self.restaurar()
+        if self._inicio_tracemalloc:
+            tracemalloc.stop()
+            self._inicio_tracemalloc = False
+
+    def restaurar(self):
+        for objeto, atributo, original, propio in reversed(self._parches):
+            if propio:
+                setattr(objeto, atributo, original)
+            else:
+                delattr(objeto, atributo)
+        self._parches = []
+
+    def _pila(self):
+        pila = getattr(self._local, 'pila', None)
+        if pila is None:
+            pila = self._local.pila = []
+        return pila
+
+    # -----------------------------------------------------
+    # Medición de una etapa (también usable a mano con 'with')
+    # -----------------------------------------------------
+    def etapa(self, nombre):
+        return _Etapa(self, nombre)
+
+    def _entrar(self, nombre):
+        pila = self._pila()
+        marco = {'nombre': nombre, 'hijos': 0.0}
+        if self.memoria:
+            actual, pico = tracemalloc.get_traced_memory()
+            marco['memoria'] = actual
+            marco['pico_previo'] = pico
+            marco['pico'] = actual
+            tracemalloc.reset_peak()
+        pila.append(marco)
+        marco['inicio'] = time.perf_counter()
+
+    def _salir(self):
+        fin = time.perf_counter()
+        pila = self._pila()
+        marco = pila.pop()
+        total = fin - marco['inicio']
+        ruta = tuple(m['nombre'] for m in pila) + (marco['nombre'],)
+
+        pico = 0
+        if self.memoria:
+            _, pico_actual = tracemalloc.get_traced_memory()
+            pico_absoluto = max(marco['pico'], pico_actual)
+            pico = pico_absoluto - marco['memoria']
+            if pila:
+                # El reset_peak de esta etapa borró el pico del padre
+                pila[-1]['pico'] = max(pila[-1]['pico'], marco['pico_previo'], pico_absoluto)
+
+        if pila:
+            pila[-1]['hijos'] += total
+
+        with self._candado:
+            datos = self._etapas.get(ruta)
+            if datos is None:
+                datos = self._etapas[ruta] = {'llamadas': 0, 'total': 0.0, 'propio': 0.0,
+                                              'pico_memoria': 0}
+            datos['llamadas'] += 1
+            datos['total'] += total
+            datos['propio'] += total - marco['hijos']
+            datos['pico_memoria'] = max(datos['pico_memoria'], pico)
+
+    def contar(self, nombre, cantidad=1):
+        with self._candado:
+            self.contadores[nombre] = self.contadores.get(nombre, 0) + cantidad
+
+    # -----------------------------------------------------
+    # Sustituye objeto.atributo por una versión medida como la
+    # etapa 'nombre'. despues(perfilador, resultado, args)
+    # se llama tras cada llamada (p. ej. para contar reglas).
+    # generador=True es para funciones que devuelven un
+    # iterador perezoso: se consume dentro de la etapa (si no,
+    # solo se mediría su creación) y se devuelve iter(lista).
+    # -----------------------------------------------------
+    def envolver(self, objeto, atributo, nombre=None, despues=None, generador=False):
+        nombre = nombre or atributo
+        # Atributo propio (se restaura) o heredado de la clase (se borra)
+        propio = atributo in vars(objeto)
+        original = vars(objeto)[atributo] if propio else None
+        funcion = getattr(objeto, atributo)
+        perfil = self
+
+        @functools.wraps(funcion)
+        def medida(*args, **kwargs):
+            perfil._entrar(nombre)
+            try:
+                resultado = funcion(*args, **kwargs)
+                if generador:
+                    resultado = iter(list(resultado))
+            finally:
+                perfil._salir()
+            if despues is not None:
+                despues(perfil, resultado, args)
+            return resultado
+
+        setattr(objeto, atributo, medida)
+        self._parches.append((objeto, atributo, original, propio))
+        return medida
+
+    # -----------------------------------------------------
+    # Exportación
+    # -----------------------------------------------------
+    def metricas(self):
+        with self._candado:
+            etapas = sorted(self._etapas.items())
+            contadores = dict(self.contadores)
+        raices = sum(d['llamadas'] for ruta, d in etapas if len(ruta) == 1)
+        # Puntos evaluados (un lote cuenta tantos como filas)
+        puntos = contadores.get('puntos', raices)
+        resultado = {'etapas': [], 'contadores': contadores, 'evaluaciones': raices,
+                     'puntos': puntos}
+        for ruta, datos in etapas:
+            resultado['etapas'].append({
+                'ruta': '/'.join(ruta),
+                'llamadas': datos['llamadas'],
+                'total_s': datos['total'],
+                'propio_s': datos['propio'],
+                'media_us': datos['total'] / datos['llamadas'] * 1e6,
+                'pico_memoria_bytes': datos['pico_memoria'] if self.memoria else None,
+            })
+        if puntos:
+            resultado['por_punto'] = {nombre: valor / puntos
+                                      for nombre, valor in contadores.items()
+                                      if nombre != 'puntos'}
+        return resultado
+
+    def pila_plegada(self):
+        with self._candado:
+            etapas = sorted(self._etapas.items())
+        return '\n'.join('{} {}'.format(';'.join(ruta), int(round(datos['propio'] * 1e6)))
+                         for ruta, datos in etapas) + '\n'
+
+    def guardar(self, ruta_metricas=None, ruta_pila=None):
+        if ruta_metricas:
+            with open(ruta_metricas, 'w', encoding='utf-8') as archivo:
+                json.dump(self.metricas(), archivo, ensure_ascii=False, indent=2)
+        if ruta_pila:
+            with open(ruta_pila, 'w', encoding='utf-8') as archivo:
+                archivo.write(self.pila_plegada())
+
+    def resumen(self):
+        metricas = self.metricas()
+        total_raiz = sum(e['total_s'] for e in metricas['etapas'] if '/' not in e['ruta']) or 1.0
+        lineas = ["{:<45} {:>9} {:>11} {:>11} {:>7} {:>10}".format(
+            'etapa', 'llamadas', 'total ms', 'propio ms', '%', 'pico KiB')]
+        for e in metricas['etapas']:
+            nivel = e['ruta'].count('/')
+            nombre = '  ' * nivel + e['ruta'].rsplit('/', 1)[-1]
+            pico = '' if e['pico_memoria_bytes'] is None else '{:.1f}'.format(
+                e['pico_memoria_bytes'] / 1024)
+            lineas.append("{:<45} {:>9} {:>11.2f} {:>11.2f} {:>6.1f}% {:>10}".format(
+                nombre, e['llamadas'], e['total_s'] * 1e3, e['propio_s'] * 1e3,
+                100.0 * e['propio_s'] / total_raiz, pico))
+        for nombre, valor in metricas.get('por_punto', {}).items():
+            lineas.append("{}: {:.2f} por punto".format(nombre, valor))
+        return '\n'.join(lineas)
+
+
+class _Etapa(object):
+
+    def __init__(self, perfil, nombre):
+        self.perfil = perfil
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.perfil._entrar(self.nombre)
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        self.perfil._salir()
+
+
+# ---------------------------------------------------------
+# Etapas de ControlSystemSimulation.compute() en skfuzzy
+# ---------------------------------------------------------
+def instrumentar_skfuzzy(perfil):
+    from skfuzzy.control import controlsystem
+
+    def contar_regla(perfil, resultado, args):
+        simulacion, regla = args
+        perfil.contar('reglas_evaluadas')
+        if regla.aggregate_firing[simulacion] > 0:
+            perfil.contar('reglas_disparadas')
+
+    simulacion = controlsystem.ControlSystemSimulation
+    calculadora = controlsystem.CrispValueCalculator
+    perfil.envolver(simulacion, 'compute', despues=lambda perfil, *_: perfil.contar('puntos'))
+    perfil.envolver(controlsystem.RuleOrderGenerator, '__iter__', 'orden_reglas', generador=True)
+    perfil.envolver(simulacion, '_reset_simulation', 'reinicio')
+    perfil.envolver(calculadora, 'fuzz', 'fuzzificacion')
+    perfil.envolver(simulacion, 'compute_rule', 'evaluacion_reglas', despues=contar_regla)
+    perfil.envolver(simulacion, 'defuzz_consequents', 'defuzzificacion')
+    perfil.envolver(calculadora, 'find_memberships', 'agregacion')
+    perfil.envolver(controlsystem, 'defuzz', 'centroide')
+
+
+# ---------------------------------------------------------
+# Etapas de un MotorMamdani (solo esa instancia)
+# ---------------------------------------------------------
+def instrumentar_motor(perfil, motor):
+    def contar_reglas(perfil, fuerza, args):
+        perfil.contar('reglas_disparadas', int((fuerza > 0).sum()))
+        perfil.contar('puntos', fuerza.shape[0])
+
+    perfil.envolver(motor, 'evaluar')
+    perfil.envolver(motor, 'fuzzificar')
+    perfil.envolver(motor, 'activaciones', despues=contar_reglas)
+    perfil.envolver(motor, 'cortes')
+    perfil.envolver(motor, 'agregar')
+    perfil.envolver(motor, 'defuzzificar')
+    perfil.envolver(motor, 'defuzzificar_analitico')
+
+
+# ---------------------------------------------------------
+# Funciones sueltas de un módulo: {atributo: etapa}
+# (p. ej. membresia.evaluar_conjuntos del robot)
+# ---------------------------------------------------------
+def instrumentar_funciones(perfil, modulo, funciones):
+    for atributo, nombre in funciones.items():
+        if hasattr(modulo, atributo):
+            perfil.envolver(modulo, atributo, nombre)
+
+
+if __name__ == "__main__":
+    import sys
+
+    import numpy as np
+
+    from modelo_satisfaccion import cargar_motor, construir_sistema_control
+    from skfuzzy import control as ctrl
+
+    rng = np.random.default_rng(0)
+    entradas = np.column_stack([rng.uniform(0, 10, 500), rng.uniform(0, 60, 500)])
+
+    sistema = ctrl.ControlSystemSimulation(construir_sistema_control(), cache=False)
+    with Perfilador(memoria='--memoria' in sys.argv) as perfil:
+        instrumentar_skfuzzy(perfil)
+        for calidad, tiempo in entradas.tolist():
+            sistema.input['calidad'] = calidad
+            sistema.input['tiempo_espera'] = tiempo
+            sistema.compute()
+    print("skfuzzy, {} inferencias:".format(len(entradas)))
+    print(perfil.resumen())
+    perfil.guardar('perfil_skfuzzy.json', 'perfil_skfuzzy.folded')
+
+    motor = cargar_motor()
+    with Perfilador(memoria='--memoria' in sys.argv) as perfil:
+        instrumentar_motor(perfil, motor)
+        for _ in range(20):
+            motor.evaluar(rng.uniform([0, 0], [10, 60], (50000, 2)))
+    print("\nMotorMamdani, 20 lotes de 50000:")
+    print(perfil.resumen())
+    perfil.guardar('perfil_motor.json', 'perfil_motor.folded')
@@ -0,0 +1,392 @@
+"""
+A1.2 Práctica - Minimización de la Base de Reglas
+Fusión de reglas redundantes sin cambiar la salida
+
+Descripción:
+Varias reglas del sistema de satisfacción comparten consecuente (regla2 a
+regla5 llevan a 'media'; regla6 a regla9, a 'baja'). Con AND = mínimo,
+OR = máximo y acumulación por máximo, dos reglas con el mismo consecuente
+que solo difieren en los términos de una variable se pueden fusionar de
+forma exacta:
+
+    max(min(a, b1), min(a, b2)) = min(a, max(b1, b2))
+    (buena & medio) , (buena & largo)  ->  buena & (medio | largo)
+
+Cada regla se ve como un "cubo": para cada variable, el conjunto de términos
+(o términos negados) unidos con OR, y las variables unidas con AND. El pase
+repite hasta que no hay cambios:
+- se fusionan cubos del mismo consecuente (y peso) que difieren en una sola
+  variable (en cada ronda, todos los que coinciden en el resto, por la
+  variable que más reglas elimina),
+- se eliminan los cubos contenidos en otro (reglas redundantes), también
+  entre consecuentes distintos si el otro da los mismos términos de salida
+  con peso mayor o igual,
+- se elimina una variable cuyos términos unidos valen 1 en todo el universo
+  (antecedentes complementarios). Se comprueba en cada tramo del universo,
+  porque skfuzzy interpola linealmente entre muestras.
+
+Las reglas que no son cubos (negaciones mezcladas con AND de la misma
+variable, OR entre variables distintas, ...) pasan sin cambios, igual que
+las que usan and_func/or_func distintas de fmin/fmax o cuya salida no se
+acumula por máximo (las fusiones solo son exactas con mínimo y máximo). El resultado
+usa antecedentes anidados AND/OR de skfuzzy; verificar_equivalencia() compara
+la superficie de control del sistema original y del minimizado.
+
+minimizar_definicion() hace lo mismo sobre una definición JSON
+(definicion_difusa) y devuelve la definición con las reglas fusionadas, que
+usan listas de términos por variable (OR dentro de la variable).
+
+Uso:
+    sistema, informe = minimizar_control_system(construir_sistema_control())
+    print(formatear_informe(informe))
+
+    python minimizacion_reglas.py                                # informe
+    python minimizacion_reglas.py --guardar satisfaccion_min.json
+"""
+
+import copy
+import functools
+import operator
+import sys
+import time
+
+import numpy as np
+
+
+# ---------------------------------------------------------
+# Antecedente -> cubo {variable: frozenset((término, negado))}
+# o None si no tiene esa forma. variables recoge los objetos
+# Antecedent por nombre.
+# ---------------------------------------------------------
+def _cubo(nodo, variables):
+    from skfuzzy.control.term import Term, TermAggregate
+
+    if isinstance(nodo, Term):
+        variables[nodo.parent.label] = nodo.parent
+        return {nodo.parent.label: frozenset([(nodo.label, False)])}
+    if not isinstance(nodo, TermAggregate):
+        return None
+    if nodo.kind == 'not':
+        if not isinstance(nodo.term1, Term):
+            return None
+        variables[nodo.term1.parent.label] = nodo.term1.parent
+        return {nodo.term1.parent.label: frozenset([(nodo.term1.label, True)])}
+
+    izquierdo = _cubo(nodo.term1, variables)
+    derecho = _cubo(nodo.term2, variables)
+    if izquierdo is None or derecho is None:
+        return None
+    if nodo.kind == 'or':
+        # Solo OR de literales de una misma variable
+        if len(izquierdo) != 1 or list(izquierdo) != list(derecho):
+            return None
+        variable = next(iter(izquierdo))
+        return {variable: izquierdo[variable] | derecho[variable]}
+    if set(izquierdo) & set(derecho):
+        return None
+    return dict(izquierdo, **derecho)
+
+
+# ---------------------------------------------------------
+# Las fusiones solo son exactas con AND = fmin, OR = fmax y
+# acumulación por máximo; las demás reglas pasan sin cambios
+# ---------------------------------------------------------
+def _es_min_max(regla):
+    from skfuzzy.control.antecedent_consequent import accumulation_max
+
+    if regla.and_func is not np.fmin or regla.or_func is not np.fmax:
+        return False
+    return all(getattr(c.term.parent, 'accumulation_method', accumulation_max) is accumulation_max
+               for c in regla.consequent)
+
+
+def _clave_consecuente(regla):
+    return tuple(sorted((c.term.parent.label, c.term.label, float(c.weight))
+                        for c in regla.consequent))
+
+
+def _contenido(cubo, otro):
+    # cubo <= otro: cada variable de otro está en cubo con
+    # menos (o los mismos) literales
+    return all(v in cubo and cubo[v] <= literales for v, literales in otro.items())
+
+
+def _curva(variable, literal):
+    termino, negado = literal
+    mf = np.asarray(variable[termino].mf, dtype=float)
+    return 1.0 - mf if negado else mf
+
+
+# ---------------------------------------------------------
+# True si el OR de los literales vale 1 en todo el universo:
+# en cada tramo entre muestras algún literal vale 1 en los
+# dos extremos
+# ---------------------------------------------------------
+def cubre_universo(variable, literales):
+    curvas = np.array([_curva(variable, literal) for literal in literales])
+    uno = curvas >= 1.0
+    if curvas.shape[1] == 1:
+        return bool(uno.any())
+    return bool((uno[:, :-1] & uno[:, 1:]).any(axis=0).all())
+
+
+# ---------------------------------------------------------
+# Pase de minimización sobre una lista de ctrl.Rule.
+# Devuelve (reglas nuevas, fusiones) donde fusiones es una
+# lista de (etiqueta nueva, [etiquetas originales]).
+# ---------------------------------------------------------
+def minimizar_reglas(reglas):
+    variables = {}
+    grupos = {}    # consecuente -> [(cubo, etiquetas)]
+    orden = []     # ('cubo', consecuente) o ('regla', regla) en orden original
+    consecuentes = {}
+    for regla in reglas:
+        cubo = _cubo(regla.antecedent, variables) if _es_min_max(regla) else None
+        etiqueta = regla.label if isinstance(regla.label, str) else str(regla.label)
+        if cubo is None:
+            orden.append(('regla', regla))
+            continue
+        clave = _clave_consecuente(regla)
+        if clave not in grupos:
+            grupos[clave] = []
+            consecuentes[clave] = regla.consequent
+            orden.append(('cubo', clave))
+        grupos[clave].append((cubo, [etiqueta]))
+
+    for clave, cubos in grupos.items():
+        grupos[clave] = _minimizar_grupo(cubos, variables)
+    _eliminar_dominadas(grupos)
+
+    nuevas = []
+    fusiones = []
+    for tipo, valor in orden:
+        if tipo == 'regla':
+            nuevas.append(valor)
+            continue
+        for cubo, etiquetas in grupos[valor]:
+            etiqueta = '+'.join(etiquetas)
+            nuevas.append(_construir_regla(cubo, consecuentes[valor], etiqueta, variables))
+            if len(etiquetas) > 1:
+                fusiones.append((etiqueta, etiquetas))
+    return nuevas, fusiones
+
+
+# ---------------------------------------------------------
+# Quita los cubos contenidos en otro del mismo grupo (sus
+# etiquetas pasan al que los contiene)
+# ---------------------------------------------------------
+def _quitar_contenidos(cubos):
+    resultado = []
+    # Primero los más generales: menos variables, más términos
+    for cubo, etiquetas in sorted(cubos, key=lambda c: (len(c[0]), -sum(map(len, c[0].values())))):
+        for j, (mayor, etiquetas_mayor) in enumerate(resultado):
+            if _contenido(cubo, mayor):
+                resultado[j] = (mayor, etiquetas_mayor + etiquetas)
+                break
+        else:
+            resultado.append((cubo, etiquetas))
+    return resultado
+
+
+# ---------------------------------------------------------
+# Cubos con la variable v agrupados por los literales del
+# resto de variables: {resto: [(cubo, etiquetas), ...]}
+# ---------------------------------------------------------
+def _cubetas(cubos, v):
+    cubetas = {}
+    for cubo, etiquetas in cubos:
+        if v in cubo:
+            resto = frozenset((w, literales) for w, literales in cubo.items() if w != v)
+            cubetas.setdefault(resto, []).append((cubo, etiquetas))
+    return cubetas
+
+
+# ---------------------------------------------------------
+# Fusión por rondas: en cada una se toma la variable cuya
+# fusión elimina más cubos y se fusiona cada cubeta entera,
+# ya que max_k min(a, b_k) = min(a, max_k b_k)
+# ---------------------------------------------------------
+def _minimizar_grupo(cubos, variables):
+    cubos = _quitar_contenidos(cubos)
+    while True:
+        cubetas = {v: _cubetas(cubos, v) for v in sorted({v for cubo, _ in cubos for v in cubo})}
+        ahorro = {v: sum(len(g) - 1 for g in c.values()) for v, c in cubetas.items()}
+        if not ahorro or max(ahorro.values()) == 0:
+            return cubos
+        v = max(ahorro, key=ahorro.get)
+
+        nuevos = [(cubo, etiquetas) for cubo, etiquetas in cubos if v not in cubo]
+        for grupo in cubetas[v].values():
+            fusion = dict(grupo[0][0])
+            fusion[v] = frozenset().union(*(cubo[v] for cubo, _ in grupo))
+            if len(grupo) > 1 and len(fusion) > 1 and cubre_universo(variables[v], fusion[v]):
+                del fusion[v]
+            nuevos.append((fusion, [e for _, etiquetas in grupo for e in etiquetas]))
+        cubos = _quitar_contenidos(nuevos)
+
+
+# ---------------------------------------------------------
+# Quita los cubos contenidos en un cubo de otro consecuente
+# que da los mismos términos con peso mayor o igual
+# ---------------------------------------------------------
+def _domina(clave, otra):
+    pesos = {(variable, termino): peso for variable, termino, peso in otra}
+    return all(pesos.get((variable, termino), -1.0) >= peso for variable, termino, peso in clave)
+
+
+def _eliminar_dominadas(grupos):
+    for clave, cubos in grupos.items():
+        for otra, otros in grupos.items():
+            if otra == clave or not _domina(clave, otra):
+                continue
+            for cubo, etiquetas in list(cubos):
+                for j, (mayor, etiquetas_mayor) in enumerate(otros):
+                    if _contenido(cubo, mayor):
+                        otros[j] = (mayor, etiquetas_mayor + etiquetas)
+                        cubos.remove((cubo, etiquetas))
+                        break
+
+
+def _construir_regla(cubo, consecuente, etiqueta, variables):
+    from skfuzzy import control as ctrl
+
+    partes = []
+    for nombre, literales in cubo.items():
+        variable = variables[nombre]
+        # Literales en el orden de los términos de la variable
+        terminos = list(variable.terms)
+        hojas = [~variable[t] if negado else variable[t]
+                 for t, negado in sorted(literales, key=lambda l: (terminos.index(l[0]), l[1]))]
+        partes.append(functools.reduce(operator.or_, hojas))
+    antecedente = functools.reduce(operator.and_, partes)
+    salida = [c.term if c.weight == 1.0 else c.term % c.weight for c in consecuente]
+    return ctrl.Rule(antecedente, salida, label=etiqueta)
+
+
+# ---------------------------------------------------------
+# Puntos de comparación: rejilla completa si cabe en
+# 'muestras', si no puntos al azar en los universos
+# ---------------------------------------------------------
+def _puntos(universos, muestras, semilla):
+    por_eje = int(np.floor(muestras ** (1.0 / len(universos))))
+    if por_eje >= 2:
+        ejes = [np.linspace(u[0], u[-1], por_eje) for u in universos]
+        return np.column_stack([m.ravel() for m in np.meshgrid(*ejes, indexing='ij')])
+    rng = np.random.default_rng(semilla)
+    return np.column_stack([rng.uniform(u[0], u[-1], muestras) for u in universos])
+
+
+def _simular(sistema_control, entradas, puntos):
+    from skfuzzy import control as ctrl
+
+    simulacion = ctrl.ControlSystemSimulation(sistema_control, cache=False)
+    salidas = [c.label for c in sistema_control.consequents]
+    resultado = np.full((puntos.shape[0], len(salidas)), np.nan)
+    inicio = time.perf_counter()
+    for i, fila in enumerate(puntos.tolist()):
+        for nombre, valor in zip(entradas, fila):
+            simulacion.input[nombre] = valor
+        try:
+            simulacion.compute()
+        except (ValueError, AssertionError):
+            continue   # ninguna regla dispara
+        # skfuzzy 0.5 no lanza error si no dispara ninguna regla:
+        # la salida queda sin valor y el punto sigue en NaN
+        resultado[i] = [simulacion.output.get(s, np.nan) for s in salidas]
+    return resultado, time.perf_counter() - inicio
+
+
+# ---------------------------------------------------------
+# Compara ambos sistemas con ControlSystemSimulation en los
+# mismos puntos: error máximo (NaN si difieren en qué puntos
+# no disparan reglas) y tiempo de compute() de cada uno
+# ---------------------------------------------------------
+def verificar_equivalencia(original, minimizado, muestras=500, semilla=0):
+    antecedentes = list(original.antecedents)
+    entradas = [a.label for a in antecedentes]
+    puntos = _puntos([a.universe for a in antecedentes], muestras, semilla)
+    antes, tiempo_antes = _simular(original, entradas, puntos)
+    despues, tiempo_despues = _simular(minimizado, entradas, puntos)
+
+    mismos_nan = np.array_equal(np.isnan(antes), np.isnan(despues))
+    diferencia = np.abs(antes - despues)
+    return {
+        'puntos': puntos.shape[0],
+        'error_max': float(np.nanmax(diferencia)) if mismos_nan and np.isfinite(diferencia).any()
+        else (0.0 if mismos_nan else float('nan')),
+        'tiempo_original_s': tiempo_antes,
+        'tiempo_minimizado_s': tiempo_despues,
+    }
+
+
+# ---------------------------------------------------------
+# ControlSystem -> (ControlSystem minimizado, informe).
+# Con verificar=True se comprueba la equivalencia y se lanza
+# ValueError si la salida cambia más que tolerancia.
+# ---------------------------------------------------------
+def minimizar_control_system(sistema_control, verificar=True, muestras=500, tolerancia=1e-9):
+    _, minimizado, informe = _minimizar(sistema_control, verificar, muestras, tolerancia)
+    return minimizado, informe
+
+
+# ---------------------------------------------------------
+# Definición JSON -> (definición con las reglas minimizadas,
+# informe). Los conjuntos y universos no cambian.
+# ---------------------------------------------------------
+def minimizar_definicion(definicion, verificar=True, muestras=500, tolerancia=1e-9):
+    from definicion_difusa import construir_control_system, regla_a_json
+
+    sistema_control, _ = construir_control_system(definicion)
+    nuevas, _, informe = _minimizar(sistema_control, verificar, muestras, tolerancia)
+    minimizada = copy.deepcopy(definicion)
+    minimizada['reglas'] = [regla_a_json(regla) for regla in nuevas]
+    return minimizada, informe
+
+
+def _minimizar(sistema_control, verificar, muestras, tolerancia):
+    from skfuzzy import control as ctrl
+
+    reglas = list(sistema_control.rules)
+    nuevas, fusiones = minimizar_reglas(reglas)
+    minimizado = ctrl.ControlSystem(nuevas)
+    informe = {
+        'reglas_original': len(reglas),
+        'reglas_minimizado': len(nuevas),
+        'fusiones': fusiones,
+        'reglas': [(str(r.label), str(r.antecedent), [str(c) for c in r.consequent])
+                   for r in nuevas],
+    }
+    if verificar:
+        informe['verificacion'] = verificar_equivalencia(sistema_control, minimizado, muestras)
+        error = informe['verificacion']['error_max']
+        if not error <= tolerancia:
+            raise ValueError("La base de reglas minimizada no es equivalente "
+                             "(error máximo {})".format(error))
+    return nuevas, minimizado, informe
+
+
+def formatear_informe(informe):
+    lineas = ["Reglas: {} -> {}".format(informe['reglas_original'], informe['reglas_minimizado'])]
+    for etiqueta, antecedente, consecuente in informe['reglas']:
+        lineas.append("  {}: SI {} ENTONCES {}".format(etiqueta, antecedente,
+                                                     ', '.join(consecuente)))
+    verificacion = informe.get('verificacion')
+    if verificacion:
+        lineas.append("Verificación en {} puntos: error máximo {:.2e}".format(
+            verificacion['puntos'], verificacion['error_max']))
+        lineas.append("compute(): {:.1f} µs -> {:.1f} µs por punto".format(
+            verificacion['tiempo_original_s'] / verificacion['puntos'] * 1e6,
+            verificacion['tiempo_minimizado_s'] / verificacion['puntos'] * 1e6))
+    return '\n'.join(lineas)
+
+
+if __name__ == "__main__":
+    from definicion_difusa import cargar_definicion, guardar_definicion
+    from modelo_satisfaccion import RUTA_DEFINICION
+
+    minimizada, informe = minimizar_definicion(cargar_definicion(RUTA_DEFINICION))
+    print(formatear_informe(informe))
+    if '--guardar' in sys.argv[1:-1]:
+        ruta = sys.argv[sys.argv.index('--guardar') + 1]
+        guardar_definicion(ruta, minimizada)
+        print("Definición minimizada guardada en", ruta)
@@ -0,0 +1,68 @@
+"""
+A1.2 Práctica - Modelo del Sistema Difuso de Satisfacción
+Construcción reutilizable del ControlSystem (sin gráficas)
+
+Descripción:
+Las variables, funciones de membresía y reglas (regla1..regla9) se describen
+una sola vez en definiciones/satisfaccion.json. Este módulo las expone a los
+demás (scripts, motor vectorizado, superficies, etc.) sin abrir ventanas ni
+ejecutar los casos de prueba:
+- construir_sistema_control(): el ctrl.ControlSystem de scikit-fuzzy
+- cargar_motor(): el MotorMamdani leído de la caché compilada, sin construir
+  el sistema de skfuzzy
+- obtener_motor() / puntuar(): un motor compartido que se construye la
+  primera vez que se usa; importar este módulo no carga skfuzzy, scipy ni
+  matplotlib
+"""
+
+import functools
+import os
+
+import numpy as np
+
+from definicion_difusa import (DIRECTORIO_DEFINICIONES, cargar_compilado, cargar_definicion,
+                               construir_control_system)
+
+RUTA_DEFINICION = os.path.join(DIRECTORIO_DEFINICIONES, 'satisfaccion.json')
+
+# Umbrales de clasificación cualitativa usados en los scripts
+UMBRAL_ALTA = 70
+UMBRAL_MEDIA = 40
+
+
+# ---------------------------------------------------------
+# Construye y devuelve el ctrl.ControlSystem de satisfacción
+# ---------------------------------------------------------
+def construir_sistema_control():
+    sistema_control, _ = construir_control_system(cargar_definicion(RUTA_DEFINICION))
+    return sistema_control
+
+
+# ---------------------------------------------------------
+# Motor vectorizado desde la forma compilada (caché en disco)
+# ---------------------------------------------------------
+def cargar_motor(**opciones):
+    return cargar_compilado(RUTA_DEFINICION).motor(**opciones)
+
+
+# ---------------------------------------------------------
+# Motor compartido (uno por combinación de opciones),
+# construido de forma perezosa. No debe modificarse: para
+# editar el sistema use cargar_motor().
+# ---------------------------------------------------------
+@functools.lru_cache(maxsize=None)
+def obtener_motor(**opciones):
+    return cargar_motor(**opciones)
+
+
+def puntuar(entradas):
+    return obtener_motor().evaluar(entradas)
+
+
+# ---------------------------------------------------------
+# Clasificación vectorizada: ALTA (>= 70), MEDIA (>= 40), BAJA
+# ---------------------------------------------------------
+def clasificar(resultados):
+    resultados = np.asarray(resultados, dtype=float)
+    return np.select([resultados >= UMBRAL_ALTA, resultados >= UMBRAL_MEDIA],
+                     ['ALTA', 'MEDIA'], default='BAJA')
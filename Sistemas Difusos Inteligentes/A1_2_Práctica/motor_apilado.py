@@ -0,0 +1,344 @@
+"""
+A1.2 Práctica - Evaluación Apilada de Variantes
+Muchas variantes de la base de reglas evaluadas en una sola llamada
+
+Descripción:
+Las variantes por región del sistema de satisfacción solo cambian los
+puntos de quiebre de algunos conjuntos y algunos consecuentes (p. ej.
+tiempo_espera['largo'] o el consecuente de regla3). MotorApilado junta V
+sistemas con la misma estructura (mismas variables, términos y antecedentes
+de las reglas) en tensores de parámetros:
+
+- membresías de cada entrada: las familias distintas de curvas (universo y
+  curvas) de cada variable; las variantes que comparten familia comparten
+  también la fuzzificación, que se hace una vez por familia y entrada
+- pesos de los consecuentes: V x R x C
+- curvas de salida: familias distintas sobre el universo de salida común
+
+evaluar() evalúa cada entrada con todas las variantes (N x V) y
+evaluar_por_variante() cada entrada con la suya (N). Ambos trabajan por
+bloques de pares (entrada, variante), como MotorMamdani, y dan el mismo
+resultado que el motor de cada variante por separado. Si las variantes se
+compilan con analitica=True la defuzzificación es la cerrada, una llamada
+por familia de salida, sin recorrer el universo de salida.
+
+Uso:
+    base = cargar_definicion('definiciones/satisfaccion.json')
+    variantes = [variante_definicion(base, conjuntos={'tiempo_espera': {'largo': [35, 60, 60]}}),
+                 variante_definicion(base, consecuentes={'regla3': 'baja'})]
+    apilado = MotorApilado.desde_definiciones(variantes)
+    z = apilado.evaluar(puntos)                         # N x 2
+    z = apilado.evaluar_por_variante(puntos, region)    # N
+"""
+
+import copy
+
+import numpy as np
+
+import defuzzificacion_analitica
+from motor_vectorizado import MotorMamdani
+
+
+# ---------------------------------------------------------
+# Copia de una definición JSON con conjuntos o consecuentes
+# cambiados:
+#   conjuntos:    {variable: {término: params | {'tipo', 'params'}}}
+#   consecuentes: {nombre_regla: término | {salida: término}}
+# ---------------------------------------------------------
+def variante_definicion(definicion, conjuntos=None, consecuentes=None, nombre=None):
+    variante = copy.deepcopy(definicion)
+    if nombre is not None:
+        variante['nombre'] = nombre
+
+    for variable, cambios in (conjuntos or {}).items():
+        seccion = 'entradas' if variable in variante['entradas'] else 'salidas'
+        if variable not in variante[seccion]:
+            raise ValueError("Variable desconocida: {}".format(variable))
+        terminos = variante[seccion][variable]['conjuntos']
+        for termino, conjunto in cambios.items():
+            if termino not in terminos:
+                raise ValueError("Término desconocido: {}['{}']".format(variable, termino))
+            if isinstance(conjunto, dict):
+                terminos[termino] = dict(conjunto)
+            else:
+                terminos[termino] = dict(terminos[termino], params=list(conjunto))
+
+    reglas = {regla.get('nombre', 'regla{}'.format(r + 1)): regla
+              for r, regla in enumerate(variante.get('reglas', []))}
+    for nombre_regla, entonces in (consecuentes or {}).items():
+        if nombre_regla not in reglas:
+            raise ValueError("Regla desconocida: {}".format(nombre_regla))
+        if not isinstance(entonces, dict):
+            salidas = list(reglas[nombre_regla]['entonces'])
+            if len(salidas) != 1:
+                raise ValueError("{} tiene varias salidas: indique {{salida: término}}"
+                                 .format(nombre_regla))
+            entonces = {salidas[0]: entonces}
+        reglas[nombre_regla]['entonces'] = dict(entonces)
+    return variante
+
+
+# ---------------------------------------------------------
+# Agrupa arreglos iguales: devuelve (distintos, índice de
+# cada elemento en distintos)
+# ---------------------------------------------------------
+def _agrupar(elementos, iguales):
+    distintos = []
+    indices = np.empty(len(elementos), dtype=np.intp)
+    for i, elemento in enumerate(elementos):
+        for f, otro in enumerate(distintos):
+            if iguales(elemento, otro):
+                indices[i] = f
+                break
+        else:
+            indices[i] = len(distintos)
+            distintos.append(elemento)
+    return distintos, indices
+
+
+class MotorApilado(object):
+    """
+    motores: lista de MotorMamdani (o de sus tablas) con la misma estructura.
+    nombres: nombre de cada variante (por defecto 0..V-1).
+    """
+
+    def __init__(self, motores, nombres=None, tamano_bloque=8192):
+        self.motores = [m if isinstance(m, MotorMamdani) else MotorMamdani.desde_tablas(m)
+                        for m in motores]
+        if not self.motores:
+            raise ValueError("Se necesita al menos una variante")
+        self.nombres = list(nombres) if nombres is not None else list(range(len(self.motores)))
+        self.tamano_bloque = tamano_bloque
+
+        base = self._base = self.motores[0]
+        for v, motor in enumerate(self.motores[1:], 1):
+            diferencias = [campo for campo, igual in (
+                ('entradas', motor.entradas == base.entradas),
+                ('terminos', motor.terminos == base.terminos),
+                ('salida', motor.salida == base.salida),
+                ('terminos_salida', motor.terminos_salida == base.terminos_salida),
+                ('universo_salida', np.array_equal(motor.universo_salida, base.universo_salida)),
+                ('reglas', np.array_equal(motor.indices_reglas, base.indices_reglas)
+                 and np.array_equal(motor.reglas_or, base.reglas_or)
+                 and np.array_equal(motor.grupos_or, base.grupos_or)),
+                ('metodo', motor.metodo == base.metodo)) if not igual]
+            if diferencias:
+                raise ValueError("La variante {} no tiene la misma estructura que la primera "
+                                 "({})".format(self.nombres[v], ', '.join(diferencias)))
+            if motor.dispersa or (motor.trapecios_salida is None) != (base.trapecios_salida is None):
+                raise ValueError("Las variantes deben ser motores densos, todos con la misma "
+                                 "defuzzificación (muestreada o analítica)")
+
+        self.entradas = base.entradas
+        self.salida = base.salida
+
+        # Familias distintas de cada entrada: (motor que la
+        # representa, membresía S x U)
+        self._familias = []
+        self._familia_de = []
+        for k in range(len(self.entradas)):
+            distintas, indices = _agrupar(
+                [(m, m.membresias[k]) for m in self.motores],
+                lambda a, b: (np.array_equal(a[0].universos[k], b[0].universos[k])
+                              and np.array_equal(a[1], b[1])))
+            self._familias.append(distintas)
+            self._familia_de.append(indices)
+
+        # Curvas de salida distintas (F x C x U), sus trapecios
+        # (vía analítica) y pesos V x R x C
+        distintas, self._salida_de = _agrupar(
+            self.motores, lambda a, b: np.array_equal(a.membresia_salida, b.membresia_salida))
+        self._salidas = np.array([m.membresia_salida for m in distintas])
+        self._trapecios = None
+        if base.trapecios_salida is not None:
+            self._trapecios = [m.trapecios_salida for m in distintas]
+        self.pesos_consecuentes = np.array([m.pesos_consecuentes for m in self.motores])
+
+    @classmethod
+    def desde_definiciones(cls, definiciones, nombres=None, salida=None, tamano_bloque=8192,
+                           analitica=False):
+        from definicion_difusa import compilar
+
+        motores = [compilar(definicion).motor(salida, analitica=analitica)
+                   for definicion in definiciones]
+        if nombres is None:
+            nombres = [definicion.get('nombre', v) for v, definicion in enumerate(definiciones)]
+            if len(set(nombres)) != len(nombres):
+                nombres = None
+        return cls(motores, nombres, tamano_bloque)
+
+    @property
+    def n_variantes(self):
+        return len(self.motores)
+
+    def familias(self):
+        return {nombre: len(f) for nombre, f in zip(self.entradas, self._familias)}
+
+    def _variante(self, variante):
+        if isinstance(variante, (int, np.integer)):
+            return int(variante)
+        return self.nombres.index(variante)
+
+    # -----------------------------------------------------
+    # Evalúa los pares (bloque[filas[m]], variantes[m]).
+    # La fuzzificación se hace una vez por entrada y familia.
+    # todas=True indica pares en orden entrada x variante
+    # (los pesos se combinan sin copiarlos por par).
+    # -----------------------------------------------------
+    def _evaluar_pares(self, bloque, filas, variantes, todas=False):
+        base = self._base
+        grados = np.empty((base.n_terminos, filas.size))
+        inicio = 0
+        for k, (familias, familia_de) in enumerate(zip(self._familias, self._familia_de)):
+            s = familias[0][1].shape[0]
+            if len(familias) == 1:
+                motor, membresia = familias[0]
+                por_familia = motor._interpolar(bloque[:, k], k, membresia,
+                                                np.empty((s, bloque.shape[0])))
+                grados[inicio:inicio + s] = por_familia[:, filas]
+            elif todas:
+                # Cada entrada se usa con todas las familias
+                por_familia = np.empty((len(familias), s, bloque.shape[0]))
+                for f, (motor, membresia) in enumerate(familias):
+                    motor._interpolar(bloque[:, k], k, membresia, por_familia[f])
+                grados[inicio:inicio + s] = por_familia[familia_de[variantes], :, filas].T
+            else:
+                # Cada par solo con la familia de su variante
+                familia_par = familia_de[variantes]
+                for f, (motor, membresia) in enumerate(familias):
+                    pares = np.flatnonzero(familia_par == f)
+                    if pares.size:
+                        grados[inicio:inicio + s, pares] = motor._interpolar(
+                            bloque[filas[pares], k], k, membresia, np.empty((s, pares.size)))
+            inicio += s
+
+        # Misma matriz de reglas en todas las variantes
+        fuerza = base.activaciones(grados.T)
+        pesos = self.pesos_consecuentes if todas else self.pesos_consecuentes[variantes]
+        if todas:
+            fuerza = fuerza.reshape(-1, self.n_variantes, fuerza.shape[1])
+        cortes = np.zeros(fuerza.shape[:-1] + (pesos.shape[-1],))
+        for r in range(fuerza.shape[-1]):
+            np.maximum(cortes, fuerza[..., r, None] * pesos[..., r, :], out=cortes)
+        cortes = cortes.reshape(filas.size, -1)
+
+        # Defuzzificación por familia de salida (cada una con
+        # sus curvas o trapecios, sin copiarlos por par)
+        if len(self._salidas) == 1:
+            return self._defuzzificar(cortes, 0)
+        resultado = np.empty(filas.size)
+        familia_par = self._salida_de[variantes]
+        for f in range(len(self._salidas)):
+            pares = np.flatnonzero(familia_par == f)
+            if pares.size:
+                resultado[pares] = self._defuzzificar(cortes[pares], f)
+        return resultado
+
+    def _defuzzificar(self, cortes, familia):
+        base = self._base
+        if self._trapecios is not None:
+            metodo = defuzzificacion_analitica.METODOS[base.metodo]
+            limites = (base.universo_salida[0], base.universo_salida[-1])
+            return metodo(self._trapecios[familia], cortes, limites)
+
+        curvas = self._salidas[familia]
+        agregada = np.zeros((cortes.shape[0], curvas.shape[1]))
+        recorte = np.empty_like(agregada)
+        for c, curva in enumerate(curvas):
+            np.minimum(cortes[:, c, None], curva, out=recorte)
+            np.maximum(agregada, recorte, out=agregada)
+        return base.defuzzificar(agregada)
+
+    # -----------------------------------------------------
+    # Cada entrada con todas las variantes: N x V
+    # -----------------------------------------------------
+    def evaluar(self, entradas):
+        matriz = self._base._como_matriz(entradas)
+        v = self.n_variantes
+        resultado = np.empty((matriz.shape[0], v))
+        paso = max(1, self.tamano_bloque // v)
+        for inicio in range(0, matriz.shape[0], paso):
+            bloque = matriz[inicio:inicio + paso]
+            n = bloque.shape[0]
+            filas = np.repeat(np.arange(n), v)
+            variantes = np.tile(np.arange(v), n)
+            resultado[inicio:inicio + n] = self._evaluar_pares(bloque, filas, variantes,
+                                                               todas=True).reshape(n, v)
+        return resultado
+
+    # -----------------------------------------------------
+    # Cada entrada con su variante (índice o nombre por fila,
+    # o uno solo para todas): N
+    # -----------------------------------------------------
+    def evaluar_por_variante(self, entradas, variantes):
+        matriz = self._base._como_matriz(entradas)
+        variantes = np.atleast_1d(variantes)
+        if np.issubdtype(variantes.dtype, np.integer):
+            indices = variantes.astype(np.intp, copy=False)
+        else:
+            # Nombres: se traduce cada nombre distinto una sola vez
+            distintos, inversa = np.unique(variantes, return_inverse=True)
+            indices = np.array([self._variante(v) for v in distintos], dtype=np.intp)[inversa]
+        if indices.size == 1:
+            indices = np.full(matriz.shape[0], indices[0])
+        if indices.size != matriz.shape[0]:
+            raise ValueError("Se esperaba una variante por entrada")
+
+        resultado = np.empty(matriz.shape[0])
+        for inicio in range(0, matriz.shape[0], self.tamano_bloque):
+            bloque = matriz[inicio:inicio + self.tamano_bloque]
+            filas = np.arange(bloque.shape[0])
+            resultado[inicio:inicio + bloque.shape[0]] = self._evaluar_pares(
+                bloque, filas, indices[inicio:inicio + bloque.shape[0]])
+        return resultado
+
+    def motor(self, variante):
+        return self.motores[self._variante(variante)]
+
+
+if __name__ == "__main__":
+    import time
+
+    from definicion_difusa import cargar_definicion
+    from modelo_satisfaccion import RUTA_DEFINICION
+
+    # 40 variantes: 'largo' desde 30..49 y regla3 -> media o baja
+    base = cargar_definicion(RUTA_DEFINICION)
+    definiciones = [variante_definicion(base, nombre='region{}'.format(i),
+                                        conjuntos={'tiempo_espera': {'largo': [30 + i // 2, 60, 60]}},
+                                        consecuentes={'regla3': 'baja' if i % 2 else 'media'})
+                    for i in range(40)]
+    apilado = MotorApilado.desde_definiciones(definiciones)
+    print("Familias distintas por entrada:", apilado.familias())
+
+    rng = np.random.default_rng(0)
+    puntos = rng.uniform([0, 0], [10, 60], (20000, 2))
+
+    inicio = time.perf_counter()
+    todas = apilado.evaluar(puntos)
+    apilada = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    por_separado = np.column_stack([motor.evaluar(puntos) for motor in apilado.motores])
+    separada = time.perf_counter() - inicio
+    print(f"{len(puntos)} entradas x {apilado.n_variantes} variantes: apilado {apilada:.2f} s, "
+          f"un motor por variante {separada:.2f} s; "
+          f"diferencia máxima {np.nanmax(np.abs(todas - por_separado)):.2e}")
+
+    # Pocas entradas por región: un solo lote frente a un
+    # motor por región
+    pocas = puntos[:400]
+    region = rng.integers(0, apilado.n_variantes, len(pocas))
+    inicio = time.perf_counter()
+    propia = apilado.evaluar_por_variante(pocas, region)
+    apilada = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    por_region = np.empty(len(pocas))
+    for v, motor in enumerate(apilado.motores):
+        filas = region == v
+        por_region[filas] = motor.evaluar(pocas[filas])
+    separada = time.perf_counter() - inicio
+    print(f"{len(pocas)} entradas, cada una con su variante: apilado {apilada * 1e3:.1f} ms, "
+          f"un motor por variante {separada * 1e3:.1f} ms; "
+          f"diferencia máxima {np.nanmax(np.abs(propia - por_region)):.2e}")
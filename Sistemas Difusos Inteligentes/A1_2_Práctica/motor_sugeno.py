@@ -0,0 +1,187 @@
+"""
+A1.2 Práctica - Inferencia Takagi-Sugeno (TSK)
+Mismos antecedentes y reglas, consecuentes constantes o lineales
+
+Descripción:
+Un sistema Sugeno reutiliza la parte "si" del sistema Mamdani (las variables
+calidad y tiempo_espera, sus funciones de membresía y la estructura de
+regla1..regla9), pero cada regla produce directamente un valor nítido:
+
+    orden 0 (constante):  z_r = c_r0
+    orden 1 (lineal):     z_r = c_r0 + c_r1 * calidad + c_r2 * tiempo_espera
+
+y la salida es el promedio ponderado por la fuerza de disparo w_r:
+
+    z = sum(w_r * z_r) / sum(w_r)
+
+No hay universo de salida, ni agregación, ni centroide, por lo que es mucho
+más barato que la vía Mamdani para puntuar grandes volúmenes.
+
+ajustar_consecuentes() calcula los coeficientes por mínimos cuadrados para
+que la superficie Sugeno aproxime la superficie del motor Mamdani.
+
+Uso:
+    motor = MotorMamdani(construir_sistema_control())
+    sugeno = ajustar_consecuentes(motor, orden=1)
+    z = sugeno.evaluar(np.column_stack([calidades, tiempos]))
+"""
+
+import numpy as np
+
+# Columnas de coeficientes por orden: 1 (constante) o 1 + k (lineal)
+ORDENES = (0, 1)
+
+
+class MotorSugeno(object):
+    """
+    Motor TSK vectorizado. antecedentes es un MotorMamdani (se usa solo su
+    fuzzificación y la evaluación de reglas); coeficientes es una matriz
+    R x 1 (orden 0) o R x (1 + k) (orden 1), una fila por regla, en el
+    orden de antecedentes.nombres_reglas y antecedentes.entradas.
+    """
+
+    def __init__(self, antecedentes, coeficientes, tamano_bloque=65536):
+        self.antecedentes = antecedentes
+        self.entradas = antecedentes.entradas
+        self.salida = antecedentes.salida
+        self.nombres_reglas = antecedentes.nombres_reglas
+        self.tamano_bloque = tamano_bloque
+
+        coeficientes = np.asarray(coeficientes, dtype=float)
+        if coeficientes.ndim == 1:
+            coeficientes = coeficientes.reshape(-1, 1)
+        n_reglas = len(self.nombres_reglas)
+        if coeficientes.shape not in ((n_reglas, 1), (n_reglas, 1 + len(self.entradas))):
+            raise ValueError("Se esperaban coeficientes {} x 1 o {} x {}; recibido {}"
+                             .format(n_reglas, n_reglas, 1 + len(self.entradas),
+                                     coeficientes.shape))
+        self.coeficientes = coeficientes
+        self.orden = 0 if coeficientes.shape[1] == 1 else 1
+
+    # -----------------------------------------------------
+    # Salida de cada regla: N x R
+    # -----------------------------------------------------
+    def salidas_reglas(self, matriz):
+        salidas = np.broadcast_to(self.coeficientes[:, 0], (matriz.shape[0],
+                                                             self.coeficientes.shape[0]))
+        if self.orden == 1:
+            salidas = salidas + matriz @ self.coeficientes[:, 1:].T
+        return salidas
+
+    # -----------------------------------------------------
+    # Promedio ponderado. Las filas sin ninguna regla activa
+    # devuelven NaN (igual que MotorMamdani).
+    # -----------------------------------------------------
+    def _evaluar_bloque(self, bloque, traza=None):
+        motor = self.antecedentes
+        grados = motor.fuzzificar(bloque)
+        fuerza = motor.activaciones(grados)
+        total = fuerza.sum(axis=1)
+        ponderada = np.einsum('nr,nr->n', fuerza, self.salidas_reglas(bloque))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            resultado = np.where(total > 0, ponderada / total, np.nan)
+        if traza is not None:
+            traza.escribir(bloque, grados, fuerza, resultado)
+        return resultado
+
+    # -----------------------------------------------------
+    # traza: igual que en MotorMamdani.evaluar
+    # -----------------------------------------------------
+    def evaluar(self, entradas, traza=None):
+        matriz = self.antecedentes._como_matriz(entradas)
+        resultado = np.empty(matriz.shape[0])
+        for inicio in range(0, matriz.shape[0], self.tamano_bloque):
+            bloque = matriz[inicio:inicio + self.tamano_bloque]
+            resultado[inicio:inicio + bloque.shape[0]] = self._evaluar_bloque(bloque, traza)
+        return resultado
+
+    __call__ = evaluar
+
+
+# ---------------------------------------------------------
+# Consecuentes constantes iniciales: centroide del término de
+# salida de cada regla (la aproximación Sugeno "directa" de un
+# sistema Mamdani, sin ajuste)
+# ---------------------------------------------------------
+def consecuentes_centroide(motor_mamdani):
+    universo = motor_mamdani.universo_salida
+    centroides = np.array([np.dot(mf, universo) / mf.sum()
+                           for mf in motor_mamdani.membresia_salida])
+    pesos = motor_mamdani.pesos_consecuentes
+    return (pesos @ centroides / pesos.sum(axis=1)).reshape(-1, 1)
+
+
+# ---------------------------------------------------------
+# Ajusta los consecuentes para aproximar la superficie del
+# motor Mamdani en una malla regular de puntos_por_eje^k
+# puntos (mínimos cuadrados sobre las fuerzas normalizadas).
+# Devuelve un MotorSugeno con los mismos antecedentes.
+# ---------------------------------------------------------
+def ajustar_consecuentes(motor_mamdani, orden=1, puntos_por_eje=41):
+    if orden not in ORDENES:
+        raise ValueError("El orden debe ser 0 (constante) o 1 (lineal)")
+
+    ejes = [np.linspace(u[0], u[-1], puntos_por_eje) for u in motor_mamdani.universos]
+    puntos = np.column_stack([m.ravel() for m in np.meshgrid(*ejes, indexing='ij')])
+    objetivo = motor_mamdani.evaluar(puntos)
+    validos = ~np.isnan(objetivo)
+    puntos, objetivo = puntos[validos], objetivo[validos]
+
+    fuerza = motor_mamdani.activaciones(motor_mamdani.fuzzificar(puntos))
+    normalizada = fuerza / fuerza.sum(axis=1, keepdims=True)
+
+    # Columnas del sistema lineal: w_r (y w_r * x_k para orden 1)
+    columnas = [normalizada]
+    if orden == 1:
+        columnas += [normalizada * puntos[:, k, None] for k in range(puntos.shape[1])]
+    diseno = np.concatenate(columnas, axis=1)
+
+    solucion, _, _, _ = np.linalg.lstsq(diseno, objetivo, rcond=None)
+    coeficientes = solucion.reshape(1 + orden * puntos.shape[1], -1).T
+
+    # Reglas que nunca disparan en la malla: se conserva el centroide
+    sin_datos = fuerza.max(axis=0) == 0
+    if sin_datos.any():
+        coeficientes[sin_datos] = 0.0
+        coeficientes[sin_datos, 0] = consecuentes_centroide(motor_mamdani)[sin_datos, 0]
+
+    return MotorSugeno(motor_mamdani, coeficientes, motor_mamdani.tamano_bloque)
+
+
+# ---------------------------------------------------------
+# Error de la aproximación frente al motor Mamdani en puntos
+# aleatorios: (máximo, RMSE)
+# ---------------------------------------------------------
+def error_frente_a_mamdani(sugeno, motor_mamdani, n_puntos=20000, semilla=0):
+    rng = np.random.default_rng(semilla)
+    puntos = np.column_stack([rng.uniform(u[0], u[-1], n_puntos)
+                              for u in motor_mamdani.universos])
+    diferencia = sugeno.evaluar(puntos) - motor_mamdani.evaluar(puntos)
+    diferencia = diferencia[~np.isnan(diferencia)]
+    return float(np.abs(diferencia).max()), float(np.sqrt(np.mean(diferencia ** 2)))
+
+
+if __name__ == "__main__":
+    import time
+
+    from modelo_satisfaccion import construir_sistema_control
+    from motor_vectorizado import MotorMamdani
+
+    mamdani = MotorMamdani(construir_sistema_control())
+    puntos = np.random.default_rng(1).uniform([0, 0], [10, 60], (1000000, 2))
+
+    inicio = time.perf_counter()
+    mamdani.evaluar(puntos)
+    t_mamdani = time.perf_counter() - inicio
+    print(f"Mamdani: {t_mamdani:.2f} s para {len(puntos):,} puntos")
+
+    for nombre, sugeno in (('constante (centroides)',
+                            MotorSugeno(mamdani, consecuentes_centroide(mamdani))),
+                           ('constante (ajustada)', ajustar_consecuentes(mamdani, orden=0)),
+                           ('lineal (ajustada)', ajustar_consecuentes(mamdani, orden=1))):
+        maximo, rmse = error_frente_a_mamdani(sugeno, mamdani)
+        inicio = time.perf_counter()
+        sugeno.evaluar(puntos)
+        segundos = time.perf_counter() - inicio
+        print(f"Sugeno {nombre}: {segundos:.2f} s (x{t_mamdani / segundos:.1f}), "
+              f"error máx {maximo:.2f}, RMSE {rmse:.2f}")
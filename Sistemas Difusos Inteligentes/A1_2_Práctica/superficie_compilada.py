@@ -0,0 +1,206 @@
+"""
+A1.2 Práctica - Superficie de Control Compilada
+Tabla precalculada del sistema difuso con consultas por interpolación
+
+Descripción:
+"Compila" un ctrl.ControlSystem (por ejemplo el construido con regla1..regla9)
+evaluándolo una sola vez sobre una rejilla de sus universos de entrada. Después
+cada consulta se responde con interpolación bilineal (n-lineal en general) en
+tiempo constante, sin volver a ejecutar la inferencia.
+
+- La rejilla se refina automáticamente en los intervalos donde la superficie
+  se curva y la interpolación lineal se aleja del motor exacto.
+- La tabla se guarda y se carga como .npz.
+- Se informa el error máximo observado frente al motor exacto.
+"""
+
+import numpy as np
+
+from motor_vectorizado import MotorMamdani
+
+
+# ---------------------------------------------------------
+# Índice de intervalo en O(1) para un eje no uniforme.
+# Se divide el eje en cubetas del ancho del intervalo más
+# pequeño; cada cubeta contiene a lo sumo un nodo, así que
+# basta una consulta a la tabla y una corrección de ±1.
+# ---------------------------------------------------------
+class _IndiceEje(object):
+
+    def __init__(self, eje):
+        self.eje = eje
+        self.inicio = eje[0]
+        self.ancho = np.min(np.diff(eje))
+        n_cubetas = int(np.ceil((eje[-1] - eje[0]) / self.ancho)) + 1
+        bordes = eje[0] + self.ancho * np.arange(n_cubetas)
+        self.tabla = np.clip(np.searchsorted(eje, bordes, side='right') - 1,
+                             0, eje.size - 2)
+
+    def buscar(self, x):
+        cubeta = ((x - self.inicio) / self.ancho).astype(np.intp)
+        np.clip(cubeta, 0, self.tabla.size - 1, out=cubeta)
+        idx = self.tabla[cubeta]
+        # Corrección por redondeo en los bordes de las cubetas
+        idx -= (x < self.eje[idx]) & (idx > 0)
+        idx += (x >= self.eje[idx + 1]) & (idx < self.eje.size - 2)
+        return idx
+
+
+class SuperficieCompilada(object):
+    """
+    Valores de salida precalculados sobre una rejilla rectilínea (un eje por
+    variable de entrada, en el orden de MotorMamdani.entradas).
+    """
+
+    def __init__(self, ejes, valores, entradas, salida, error_maximo=None):
+        self.ejes = [np.asarray(eje, dtype=float) for eje in ejes]
+        # Se conserva el dtype de punto flotante de la tabla: una superficie
+        # float32 abierta con np.memmap (tabla_mmap) no se copia a float64
+        self.valores = np.asarray(valores)
+        if self.valores.dtype.kind != 'f':
+            self.valores = self.valores.astype(float)
+        self.entradas = list(entradas)
+        self.salida = salida
+        self.error_maximo = error_maximo
+        self._indices = [_IndiceEje(eje) for eje in self.ejes]
+
+    # -----------------------------------------------------
+    # Evalúa el motor exacto sobre la rejilla y refina los ejes.
+    # puntos_por_eje: número inicial de nodos por variable.
+    # tolerancia: error admitido en los puntos medios; None
+    # desactiva el refinamiento.
+    # -----------------------------------------------------
+    @classmethod
+    def compilar(cls, sistema_control, puntos_por_eje=21, tolerancia=0.5,
+                 max_iteraciones=6, motor=None):
+        if motor is None:
+            motor = MotorMamdani(sistema_control)
+        if np.isscalar(puntos_por_eje):
+            puntos_por_eje = [puntos_por_eje] * len(motor.entradas)
+
+        ejes = [np.linspace(u[0], u[-1], n) for u, n in zip(motor.universos, puntos_por_eje)]
+        valores = _evaluar_rejilla(motor, ejes)
+
+        for _ in range(max_iteraciones if tolerancia is not None else 0):
+            nuevos_ejes = [_refinar_eje(motor, ejes, valores, k, tolerancia)
+                           for k in range(len(ejes))]
+            if all(nuevo.size == eje.size for nuevo, eje in zip(nuevos_ejes, ejes)):
+                break
+            ejes = nuevos_ejes
+            valores = _evaluar_rejilla(motor, ejes)
+
+        superficie = cls(ejes, valores, motor.entradas, motor.salida)
+        superficie.error_maximo = superficie.medir_error(motor)
+        return superficie
+
+    # -----------------------------------------------------
+    # Interpolación n-lineal de N consultas (matriz N x k)
+    # -----------------------------------------------------
+    def evaluar(self, entradas):
+        matriz = np.asarray(entradas, dtype=float)
+        if matriz.ndim == 1:
+            matriz = matriz.reshape(1, -1)
+
+        indices = []
+        fracciones = []
+        for k, (eje, indice) in enumerate(zip(self.ejes, self._indices)):
+            x = np.clip(matriz[:, k], eje[0], eje[-1])
+            i = indice.buscar(x)
+            indices.append(i)
+            fracciones.append((x - eje[i]) / (eje[i + 1] - eje[i]))
+
+        resultado = np.zeros(matriz.shape[0])
+        for esquina in range(2 ** len(self.ejes)):
+            peso = np.ones(matriz.shape[0])
+            posicion = []
+            for k in range(len(self.ejes)):
+                if (esquina >> k) & 1:
+                    peso *= fracciones[k]
+                    posicion.append(indices[k] + 1)
+                else:
+                    peso *= 1.0 - fracciones[k]
+                    posicion.append(indices[k])
+            resultado += peso * self.valores[tuple(posicion)]
+        return resultado
+
+    __call__ = evaluar
+
+    # -----------------------------------------------------
+    # Error absoluto máximo frente al motor exacto en los
+    # centros de todas las celdas y en puntos aleatorios
+    # -----------------------------------------------------
+    def medir_error(self, motor, n_aleatorios=20000, semilla=0):
+        centros = [(eje[:-1] + eje[1:]) / 2.0 for eje in self.ejes]
+        malla = np.meshgrid(*centros, indexing='ij')
+        puntos = np.column_stack([m.ravel() for m in malla])
+
+        rng = np.random.default_rng(semilla)
+        aleatorios = np.column_stack([rng.uniform(eje[0], eje[-1], n_aleatorios)
+                                      for eje in self.ejes])
+        puntos = np.vstack([puntos, aleatorios])
+
+        return float(np.nanmax(np.abs(self.evaluar(puntos) - motor.evaluar(puntos))))
+
+    # -----------------------------------------------------
+    # Persistencia en .npz (sin pickle)
+    # -----------------------------------------------------
+    def guardar(self, ruta):
+        ejes = {'eje_{}'.format(k): eje for k, eje in enumerate(self.ejes)}
+        np.savez_compressed(ruta, valores=self.valores,
+                            entradas=np.array(self.entradas),
+                            salida=np.array(self.salida),
+                            error_maximo=np.array(np.nan if self.error_maximo is None
+                                                  else self.error_maximo),
+                            **ejes)
+
+    @classmethod
+    def cargar(cls, ruta):
+        with np.load(ruta, allow_pickle=False) as datos:
+            entradas = [str(e) for e in datos['entradas']]
+            ejes = [datos['eje_{}'.format(k)] for k in range(len(entradas))]
+            error = float(datos['error_maximo'])
+            return cls(ejes, datos['valores'], entradas, str(datos['salida']),
+                       None if np.isnan(error) else error)
+
+
+# ---------------------------------------------------------
+# Evalúa el motor en todos los nodos de la rejilla
+# ---------------------------------------------------------
+def _evaluar_rejilla(motor, ejes):
+    malla = np.meshgrid(*ejes, indexing='ij')
+    puntos = np.column_stack([m.ravel() for m in malla])
+    return motor.evaluar(puntos).reshape(malla[0].shape)
+
+
+# ---------------------------------------------------------
+# Inserta el punto medio de cada intervalo del eje k en el que
+# la interpolación lineal (a lo largo de ese eje, sobre todas
+# las líneas de la rejilla) se aleja del motor más que la
+# tolerancia. Es ahí donde la superficie tiene más curvatura.
+# ---------------------------------------------------------
+def _refinar_eje(motor, ejes, valores, k, tolerancia):
+    eje = ejes[k]
+    medios = (eje[:-1] + eje[1:]) / 2.0
+
+    ejes_medios = list(ejes)
+    ejes_medios[k] = medios
+    exactos = _evaluar_rejilla(motor, ejes_medios)
+
+    v = np.moveaxis(valores, k, 0)
+    interpolados = (v[:-1] + v[1:]) / 2.0
+    error = np.abs(np.moveaxis(exactos, k, 0) - interpolados)
+    error = error.reshape(error.shape[0], -1)
+    error_intervalo = np.nanmax(error, axis=1)
+
+    return np.union1d(eje, medios[error_intervalo > tolerancia])
+
+
+if __name__ == "__main__":
+    from modelo_satisfaccion import construir_sistema_control
+
+    superficie = SuperficieCompilada.compilar(construir_sistema_control())
+    superficie.guardar('superficie_satisfaccion.npz')
+
+    print("Nodos por eje:", [eje.size for eje in superficie.ejes])
+    print(f"Error máximo frente al motor exacto: {superficie.error_maximo:.4f}")
+    print("Guardada: superficie_satisfaccion.npz")
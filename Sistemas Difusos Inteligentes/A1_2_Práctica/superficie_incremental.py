@@ -0,0 +1,250 @@
+"""
+A1.2 Práctica - Superficie de Control Incremental
+Reevaluación parcial de la superficie al editar conjuntos o reglas
+
+Descripción:
+Al ajustar el sistema (mover tiempo_espera['medio'], cambiar el consecuente de
+regla3, ...) no hace falta recalcular toda la superficie. SuperficieIncremental
+guarda, para cada celda de la rejilla, los grados de pertenencia, la fuerza de
+cada regla y los niveles de corte de la salida, y ante cada edición recalcula
+solo lo que puede cambiar:
+
+- Conjunto de entrada: las celdas cuya coordenada cae en el soporte del
+  conjunto antiguo o del nuevo; dentro de ellas solo las reglas que usan ese
+  término, y solo se defuzzifican las celdas cuya fuerza cambió.
+- Conjunto de salida: las celdas donde ese término tiene corte > 0.
+- Consecuente o antecedente de una regla: las celdas donde la regla dispara
+  (antes o después de la edición).
+
+Las ediciones se aplican sobre una copia privada del motor, así que el motor
+original no se modifica.
+
+Uso:
+    sup = SuperficieIncremental(motor, [np.linspace(0, 10, 1000), np.linspace(0, 60, 1000)])
+    sup.editar_conjunto('tiempo_espera', 'medio', [10, 25, 50])
+    sup.editar_consecuente('regla3', 'baja')
+    plot_surface(*sup.malla(), sup.z)
+"""
+
+import copy
+
+import numpy as np
+
+import defuzzificacion_analitica
+from definicion_difusa import membresia
+from motor_vectorizado import MotorMamdani
+
+
+def _copiar_motor(motor):
+    return MotorMamdani.desde_tablas(copy.deepcopy(motor.tablas()), motor.tamano_bloque,
+                                     analitica=motor.trapecios_salida is not None,
+                                     dispersa=motor.dispersa)
+
+
+class SuperficieIncremental(object):
+    """
+    ejes: un arreglo 1D por variable de entrada (orden de motor.entradas).
+    Las celdas son el producto cartesiano de los ejes (indexing='ij').
+    """
+
+    def __init__(self, motor, ejes):
+        self.motor = _copiar_motor(motor)
+        self.ejes = [np.asarray(eje, dtype=float) for eje in ejes]
+        if len(self.ejes) != len(self.motor.entradas):
+            raise ValueError("Se esperaba un eje por entrada: {}".format(self.motor.entradas))
+        self.forma = tuple(eje.size for eje in self.ejes)
+
+        # Índice de cada celda a lo largo de cada eje y puntos N x k
+        indices = np.meshgrid(*[np.arange(n) for n in self.forma], indexing='ij')
+        self._indice_eje = [i.ravel() for i in indices]
+        self.puntos = np.column_stack([eje[i] for eje, i in zip(self.ejes, self._indice_eje)])
+
+        self.celdas_recalculadas = 0
+        self.ediciones = 0
+        self._calcular_todo()
+
+    # -----------------------------------------------------
+    # Cálculo completo (por bloques): grados N x T, fuerza N x R,
+    # cortes N x C y salida N
+    # -----------------------------------------------------
+    def _calcular_todo(self):
+        motor = self.motor
+        n = self.puntos.shape[0]
+        self.grados = np.empty((n, motor.n_terminos))
+        self.fuerza = np.empty((n, len(motor.nombres_reglas)))
+        self.cortes = np.empty((n, len(motor.terminos_salida)))
+        self.salida = np.empty(n)
+        for inicio in range(0, n, motor.tamano_bloque):
+            bloque = slice(inicio, inicio + motor.tamano_bloque)
+            self.grados[bloque] = motor.fuzzificar(self.puntos[bloque])
+            self.fuerza[bloque] = motor.activaciones(self.grados[bloque])
+            self.cortes[bloque] = motor.cortes(self.fuerza[bloque])
+            self.salida[bloque] = self._defuzzificar(self.cortes[bloque])
+
+    def _defuzzificar(self, cortes):
+        if self.motor.trapecios_salida is not None:
+            return self.motor.defuzzificar_analitico(cortes)
+        return self.motor.defuzzificar(self.motor.agregar(cortes))
+
+    # -----------------------------------------------------
+    # Recalcula cortes y salida de las celdas indicadas
+    # -----------------------------------------------------
+    def _actualizar_salida(self, celdas):
+        paso = self.motor.tamano_bloque
+        for inicio in range(0, celdas.size, paso):
+            grupo = celdas[inicio:inicio + paso]
+            self.cortes[grupo] = self.motor.cortes(self.fuerza[grupo])
+            self.salida[grupo] = self._defuzzificar(self.cortes[grupo])
+        self.celdas_recalculadas += celdas.size
+        self.ediciones += 1
+        return celdas.size
+
+    # -----------------------------------------------------
+    # Recalcula la fuerza de 'reglas' en 'celdas' y devuelve
+    # las celdas en las que alguna fuerza cambió
+    # -----------------------------------------------------
+    def _actualizar_fuerza(self, reglas, celdas):
+        if reglas.size == 0 or celdas.size == 0:
+            return np.empty(0, dtype=np.intp)
+        nueva = self.motor.activaciones(self.grados[celdas], reglas)
+        anterior = self.fuerza[np.ix_(celdas, reglas)]
+        cambiaron = (nueva != anterior).any(axis=1)
+        self.fuerza[np.ix_(celdas, reglas)] = nueva
+        return celdas[cambiaron]
+
+    def _regla(self, regla):
+        if isinstance(regla, str):
+            return self.motor.nombres_reglas.index(regla)
+        return int(regla)
+
+    def _curva(self, universo, params, tipo, mf):
+        if mf is not None:
+            return np.asarray(mf, dtype=float)
+        return membresia(universo, {'tipo': tipo, 'params': params})
+
+    # -----------------------------------------------------
+    # Edita un conjunto de entrada o de salida. Se indica con
+    # params y tipo (como en la definición JSON) o con la curva
+    # mf muestreada en el universo. Devuelve las celdas
+    # recalculadas.
+    # -----------------------------------------------------
+    def editar_conjunto(self, variable, termino, params=None, tipo='trimf', mf=None):
+        motor = self.motor
+        if variable == motor.salida:
+            return self._editar_conjunto_salida(termino, params, tipo, mf)
+
+        k = motor.entradas.index(variable)
+        t = motor.terminos[k].index(termino)
+        columna = motor._columna[(variable, termino)]
+        universo = motor.universos[k]
+        nueva = self._curva(universo, params, tipo, mf)
+        anterior = motor.membresias[k][t].copy()
+        motor.membresias[k][t] = nueva
+        if motor.dispersa:
+            motor._indexar_zonas()
+
+        # Grados sobre el eje (barato) y celdas en el soporte de
+        # la curva antigua o de la nueva
+        eje = self.ejes[k]
+        grado_eje = np.interp(eje, universo, nueva)
+        en_soporte = (np.interp(eje, universo, anterior) > 0) | (grado_eje > 0)
+        celdas = np.flatnonzero(en_soporte[self._indice_eje[k]])
+        self.grados[celdas, columna] = grado_eje[self._indice_eje[k][celdas]]
+
+        usa = (motor.indices_reglas % motor.n_terminos == columna) \
+            & (motor.indices_reglas < 2 * motor.n_terminos)
+        # También las reglas con un grupo OR que contiene el término
+        grupos = np.flatnonzero(((motor.grupos_or % motor.n_terminos == columna)
+                                 & (motor.grupos_or < 2 * motor.n_terminos)).any(axis=1))
+        usa |= np.isin(motor.indices_reglas, 2 * motor.n_terminos + 2 + grupos)
+        reglas = np.flatnonzero(usa.any(axis=1))
+        return self._actualizar_salida(self._actualizar_fuerza(reglas, celdas))
+
+    def _editar_conjunto_salida(self, termino, params, tipo, mf):
+        motor = self.motor
+        c = motor.terminos_salida.index(termino)
+        motor.membresia_salida[c] = self._curva(motor.universo_salida, params, tipo, mf)
+        if motor.trapecios_salida is not None:
+            forma = defuzzificacion_analitica.forma_trapezoidal(motor.universo_salida,
+                                                                motor.membresia_salida[c])
+            if forma is None:
+                raise ValueError("La vía analítica requiere un conjunto triangular o trapezoidal")
+            motor.trapecios_salida[c] = forma
+        return self._actualizar_salida(np.flatnonzero(self.cortes[:, c] > 0))
+
+    # -----------------------------------------------------
+    # Sustituye el consecuente de una regla por 'termino'
+    # (con el peso indicado)
+    # -----------------------------------------------------
+    def editar_consecuente(self, regla, termino, peso=1.0):
+        r = self._regla(regla)
+        fila = np.zeros(len(self.motor.terminos_salida))
+        fila[self.motor.terminos_salida.index(termino)] = peso
+        self.motor.pesos_consecuentes[r] = fila
+        return self._actualizar_salida(np.flatnonzero(self.fuerza[:, r] > 0))
+
+    # -----------------------------------------------------
+    # Sustituye el antecedente de una regla:
+    # terminos = {variable: término}, conector 'and' u 'or'
+    # -----------------------------------------------------
+    def editar_antecedente(self, regla, terminos, conector='and'):
+        motor = self.motor
+        r = self._regla(regla)
+        columnas = [motor._columna[(variable, termino)] for variable, termino in terminos.items()]
+
+        largo = motor.indices_reglas.shape[1]
+        if len(columnas) > largo:
+            # Se ensancha la matriz con la columna neutra de cada regla
+            neutra = np.where(motor.reglas_or, 2 * motor.n_terminos + 1, 2 * motor.n_terminos)
+            relleno = np.repeat(neutra[:, None], len(columnas) - largo, axis=1)
+            motor.indices_reglas = np.concatenate([motor.indices_reglas, relleno], axis=1)
+
+        es_or = conector == 'or'
+        motor.reglas_or[r] = es_or
+        motor.indices_reglas[r] = 2 * motor.n_terminos + (1 if es_or else 0)
+        motor.indices_reglas[r, :len(columnas)] = columnas
+        if motor.dispersa:
+            motor._indexar_zonas()
+
+        celdas = np.arange(self.puntos.shape[0])
+        return self._actualizar_salida(self._actualizar_fuerza(np.array([r]), celdas))
+
+    # -----------------------------------------------------
+    # Resultados con la forma de la rejilla
+    # -----------------------------------------------------
+    @property
+    def z(self):
+        return self.salida.reshape(self.forma)
+
+    def malla(self):
+        return np.meshgrid(*self.ejes, indexing='ij')
+
+
+if __name__ == "__main__":
+    import time
+
+    from modelo_satisfaccion import cargar_motor
+
+    ejes = [np.linspace(0, 10, 1000), np.linspace(0, 60, 1000)]
+    inicio = time.perf_counter()
+    sup = SuperficieIncremental(cargar_motor(), ejes)
+    print(f"Superficie completa 1000x1000: {time.perf_counter() - inicio:.2f} s")
+
+    ediciones = [
+        ("tiempo_espera['medio'] -> [10, 25, 50]",
+         lambda: sup.editar_conjunto('tiempo_espera', 'medio', [10, 25, 50])),
+        ("calidad['regular'] -> [3, 5.5, 7]",
+         lambda: sup.editar_conjunto('calidad', 'regular', [3, 5.5, 7])),
+        ("regla3 -> satisfaccion['baja']", lambda: sup.editar_consecuente('regla3', 'baja')),
+        ("satisfaccion['alta'] -> [60, 100, 100]",
+         lambda: sup.editar_conjunto('satisfaccion', 'alta', [60, 100, 100])),
+    ]
+    for descripcion, editar in ediciones:
+        inicio = time.perf_counter()
+        celdas = editar()
+        print(f"{descripcion}: {celdas:,} celdas recalculadas en "
+              f"{time.perf_counter() - inicio:.2f} s")
+
+    completa = sup.motor.evaluar(sup.puntos)
+    print(f"Diferencia máxima frente a un recálculo completo: "
+          f"{np.nanmax(np.abs(completa - sup.salida)):.2e}")
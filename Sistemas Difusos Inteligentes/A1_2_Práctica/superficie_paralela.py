@@ -0,0 +1,145 @@
+"""
+A1.2 Práctica - Superficies y Barridos en Paralelo
+Reparto de la malla entre procesos con memoria compartida
+
+Descripción:
+Genera superficies de control de alta resolución (1000x1000 y más) y barridos
+de varias variantes del sistema repartiendo los puntos entre procesos:
+- Cada proceso construye su propio sistema (ControlSystemSimulation o
+  MotorMamdani) una sola vez, en el inicializador del pool.
+- Los puntos de entrada y la matriz de resultados viven en memoria compartida
+  (multiprocessing.shared_memory); las tareas son solo índices
+  (variante, inicio, fin), así que no se serializan bloques de datos.
+
+Uso:
+    x, y, z = superficie_paralela(np.arange(0, 11, 0.01), np.arange(0, 61, 0.06))
+"""
+
+import os
+import time
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+from modelo_satisfaccion import construir_sistema_control
+from motor_vectorizado import MotorMamdani
+
+# Estado de cada proceso trabajador
+_estado = {}
+
+
+def _inicializar(nombre_entrada, forma_entrada, nombre_salida, forma_salida,
+                 fabricas, usar_skfuzzy):
+    memoria_entrada = shared_memory.SharedMemory(name=nombre_entrada)
+    memoria_salida = shared_memory.SharedMemory(name=nombre_salida)
+    _estado['memorias'] = (memoria_entrada, memoria_salida)
+    _estado['entrada'] = np.ndarray(forma_entrada, dtype=float, buffer=memoria_entrada.buf)
+    _estado['salida'] = np.ndarray(forma_salida, dtype=float, buffer=memoria_salida.buf)
+    _estado['fabricas'] = fabricas
+    _estado['usar_skfuzzy'] = usar_skfuzzy
+    _estado['evaluadores'] = {}
+
+
+# ---------------------------------------------------------
+# Evaluador de la variante v, construido la primera vez que
+# el proceso la necesita (skfuzzy.control solo se importa si
+# se evalúa con ControlSystemSimulation)
+# ---------------------------------------------------------
+def _evaluador(v):
+    if v not in _estado['evaluadores']:
+        sistema_control = _estado['fabricas'][v]()
+        motor = MotorMamdani(sistema_control)
+        if _estado['usar_skfuzzy']:
+            from skfuzzy import control as ctrl
+
+            simulacion = ctrl.ControlSystemSimulation(sistema_control, cache=False)
+            _estado['evaluadores'][v] = _evaluador_skfuzzy(simulacion, motor.entradas, motor.salida)
+        else:
+            _estado['evaluadores'][v] = motor.evaluar
+    return _estado['evaluadores'][v]
+
+
+def _evaluador_skfuzzy(simulacion, entradas, salida):
+    def evaluar(bloque):
+        resultado = np.empty(bloque.shape[0])
+        for i, fila in enumerate(bloque):
+            for nombre, valor in zip(entradas, fila):
+                simulacion.input[nombre] = valor
+            simulacion.compute()
+            resultado[i] = simulacion.output[salida]
+        return resultado
+    return evaluar
+
+
+def _tarea(tarea):
+    v, inicio, fin = tarea
+    _estado['salida'][v, inicio:fin] = _evaluador(v)(_estado['entrada'][inicio:fin])
+    return fin - inicio
+
+
+# ---------------------------------------------------------
+# Evalúa los mismos puntos (N x k) en V variantes del sistema.
+# fabricas: lista de funciones sin argumentos que devuelven un
+# ctrl.ControlSystem (deben poder enviarse a otro proceso, p. ej.
+# funciones de módulo o functools.partial).
+# Devuelve una matriz V x N.
+# ---------------------------------------------------------
+def barrido(fabricas, puntos, procesos=None, usar_skfuzzy=False, tamano_tarea=None):
+    puntos = np.ascontiguousarray(puntos, dtype=float)
+    n = puntos.shape[0]
+    procesos = procesos or os.cpu_count() or 1
+    if tamano_tarea is None:
+        # Varias tareas por proceso para equilibrar la carga
+        tamano_tarea = max(1, -(-n // (procesos * 8)))
+        if usar_skfuzzy:
+            tamano_tarea = min(tamano_tarea, 2000)
+
+    forma_salida = (len(fabricas), n)
+    memoria_entrada = shared_memory.SharedMemory(create=True, size=max(puntos.nbytes, 1))
+    memoria_salida = shared_memory.SharedMemory(create=True, size=max(8 * n * len(fabricas), 1))
+    try:
+        np.ndarray(puntos.shape, dtype=float, buffer=memoria_entrada.buf)[:] = puntos
+
+        tareas = [(v, inicio, min(inicio + tamano_tarea, n))
+                  for v in range(len(fabricas)) for inicio in range(0, n, tamano_tarea)]
+        argumentos = (memoria_entrada.name, puntos.shape, memoria_salida.name, forma_salida,
+                      list(fabricas), usar_skfuzzy)
+        with Pool(procesos, initializer=_inicializar, initargs=argumentos) as pool:
+            for _ in pool.imap_unordered(_tarea, tareas):
+                pass
+
+        return np.ndarray(forma_salida, dtype=float, buffer=memoria_salida.buf).copy()
+    finally:
+        memoria_entrada.close()
+        memoria_entrada.unlink()
+        memoria_salida.close()
+        memoria_salida.unlink()
+
+
+# ---------------------------------------------------------
+# Evalúa N puntos con un solo sistema en paralelo
+# ---------------------------------------------------------
+def evaluar_paralelo(puntos, fabrica=construir_sistema_control, **opciones):
+    return barrido([fabrica], puntos, **opciones)[0]
+
+
+# ---------------------------------------------------------
+# Superficie de control sobre np.meshgrid(calidad_range, tiempo_range),
+# con la misma forma que en los scripts (lista para plot_surface)
+# ---------------------------------------------------------
+def superficie_paralela(calidad_range, tiempo_range, fabrica=construir_sistema_control,
+                        **opciones):
+    x, y = np.meshgrid(calidad_range, tiempo_range)
+    z = evaluar_paralelo(np.column_stack([x.ravel(), y.ravel()]), fabrica, **opciones)
+    return x, y, z.reshape(x.shape)
+
+
+if __name__ == "__main__":
+    calidad_range = np.linspace(0, 10, 1000)
+    tiempo_range = np.linspace(0, 60, 1000)
+
+    for procesos in sorted({1, os.cpu_count() or 1}):
+        inicio = time.perf_counter()
+        x, y, z = superficie_paralela(calidad_range, tiempo_range, procesos=procesos)
+        print(f"Superficie {z.shape[0]}x{z.shape[1]} con {procesos} proceso(s): "
+              f"{time.perf_counter() - inicio:.2f} s")
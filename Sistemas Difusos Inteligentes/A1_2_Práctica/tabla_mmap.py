@@ -0,0 +1,259 @@
+"""
+A1.2 Práctica - Formato Binario con Mapeo en Memoria
+Superficies de control y tablas de membresía compartidas entre procesos
+
+Descripción:
+Un archivo .tabla guarda varios arreglos de NumPy con una cabecera pequeña:
+
+    bytes 0-7     b'TABLADIF'
+    bytes 8-11    versión (uint32, little endian)
+    bytes 12-15   largo de la cabecera JSON (uint32)
+    byte  16      1 si la escritura terminó, 0 si está en curso
+    bytes 17-31   reservados
+    bytes 32-     cabecera JSON (utf-8): firma del sistema, metadatos y, por
+                  cada arreglo, su desplazamiento, forma y dtype
+    después       los datos de cada arreglo, alineados a 64 bytes
+
+La superficie (valores), sus ejes y los universos/tablas de membresía son
+arreglos con nombre dentro del mismo archivo. EscritorTabla reserva el
+archivo completo de antemano y entrega vistas np.memmap para llenarlo por
+bloques (la superficie nunca tiene que estar entera en RAM). abrir_tabla()
+devuelve vistas de solo lectura: los procesos que abren el mismo archivo
+comparten las páginas del sistema operativo, sin copias, y solo se leen las
+páginas que se consultan.
+
+Uso:
+    escribir_superficie('sup.tabla', motor, [np.linspace(0, 10, 4000),
+                                             np.linspace(0, 60, 4000)])
+    superficie = abrir_superficie('sup.tabla')   # SuperficieCompilada
+    z = superficie.evaluar(puntos)
+"""
+
+import json
+import os
+import struct
+
+import numpy as np
+
+MAGIA = b'TABLADIF'
+VERSION = 1
+_PREFIJO = struct.Struct('<8sIIB15x')
+ALINEACION = 64
+
+
+def _alinear(n):
+    return -(-n // ALINEACION) * ALINEACION
+
+
+class EscritorTabla(object):
+    """
+    arreglos: {nombre: (forma, dtype)} de todos los arreglos del archivo.
+    Se escriben con escritor[nombre][...] = datos (vistas np.memmap) y se
+    termina con cerrar(), que marca el archivo como completo.
+    """
+
+    def __init__(self, ruta, arreglos, firma=None, metadatos=None):
+        self.ruta = ruta
+        descripcion = {}
+        desplazamiento = 0
+        for nombre, (forma, dtype) in arreglos.items():
+            forma = tuple(int(n) for n in np.atleast_1d(forma))
+            dtype = np.dtype(dtype)
+            descripcion[nombre] = {'forma': forma, 'dtype': dtype.str,
+                                   'desplazamiento': desplazamiento}
+            desplazamiento = _alinear(desplazamiento + int(np.prod(forma)) * dtype.itemsize)
+
+        # Los desplazamientos absolutos dependen del largo de la cabecera,
+        # que a su vez los contiene: se itera hasta que el inicio de los
+        # datos no cambia (dos vueltas en la práctica)
+        inicio_datos = 0
+        while True:
+            absolutos = {nombre: dict(info, desplazamiento=info['desplazamiento'] + inicio_datos)
+                         for nombre, info in descripcion.items()}
+            cabecera = json.dumps({'firma': firma, 'metadatos': metadatos or {},
+                                   'arreglos': absolutos}, ensure_ascii=False).encode('utf-8')
+            nuevo_inicio = _alinear(_PREFIJO.size + len(cabecera))
+            if nuevo_inicio == inicio_datos:
+                break
+            inicio_datos = nuevo_inicio
+        descripcion = absolutos
+
+        with open(ruta, 'wb') as archivo:
+            archivo.write(_PREFIJO.pack(MAGIA, VERSION, len(cabecera), 0))
+            archivo.write(cabecera)
+            archivo.truncate(inicio_datos + desplazamiento)
+
+        self._vistas = {nombre: np.memmap(ruta, dtype=info['dtype'], mode='r+',
+                                          offset=info['desplazamiento'], shape=tuple(info['forma']))
+                        for nombre, info in descripcion.items()}
+
+    def __getitem__(self, nombre):
+        return self._vistas[nombre]
+
+    def __setitem__(self, nombre, datos):
+        self._vistas[nombre][...] = datos
+
+    def cerrar(self):
+        for vista in self._vistas.values():
+            vista.flush()
+        self._vistas = {}
+        with open(self.ruta, 'r+b') as archivo:
+            archivo.seek(16)
+            archivo.write(b'\x01')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        if tipo is None:
+            self.cerrar()
+
+
+class TablaMmap(object):
+    """
+    Archivo .tabla abierto en solo lectura: firma, metadatos y
+    arreglos[nombre] como np.memmap.
+    """
+
+    def __init__(self, ruta, firma, metadatos, arreglos):
+        self.ruta = ruta
+        self.firma = firma
+        self.metadatos = metadatos
+        self.arreglos = arreglos
+
+    def __getitem__(self, nombre):
+        return self.arreglos[nombre]
+
+
+def leer_cabecera(ruta):
+    with open(ruta, 'rb') as archivo:
+        magia, version, largo, completo = _PREFIJO.unpack(archivo.read(_PREFIJO.size))
+        if magia != MAGIA:
+            raise ValueError("{} no es un archivo .tabla".format(ruta))
+        if version != VERSION:
+            raise ValueError("Versión de .tabla no soportada: {}".format(version))
+        cabecera = json.loads(archivo.read(largo).decode('utf-8'))
+    cabecera['completo'] = bool(completo)
+    return cabecera
+
+
+def abrir_tabla(ruta, permitir_incompleto=False):
+    cabecera = leer_cabecera(ruta)
+    if not cabecera['completo'] and not permitir_incompleto:
+        raise ValueError("{} no terminó de escribirse".format(ruta))
+    arreglos = {nombre: np.memmap(ruta, dtype=info['dtype'], mode='r',
+                                  offset=info['desplazamiento'], shape=tuple(info['forma']))
+                for nombre, info in cabecera['arreglos'].items()}
+    return TablaMmap(ruta, cabecera['firma'], cabecera['metadatos'], arreglos)
+
+
+# ---------------------------------------------------------
+# Superficies de control: ejes/<k>, valores y, para poder
+# reconstruir el sistema, universo/<variable> y
+# membresia/<variable> (términos x universo)
+# ---------------------------------------------------------
+def _arreglos_motor(motor):
+    arreglos = {}
+    for nombre, universo, membresia in zip(motor.entradas, motor.universos, motor.membresias):
+        arreglos['universo/' + nombre] = universo
+        arreglos['membresia/' + nombre] = membresia
+    arreglos['universo/' + motor.salida] = motor.universo_salida
+    arreglos['membresia/' + motor.salida] = motor.membresia_salida
+    return arreglos
+
+
+def escribir_superficie(ruta, motor, ejes, dtype=np.float64, filas_por_bloque=None):
+    from cache_inferencia import firma_sistema
+
+    ejes = [np.asarray(eje, dtype=float) for eje in ejes]
+    forma = tuple(eje.size for eje in ejes)
+    tablas = _arreglos_motor(motor)
+    arreglos = {'ejes/{}'.format(k): (eje.size, np.float64) for k, eje in enumerate(ejes)}
+    arreglos.update({nombre: (valor.shape, np.float64) for nombre, valor in tablas.items()})
+    arreglos['valores'] = (forma, dtype)
+
+    metadatos = {
+        'entradas': motor.entradas,
+        'salida': motor.salida,
+        'terminos': dict(zip(motor.entradas, motor.terminos),
+                         **{motor.salida: motor.terminos_salida}),
+    }
+    with EscritorTabla(ruta, arreglos, firma_sistema(motor), metadatos) as escritor:
+        for k, eje in enumerate(ejes):
+            escritor['ejes/{}'.format(k)] = eje
+        for nombre, valor in tablas.items():
+            escritor[nombre] = valor
+
+        # Por bloques de filas del primer eje: solo un bloque en RAM
+        resto = int(np.prod(forma[1:]))
+        if filas_por_bloque is None:
+            filas_por_bloque = max(1, motor.tamano_bloque // max(resto, 1))
+        valores = escritor['valores'].reshape(forma[0], -1)
+        malla_resto = np.meshgrid(*ejes[1:], indexing='ij')
+        resto_columnas = [m.ravel() for m in malla_resto]
+        for inicio in range(0, forma[0], filas_por_bloque):
+            filas = ejes[0][inicio:inicio + filas_por_bloque]
+            puntos = np.column_stack([np.repeat(filas, resto)]
+                                     + [np.tile(c, filas.size) for c in resto_columnas])
+            valores[inicio:inicio + filas.size] = motor.evaluar(puntos).reshape(filas.size, -1)
+
+
+def abrir_superficie(ruta):
+    from superficie_compilada import SuperficieCompilada
+
+    tabla = abrir_tabla(ruta)
+    entradas = tabla.metadatos['entradas']
+    ejes = [tabla['ejes/{}'.format(k)] for k in range(len(entradas))]
+    superficie = SuperficieCompilada(ejes, tabla['valores'], entradas, tabla.metadatos['salida'])
+    superficie.firma = tabla.firma
+    return superficie
+
+
+# ---------------------------------------------------------
+# Tablas de membresía sueltas (p. ej. desviacion_sets de
+# main.py): universos {variable: x} y conjuntos
+# {variable: {término: curva}}
+# ---------------------------------------------------------
+def escribir_membresias(ruta, universos, conjuntos, firma=None):
+    arreglos = {}
+    for variable, x in universos.items():
+        arreglos['universo/' + variable] = (np.size(x), np.float64)
+        arreglos['membresia/' + variable] = ((len(conjuntos[variable]), np.size(x)), np.float64)
+    metadatos = {'terminos': {variable: list(conjuntos[variable]) for variable in universos}}
+
+    with EscritorTabla(ruta, arreglos, firma, metadatos) as escritor:
+        for variable, x in universos.items():
+            escritor['universo/' + variable] = x
+            escritor['membresia/' + variable] = np.array(list(conjuntos[variable].values()))
+
+
+def abrir_membresias(ruta):
+    tabla = abrir_tabla(ruta)
+    universos = {}
+    conjuntos = {}
+    for variable, terminos in tabla.metadatos['terminos'].items():
+        universos[variable] = tabla['universo/' + variable]
+        curvas = tabla['membresia/' + variable]
+        conjuntos[variable] = {termino: curvas[i] for i, termino in enumerate(terminos)}
+    return universos, conjuntos
+
+
+if __name__ == "__main__":
+    import time
+
+    from modelo_satisfaccion import cargar_motor
+
+    ruta = 'superficie_satisfaccion.tabla'
+    motor = cargar_motor()
+    inicio = time.perf_counter()
+    escribir_superficie(ruta, motor, [np.linspace(0, 10, 2000), np.linspace(0, 60, 2000)])
+    print(f"Escrita {ruta} ({os.path.getsize(ruta) / 2**20:.1f} MiB) en "
+          f"{time.perf_counter() - inicio:.2f} s")
+
+    inicio = time.perf_counter()
+    superficie = abrir_superficie(ruta)
+    print(f"Abierta en {(time.perf_counter() - inicio) * 1000:.2f} ms; "
+          f"firma {superficie.firma[:12]}...")
+    puntos = np.random.default_rng(0).uniform([0, 0], [10, 60], (10000, 2))
+    print(f"Error máximo de la interpolación: "
+          f"{np.abs(superficie.evaluar(puntos) - motor.evaluar(puntos)).max():.4f}")
@@ -0,0 +1,289 @@
+"""
+A1.2 Práctica - Traza de Disparo de Reglas
+Grados de pertenencia y fuerza de cada regla por cliente puntuado
+
+Descripción:
+Para auditoría se registra, por cada cliente puntuado, qué reglas (regla1 ..
+regla9) dispararon y con qué fuerza, junto con los grados de pertenencia de
+cada entrada. Los datos salen del mismo pase de inferencia: MotorMamdani y
+MotorSugeno aceptan evaluar(entradas, traza=escritor) y entregan al escritor
+los grados (N x T) y la fuerza (N x R) que ya calcularon para cada bloque,
+sin volver a llamar a compute() ni a la inferencia.
+
+Columnas de la traza (en este orden):
+    <entrada>            valor de cada entrada (float64)
+    <entrada>[<término>] grado de pertenencia (dtype, float32 por defecto)
+    <regla>              fuerza de disparo (dtype)
+    <salida>             valor nítido (float64, NaN si no disparó ninguna)
+
+La escritura es por bloques: solo el bloque en curso está en memoria. Hay
+dos formatos:
+- Parquet (.parquet, requiere pyarrow): un row group por bloque.
+- Binario (.traza): cabecera como la de .tabla y luego, por bloque, el
+  número de filas y cada columna contigua:
+
+    bytes 0-7     b'TRAZADIF'
+    bytes 8-11    versión (uint32, little endian)
+    bytes 12-15   largo de la cabecera JSON (uint32)
+    byte  16      1 si la escritura terminó, 0 si está en curso
+    bytes 17-23   reservados
+    bytes 24-31   filas totales (uint64, se escribe al cerrar)
+    bytes 32-     cabecera JSON: firma del sistema, columnas y dtypes (la
+                  misma que va en los metadatos del esquema Parquet)
+    después       bloques: filas (uint64) + columna 1 + columna 2 + ...
+
+Uso:
+    with abrir_escritor_traza('traza.traza', motor) as traza:
+        for bloque in leer_bloques('clientes.csv'):
+            motor.evaluar(bloque, traza=traza)
+
+    python puntuacion_streaming.py clientes.csv puntajes.csv --traza traza.parquet
+    python traza_disparos.py traza.parquet     # resumen por regla
+"""
+
+import json
+import struct
+import sys
+
+import numpy as np
+
+from puntuacion_streaming import _es_parquet, _importar_parquet
+
+MAGIA = b'TRAZADIF'
+CLAVE_PARQUET = b'traza_disparos'
+VERSION = 1
+_PREFIJO = struct.Struct('<8sIIB7xQ')
+_FILAS = struct.Struct('<Q')
+
+
+# ---------------------------------------------------------
+# Columnas de la traza de un motor: [(nombre, tipo, dtype)]
+# con tipo 'entrada', 'grado', 'regla' o 'salida'. Para un
+# MotorSugeno se usan los nombres de sus antecedentes.
+# ---------------------------------------------------------
+def columnas_traza(motor, dtype=np.float32):
+    motor = getattr(motor, 'antecedentes', motor)
+    dtype = np.dtype(dtype).str
+    columnas = [(nombre, 'entrada', '<f8') for nombre in motor.entradas]
+    for nombre, etiquetas in zip(motor.entradas, motor.terminos):
+        columnas += [('{}[{}]'.format(nombre, etiqueta), 'grado', dtype) for etiqueta in etiquetas]
+    columnas += [(str(nombre), 'regla', dtype) for nombre in motor.nombres_reglas]
+    columnas.append((motor.salida, 'salida', '<f8'))
+    return columnas
+
+
+class _EscritorTraza(object):
+
+    def __init__(self, motor, dtype):
+        from cache_inferencia import firma_sistema
+
+        self.columnas = columnas_traza(motor, dtype)
+        self.filas = 0
+        self.cabecera = json.dumps({
+            'firma': firma_sistema(motor),
+            'columnas': [{'nombre': nombre, 'tipo': tipo, 'dtype': tipo_dato}
+                         for nombre, tipo, tipo_dato in self.columnas],
+        }, ensure_ascii=False).encode('utf-8')
+
+    # -----------------------------------------------------
+    # Columnas del bloque en el orden de self.columnas
+    # (vistas, sin copias hasta la conversión de dtype). Un
+    # bloque con otro número de columnas que la cabecera es
+    # un error: no se trunca en silencio.
+    # -----------------------------------------------------
+    def _datos(self, entradas, grados, fuerza, salida):
+        datos = [entradas[:, k] for k in range(entradas.shape[1])]
+        datos += [grados[:, t] for t in range(grados.shape[1])]
+        datos += [fuerza[:, r] for r in range(fuerza.shape[1])]
+        datos.append(salida)
+        if len(datos) != len(self.columnas):
+            raise ValueError("El bloque tiene {} columnas ({} entradas, {} grados, {} reglas y "
+                             "la salida); la traza espera {}"
+                             .format(len(datos), entradas.shape[1], grados.shape[1],
+                                     fuerza.shape[1], len(self.columnas)))
+        return [np.ascontiguousarray(columna, dtype=dtype)
+                for columna, (_, _, dtype) in zip(datos, self.columnas)]
+
+    def escribir(self, entradas, grados, fuerza, salida):
+        if entradas.shape[0]:
+            self._escribir(self._datos(entradas, grados, fuerza, salida))
+            self.filas += entradas.shape[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        if tipo is None:
+            self.cerrar()
+        else:
+            self.abortar()
+
+
+class EscritorTrazaBinaria(_EscritorTraza):
+
+    def __init__(self, ruta, motor, dtype=np.float32):
+        super(EscritorTrazaBinaria, self).__init__(motor, dtype)
+        self.archivo = open(ruta, 'wb')
+        self.archivo.write(_PREFIJO.pack(MAGIA, VERSION, len(self.cabecera), 0, 0))
+        self.archivo.write(self.cabecera)
+
+    def _escribir(self, columnas):
+        self.archivo.write(_FILAS.pack(columnas[0].size))
+        for columna in columnas:
+            self.archivo.write(columna.data)
+
+    def cerrar(self):
+        self.archivo.seek(0)
+        self.archivo.write(_PREFIJO.pack(MAGIA, VERSION, len(self.cabecera), 1, self.filas))
+        self.archivo.close()
+
+    # Cierra sin marcar la traza como completa (los bloques ya
+    # escritos se pueden leer con permitir_incompleto=True)
+    def abortar(self):
+        self.archivo.close()
+
+
+class EscritorTrazaParquet(_EscritorTraza):
+
+    def __init__(self, ruta, motor, dtype=np.float32):
+        super(EscritorTrazaParquet, self).__init__(motor, dtype)
+        self.pa, pq = _importar_parquet()
+        esquema = self.pa.schema([(nombre, self.pa.from_numpy_dtype(np.dtype(tipo_dato)))
+                                  for nombre, _, tipo_dato in self.columnas],
+                                 metadata={CLAVE_PARQUET: self.cabecera})
+        self.escritor = pq.ParquetWriter(ruta, esquema)
+
+    def _escribir(self, columnas):
+        self.escritor.write_table(self.pa.Table.from_arrays(columnas,
+                                                            schema=self.escritor.schema))
+
+    def cerrar(self):
+        self.escritor.close()
+
+    abortar = cerrar
+
+
+# ---------------------------------------------------------
+# Escritor según la extensión: .parquet o binario
+# ---------------------------------------------------------
+def abrir_escritor_traza(ruta, motor, dtype=np.float32):
+    if _es_parquet(ruta):
+        return EscritorTrazaParquet(ruta, motor, dtype)
+    return EscritorTrazaBinaria(ruta, motor, dtype)
+
+
+# ---------------------------------------------------------
+# Cabecera JSON (firma y columnas). En Parquet va en los
+# metadatos del esquema; filas sale del pie del archivo.
+# ---------------------------------------------------------
+def leer_cabecera(ruta):
+    if _es_parquet(ruta):
+        _, pq = _importar_parquet()
+        metadatos = pq.ParquetFile(ruta).metadata
+        cabecera = json.loads(metadatos.metadata[CLAVE_PARQUET].decode('utf-8'))
+        cabecera['completo'] = True
+        cabecera['filas'] = metadatos.num_rows
+        return cabecera
+
+    with open(ruta, 'rb') as archivo:
+        magia, version, largo, completo, filas = _PREFIJO.unpack(archivo.read(_PREFIJO.size))
+        if magia != MAGIA:
+            raise ValueError("{} no es un archivo de traza".format(ruta))
+        if version != VERSION:
+            raise ValueError("Versión de traza no soportada: {}".format(version))
+        cabecera = json.loads(archivo.read(largo).decode('utf-8'))
+    cabecera['completo'] = bool(completo)
+    cabecera['filas'] = filas
+    cabecera['inicio_datos'] = _PREFIJO.size + largo
+    return cabecera
+
+
+# ---------------------------------------------------------
+# Lectura por bloques: genera dicts {columna: arreglo} con
+# las columnas pedidas (todas por defecto). En el formato
+# binario se saltan las demás columnas sin leerlas; una traza
+# sin cerrar solo se lee con permitir_incompleto=True.
+# ---------------------------------------------------------
+def leer_traza(ruta, columnas=None, permitir_incompleto=False):
+    if _es_parquet(ruta):
+        _, pq = _importar_parquet()
+        archivo = pq.ParquetFile(ruta)
+        for grupo in range(archivo.num_row_groups):
+            tabla = archivo.read_row_group(grupo, columns=columnas)
+            yield {nombre: tabla.column(nombre).to_numpy() for nombre in tabla.column_names}
+        return
+
+    cabecera = leer_cabecera(ruta)
+    if not cabecera['completo'] and not permitir_incompleto:
+        raise ValueError("{} no terminó de escribirse".format(ruta))
+    descripcion = [(c['nombre'], np.dtype(c['dtype'])) for c in cabecera['columnas']]
+    pedidas = set(nombre for nombre, _ in descripcion) if columnas is None else set(columnas)
+    with open(ruta, 'rb') as archivo:
+        archivo.seek(cabecera['inicio_datos'])
+        while True:
+            prefijo = archivo.read(_FILAS.size)
+            if len(prefijo) < _FILAS.size:
+                return
+            filas, = _FILAS.unpack(prefijo)
+            bloque = {}
+            for nombre, dtype in descripcion:
+                if nombre in pedidas:
+                    bloque[nombre] = np.fromfile(archivo, dtype=dtype, count=filas)
+                    if bloque[nombre].size < filas:
+                        return
+                else:
+                    archivo.seek(filas * dtype.itemsize, 1)
+            yield bloque
+
+
+# ---------------------------------------------------------
+# Traza completa en memoria (para trazas que caben en RAM)
+# ---------------------------------------------------------
+def cargar_traza(ruta, columnas=None, permitir_incompleto=False):
+    bloques = list(leer_traza(ruta, columnas, permitir_incompleto))
+    if not bloques:
+        return {}
+    return {nombre: np.concatenate([bloque[nombre] for bloque in bloques])
+            for nombre in bloques[0]}
+
+
+# ---------------------------------------------------------
+# Resumen por regla recorriendo la traza por bloques:
+# {regla: (fracción de filas en que disparó, fuerza media
+# cuando disparó, fuerza máxima)} y filas totales
+# ---------------------------------------------------------
+def resumir_traza(ruta, reglas=None):
+    if reglas is None:
+        reglas = [c['nombre'] for c in leer_cabecera(ruta)['columnas'] if c['tipo'] == 'regla']
+    filas = 0
+    disparos = dict.fromkeys(reglas, 0)
+    suma = dict.fromkeys(reglas, 0.0)
+    maximo = dict.fromkeys(reglas, 0.0)
+    for bloque in leer_traza(ruta, reglas, permitir_incompleto=True):
+        filas += bloque[reglas[0]].size if reglas else 0
+        for nombre in reglas:
+            fuerza = bloque[nombre]
+            disparos[nombre] += int(np.count_nonzero(fuerza > 0))
+            suma[nombre] += float(fuerza.sum(dtype=np.float64))
+            if fuerza.size:
+                maximo[nombre] = max(maximo[nombre], float(fuerza.max()))
+    resumen = {nombre: (disparos[nombre] / filas if filas else 0.0,
+                        suma[nombre] / disparos[nombre] if disparos[nombre] else 0.0,
+                        maximo[nombre])
+               for nombre in reglas}
+    return resumen, filas
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python traza_disparos.py traza.traza|traza.parquet")
+        return
+    resumen, filas = resumir_traza(sys.argv[1])
+    print(f"Filas: {filas}")
+    print("{:<12} {:>9} {:>12} {:>9}".format('regla', 'disparos', 'fuerza media', 'máxima'))
+    for nombre, (fraccion, media, maximo) in resumen.items():
+        print(f"{nombre:<12} {fraccion:>9.2%} {media:>12.3f} {maximo:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""
+Benchmarks - Sistemas Difusos Inteligentes
+Medición reproducible de membresía, inferencia y superficies de control
+
+Descripción:
+Mide los puntos calientes de los dos proyectos:
+- Funciones de membresía del robot (membresia.py): el kernel
+  evaluar_conjuntos con una familia de conjuntos en una pasada (con buffers
+  preasignados) frente a la misma familia conjunto por conjunto con
+  triangular_membership/trapezoidal_membership, como antes del kernel
+- Una inferencia aislada con ControlSystemSimulation.compute() del sistema
+  de satisfacción
+- La superficie de control completa en varias mallas, con el motor
+  vectorizado (denso y disperso) y, en la malla de los scripts, celda por
+  celda con skfuzzy
+- El arranque de un proceso que solo puntúa una fila (import de
+  modelo_satisfaccion + motor desde la caché), sin cargar skfuzzy, scipy ni
+  matplotlib. El objetivo es relativo a la máquina: el p50 de un proceso que
+  solo hace "import numpy", medido en la misma ejecución, más
+  MARGEN_ARRANQUE_MS
+
+Para cada caso se informa latencia por llamada (p50, p90, p99, media, mín;
+p99 solo con al menos MIN_REPETICIONES_P99 repeticiones, si no queda null),
+rendimiento (elementos por segundo) y memoria pico (tracemalloc, en una
+ejecución aparte para no alterar los tiempos). Los resultados se guardan en
+JSON junto con el commit y las versiones, y --comparar marca como regresión
+todo caso cuyo p50 empeore más que --umbral respecto a otra ejecución.
+
+Uso:
+    python benchmark.py                              # guarda resultados/<commit>.json
+    python benchmark.py --rapido --salida actual.json
+    python benchmark.py --comparar resultados/abc1234.json --umbral 0.2
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'A1_2_Práctica'))
+sys.path.insert(0, os.path.join(RAIZ, 'conjuntos_difusos_robot', 'src'))
+
+import membresia  # noqa: E402
+from modelo_satisfaccion import construir_sistema_control  # noqa: E402
+from motor_vectorizado import MotorMamdani  # noqa: E402
+
+SEMILLA = 0
+MIN_REPETICIONES_P99 = 100
+DIRECTORIO_A1_2 = os.path.join(RAIZ, 'A1_2_Práctica')
+
+# Margen de arranque (p50) de un trabajo que solo puntúa sobre
+# el de un proceso que solo importa numpy
+MARGEN_ARRANQUE_MS = 100
+
+# Familia de conjuntos de los casos de membresía: hombros,
+# triángulos y trapecios sobre 0..100
+FAMILIA_MEMBRESIA = [[0, 0, 10, 25], [10, 25, 40], [25, 50, 75], [60, 75, 90], [75, 90, 100, 100]]
+
+
+# ---------------------------------------------------------
+# Mide funcion() 'repeticiones' veces (tras 'calentamiento'
+# llamadas) y la memoria pico de una llamada adicional.
+# elementos: unidades procesadas por llamada (puntos, celdas)
+# ---------------------------------------------------------
+def medir(funcion, repeticiones, elementos=1, calentamiento=3):
+    for _ in range(calentamiento):
+        funcion()
+
+    tiempos = np.empty(repeticiones)
+    for i in range(repeticiones):
+        inicio = time.perf_counter_ns()
+        funcion()
+        tiempos[i] = time.perf_counter_ns() - inicio
+    tiempos_us = tiempos / 1000.0
+
+    tracemalloc.start()
+    funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    media_s = tiempos_us.mean() / 1e6
+    return {
+        'repeticiones': repeticiones,
+        'elementos': elementos,
+        'p50_us': float(np.percentile(tiempos_us, 50)),
+        'p90_us': float(np.percentile(tiempos_us, 90)),
+        'p99_us': (float(np.percentile(tiempos_us, 99))
+                   if repeticiones >= MIN_REPETICIONES_P99 else None),
+        'media_us': float(tiempos_us.mean()),
+        'min_us': float(tiempos_us.min()),
+        'elementos_por_s': elementos / media_s if media_s > 0 else float('inf'),
+        'memoria_pico_kb': pico / 1024.0,
+    }
+
+
+# ---------------------------------------------------------
+# Casos: {nombre: función que prepara y mide}. Los nombres
+# no construyen nada; sistemas, motores y simulaciones se
+# crean al medir el primer caso que los usa, así --filtro
+# no paga la preparación de los casos que descarta.
+#
+# Las interfaces de un solo conjunto de membresia.py llaman
+# todas al mismo kernel: se mide el kernel con una familia
+# completa y, como referencia, la familia conjunto por
+# conjunto.
+# ---------------------------------------------------------
+def casos_membresia(rapido):
+    repeticiones = 200 if rapido else 2000
+    x = np.linspace(0, 100, 1001)
+    elementos = x.size * len(FAMILIA_MEMBRESIA)
+
+    def medir_kernel():
+        params = membresia.parametros_trapecio(FAMILIA_MEMBRESIA)
+        out = np.empty((params.shape[0], x.size))
+        trabajo = np.empty_like(out)
+        return medir(lambda: membresia.evaluar_conjuntos(x, params, out, trabajo),
+                     repeticiones, elementos)
+
+    def por_conjunto():
+        return [membresia.triangular_membership(x, p) if len(p) == 3
+                else membresia.trapezoidal_membership(x, p) for p in FAMILIA_MEMBRESIA]
+
+    return {
+        'membresia/familia_kernel': medir_kernel,
+        'membresia/familia_por_conjunto': lambda: medir(por_conjunto, repeticiones, elementos),
+    }
+
+
+def caso_compute(rapido):
+    def medir_compute():
+        from skfuzzy import control as ctrl
+
+        simulacion = ctrl.ControlSystemSimulation(construir_sistema_control())
+        rng = np.random.default_rng(SEMILLA)
+        entradas = iter(np.column_stack([rng.uniform(0, 10, 100000),
+                                         rng.uniform(0, 60, 100000)]).tolist())
+
+        def una_inferencia():
+            calidad, tiempo = next(entradas)
+            simulacion.input['calidad'] = calidad
+            simulacion.input['tiempo_espera'] = tiempo
+            simulacion.compute()
+            return simulacion.output['satisfaccion']
+
+        return medir(una_inferencia, 100 if rapido else 1000)
+
+    return {'inferencia/compute': medir_compute}
+
+
+def _superficie_motor(motor, n):
+    calidad_range = np.linspace(0, 10, n)
+    tiempo_range = np.linspace(0, 60, n)
+
+    def generar():
+        x, y = np.meshgrid(calidad_range, tiempo_range)
+        return motor.evaluar(np.column_stack([x.ravel(), y.ravel()])).reshape(x.shape)
+
+    return generar
+
+
+def _superficie_skfuzzy(sistema_control):
+    from skfuzzy import control as ctrl
+
+    # Misma malla y mismo bucle que tenían los scripts de la práctica
+    calidad_range = np.arange(0, 11, 0.5)
+    tiempo_range = np.arange(0, 61, 2)
+
+    def generar():
+        simulacion = ctrl.ControlSystemSimulation(sistema_control)
+        x, y = np.meshgrid(calidad_range, tiempo_range)
+        z = np.zeros_like(x)
+        for i in range(x.shape[0]):
+            for j in range(x.shape[1]):
+                simulacion.input['calidad'] = x[i, j]
+                simulacion.input['tiempo_espera'] = y[i, j]
+                simulacion.compute()
+                z[i, j] = simulacion.output['satisfaccion']
+        return z
+
+    return generar, calidad_range.size * tiempo_range.size
+
+
+def casos_superficie(rapido):
+    preparado = {}
+
+    # Sistema y motores compartidos por todas las mallas
+    def preparar(clave):
+        if not preparado:
+            preparado['sistema'] = construir_sistema_control()
+            preparado['denso'] = MotorMamdani(preparado['sistema'])
+            preparado['disperso'] = MotorMamdani(preparado['sistema'], dispersa=True)
+        return preparado[clave]
+
+    def medir_skfuzzy():
+        generar, celdas = _superficie_skfuzzy(preparar('sistema'))
+        return medir(generar, 2 if rapido else 5, celdas, 1)
+
+    mallas = (21, 101, 501) if rapido else (21, 101, 501, 1001)
+    casos = {}
+    for n in mallas:
+        repeticiones = max(3, min(200, 2000000 // (n * n)))
+        if rapido:
+            repeticiones = max(3, repeticiones // 10)
+        casos['superficie/motor_{}x{}'.format(n, n)] = (
+            lambda n=n, r=repeticiones: medir(_superficie_motor(preparar('denso'), n), r, n * n, 1))
+        casos['superficie/motor_disperso_{}x{}'.format(n, n)] = (
+            lambda n=n, r=repeticiones: medir(_superficie_motor(preparar('disperso'), n),
+                                              r, n * n, 1))
+
+    casos['superficie/skfuzzy_22x31'] = medir_skfuzzy
+    return casos
+
+
+# ---------------------------------------------------------
+# Arranque en frío de un proceso que puntúa una fila. El
+# proceso falla si la ruta de puntuación carga módulos
+# pesados. El objetivo se fija sobre el arranque de
+# "import numpy" medido con las mismas repeticiones.
+# ---------------------------------------------------------
+def caso_arranque(rapido):
+    codigo = ("import sys, modelo_satisfaccion as m; m.puntuar([[9, 10]]); "
+              "pesados = [n for n in ('skfuzzy', 'scipy', 'matplotlib') if n in sys.modules]; "
+              "sys.exit('Se importaron: ' + ', '.join(pesados) if pesados else 0)")
+
+    def arrancar(codigo=codigo):
+        subprocess.run([sys.executable, '-c', codigo], cwd=DIRECTORIO_A1_2, check=True)
+
+    def medir_arranque():
+        repeticiones = 5 if rapido else 20
+        base = medir(lambda: arrancar('import numpy'), repeticiones, calentamiento=1)
+        resultado = medir(arrancar, repeticiones, calentamiento=1)
+        resultado['base_us'] = base['p50_us']
+        resultado['objetivo_us'] = base['p50_us'] + MARGEN_ARRANQUE_MS * 1000.0
+        return resultado
+
+    return {'arranque/puntuacion_una_fila': medir_arranque}
+
+
+def todos_los_casos(rapido):
+    casos = {}
+    casos.update(casos_membresia(rapido))
+    casos.update(caso_compute(rapido))
+    casos.update(casos_superficie(rapido))
+    casos.update(caso_arranque(rapido))
+    return casos
+
+
+# ---------------------------------------------------------
+# Metadatos de la ejecución (para comparar entre commits)
+# ---------------------------------------------------------
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadatos(rapido):
+    versiones = {'python': platform.python_version(), 'numpy': np.__version__}
+    try:
+        import skfuzzy
+        versiones['skfuzzy'] = skfuzzy.__version__
+    except ImportError:
+        pass
+    return {
+        'commit': _commit(),
+        'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'plataforma': platform.platform(),
+        'procesador': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+        'versiones': versiones,
+        'rapido': rapido,
+    }
+
+
+def ejecutar(filtro=None, rapido=False):
+    resultados = {}
+    for nombre, caso in todos_los_casos(rapido).items():
+        if filtro and filtro not in nombre:
+            continue
+        resultados[nombre] = caso()
+        r = resultados[nombre]
+        marca = ''
+        if 'objetivo_us' in r and r['p50_us'] > r['objetivo_us']:
+            marca = '  <-- SUPERA EL OBJETIVO ({:.0f} ms)'.format(r['objetivo_us'] / 1000.0)
+        if 'base_us' in r:
+            marca = '   (import numpy {:.1f} ms){}'.format(r['base_us'] / 1000.0, marca)
+        p99 = f"{r['p99_us']:12.1f}" if r['p99_us'] is not None else f"{'—':>12s}"
+        print(f"{nombre:38s} p50 {r['p50_us']:12.1f} µs   p99 {p99} µs   "
+              f"{r['elementos_por_s']:14,.0f} elem/s   {r['memoria_pico_kb']:10.1f} KiB{marca}")
+    return {'metadatos': metadatos(rapido), 'casos': resultados}
+
+
+def objetivos_incumplidos(resultados):
+    return [nombre for nombre, r in resultados['casos'].items()
+            if 'objetivo_us' in r and r['p50_us'] > r['objetivo_us']]
+
+
+# ---------------------------------------------------------
+# Compara dos ejecuciones por p50. Devuelve la lista de
+# casos cuyo p50 empeoró más que 'umbral' (0.2 = 20 %).
+# ---------------------------------------------------------
+def comparar(base, actual, umbral=0.2):
+    regresiones = []
+    print(f"\nComparación con {base['metadatos'].get('commit')} (umbral {umbral:.0%}):")
+    for nombre, r in actual['casos'].items():
+        if nombre not in base['casos']:
+            print(f"  {nombre:38s} (nuevo)")
+            continue
+        razon = r['p50_us'] / base['casos'][nombre]['p50_us']
+        marca = ''
+        if razon > 1 + umbral:
+            marca = '  <-- REGRESIÓN'
+            regresiones.append(nombre)
+        print(f"  {nombre:38s} x{razon:6.2f}{marca}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de membresía, inferencia y "
+                                                 "superficies de control.")
+    parser.add_argument('--salida', help="archivo JSON de resultados "
+                                         "(por defecto resultados/<commit>.json)")
+    parser.add_argument('--comparar', help="JSON de una ejecución anterior")
+    parser.add_argument('--umbral', type=float, default=0.2,
+                        help="empeoramiento relativo del p50 que cuenta como regresión")
+    parser.add_argument('--filtro', help="solo los casos cuyo nombre contiene este texto")
+    parser.add_argument('--rapido', action='store_true', help="menos repeticiones y mallas")
+    args = parser.parse_args()
+
+    actual = ejecutar(args.filtro, args.rapido)
+
+    salida = args.salida
+    if salida is None:
+        directorio = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resultados')
+        os.makedirs(directorio, exist_ok=True)
+        salida = os.path.join(directorio, '{}.json'.format(actual['metadatos']['commit']
+                                                           or 'sin_commit'))
+    with open(salida, 'w', encoding='utf-8') as archivo:
+        json.dump(actual, archivo, indent=2, ensure_ascii=False)
+    print(f"\nResultados guardados en {salida}")
+
+    fallos = objetivos_incumplidos(actual)
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as archivo:
+            base = json.load(archivo)
+        fallos += comparar(base, actual, args.umbral)
+    if fallos:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,77 +1,103 @@
+# -*- coding: utf-8 -*-
+# Requisitos: pip install numpy matplotlib
+#
+# Uso:
+#   python LineFollowin_fuzzy.py                 # muestra cada figura en una ventana
+#   python LineFollowin_fuzzy.py --sin-ventanas  # las figuras se dibujan fuera de
+#                                                # pantalla y se guardan en un hilo
+#                                                # de fondo (mismo ReporteDiferido
+#                                                # que main.py, ver compartidos.py)
+
 import numpy as np
-import matplotlib.pyplot as plt
 #*********************************************************
 #                                                        *
 #  FUNCIONES PRINCIPALES PARA LOS GRADOS DE MEMBRESIA
+#  (biblioteca común membresia.py, compartida con main.py)
 #                                                        *
 #*********************************************************
 
-# Función trapezoidal
-def trapezoidal(x, a, b, c, d):
-    return np.maximum(np.minimum(np.minimum((x - a)/(b - a + 1e-6), 1), (d - x)/(d - c + 1e-6)), 0)
-
-# Función triangular
-def triangular(x, a, b, c):
-    return np.maximum(np.minimum((x - a)/(b - a + 1e-6), (c - x)/(c - b + 1e-6)), 0)
+from membresia import evaluar_conjuntos
+from compartidos import cargar_definicion, conjuntos, reporte_figuras
 
-# Rango de reflexión
-x = np.linspace(0, 1.0, 500)
+# Conjuntos de reflexión y distancia: definiciones/seguidor_linea.json, los
+# mismos que usa controlador_seguidor.py
+ENTRADAS = cargar_definicion('seguidor_linea.json')['entradas']
 
 #*********************************************************
 #                                                        *
 #*********************************************************
 
+
 #GRAFICAMOS LOS DATOS DE LA REFLEXION
+def figura_reflexion(reporte):
+    # Rango de reflexión
+    x = np.linspace(0, 1.0, 500)
+
+    # Definición de funciones de membresía para el sensor de REFLEXION
+    # (los cuatro conjuntos se evalúan en una sola pasada)
+    # (Low y High trapezoidales, Gray y DarkGray triangulares)
+    params = conjuntos(ENTRADAS['reflexion'])
+    low, gray, dark_gray, high = evaluar_conjuntos(x, [params[nombre] for nombre in
+                                                       ('Low', 'Gray', 'DarkGray', 'High')])
 
-# Definición de funciones de membresía para el sensor de REFLEXION
-low = trapezoidal(x, 0.0, 0.1, 0.2, 0.3)       # Low (trapezoidal)
-gray = triangular(x, 0.2, 0.4, 0.5)            # Gray (triangular)
-dark_gray = triangular(x, 0.4, 0.6, 0.8)       # DarkGray (triangular)
-high = trapezoidal(x, 0.7, 0.8, 0.9, 1.0)      # High (trapezoidal)
-
-# Graficar todas las funciones en una sola figura
-plt.figure(figsize=(10, 6))
-plt.plot(x, low, label='Low', color='blue')
-plt.plot(x, gray, label='Gray', color='green')
-plt.plot(x, dark_gray, label='DarkGray', color='orange')
-plt.plot(x, high, label='High', color='red')
-
-# Configuración del gráfico
-plt.title('Funciones de membresía para Reflexión')
-plt.xlabel('Reflexión')
-plt.ylabel('Grado de pertenencia')
-plt.ylim(0, 1.1)
-plt.grid(True)
-plt.legend()
-plt.tight_layout()
-plt.show()
+    # Graficar todas las funciones en una sola figura
+    def dibujar(fig):
+        ax = fig.add_subplot(111)
+        ax.plot(x, low, label='Low', color='blue')
+        ax.plot(x, gray, label='Gray', color='green')
+        ax.plot(x, dark_gray, label='DarkGray', color='orange')
+        ax.plot(x, high, label='High', color='red')
+
+        # Configuración del gráfico
+        ax.set_title('Funciones de membresía para Reflexión')
+        ax.set_xlabel('Reflexión')
+        ax.set_ylabel('Grado de pertenencia')
+        ax.set_ylim(0, 1.1)
+        ax.grid(True)
+        ax.legend()
+        fig.tight_layout()
+
+    reporte.agregar('reflexion_membresia.png', dibujar, (10, 6))
 
 
 #GRAFICAMOS LOS DATOS DE LA DISTANCIA
+def figura_distancia(reporte):
+    # Rango de distancia
+    x = np.linspace(0, 200, 400)
+
+    # Definición de funciones
+    # (triangulares salvo Muy lejos, trapezoidal)
+    params = conjuntos(ENTRADAS['distancia'])
+    muy_cerca, cerca, media, lejos, muy_lejos = evaluar_conjuntos(x, [
+        params[nombre] for nombre in ('Muy cerca', 'Cerca', 'Media', 'Lejos', 'Muy lejos')])
+
+    # Graficar
+    def dibujar(fig):
+        ax = fig.add_subplot(111)
+        ax.plot(x, muy_cerca, label='Muy cerca')
+        ax.plot(x, cerca, label='Cerca')
+        ax.plot(x, media, label='Distancia media')
+        ax.plot(x, lejos, label='Lejos')
+        ax.plot(x, muy_lejos, label='Muy lejos')
+
+        # Configuración
+        ax.set_title('Funciones de membresía (Triangulares y Trapezoidales)')
+        ax.set_xlabel('Distancia (cm)')
+        ax.set_ylabel('Grado de pertenencia')
+        ax.set_ylim(0, 1.1)
+        ax.legend()
+        ax.grid(True)
+
+    reporte.agregar('distancia_membresia.png', dibujar, (10, 6))
+
+
+def main():
+    reporte = reporte_figuras()
+    figura_reflexion(reporte)
+    figura_distancia(reporte)
+    for ruta in reporte.esperar():
+        print("Guardada:", ruta)
+
 
-# Rango de distancia
-x = np.linspace(0, 200, 400)
-
-# Definición de funciones
-muy_cerca = triangular(x, 0.0, 0.0, 10)          # triangular
-cerca = triangular(x, 8, 15, 20)                 # triangular
-media = triangular(x, 15, 25.5, 30)              # triangular
-lejos = triangular(x, 25, 40.5, 50)              # triangular
-muy_lejos = trapezoidal(x, 45, 60, 200, 200)     # trapezoidal
-
-# Graficar
-plt.figure(figsize=(10, 6))
-plt.plot(x, muy_cerca, label='Muy cerca')
-plt.plot(x, cerca, label='Cerca')
-plt.plot(x, media, label='Distancia media')
-plt.plot(x, lejos, label='Lejos')
-plt.plot(x, muy_lejos, label='Muy lejos')
-
-# Configuración
-plt.title('Funciones de membresía (Triangulares y Trapezoidales)')
-plt.xlabel('Distancia (cm)')
-plt.ylabel('Grado de pertenencia')
-plt.ylim(0, 1.1)
-plt.legend()
-plt.grid(True)
-plt.show()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
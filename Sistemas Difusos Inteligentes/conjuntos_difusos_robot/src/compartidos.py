@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+# Requisitos: pip install numpy (matplotlib solo para dibujar)
+#
+# Acceso desde los scripts del robot a los módulos compartidos que viven en
+# A1_2_Práctica (graficas_diferidas, tabla_mmap, instrumentacion).
+#
+# reporte_figuras() devuelve el ReporteDiferido de graficas_diferidas, el
+# mismo que usan los scripts de A1_2: con --sin-ventanas las figuras se
+# dibujan fuera de pantalla y se guardan en un hilo de fondo; sin la opción
+# se guardan y se muestran en ventanas (backend por defecto de matplotlib).
+#
+# Los conjuntos del robot se describen una sola vez en definiciones/*.json
+# (formato de definicion_difusa): robot.json para main.py y
+# seguidor_linea.json para LineFollowin_fuzzy.py y controlador_seguidor.py.
+# cargar_definicion(), conjuntos() y universo() los leen sin importar
+# scikit-fuzzy.
+
+import json
+import os
+import sys
+
+import numpy as np
+
+DIRECTORIO_DEFINICIONES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                                       'definiciones')
+
+
+# ---------------------------------------------------------
+# Agrega A1_2_Práctica a sys.path
+# ---------------------------------------------------------
+def usar_a1_2():
+    ruta = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'A1_2_Práctica')
+    if ruta not in sys.path:
+        sys.path.insert(0, ruta)
+
+
+def reporte_figuras(argv=None, dpi=200):
+    usar_a1_2()
+    from graficas_diferidas import ReporteDiferido
+
+    argv = sys.argv if argv is None else argv
+    return ReporteDiferido(dpi=dpi, interactivo='--sin-ventanas' not in argv, backend=None)
+
+
+def cargar_definicion(nombre):
+    with open(os.path.join(DIRECTORIO_DEFINICIONES, nombre), encoding='utf-8') as archivo:
+        return json.load(archivo)
+
+
+# ---------------------------------------------------------
+# {término: [a, b, c(, d)]} de una variable de la definición
+# ---------------------------------------------------------
+def conjuntos(variable):
+    return {nombre: list(conjunto['params']) for nombre, conjunto in variable['conjuntos'].items()}
+
+
+# ---------------------------------------------------------
+# Universo discreto inicio..fin (incluido), como
+# definicion_difusa.universo_variable
+# ---------------------------------------------------------
+def universo(variable):
+    u = variable['universo']
+    return np.linspace(u['inicio'], u['fin'], int(round((u['fin'] - u['inicio']) / u['paso'])) + 1)
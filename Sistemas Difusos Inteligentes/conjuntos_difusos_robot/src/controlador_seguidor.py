@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+# Requisitos: pip install numpy
+#
+# Controlador difuso del seguidor de línea para el bucle de control del robot.
+#
+# Entradas:  reflexión (0..1) y distancia (0..200 cm)
+# Salida:    ángulo de giro (0..180°)
+# Conjuntos y reglas: definiciones/seguidor_linea.json, la misma fuente que
+# dibuja LineFollowin_fuzzy.py (ángulo: los conjuntos de main.py).
+#
+# Todo lo que no depende de la lectura se precalcula al construir el objeto
+# (parámetros, tabla de reglas, curvas de salida y buffers). En cada tick:
+# - los grados de pertenencia se calculan con aritmética escalar de Python,
+# - se omiten las reglas cuyo conjunto de reflexión tiene grado cero,
+# - la agregación y el centroide escriben en buffers preasignados
+#   (no se crea ningún arreglo de NumPy por tick).
+#
+# Las lecturas se recortan al tramo donde algún conjunto vale 1: del
+# hombro del primero al del último (reflexión 0.1..0.9, distancia 0..200).
+# En los extremos del soporte (reflexión 0 y 1, negro o blanco a fondo)
+# Low y High valen 0, así que recortar ahí dejaría el giro congelado.
+# estadisticas() informa cuántos ticks se recortaron ("saturadas") y en
+# cuántos no disparó ninguna regla ("sin_disparo") y se mantuvo el ángulo
+# anterior.
+#
+# evaluar_lote() es la versión vectorizada para análisis fuera de línea
+# (millones de lecturas por bloques); da el mismo resultado que paso() salvo
+# que devuelve NaN donde ninguna regla dispara.
+#
+# paso_medido() registra la duración de cada tick en un buffer circular para
+# obtener p50/p99 y comprobar que cabe en un periodo de control de 1 ms.
+
+import time
+
+import numpy as np
+
+from compartidos import cargar_definicion, conjuntos, universo
+from membresia import evaluar_conjuntos, parametros_trapecio
+
+
+# ---------------------------------------------------------
+# Conjuntos y reglas del seguidor desde
+# definiciones/seguidor_linea.json (la misma fuente que
+# dibuja LineFollowin_fuzzy.py). Devuelve los argumentos de
+# ControladorSeguidor: params_reflexion, params_distancia,
+# params_angulo, tabla_reglas (tabla[reflexión][distancia] =
+# ángulo) y universo_angulo.
+# Reglas: cuanto más se aleja la reflexión del centro de la
+# línea, mayor es el giro; un obstáculo "Muy cerca" obliga a
+# un giro completo y uno "Cerca" sube el giro un nivel.
+# ---------------------------------------------------------
+def cargar_definicion_seguidor(nombre='seguidor_linea.json'):
+    definicion = cargar_definicion(nombre)
+    angulo = definicion['salidas']['angulo']
+    tabla_reglas = {}
+    for regla in definicion['reglas']:
+        tabla_reglas.setdefault(regla['si']['reflexion'], {})[regla['si']['distancia']] = \
+            regla['entonces']['angulo']
+    return {
+        'params_reflexion': conjuntos(definicion['entradas']['reflexion']),
+        'params_distancia': conjuntos(definicion['entradas']['distancia']),
+        'params_angulo': conjuntos(angulo),
+        'tabla_reglas': tabla_reglas,
+        'universo_angulo': universo(angulo),
+    }
+
+
+# ---------------------------------------------------------
+# Grado de pertenencia escalar de un trapecio (a, b, c, d)
+# Los hombros degenerados (a == b o c == d) valen 1 en el borde.
+# ---------------------------------------------------------
+def _grado(x, a, b, c, d):
+    if x < a or x > d:
+        return 0.0
+    if x < b:
+        return (x - a) / (b - a)
+    if x <= c:
+        return 1.0
+    return (d - x) / (d - c)
+
+
+# ---------------------------------------------------------
+# Tramo (mínimo b, máximo c) de una familia S x 4 de
+# trapecios: fuera de él se pierde el grado 1 de los bordes
+# ---------------------------------------------------------
+def rango_util(params):
+    return float(params[:, 1].min()), float(params[:, 2].max())
+
+
+class ControladorSeguidor(object):
+
+    def __init__(self, params_reflexion=None, params_distancia=None, params_angulo=None,
+                 tabla_reglas=None, universo_angulo=None, capacidad_tiempos=100000):
+        definicion = cargar_definicion_seguidor()
+        params_reflexion = params_reflexion or definicion['params_reflexion']
+        params_distancia = params_distancia or definicion['params_distancia']
+        params_angulo = params_angulo or definicion['params_angulo']
+        tabla_reglas = tabla_reglas or definicion['tabla_reglas']
+        if universo_angulo is None:
+            universo_angulo = definicion['universo_angulo']
+
+        self.nombres_reflexion = list(params_reflexion)
+        self.nombres_distancia = list(params_distancia)
+        self.nombres_angulo = list(params_angulo)
+
+        # Conjuntos de entrada como tuplas de floats de Python (paso)
+        # y como matrices S x 4 (evaluar_lote)
+        self.params_reflexion = parametros_trapecio(params_reflexion.values())
+        self.params_distancia = parametros_trapecio(params_distancia.values())
+        self._reflexion = [tuple(float(v) for v in fila) for fila in self.params_reflexion]
+        self._distancia = [tuple(float(v) for v in fila) for fila in self.params_distancia]
+
+        # Rango de lectura útil: de b del primer conjunto a c del
+        # último, donde siempre hay un conjunto con grado 1
+        self.rango_reflexion = rango_util(self.params_reflexion)
+        self.rango_distancia = rango_util(self.params_distancia)
+
+        # Reglas agrupadas por conjunto de reflexión:
+        # _reglas[i] = [(j_distancia, k_angulo), ...]
+        self._reglas = [[] for _ in self.nombres_reflexion]
+        for i, nombre_r in enumerate(self.nombres_reflexion):
+            for nombre_d, nombre_a in tabla_reglas[nombre_r].items():
+                j = self.nombres_distancia.index(nombre_d)
+                k = self.nombres_angulo.index(nombre_a)
+                self._reglas[i].append((j, k))
+
+        # Curvas de salida precalculadas (C x U) y buffers del tick
+        self.universo_angulo = np.asarray(universo_angulo, dtype=float)
+        self.params_angulo = parametros_trapecio(params_angulo.values())
+        self._curvas = evaluar_conjuntos(self.universo_angulo, self.params_angulo)
+        self._cortes = np.zeros(len(self.nombres_angulo))
+        self._cortes_columna = self._cortes[:, None]
+        self._recorte = np.empty_like(self._curvas)
+        self._agregada = np.empty_like(self.universo_angulo)
+        self._grados_distancia = [0.0] * len(self._distancia)
+        self._cortes_lista = [0.0] * len(self.nombres_angulo)
+
+        # Si ninguna regla dispara se mantiene la última salida
+        self.ultima_salida = 0.0
+        self.saturadas = 0
+        self.sin_disparo = 0
+
+        # Buffer circular de duraciones (ns)
+        self._tiempos = np.zeros(capacidad_tiempos, dtype=np.int64)
+        self._n_tiempos = 0
+
+    # -----------------------------------------------------
+    # Un tick de control: (reflexión, distancia) -> ángulo
+    # -----------------------------------------------------
+    def paso(self, reflexion, distancia):
+        minimo_r, maximo_r = self.rango_reflexion
+        minimo_d, maximo_d = self.rango_distancia
+        if not (minimo_r <= reflexion <= maximo_r and minimo_d <= distancia <= maximo_d):
+            self.saturadas += 1
+            reflexion = minimo_r if reflexion < minimo_r else \
+                (maximo_r if reflexion > maximo_r else reflexion)
+            distancia = minimo_d if distancia < minimo_d else \
+                (maximo_d if distancia > maximo_d else distancia)
+
+        grados_d = self._grados_distancia
+        for j, (a, b, c, d) in enumerate(self._distancia):
+            grados_d[j] = _grado(distancia, a, b, c, d)
+
+        cortes = self._cortes_lista
+        for k in range(len(cortes)):
+            cortes[k] = 0.0
+        activa = False
+        for i, (a, b, c, d) in enumerate(self._reflexion):
+            gr = _grado(reflexion, a, b, c, d)
+            if gr == 0.0:
+                continue
+            for j, k in self._reglas[i]:
+                fuerza = gr if gr < grados_d[j] else grados_d[j]
+                if fuerza > cortes[k]:
+                    cortes[k] = fuerza
+                    activa = True
+
+        if not activa:
+            self.sin_disparo += 1
+            return self.ultima_salida
+
+        for k, corte in enumerate(cortes):
+            self._cortes[k] = corte
+
+        # Agregación (máximo de recortes) y centroide sobre el universo
+        np.minimum(self._curvas, self._cortes_columna, out=self._recorte)
+        np.max(self._recorte, axis=0, out=self._agregada)
+        area = self._agregada.sum()
+        self.ultima_salida = float(np.dot(self._agregada, self.universo_angulo) / area)
+        return self.ultima_salida
+
+    # -----------------------------------------------------
+    # Lote de lecturas -> ángulos (NaN si ninguna regla
+    # dispara). Por bloques de tamano_bloque lecturas para
+    # acotar la memoria (bloque x universo de salida). Las
+    # lecturas se recortan al universo igual que en paso().
+    # -----------------------------------------------------
+    def evaluar_lote(self, reflexion, distancia, tamano_bloque=4096):
+        reflexion, distancia = np.broadcast_arrays(np.clip(reflexion, *self.rango_reflexion),
+                                                   np.clip(distancia, *self.rango_distancia))
+        forma = reflexion.shape
+        reflexion = reflexion.ravel()
+        distancia = distancia.ravel()
+        salida = np.empty(reflexion.size)
+        for inicio in range(0, reflexion.size, tamano_bloque):
+            bloque = slice(inicio, inicio + tamano_bloque)
+            salida[bloque] = self._evaluar_bloque(reflexion[bloque], distancia[bloque])
+        return salida.reshape(forma)
+
+    def _evaluar_bloque(self, reflexion, distancia):
+        grados_r = evaluar_conjuntos(reflexion, self.params_reflexion)
+        grados_d = evaluar_conjuntos(distancia, self.params_distancia)
+
+        # Cortes C x n: máximo de las fuerzas (mínimo) por consecuente
+        cortes = np.zeros((len(self.nombres_angulo), reflexion.size))
+        for i, reglas in enumerate(self._reglas):
+            for j, k in reglas:
+                np.maximum(cortes[k], np.minimum(grados_r[i], grados_d[j]), out=cortes[k])
+
+        agregada = np.minimum(cortes[:, :, None], self._curvas[:, None, :]).max(axis=0)
+        area = agregada.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(area > 0, agregada @ self.universo_angulo / area, np.nan)
+
+    # -----------------------------------------------------
+    # Igual que paso(), registrando la duración del tick
+    # -----------------------------------------------------
+    def paso_medido(self, reflexion, distancia):
+        inicio = time.perf_counter_ns()
+        salida = self.paso(reflexion, distancia)
+        self._tiempos[self._n_tiempos % self._tiempos.size] = time.perf_counter_ns() - inicio
+        self._n_tiempos += 1
+        return salida
+
+    # -----------------------------------------------------
+    # Estadísticas de latencia por tick (microsegundos) y
+    # ticks con lecturas recortadas o sin reglas disparadas
+    # -----------------------------------------------------
+    def estadisticas(self, presupuesto_s=1e-3):
+        n = min(self._n_tiempos, self._tiempos.size)
+        if n == 0:
+            return {"ticks": 0, "saturadas": self.saturadas, "sin_disparo": self.sin_disparo}
+        tiempos_us = self._tiempos[:n] / 1000.0
+        return {
+            "ticks": self._n_tiempos,
+            "saturadas": self.saturadas,
+            "sin_disparo": self.sin_disparo,
+            "p50_us": float(np.percentile(tiempos_us, 50)),
+            "p99_us": float(np.percentile(tiempos_us, 99)),
+            "max_us": float(tiempos_us.max()),
+            "media_us": float(tiempos_us.mean()),
+            "excedidos": int(np.count_nonzero(tiempos_us > presupuesto_s * 1e6)),
+        }
+
+    def reiniciar_estadisticas(self):
+        self._n_tiempos = 0
+        self.saturadas = 0
+        self.sin_disparo = 0
+
+
+# ---------------------------------------------------------
+# Bucle de control a periodo fijo.
+# leer_sensores() -> (reflexión, distancia); actuar(ángulo).
+# Devuelve el número de ticks que no cupieron en el periodo.
+# ---------------------------------------------------------
+def bucle_control(controlador, leer_sensores, actuar, periodo_s=1e-3, n_ticks=1000):
+    periodo_ns = int(periodo_s * 1e9)
+    siguiente = time.perf_counter_ns()
+    atrasos = 0
+    for _ in range(n_ticks):
+        reflexion, distancia = leer_sensores()
+        actuar(controlador.paso_medido(reflexion, distancia))
+
+        siguiente += periodo_ns
+        restante = siguiente - time.perf_counter_ns()
+        if restante > 0:
+            time.sleep(restante / 1e9)
+        else:
+            atrasos += 1
+            siguiente = time.perf_counter_ns()
+    return atrasos
+
+
+def main():
+    controlador = ControladorSeguidor()
+
+    rng = np.random.default_rng(0)
+    lecturas = np.column_stack([rng.uniform(0, 1, 20000), rng.uniform(0, 200, 20000)])
+
+    # Calentamiento y medición sin esperas
+    for reflexion, distancia in lecturas[:1000]:
+        controlador.paso(float(reflexion), float(distancia))
+    for reflexion, distancia in lecturas:
+        controlador.paso_medido(float(reflexion), float(distancia))
+
+    stats = controlador.estadisticas()
+    print("Ticks medidos:", stats["ticks"])
+    print(f"p50: {stats['p50_us']:.1f} µs   p99: {stats['p99_us']:.1f} µs   "
+          f"máx: {stats['max_us']:.1f} µs")
+    print("Ticks que exceden 1 ms:", stats["excedidos"])
+    print("Lecturas recortadas al universo:", stats["saturadas"],
+          "  ticks sin reglas disparadas:", stats["sin_disparo"])
+
+
+if __name__ == "__main__":
+    main()
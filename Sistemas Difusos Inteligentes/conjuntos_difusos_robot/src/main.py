@@ -1,147 +1,141 @@
 # -*- coding: utf-8 -*-
 # Requisitos: pip install numpy matplotlib
+#
+# Uso:
+#   python main.py                 # muestra cada figura en una ventana
+#   python main.py --sin-ventanas  # las figuras se dibujan fuera de pantalla
+#                                  # y se guardan en un hilo de fondo
+#   python main.py --tablas conjuntos.tabla
+#                                  # además guarda universos y curvas en el
+#                                  # formato con mapeo en memoria (tabla_mmap)
+#   python main.py --perfil perfil_robot
+#                                  # tiempos por etapa en perfil_robot.json y
+#                                  # perfil_robot.folded (instrumentacion)
+#   python main.py --punto-fijo 8  # tablas enteras de 8 (o 16) bits para la
+#                                  # placa: huella y error frente a float64
+
+import argparse
+import sys
 
 import numpy as np
-import matplotlib.pyplot as plt
+
+# Funciones de membresía compartidas con LineFollowin_fuzzy.py
+from membresia import triangular_membership, trapezoidal_membership, evaluar_familia
+from compartidos import cargar_definicion, conjuntos, universo, usar_a1_2, reporte_figuras
+
+# Las figuras pasan por el ReporteDiferido de A1_2_Práctica (compartidos.py):
+# con --sin-ventanas se dibujan con Agg y se guardan en un hilo de fondo;
+# matplotlib se importa solo al dibujar la primera figura.
+_reporte = None
+_sin_ventanas = False
+
+
+# ---------------------------------------------------------
+# Dibuja una figura con dibujar(fig) y la guarda en output_png.
+# - Interactivo: guarda y muestra (bloquea como antes).
+# - Sin ventanas: dibujo y escritura en el hilo de fondo; el
+#   cálculo continúa sin esperar.
+# ---------------------------------------------------------
+def publicar_figura(dibujar, figsize, output_png):
+    global _reporte
+    if _reporte is None:
+        _reporte = reporte_figuras(['--sin-ventanas'] if _sin_ventanas else [])
+    _reporte.agregar(output_png, dibujar, figsize)
 
 
 # ---------------------------------------------------------
-# Función de membresía: Triangular
-# Parámetros: [a, b, c] con a <= b <= c
-# - Sube linealmente de 0 a 1 entre a y b
-# - Baja linealmente de 1 a 0 entre b y c
-# - Fuera de [a, c] vale 0
+# Espera a que el hilo de fondo termine de escribir imágenes
 # ---------------------------------------------------------
-def triangular_membership(x_values, params):
-    a = params[0]
-    b = params[1]
-    c = params[2]
+def esperar_figuras():
+    if _reporte is not None:
+        for ruta in _reporte.esperar():
+            print("Guardada:", ruta)
 
-    membership = np.zeros_like(x_values, dtype=float)
 
-    # Tramo ascendente: entre a y b
-    if a != b:
-        # IMPORTANTE: usar "&" (and vectorizado) con paréntesis
-        mask_asc = (x_values >= a) & (x_values <= b)
-        membership[mask_asc] = (x_values[mask_asc] - a) / (b - a)
+# ---------------------------------------------------------
+# Utilidad para graficar un conjunto de curvas en una figura
+# ---------------------------------------------------------
+def plot_membership_sets(x_values, sets_dict, title, x_label, output_png):
+    def dibujar(fig):
+        ax = fig.add_subplot(111)
 
-    # Tramo descendente: entre b y c
-    if b != c:
-        mask_desc = (x_values >= b) & (x_values <= c)
-        membership[mask_desc] = (c - x_values[mask_desc]) / (c - b)
+        for label in sets_dict:
+            y_values = sets_dict[label]
+            ax.plot(x_values, y_values, linewidth=2, label=label)
 
-    # Aseguramos pico en b
-    membership[np.isclose(x_values, b)] = 1.0
+        ax.set_title(title)
+        ax.set_xlabel(x_label)
+        ax.set_ylabel('μ(x)')
+        ax.set_ylim(-0.05, 1.05)
+        ax.grid(alpha=0.3)
+        ax.legend()
+        fig.tight_layout()
 
-    membership = np.clip(membership, 0.0, 1.0)
-    return membership
+    publicar_figura(dibujar, (9, 5.5), output_png)
 
 
 # ---------------------------------------------------------
-# Función de membresía: Trapezoidal
-# Parámetros: [a, b, c, d] con a <= b <= c <= d
-# - Sube linealmente de 0 a 1 entre a y b
-# - Meseta (1) entre b y c
-# - Baja linealmente de 1 a 0 entre c y d
-# - Fuera de [a, d] vale 0
+# Guarda universos y curvas en un archivo .tabla que otros
+# procesos abren con mapeo en memoria
 # ---------------------------------------------------------
-def trapezoidal_membership(x_values, params):
-    a = params[0]
-    b = params[1]
-    c = params[2]
-    d = params[3]
+def guardar_tablas(ruta, universos, conjuntos):
+    usar_a1_2()
+    from tabla_mmap import escribir_membresias
 
-    membership = np.zeros_like(x_values, dtype=float)
+    escribir_membresias(ruta, universos, conjuntos)
+    print(f"Tablas de membresía guardadas en {ruta}")
 
-    # Tramo ascendente: [a, b)
-    if a != b:
-        mask_asc = (x_values >= a) & (x_values < b)
-        membership[mask_asc] = (x_values[mask_asc] - a) / (b - a)
 
-    # Meseta: [b, c]
-    mask_plateau = (x_values >= b) & (x_values <= c)
-    membership[mask_plateau] = 1.0
-
-    # Tramo descendente: (c, d]
-    if c != d:
-        mask_desc = (x_values > c) & (x_values <= d)
-        membership[mask_desc] = (d - x_values[mask_desc]) / (d - c)
+# ---------------------------------------------------------
+# Compila cada familia a una tabla entera (un código por
+# punto del universo) e informa de huella y error
+# ---------------------------------------------------------
+def informe_punto_fijo(universos, familias, bits):
+    from punto_fijo import compilar_tabla
 
-    membership = np.clip(membership, 0.0, 1.0)
-    return membership
+    print(f"Tablas enteras de {bits} bits:")
+    total = 0
+    for variable, x in universos.items():
+        tabla = compilar_tabla(familias[variable], x[0], x[-1], puntos=x.size, bits=bits)
+        error = tabla.error_cuantizacion()
+        total += tabla.bytes
+        print(f"  {variable}: {tabla.tabla.shape[0]} x {tabla.n_puntos} = {tabla.bytes} B "
+              f"(float64: {tabla.tabla.size * 8} B); error máx {error['max']:.4f}, "
+              f"medio {error['medio']:.4f}")
+    print(f"  total: {total} B")
 
 
 # ---------------------------------------------------------
-# Utilidad para graficar un conjunto de curvas en una figura
+# Curvas, tablas opcionales y figuras
 # ---------------------------------------------------------
-def plot_membership_sets(x_values, sets_dict, title, x_label, output_png):
-    plt.figure(figsize=(9, 5.5))
-
-    for label in sets_dict:
-        y_values = sets_dict[label]
-        plt.plot(x_values, y_values, linewidth=2, label=label)
-
-    plt.title(title)
-    plt.xlabel(x_label)
-    plt.ylabel('μ(x)')
-    plt.ylim(-0.05, 1.05)
-    plt.grid(alpha=0.3)
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(output_png, dpi=200)
-    plt.show()
-
-    print("Guardada:", output_png)
-
-
-def main():
-    # Universos de discurso
-    desviacion_x = np.arange(0, 101, 1)   # 0..100
-    distancia_x  = np.arange(0, 201, 1)   # 0..200
-    angulo_x     = np.arange(0, 181, 1)   # 0..180
-
-    # Desviación (triangulares)
-    desviacion_params = {}
-    desviacion_params["Muy izquierda"] = [0, 0, 25]
-    desviacion_params["Izquierda"]     = [0, 25, 50]
-    desviacion_params["Centrado"]      = [25, 50, 75]
-    desviacion_params["Derecha"]       = [50, 75, 100]
-    desviacion_params["Muy derecha"]   = [75, 100, 100]
-
-    # Distancia (trapezoidales)
-    distancia_params = {}
-    distancia_params["Muy cerca"] = [0, 0, 20, 40]
-    distancia_params["Cerca"]     = [20, 40, 60, 80]
-    distancia_params["Media"]     = [60, 80, 120, 140]
-    distancia_params["Lejos"]     = [120, 160, 200, 200]
-
-    # Ángulo (triangulares)
-    angulo_params = {}
-    angulo_params["Sin giro (0°)"]        = [0, 0, 45]
-    angulo_params["Giro leve (45°)"]      = [0, 45, 90]
-    angulo_params["Giro moderado (90°)"]  = [45, 90, 135]
-    angulo_params["Giro fuerte (135°)"]   = [90, 135, 180]
-    angulo_params["Giro completo (180°)"] = [135, 180, 180]
-
-    # Cálculo de curvas
-
-    desviacion_sets = {}
-    for nombre in desviacion_params:
-        params = desviacion_params[nombre]
-        y_vals = triangular_membership(desviacion_x, params)
-        desviacion_sets[nombre] = y_vals
-
-    distancia_sets = {}
-    for nombre in distancia_params:
-        params = distancia_params[nombre]
-        y_vals = trapezoidal_membership(distancia_x, params)
-        distancia_sets[nombre] = y_vals
-
-    angulo_sets = {}
-    for nombre in angulo_params:
-        params = angulo_params[nombre]
-        y_vals = triangular_membership(angulo_x, params)
-        angulo_sets[nombre] = y_vals
+def generar(ruta_tablas=None, bits_punto_fijo=None):
+    # Universos y conjuntos: definiciones/robot.json
+    #   desviación (triangulares) 0..100, distancia (trapezoidales) 0..200,
+    #   ángulo (triangulares) 0..180
+    definicion = cargar_definicion('robot.json')
+    desviacion, distancia = definicion['entradas']['desviacion'], definicion['entradas']['distancia']
+    angulo = definicion['salidas']['angulo']
+    desviacion_x, distancia_x, angulo_x = universo(desviacion), universo(distancia), universo(angulo)
+    desviacion_params = conjuntos(desviacion)
+    distancia_params = conjuntos(distancia)
+    angulo_params = conjuntos(angulo)
+
+    # Cálculo de curvas (cada familia de conjuntos en una sola pasada)
+
+    desviacion_sets = evaluar_familia(desviacion_x, desviacion_params)
+    distancia_sets = evaluar_familia(distancia_x, distancia_params)
+    angulo_sets = evaluar_familia(angulo_x, angulo_params)
+
+    if ruta_tablas:
+        guardar_tablas(ruta_tablas,
+                       {"desviacion": desviacion_x, "distancia": distancia_x, "angulo": angulo_x},
+                       {"desviacion": desviacion_sets, "distancia": distancia_sets,
+                        "angulo": angulo_sets})
+
+    if bits_punto_fijo:
+        informe_punto_fijo({"desviacion": desviacion_x, "distancia": distancia_x, "angulo": angulo_x},
+                           {"desviacion": desviacion_params, "distancia": distancia_params,
+                            "angulo": angulo_params}, bits_punto_fijo)
 
     # Gráficas
 
@@ -179,33 +173,78 @@ def main():
     trap_params = [15, 35, 65, 85]
     trap_y = trapezoidal_membership(comparativa_x, trap_params)
 
-    plt.figure(figsize=(11, 4.5))
+    def dibujar_comparativa(fig):
+        ax = fig.add_subplot(1, 2, 1)
+        ax.plot(comparativa_x, tri_y, color='blue', linewidth=3, label='Triangular [25,50,75]')
+        ax.fill_between(comparativa_x, 0, tri_y, alpha=0.25, color='blue')
+        ax.set_title("Función Triangular (ejemplo)")
+        ax.set_xlabel("x")
+        ax.set_ylabel("μ(x)")
+        ax.set_ylim(-0.1, 1.1)
+        ax.grid(alpha=0.3)
+        ax.legend()
 
-    plt.subplot(1, 2, 1)
-    plt.plot(comparativa_x, tri_y, color='blue', linewidth=3, label='Triangular [25,50,75]')
-    plt.fill_between(comparativa_x, 0, tri_y, alpha=0.25, color='blue')
-    plt.title("Función Triangular (ejemplo)")
-    plt.xlabel("x")
-    plt.ylabel("μ(x)")
-    plt.ylim(-0.1, 1.1)
-    plt.grid(alpha=0.3)
-    plt.legend()
+        ax = fig.add_subplot(1, 2, 2)
+        ax.plot(comparativa_x, trap_y, color='red', linewidth=3, label='Trapezoidal [15,35,65,85]')
+        ax.fill_between(comparativa_x, 0, trap_y, alpha=0.25, color='red')
+        ax.set_title("Función Trapezoidal (ejemplo)")
+        ax.set_xlabel("x")
+        ax.set_ylim(-0.1, 1.1)
+        ax.grid(alpha=0.3)
+        ax.legend()
 
-    plt.subplot(1, 2, 2)
-    plt.plot(comparativa_x, trap_y, color='red', linewidth=3, label='Trapezoidal [15,35,65,85]')
-    plt.fill_between(comparativa_x, 0, trap_y, alpha=0.25, color='red')
-    plt.title("Función Trapezoidal (ejemplo)")
-    plt.xlabel("x")
-    plt.ylim(-0.1, 1.1)
-    plt.grid(alpha=0.3)
-    plt.legend()
+        fig.tight_layout()
 
-    plt.tight_layout()
-    plt.savefig("comparativa_tri_vs_trap.png", dpi=200)
-    plt.show()
+    publicar_figura(dibujar_comparativa, (11, 4.5), "comparativa_tri_vs_trap.png")
 
-    print("Guardada:", "comparativa_tri_vs_trap.png")
+    esperar_figuras()
+
+
+# ---------------------------------------------------------
+# Ejecuta generar() midiendo cada etapa del pipeline de
+# membresía y del dibujo de figuras
+# ---------------------------------------------------------
+def generar_con_perfil(prefijo, ruta_tablas=None, bits_punto_fijo=None):
+    usar_a1_2()
+    import membresia
+    from instrumentacion import Perfilador, instrumentar_funciones
+
+    modulo = sys.modules[__name__]
+    with Perfilador(memoria=True) as perfil:
+        instrumentar_funciones(perfil, membresia, {'evaluar_conjuntos': 'evaluar_conjuntos',
+                                                   'parametros_trapecio': 'parametros_trapecio'})
+        instrumentar_funciones(perfil, modulo, {'generar': 'generar',
+                                                'evaluar_familia': 'evaluar_familia',
+                                                'guardar_tablas': 'guardar_tablas',
+                                                'plot_membership_sets': 'plot_membership_sets',
+                                                'publicar_figura': 'publicar_figura',
+                                                'esperar_figuras': 'esperar_figuras'})
+        modulo.generar(ruta_tablas, bits_punto_fijo)
+    print(perfil.resumen())
+    perfil.guardar(prefijo + '.json', prefijo + '.folded')
+
+
+def main(argv=None):
+    global _sin_ventanas
+
+    parser = argparse.ArgumentParser(description="Funciones de membresía del robot: curvas, "
+                                                 "figuras y tablas.")
+    parser.add_argument('--sin-ventanas', action='store_true',
+                        help="dibujar fuera de pantalla y guardar en un hilo de fondo")
+    parser.add_argument('--tablas', metavar='RUTA',
+                        help="guardar universos y curvas en formato .tabla (tabla_mmap)")
+    parser.add_argument('--perfil', metavar='PREFIJO',
+                        help="tiempos por etapa en PREFIJO.json y PREFIJO.folded")
+    parser.add_argument('--punto-fijo', type=int, choices=(8, 16), metavar='BITS',
+                        help="tablas enteras de 8 o 16 bits: huella y error frente a float64")
+    args = parser.parse_args(argv)
+
+    _sin_ventanas = args.sin_ventanas
+    if args.perfil:
+        generar_con_perfil(args.perfil, args.tablas, args.punto_fijo)
+    else:
+        generar(args.tablas, args.punto_fijo)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
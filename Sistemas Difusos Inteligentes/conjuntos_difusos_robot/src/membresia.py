@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# Requisitos: pip install numpy
+#
+# Biblioteca común de funciones de membresía para los scripts del robot
+# (main.py y LineFollowin_fuzzy.py).
+#
+# Todas las formas se manejan como trapecio [a, b, c, d]; un triángulo
+# [a, b, c] es el trapecio [a, b, b, c]. Un único kernel evalúa S conjuntos
+# sobre P puntos en una sola pasada (matriz S x P), escribiendo en buffers
+# preasignados, y resuelve de forma exacta los hombros degenerados
+# (a == b o c == d), sin epsilon ni correcciones posteriores.
+
+import numpy as np
+
+
+# ---------------------------------------------------------
+# Convierte una lista de parámetros [a, b, c] / [a, b, c, d]
+# en una matriz S x 4 de trapecios
+# ---------------------------------------------------------
+def parametros_trapecio(lista_params, dtype=np.float64):
+    filas = []
+    for params in lista_params:
+        if len(params) == 3:
+            params = [params[0], params[1], params[1], params[2]]
+        if len(params) != 4:
+            raise ValueError("Se esperaban 3 o 4 parámetros: {}".format(params))
+        if not params[0] <= params[1] <= params[2] <= params[3]:
+            raise ValueError("Los parámetros deben cumplir a <= b <= c <= d: {}".format(params))
+        filas.append(params)
+    return np.array(filas, dtype=dtype).reshape(-1, 4)
+
+
+# ---------------------------------------------------------
+# Kernel: grados de pertenencia de S conjuntos en P puntos
+#
+# x_values: arreglo 1D de P puntos
+# params:   matriz S x 4 (o lista de [a,b,c] / [a,b,c,d])
+# out:      buffer S x P opcional donde se escribe el resultado
+# trabajo:  buffer S x P opcional para el flanco de bajada
+# dtype:    np.float64 o np.float32
+#
+# Con out y trabajo preasignados (y x_values ya en dtype) no se
+# reserva memoria nueva. Cuando un flanco es degenerado la
+# división da ±inf o NaN (0/0 justo en el hombro); np.fmin
+# descarta el NaN, así que el hombro vale exactamente 1.
+# ---------------------------------------------------------
+def evaluar_conjuntos(x_values, params, out=None, trabajo=None, dtype=np.float64):
+    x = np.asarray(x_values, dtype=dtype).ravel()
+    if not isinstance(params, np.ndarray) or params.ndim != 2 or params.dtype != dtype:
+        params = parametros_trapecio(params, dtype=dtype)
+
+    a = params[:, 0:1]
+    b = params[:, 1:2]
+    c = params[:, 2:3]
+    d = params[:, 3:4]
+
+    forma = (params.shape[0], x.size)
+    if out is None:
+        out = np.empty(forma, dtype=dtype)
+    if trabajo is None:
+        trabajo = np.empty(forma, dtype=dtype)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Flanco de subida, saturado en 1
+        np.subtract(x, a, out=out)
+        np.divide(out, b - a, out=out)
+        np.fmin(out, 1.0, out=out)
+
+        # Flanco de bajada
+        np.subtract(d, x, out=trabajo)
+        np.divide(trabajo, d - c, out=trabajo)
+        np.fmin(out, trabajo, out=out)
+
+    np.maximum(out, 0.0, out=out)
+    return out
+
+
+# ---------------------------------------------------------
+# Evalúa un diccionario {nombre: params} en una sola pasada y
+# devuelve {nombre: curva}; cada curva es una fila de la misma
+# matriz S x P
+# ---------------------------------------------------------
+def evaluar_familia(x_values, params_dict, dtype=np.float64):
+    nombres = list(params_dict)
+    matriz = evaluar_conjuntos(x_values, [params_dict[n] for n in nombres], dtype=dtype)
+    return dict(zip(nombres, matriz))
+
+
+# ---------------------------------------------------------
+# Interfaces de un solo conjunto (compatibles con los scripts)
+# ---------------------------------------------------------
+def triangular_membership(x_values, params):
+    return evaluar_conjuntos(x_values, [params])[0].reshape(np.shape(x_values))
+
+
+def trapezoidal_membership(x_values, params):
+    return evaluar_conjuntos(x_values, [params])[0].reshape(np.shape(x_values))
+
+
+def triangular(x, a, b, c):
+    return triangular_membership(x, [a, b, c])
+
+
+def trapezoidal(x, a, b, c, d):
+    return trapezoidal_membership(x, [a, b, c, d])
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+# Requisitos: pip install numpy
+#
+# Análisis Monte Carlo de la robustez del seguidor de línea frente al ruido
+# de los sensores de reflexión y distancia.
+#
+# Puntos de operación: el centro del núcleo de cada conjunto de reflexión
+# (Low, Gray, DarkGray, High) combinado con el de cada conjunto de distancia
+# (Muy cerca ... Muy lejos) de definiciones/seguidor_linea.json, o los que
+# se indiquen.
+#
+# Por cada punto se generan muchas lecturas con ruido gaussiano y se evalúan
+# con ControladorSeguidor.evaluar_lote(), que las recorta como paso() al
+# rango donde algún conjunto vale 1 (una lectura saturada del sensor sigue
+# disparando Low o High y cuenta en la media y los cuantiles), en bloques
+# de tamano_bloque lecturas, así que la memoria no depende del número de
+# muestras. De cada bloque solo se acumulan media y varianza
+# (combinación de Chan) y un histograma fino de la salida, del que salen los
+# cuantiles. Con procesos > 1 los puntos se reparten entre procesos; cada
+# punto tiene su propio flujo aleatorio (SeedSequence.spawn), de modo que
+# el resultado no depende del número de procesos.
+#
+# Uso:
+#   python montecarlo.py --muestras 200000 --procesos 4
+#
+#   resultado = analizar_ruido(ControladorSeguidor(), puntos, sigma=(0.05, 5.0))
+#   resultado['media'], resultado['cuantiles'][:, 2]  # mediana por punto
+
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+CUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+# ---------------------------------------------------------
+# Puntos de operación: centros de los núcleos [b, c] de cada
+# par (conjunto de reflexión, conjunto de distancia)
+# ---------------------------------------------------------
+def puntos_operacion(controlador):
+    nombres = []
+    puntos = []
+    for nombre_r, (_, b_r, c_r, _) in zip(controlador.nombres_reflexion, controlador._reflexion):
+        for nombre_d, (_, b_d, c_d, _) in zip(controlador.nombres_distancia, controlador._distancia):
+            nombres.append((nombre_r, nombre_d))
+            puntos.append(((b_r + c_r) / 2.0, (b_d + c_d) / 2.0))
+    return nombres, np.array(puntos)
+
+
+# ---------------------------------------------------------
+# Simulación de un grupo de puntos. Devuelve, por punto,
+# muestras válidas, media, M2 (suma de cuadrados de las
+# desviaciones), lecturas sin reglas y el histograma.
+# ---------------------------------------------------------
+def _simular(controlador, puntos, semillas, muestras, sigma, bordes, tamano_bloque):
+    n_puntos = len(puntos)
+    n = np.zeros(n_puntos, dtype=np.int64)
+    media = np.zeros(n_puntos)
+    m2 = np.zeros(n_puntos)
+    sin_reglas = np.zeros(n_puntos, dtype=np.int64)
+    histograma = np.zeros((n_puntos, bordes.size - 1), dtype=np.int64)
+
+    for p, (punto, semilla) in enumerate(zip(puntos, semillas)):
+        rng = np.random.default_rng(semilla)
+        for inicio in range(0, muestras, tamano_bloque):
+            cuantas = min(tamano_bloque, muestras - inicio)
+            lecturas = punto + rng.standard_normal((cuantas, 2)) * sigma
+            salida = controlador.evaluar_lote(lecturas[:, 0], lecturas[:, 1])
+
+            validas = salida[np.isfinite(salida)]
+            sin_reglas[p] += cuantas - validas.size
+            if validas.size == 0:
+                continue
+            n_b = validas.size
+            media_b = validas.mean()
+            m2_b = np.square(validas - media_b).sum()
+            total = n[p] + n_b
+            delta = media_b - media[p]
+            media[p] += delta * n_b / total
+            m2[p] += m2_b + delta * delta * n[p] * n_b / total
+            n[p] = total
+            histograma[p] += np.histogram(validas, bordes)[0]
+    return n, media, m2, sin_reglas, histograma
+
+
+# Estado de cada proceso: el controlador se envía una sola vez
+_estado = {}
+
+
+def _inicializar(controlador, muestras, sigma, bordes, tamano_bloque):
+    _estado.update(controlador=controlador, muestras=muestras, sigma=sigma, bordes=bordes,
+                   tamano_bloque=tamano_bloque)
+
+
+def _simular_trozo(trozo):
+    puntos, semillas = trozo
+    return _simular(_estado['controlador'], puntos, semillas, _estado['muestras'],
+                    _estado['sigma'], _estado['bordes'], _estado['tamano_bloque'])
+
+
+# ---------------------------------------------------------
+# Cuantiles a partir del histograma acumulado (interpolación
+# lineal dentro de cada intervalo)
+# ---------------------------------------------------------
+def _cuantiles_histograma(histograma, bordes, niveles):
+    resultado = np.full((histograma.shape[0], len(niveles)), np.nan)
+    for p, cuentas in enumerate(histograma):
+        total = cuentas.sum()
+        if total == 0:
+            continue
+        acumulado = np.concatenate([[0], np.cumsum(cuentas)]) / total
+        for q, nivel in enumerate(niveles):
+            resultado[p, q] = np.interp(nivel, acumulado, bordes)
+    return resultado
+
+
+# ---------------------------------------------------------
+# Distribución de la salida bajo ruido en cada punto
+#
+# puntos:     P x 2 (reflexión, distancia); por defecto
+#             puntos_operacion(controlador)
+# sigma:      desviación típica del ruido de cada sensor
+# muestras:   lecturas con ruido por punto
+# resolucion: ancho (°) de los intervalos del histograma
+#
+# Devuelve dict con, por punto: nominal (sin ruido), media,
+# varianza, desviacion, cuantiles (P x len(niveles)) y
+# sin_reglas (fracción de lecturas sin ninguna regla activa).
+# ---------------------------------------------------------
+def analizar_ruido(controlador, puntos=None, sigma=(0.05, 5.0), muestras=100000,
+                   niveles=CUANTILES, tamano_bloque=65536, procesos=None, semilla=0,
+                   resolucion=0.05):
+    if puntos is None:
+        puntos = puntos_operacion(controlador)[1]
+    puntos = np.asarray(puntos, dtype=float).reshape(-1, 2)
+    sigma = np.broadcast_to(np.asarray(sigma, dtype=float), (2,))
+    universo = controlador.universo_angulo
+    n_intervalos = max(1, int(np.ceil((universo[-1] - universo[0]) / resolucion)))
+    bordes = np.linspace(universo[0], universo[-1], n_intervalos + 1)
+    semillas = np.random.SeedSequence(semilla).spawn(len(puntos))
+
+    if procesos and procesos > 1:
+        grupos = np.array_split(np.arange(len(puntos)), procesos)
+        trozos = [(puntos[g], [semillas[i] for i in g]) for g in grupos if g.size]
+        with ProcessPoolExecutor(len(trozos), initializer=_inicializar,
+                                 initargs=(controlador, muestras, sigma, bordes,
+                                           tamano_bloque)) as ejecutor:
+            partes = list(ejecutor.map(_simular_trozo, trozos))
+        n, media, m2, sin_reglas, histograma = (np.concatenate(campo) for campo in zip(*partes))
+    else:
+        n, media, m2, sin_reglas, histograma = _simular(controlador, puntos, semillas, muestras,
+                                                        sigma, bordes, tamano_bloque)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        varianza = np.where(n > 1, m2 / (n - 1), np.nan)
+    media = np.where(n > 0, media, np.nan)
+    return {
+        'puntos': puntos,
+        'sigma': sigma,
+        'muestras': muestras,
+        'nominal': controlador.evaluar_lote(puntos[:, 0], puntos[:, 1]),
+        'media': media,
+        'varianza': varianza,
+        'desviacion': np.sqrt(varianza),
+        'niveles': tuple(niveles),
+        'cuantiles': _cuantiles_histograma(histograma, bordes, niveles),
+        'sin_reglas': sin_reglas / float(muestras),
+    }
+
+
+def formatear_resultado(resultado, nombres=None):
+    if nombres is None:
+        nombres = ['{:.3g}, {:.3g}'.format(*p) for p in resultado['puntos']]
+    else:
+        nombres = ['{} / {}'.format(*n) if isinstance(n, tuple) else str(n) for n in nombres]
+    ancho = max(len(n) for n in nombres)
+    cabecera = '{:<{}} {:>8} {:>8} {:>7}'.format('punto', ancho, 'nominal', 'media', 'desv')
+    cabecera += ''.join(' {:>7}'.format('q{:g}'.format(100 * q)) for q in resultado['niveles'])
+    cabecera += ' {:>9}'.format('sin regla')
+    lineas = [cabecera]
+    for p, nombre in enumerate(nombres):
+        linea = '{:<{}} {:>8.2f} {:>8.2f} {:>7.2f}'.format(
+            nombre, ancho, resultado['nominal'][p], resultado['media'][p],
+            resultado['desviacion'][p])
+        linea += ''.join(' {:>7.2f}'.format(v) for v in resultado['cuantiles'][p])
+        linea += ' {:>8.2%}'.format(resultado['sin_reglas'][p])
+        lineas.append(linea)
+    return '\n'.join(lineas)
+
+
+def main(argv=None):
+    from controlador_seguidor import ControladorSeguidor
+
+    parser = argparse.ArgumentParser(description="Robustez del seguidor de línea frente al "
+                                                 "ruido de los sensores (Monte Carlo).")
+    parser.add_argument('--muestras', type=int, default=100000,
+                        help="lecturas con ruido por punto de operación")
+    parser.add_argument('--procesos', type=int, help="procesos en paralelo")
+    parser.add_argument('--sigma-reflexion', type=float, default=0.05,
+                        help="desviación típica del ruido de reflexión")
+    parser.add_argument('--sigma-distancia', type=float, default=5.0,
+                        help="desviación típica del ruido de distancia (cm)")
+    args = parser.parse_args(argv)
+    muestras = args.muestras
+    procesos = args.procesos
+    sigma = (args.sigma_reflexion, args.sigma_distancia)
+
+    controlador = ControladorSeguidor()
+    nombres, puntos = puntos_operacion(controlador)
+    inicio = time.perf_counter()
+    resultado = analizar_ruido(controlador, puntos, sigma, muestras, procesos=procesos)
+    duracion = time.perf_counter() - inicio
+    print(formatear_resultado(resultado, nombres))
+
+    # Estimación del mismo análisis llamando a paso() lectura a lectura
+    rng = np.random.default_rng(1)
+    lecturas = rng.uniform([0, 0], [1, 200], (2000, 2)).tolist()
+    inicio = time.perf_counter()
+    for reflexion, distancia in lecturas:
+        controlador.paso(reflexion, distancia)
+    por_lectura = (time.perf_counter() - inicio) / len(lecturas)
+    total = muestras * len(puntos)
+    print(f"\n{total:,} lecturas en {duracion:.2f} s "
+          f"({duracion / total * 1e6:.2f} µs por lectura); lectura a lectura con paso(): "
+          f"~{por_lectura * total:.0f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,439 @@
+# -*- coding: utf-8 -*-
+# Requisitos: pip install numpy
+#
+# Compilación a tablas enteras (uint8 / uint16) de los conjuntos del robot
+# para placas tipo microcontrolador, sin coma flotante.
+#
+# - compilar_tabla() muestrea una familia de triángulos/trapecios en N
+#   códigos de entrada (p. ej. los 256 niveles del ADC) y guarda los grados
+#   como enteros 0..255 (uint8) o 0..65535 (uint16): tabla S x N.
+# - ControladorEntero hace la inferencia Mamdani solo con enteros:
+#   AND = mínimo, acumulación = máximo, agregación sobre el universo de
+#   salida muestreado en M puntos y centroide con acumuladores de 32 bits y
+#   una división entera. La salida es el código de salida en punto fijo
+#   Q(FRACCION): centro = q / 2**FRACCION códigos.
+#   Al compilar se comprueba que área y momento caben en uint32.
+# - paso() es el emulador escalar en Python puro (la misma secuencia de
+#   operaciones que el código C) y evaluar_codigos() el emulador vectorizado
+#   con NumPy para comparar millones de lecturas en un PC.
+# - informe() mide el error de cuantización frente a la referencia en
+#   coma flotante y la huella en bytes de las tablas.
+# - exportar_c() escribe una cabecera .h con las tablas y la función de
+#   inferencia para el firmware.
+#
+# Uso:
+#   entero = compilar_seguidor(ControladorSeguidor(), bits=8)
+#   angulo = entero.paso(entero.entradas[0].codigo(0.45), entero.entradas[1].codigo(30))
+#   print(formatear_informe(informe(entero, referencia_seguidor(ControladorSeguidor()))))
+#   entero.exportar_c('seguidor_difuso.h')
+
+import numpy as np
+
+from membresia import evaluar_conjuntos, parametros_trapecio
+
+# Bits fraccionarios del centroide
+FRACCION = 8
+
+_TIPOS = {8: np.uint8, 16: np.uint16}
+
+
+class TablaEntera(object):
+    """
+    Conjuntos de una variable muestreados en los códigos 0..N-1, donde el
+    código n corresponde al valor inicio + n * paso.
+    """
+
+    def __init__(self, nombres, inicio, paso, tabla, params=None):
+        self.nombres = list(nombres)
+        self.inicio = float(inicio)
+        self.paso = float(paso)
+        self.tabla = tabla
+        self.params = params
+        self.bits = tabla.dtype.itemsize * 8
+        self.maximo = int(np.iinfo(tabla.dtype).max)
+
+    @property
+    def n_puntos(self):
+        return self.tabla.shape[1]
+
+    @property
+    def bytes(self):
+        return self.tabla.nbytes
+
+    # -----------------------------------------------------
+    # Conversión valor físico <-> código (en el robot la hace
+    # el propio ADC o un escalado entero del driver)
+    # -----------------------------------------------------
+    def codigo(self, x):
+        codigos = np.rint((np.asarray(x, dtype=float) - self.inicio) / self.paso)
+        codigos = np.clip(codigos, 0, self.n_puntos - 1).astype(np.intp)
+        return int(codigos) if codigos.ndim == 0 else codigos
+
+    def valor(self, codigo):
+        return self.inicio + np.asarray(codigo) * self.paso
+
+    # -----------------------------------------------------
+    # Error de los grados enteros (escalados a 0..1) frente a
+    # las curvas exactas en puntos al azar del universo,
+    # incluido el redondeo de la entrada a su código
+    # -----------------------------------------------------
+    def error_cuantizacion(self, muestras=100000, semilla=0):
+        fin = self.inicio + (self.n_puntos - 1) * self.paso
+        x = np.random.default_rng(semilla).uniform(self.inicio, fin, muestras)
+        exacto = evaluar_conjuntos(x, self.params)
+        entero = self.tabla[:, self.codigo(x)] / self.maximo
+        error = np.abs(entero - exacto)
+        return {'max': float(error.max()), 'medio': float(error.mean())}
+
+
+# ---------------------------------------------------------
+# Compila una familia de conjuntos ({nombre: [a,b,c(,d)]})
+# en una tabla entera S x puntos. Sin inicio/fin se usa el
+# soporte de la familia.
+# ---------------------------------------------------------
+def compilar_tabla(params_dict, inicio=None, fin=None, puntos=256, bits=8):
+    if bits not in _TIPOS:
+        raise ValueError("bits debe ser 8 o 16: {}".format(bits))
+    if not 2 <= puntos <= 65536:
+        raise ValueError("El número de códigos debe estar entre 2 y 65536: {}".format(puntos))
+    params = parametros_trapecio(params_dict.values())
+    inicio = float(params[:, 0].min()) if inicio is None else float(inicio)
+    fin = float(params[:, 3].max()) if fin is None else float(fin)
+
+    paso = (fin - inicio) / (puntos - 1)
+    x = inicio + np.arange(puntos) * paso
+    maximo = np.iinfo(_TIPOS[bits]).max
+    tabla = np.rint(evaluar_conjuntos(x, params) * maximo).astype(_TIPOS[bits])
+    return TablaEntera(params_dict, inicio, paso, tabla, params)
+
+
+class ControladorEntero(object):
+    """
+    entradas:      una TablaEntera por variable de entrada
+    salida:        TablaEntera del universo de salida (M códigos)
+    antecedentes:  matriz R x k con el conjunto de cada entrada por regla
+    consecuentes:  R conjuntos de salida
+    """
+
+    def __init__(self, entradas, salida, antecedentes, consecuentes):
+        self.entradas = list(entradas)
+        self.salida = salida
+        self.antecedentes = np.asarray(antecedentes, dtype=np.uint8).reshape(-1, len(self.entradas))
+        self.consecuentes = np.asarray(consecuentes, dtype=np.uint8).ravel()
+        if len({t.bits for t in self.entradas + [salida]}) != 1:
+            raise ValueError("Todas las tablas deben tener el mismo número de bits")
+        if self.antecedentes.shape[0] != self.consecuentes.size:
+            raise ValueError("Se esperaba un consecuente por regla")
+        self.dtype = salida.tabla.dtype
+        self.maximo = salida.maximo
+
+        # Acumuladores de 32 bits: área <= max * M y momento
+        # <= max * M(M-1)/2; el resto del cociente se desplaza
+        # FRACCION bits
+        m = salida.n_puntos
+        if self.maximo * m * (m - 1) // 2 >= 2 ** 32 or (self.maximo * m) << FRACCION >= 2 ** 32:
+            raise ValueError("Con {} bits y {} puntos de salida el centroide no cabe en "
+                             "32 bits".format(salida.bits, m))
+        self._pesos = np.arange(m, dtype=np.uint32)
+
+        # Copias en listas de Python para el emulador escalar
+        self._tablas_lista = [t.tabla.tolist() for t in self.entradas]
+        self._salida_lista = salida.tabla.tolist()
+        self._reglas_lista = [(tuple(int(v) for v in ant), int(c))
+                              for ant, c in zip(self.antecedentes, self.consecuentes)]
+        self.ultima_salida = 0
+
+    # -----------------------------------------------------
+    # Emulador escalar: mismos pasos y tipos que el C.
+    # codigos de entrada -> centro de salida en Q(FRACCION);
+    # si ninguna regla dispara se mantiene la última salida.
+    # -----------------------------------------------------
+    def paso(self, *codigos):
+        cortes = [0] * len(self._salida_lista)
+        for antecedente, consecuente in self._reglas_lista:
+            fuerza = self.maximo
+            for tabla, conjunto, codigo in zip(self._tablas_lista, antecedente, codigos):
+                grado = tabla[conjunto][codigo]
+                if grado < fuerza:
+                    fuerza = grado
+            if fuerza > cortes[consecuente]:
+                cortes[consecuente] = fuerza
+
+        area = 0
+        momento = 0
+        for m in range(self.salida.n_puntos):
+            agregado = 0
+            for corte, curva in zip(cortes, self._salida_lista):
+                grado = curva[m] if curva[m] < corte else corte
+                if grado > agregado:
+                    agregado = grado
+            area += agregado
+            momento += agregado * m
+        if area == 0:
+            return self.ultima_salida
+
+        entero = momento // area
+        fraccion = ((momento - entero * area) << FRACCION) // area
+        self.ultima_salida = (entero << FRACCION) | fraccion
+        return self.ultima_salida
+
+    # -----------------------------------------------------
+    # Emulador vectorizado: codigos N x k -> (q N uint32,
+    # activa N bool). Misma aritmética, por bloques.
+    # -----------------------------------------------------
+    def evaluar_codigos(self, codigos, tamano_bloque=4096):
+        codigos = np.asarray(codigos, dtype=np.intp).reshape(-1, len(self.entradas))
+        q = np.zeros(codigos.shape[0], dtype=np.uint32)
+        activa = np.zeros(codigos.shape[0], dtype=bool)
+        for inicio in range(0, codigos.shape[0], tamano_bloque):
+            bloque = slice(inicio, inicio + tamano_bloque)
+            q[bloque], activa[bloque] = self._evaluar_bloque(codigos[bloque])
+        return q, activa
+
+    def _evaluar_bloque(self, codigos):
+        # Fuerza de las reglas R x n
+        fuerza = None
+        for i, tabla in enumerate(self.entradas):
+            grados = tabla.tabla[self.antecedentes[:, i][:, None], codigos[:, i][None, :]]
+            fuerza = grados if fuerza is None else np.minimum(fuerza, grados)
+
+        # Cortes C x n (máximo por consecuente)
+        cortes = np.zeros((self.salida.tabla.shape[0], codigos.shape[0]), dtype=self.dtype)
+        for r, c in enumerate(self.consecuentes):
+            np.maximum(cortes[c], fuerza[r], out=cortes[c])
+
+        # Agregación n x M y centroide en uint32
+        agregada = np.minimum(cortes[:, :, None], self.salida.tabla[:, None, :]).max(axis=0)
+        area = agregada.sum(axis=1, dtype=np.uint32)
+        momento = (agregada * self._pesos).sum(axis=1, dtype=np.uint32)
+        activa = area > 0
+        divisor = np.where(activa, area, 1).astype(np.uint32)
+        entero = momento // divisor
+        fraccion = ((momento - entero * divisor) << np.uint32(FRACCION)) // divisor
+        return (entero << np.uint32(FRACCION)) | fraccion, activa
+
+    # -----------------------------------------------------
+    # Valores físicos N x k -> salida física (NaN si ninguna
+    # regla dispara)
+    # -----------------------------------------------------
+    def evaluar(self, entradas):
+        entradas = np.asarray(entradas, dtype=float).reshape(-1, len(self.entradas))
+        codigos = np.column_stack([t.codigo(entradas[:, i]) for i, t in enumerate(self.entradas)])
+        q, activa = self.evaluar_codigos(codigos)
+        return np.where(activa, self.a_valor(q), np.nan)
+
+    def a_valor(self, q):
+        return self.salida.valor(np.asarray(q) / float(1 << FRACCION))
+
+    # -----------------------------------------------------
+    # Huella en memoria de las tablas (bytes)
+    # -----------------------------------------------------
+    def bytes(self):
+        huella = {'entrada_{}'.format(i): t.bytes for i, t in enumerate(self.entradas)}
+        huella['salida'] = self.salida.bytes
+        huella['reglas'] = self.antecedentes.nbytes + self.consecuentes.nbytes
+        huella['total'] = sum(huella.values())
+        return huella
+
+    # -----------------------------------------------------
+    # Cabecera C con las tablas y la inferencia entera
+    # -----------------------------------------------------
+    def exportar_c(self, ruta, prefijo='fz'):
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            archivo.write(_cabecera_c(self, prefijo))
+
+
+def _arreglo_c(valores):
+    return '{' + ', '.join(str(int(v)) for v in np.ravel(valores)) + '}'
+
+
+def _cabecera_c(controlador, prefijo):
+    p = prefijo
+    P = prefijo.upper()
+    tipo = 'uint{}_t'.format(controlador.salida.bits)
+    k = len(controlador.entradas)
+    lineas = [
+        '/* Generado por punto_fijo.py: inferencia difusa con enteros */',
+        '#ifndef {}_DIFUSO_H'.format(P),
+        '#define {}_DIFUSO_H'.format(P),
+        '',
+        '#include <stdint.h>',
+        '',
+        '#define {}_ENTRADAS {}'.format(P, k),
+        '#define {}_REGLAS {}'.format(P, controlador.consecuentes.size),
+        '#define {}_SALIDA_CONJUNTOS {}'.format(P, controlador.salida.tabla.shape[0]),
+        '#define {}_SALIDA_PUNTOS {}'.format(P, controlador.salida.n_puntos),
+        '#define {}_FRACCION {}'.format(P, FRACCION),
+        '#define {}_MAXIMO {}u'.format(P, controlador.maximo),
+        '',
+        'typedef {} {}_grado_t;'.format(tipo, p),
+        '',
+    ]
+    for i, tabla in enumerate(controlador.entradas):
+        lineas.append('/* Entrada {}: codigo n = {:g} + n * {:g}; {} */'.format(
+            i, tabla.inicio, tabla.paso, ', '.join(tabla.nombres)))
+        lineas.append('static const {}_grado_t {}_tabla_{}[{}] = {};'.format(
+            p, p, i, tabla.tabla.size, _arreglo_c(tabla.tabla)))
+    lineas += [
+        'static const {}_grado_t *const {}_tablas[{}] = {{{}}};'.format(
+            p, p, k, ', '.join('{}_tabla_{}'.format(p, i) for i in range(k))),
+        'static const uint16_t {}_puntos[{}] = {};'.format(
+            p, k, _arreglo_c([t.n_puntos for t in controlador.entradas])),
+        '/* Salida: codigo m = {:g} + m * {:g}; {} */'.format(
+            controlador.salida.inicio, controlador.salida.paso,
+            ', '.join(controlador.salida.nombres)),
+        'static const {}_grado_t {}_salida[{}] = {};'.format(
+            p, p, controlador.salida.tabla.size, _arreglo_c(controlador.salida.tabla)),
+        'static const uint8_t {}_antecedentes[{}] = {};'.format(
+            p, controlador.antecedentes.size, _arreglo_c(controlador.antecedentes)),
+        'static const uint8_t {}_consecuentes[{}] = {};'.format(
+            p, controlador.consecuentes.size, _arreglo_c(controlador.consecuentes)),
+        '',
+        '/* Devuelve el centroide en Q{P}_FRACCION o -1 si ninguna regla dispara */'.replace(
+            '{P}', P),
+        'static int32_t {}_inferir(const uint16_t codigos[{}_ENTRADAS])'.format(p, P),
+        '{',
+        '    {}_grado_t cortes[{}_SALIDA_CONJUNTOS] = {{0}};'.format(p, P),
+        '    uint32_t area = 0, momento = 0, entero, fraccion;',
+        '    int r, i, c, m;',
+        '    for (r = 0; r < {}_REGLAS; r++) {{'.format(P),
+        '        {}_grado_t fuerza = {}_MAXIMO;'.format(p, P),
+        '        for (i = 0; i < {}_ENTRADAS; i++) {{'.format(P),
+        '            {0}_grado_t g = {0}_tablas[i][(uint32_t){0}_antecedentes[r * {1}_ENTRADAS + i]'
+        ' * {0}_puntos[i] + codigos[i]];'.format(p, P),
+        '            if (g < fuerza) fuerza = g;',
+        '        }',
+        '        if (fuerza > cortes[{}_consecuentes[r]]) cortes[{}_consecuentes[r]] = fuerza;'.format(
+            p, p),
+        '    }',
+        '    for (m = 0; m < {}_SALIDA_PUNTOS; m++) {{'.format(P),
+        '        {}_grado_t agregado = 0;'.format(p),
+        '        for (c = 0; c < {}_SALIDA_CONJUNTOS; c++) {{'.format(P),
+        '            {0}_grado_t g = {0}_salida[c * {1}_SALIDA_PUNTOS + m];'.format(p, P),
+        '            if (g > cortes[c]) g = cortes[c];',
+        '            if (g > agregado) agregado = g;',
+        '        }',
+        '        area += agregado;',
+        '        momento += (uint32_t)agregado * (uint32_t)m;',
+        '    }',
+        '    if (area == 0) return -1;',
+        '    entero = momento / area;',
+        '    fraccion = ((momento - entero * area) << {}_FRACCION) / area;'.format(P),
+        '    return (int32_t)((entero << {}_FRACCION) | fraccion);'.format(P),
+        '}',
+        '',
+        '#endif',
+        '',
+    ]
+    return '\n'.join(lineas)
+
+
+# ---------------------------------------------------------
+# ControladorSeguidor (coma flotante) -> ControladorEntero
+# con el mismo universo de salida. Los códigos de entrada
+# cubren el mismo rango de lectura que paso() (de b del
+# primer conjunto a c del último): en el soporte completo
+# los códigos 0 y N-1 (lectura a fondo de escala) no
+# dispararían ninguna regla.
+# ---------------------------------------------------------
+def compilar_seguidor(controlador, puntos_reflexion=256, puntos_distancia=256, bits=8):
+    reflexion = dict(zip(controlador.nombres_reflexion, controlador._reflexion))
+    distancia = dict(zip(controlador.nombres_distancia, controlador._distancia))
+    angulo = dict(zip(controlador.nombres_angulo, controlador.params_angulo.tolist()))
+    universo = controlador.universo_angulo
+    entradas = [compilar_tabla(reflexion, *controlador.rango_reflexion, puntos=puntos_reflexion,
+                               bits=bits),
+                compilar_tabla(distancia, *controlador.rango_distancia, puntos=puntos_distancia,
+                               bits=bits)]
+    salida = compilar_tabla(angulo, universo[0], universo[-1], puntos=universo.size, bits=bits)
+
+    antecedentes = []
+    consecuentes = []
+    for i, reglas in enumerate(controlador._reglas):
+        for j, k in reglas:
+            antecedentes.append((i, j))
+            consecuentes.append(k)
+    return ControladorEntero(entradas, salida, antecedentes, consecuentes)
+
+
+# ---------------------------------------------------------
+# Referencia en coma flotante del seguidor: N x 2 -> N
+# (NaN si ninguna regla dispara)
+# ---------------------------------------------------------
+def referencia_seguidor(controlador):
+    def evaluar(entradas):
+        salida = np.empty(len(entradas))
+        for n, (reflexion, distancia) in enumerate(np.asarray(entradas, dtype=float).tolist()):
+            controlador.ultima_salida = float('nan')
+            salida[n] = controlador.paso(reflexion, distancia)
+        return salida
+    return evaluar
+
+
+# ---------------------------------------------------------
+# Error de cuantización de la salida frente a la referencia
+# en lecturas al azar, error de cada tabla y huella en bytes
+# ---------------------------------------------------------
+def informe(controlador, referencia, muestras=20000, semilla=0):
+    rng = np.random.default_rng(semilla)
+    inferior = [t.inicio for t in controlador.entradas]
+    superior = [t.inicio + (t.n_puntos - 1) * t.paso for t in controlador.entradas]
+    entradas = rng.uniform(inferior, superior, (muestras, len(controlador.entradas)))
+
+    # Referencia en las lecturas tal cual (error total) y en el
+    # valor de su código (solo grados enteros y aritmética)
+    redondeadas = np.column_stack([t.valor(t.codigo(entradas[:, i]))
+                                   for i, t in enumerate(controlador.entradas)])
+    entera = controlador.evaluar(entradas)
+    datos = {'muestras': muestras, 'bits': controlador.salida.bits}
+    for clave, exacta in (('total', referencia(entradas)), ('aritmetica', referencia(redondeadas))):
+        ambas = np.isfinite(exacta) & np.isfinite(entera)
+        error = np.abs(entera[ambas] - exacta[ambas])
+        datos[clave] = {
+            'max': float(error.max()) if error.size else 0.0,
+            'medio': float(error.mean()) if error.size else 0.0,
+            'p99': float(np.percentile(error, 99)) if error.size else 0.0,
+            'disparo_distinto': int(np.count_nonzero(np.isfinite(exacta) != np.isfinite(entera))),
+        }
+    datos['error_tablas'] = [t.error_cuantizacion(semilla=semilla) for t in controlador.entradas]
+    datos['bytes'] = controlador.bytes()
+    return datos
+
+
+def formatear_informe(datos):
+    lineas = [
+        "Inferencia entera de {} bits ({} lecturas al azar):".format(datos['bits'],
+                                                                   datos['muestras']),
+    ]
+    for clave, titulo in (('total', 'total'), ('aritmetica', 'con la entrada ya redondeada')):
+        error = datos[clave]
+        lineas.append("  error de salida ({}): máx {:.3f}  medio {:.3f}  p99 {:.3f}; "
+                      "disparo distinto en {} lecturas".format(
+                          titulo, error['max'], error['medio'], error['p99'],
+                          error['disparo_distinto']))
+    for i, error in enumerate(datos['error_tablas']):
+        lineas.append("  grados de la entrada {}: error máx {:.4f}  medio {:.4f}".format(
+            i, error['max'], error['medio']))
+    lineas.append("  huella: " + ", ".join("{} {} B".format(nombre, n)
+                                           for nombre, n in datos['bytes'].items()))
+    return '\n'.join(lineas)
+
+
+def main():
+    from controlador_seguidor import ControladorSeguidor
+
+    referencia = referencia_seguidor(ControladorSeguidor())
+    for bits in (8, 16):
+        entero = compilar_seguidor(ControladorSeguidor(), bits=bits)
+        print(formatear_informe(informe(entero, referencia)))
+        print()
+
+    entero = compilar_seguidor(ControladorSeguidor(), bits=8)
+    entero.exportar_c('seguidor_difuso.h')
+    print("Cabecera C escrita en seguidor_difuso.h")
+    print("Huella en coma flotante (float64) de las curvas equivalentes:",
+          sum(t.n_puntos * len(t.nombres) * 8 for t in entero.entradas + [entero.salida]), "B")
+
+
+if __name__ == "__main__":
+    main()
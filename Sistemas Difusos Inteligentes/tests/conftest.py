@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+# Pruebas de los núcleos numéricos contra scikit-fuzzy.
+#
+# Los módulos de A1_2_Práctica y de conjuntos_difusos_robot/src se importan
+# entre sí por nombre (se ejecutan como scripts desde su carpeta), así que
+# aquí se agregan ambas carpetas a sys.path.
+#
+# Uso (desde la raíz del repositorio):
+#   python -m pytest -q "Sistemas Difusos Inteligentes/tests"
+
+import os
+import sys
+
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for _carpeta in (os.path.join(_RAIZ, 'A1_2_Práctica'),
+                 os.path.join(_RAIZ, 'conjuntos_difusos_robot', 'src')):
+    if _carpeta not in sys.path:
+        sys.path.insert(0, _carpeta)
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+# Pérdida del ajuste de membresías: RMSE y penalización por separado.
+
+import numpy as np
+import pytest
+
+from ajuste_membresias import EspacioParametros, ajustar
+from definicion_difusa import cargar_definicion, compilar
+from modelo_satisfaccion import RUTA_DEFINICION
+
+
+def test_rmse_y_penalizacion_por_separado():
+    definicion = cargar_definicion(RUTA_DEFINICION)
+    # Cobertura exigente para que la penalización no sea nula
+    espacio = EspacioParametros(definicion, cobertura=0.6)
+    rng = np.random.default_rng(0)
+    X = np.column_stack([rng.uniform(0, 10, 200), rng.uniform(0, 60, 200)])
+    y = compilar(definicion).motor().evaluar(X) + rng.normal(0, 3, 200)
+
+    resultado = ajustar(espacio, X, y, generaciones=3, tamano_poblacion=8)
+    for etapa in ('inicial', 'final', 'rejilla'):
+        assert resultado['perdida_' + etapa] == pytest.approx(
+            resultado['rmse_' + etapa] + resultado['penalizacion_' + etapa])
+    assert resultado['penalizacion_rejilla'] > 0
+
+    # 'rmse_rejilla' es el error real del sistema compilado
+    salida = compilar(resultado['definicion']).motor().evaluar(X)
+    rango = espacio.universo_salida[-1] - espacio.universo_salida[0]
+    error = np.where(np.isnan(salida), rango, salida - y)
+    assert resultado['rmse_rejilla'] == pytest.approx(np.sqrt(np.mean(error ** 2)))
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# Invalidación de CacheInferencia ante ediciones del sistema.
+
+import threading
+
+import numpy as np
+import pytest
+
+from cache_inferencia import CacheInferencia
+
+
+def _referencia(sistema_control, calidad, tiempo):
+    from skfuzzy import control as ctrl
+
+    simulacion = ctrl.ControlSystemSimulation(sistema_control, cache=False)
+    simulacion.input['calidad'] = calidad
+    simulacion.input['tiempo_espera'] = tiempo
+    simulacion.compute()
+    return simulacion.output['satisfaccion']
+
+
+def test_edicion_de_control_system_en_la_llamada_siguiente():
+    pytest.importorskip('skfuzzy')
+    from modelo_satisfaccion import construir_sistema_control
+
+    sistema_control = construir_sistema_control()
+    cache = CacheInferencia.para_control_system(sistema_control)
+    antes = cache(7, 20)
+    assert cache(7, 20) == antes and cache.aciertos == 1
+
+    # Edición en el lugar de una función de membresía
+    calidad = next(a for a in sistema_control.antecedents if a.label == 'calidad')
+    calidad['buena'].mf[:] = np.clip(calidad['buena'].mf * 0.5, 0, 1)
+    despues = cache(7, 20)
+    assert despues != antes
+    assert despues == pytest.approx(_referencia(sistema_control, 7, 20))
+    assert cache.invalidaciones == 1
+
+
+def test_edicion_de_motor_en_la_llamada_siguiente():
+    from modelo_satisfaccion import cargar_motor
+
+    motor = cargar_motor()
+    cache = CacheInferencia.para_motor(motor)
+    antes = cache(7, 20)
+    motor.membresias[0] *= 0.5
+    despues = cache(7, 20)
+    assert cache.invalidaciones == 1
+    assert despues == motor.evaluar([[7, 20]])[0]
+    assert cache(7, 20) == despues and cache.aciertos == 1
+
+
+def test_fallo_calculado_antes_de_invalidar_no_se_guarda():
+    cache = None
+
+    def evaluador(puntos):
+        # Mientras se calcula el fallo, otro hilo invalida la caché
+        cache.invalidar()
+        return puntos.sum(axis=1)
+
+    cache = CacheInferencia(evaluador, ['a', 'b'])
+    assert cache(1, 2) == 3.0
+    assert cache.evaluar([[1, 2], [3, 4]]).tolist() == [3.0, 7.0]
+    assert cache.estadisticas()['entradas'] == 0
+
+
+def test_contador_de_llamadas_con_hilos():
+    cache = CacheInferencia(lambda puntos: puntos.sum(axis=1), ['a', 'b'], verificar_cada=0)
+
+    def llamar():
+        for i in range(2000):
+            cache(i % 7, 1)
+
+    hilos = [threading.Thread(target=llamar) for _ in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    estadisticas = cache.estadisticas()
+    assert cache._llamadas == 8000
+    assert estadisticas['aciertos'] + estadisticas['fallos'] == 8000
+
+
+def test_lote_con_claves_repetidas_cuenta_fallos_por_fila():
+    evaluadas = []
+
+    def evaluador(puntos):
+        evaluadas.append(puntos.shape[0])
+        return puntos.sum(axis=1)
+
+    cache = CacheInferencia(evaluador, ['a', 'b'], verificar_cada=0)
+    # Tres filas de una clave nueva y una de otra: 4 fallos, 2 evaluaciones
+    assert cache.evaluar([[1, 2], [1, 2], [3, 4], [1, 2]]).tolist() == [3.0, 3.0, 7.0, 3.0]
+    assert (cache.aciertos, cache.fallos) == (0, 4) and evaluadas == [2]
+
+    # Ya en la caché: aciertos por fila, sin evaluar de nuevo
+    cache.evaluar([[1, 2], [3, 4], [3, 4], [5, 6]])
+    assert (cache.aciertos, cache.fallos) == (3, 5) and evaluadas == [2, 1]
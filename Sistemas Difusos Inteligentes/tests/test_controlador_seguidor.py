@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# Lecturas fuera del rango útil en el controlador del seguidor.
+
+import numpy as np
+import pytest
+
+from compartidos import cargar_definicion, conjuntos
+from controlador_seguidor import ControladorSeguidor
+from membresia import parametros_trapecio
+
+
+def test_lecturas_fuera_del_universo_se_recortan():
+    controlador = ControladorSeguidor()
+    borde = controlador.paso(0.45, 200.0)
+    controlador.paso(0.6, 10.0)                      # otro ángulo entre medias
+    assert controlador.paso(0.45, 250.0) == borde
+    assert controlador.paso(0.45, -5.0) == ControladorSeguidor().paso(0.45, 0.0)
+    assert controlador.estadisticas()['saturadas'] == 2
+    assert controlador.estadisticas()['sin_disparo'] == 0
+
+    lote = controlador.evaluar_lote([0.45, 0.45], [250.0, 200.0])
+    np.testing.assert_allclose(lote, [borde, borde])
+
+
+@pytest.mark.parametrize('reflexion, borde', [(0.0, 0.1), (-0.3, 0.1), (1.0, 0.9), (1.2, 0.9)])
+@pytest.mark.parametrize('distancia', [5.0, 30.0, 100.0])
+def test_reflexion_a_fondo_dispara_reglas(reflexion, borde, distancia):
+    # Negro o blanco a fondo: el giro sale de Low/High, no del tick anterior
+    controlador = ControladorSeguidor()
+    controlador.paso(0.5, 100.0)
+    esperado = ControladorSeguidor().paso(borde, distancia)
+    assert controlador.paso(reflexion, distancia) == esperado
+    assert controlador.estadisticas()['sin_disparo'] == 0
+    assert controlador.evaluar_lote([reflexion], [distancia])[0] == pytest.approx(esperado)
+
+
+def test_cuenta_ticks_sin_disparo():
+    # Conjuntos con un hueco entre 0.4 y 0.6: ahí no dispara ninguna regla
+    controlador = ControladorSeguidor(params_reflexion={'Low': [0.0, 0.1, 0.2, 0.4],
+                                                        'Gray': [0.6, 0.7, 0.8, 0.9]},
+                                      tabla_reglas={'Low': {'Media': 'Sin giro (0°)'},
+                                                    'Gray': {'Media': 'Giro leve (45°)'}})
+    anterior = controlador.paso(0.15, 25.5)
+    assert controlador.paso(0.5, 25.5) == anterior
+    assert controlador.estadisticas()['sin_disparo'] == 1
+    assert np.isnan(controlador.evaluar_lote([0.5], [25.5])[0])
+    controlador.reiniciar_estadisticas()
+    assert controlador.estadisticas()['sin_disparo'] == 0
+
+
+def test_conjuntos_de_la_definicion():
+    # Una sola fuente: definiciones/seguidor_linea.json
+    definicion = cargar_definicion('seguidor_linea.json')
+    controlador = ControladorSeguidor()
+    for params, variable in ((controlador.params_reflexion, definicion['entradas']['reflexion']),
+                             (controlador.params_distancia, definicion['entradas']['distancia']),
+                             (controlador.params_angulo, definicion['salidas']['angulo'])):
+        np.testing.assert_array_equal(params, parametros_trapecio(conjuntos(variable).values()))
+    assert len(definicion['reglas']) == sum(len(reglas) for reglas in controlador._reglas)
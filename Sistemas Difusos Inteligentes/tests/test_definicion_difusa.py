@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# Reglas con listas de términos (OR dentro de una variable).
+
+import copy
+
+import numpy as np
+import pytest
+
+from definicion_difusa import cargar_definicion, compilar, validar_definicion
+from modelo_satisfaccion import RUTA_DEFINICION
+from motor_vectorizado import MotorMamdani
+
+
+def _puntos():
+    calidad, tiempo = np.meshgrid(np.linspace(0, 10, 23), np.linspace(0, 60, 31))
+    return np.column_stack([calidad.ravel(), tiempo.ravel()])
+
+
+def _skfuzzy(sistema_control, puntos):
+    from skfuzzy import control as ctrl
+
+    simulacion = ctrl.ControlSystemSimulation(sistema_control, cache=False)
+    resultado = np.full(puntos.shape[0], np.nan)
+    for i, (calidad, tiempo) in enumerate(puntos.tolist()):
+        simulacion.input['calidad'] = calidad
+        simulacion.input['tiempo_espera'] = tiempo
+        simulacion.compute()
+        resultado[i] = simulacion.output.get('satisfaccion', np.nan)
+    return resultado
+
+
+def test_lista_de_terminos_con_negacion_igual_a_skfuzzy():
+    pytest.importorskip('skfuzzy')
+    from definicion_difusa import construir_control_system
+
+    definicion = cargar_definicion(RUTA_DEFINICION)
+    definicion['reglas'][0]['si']['tiempo_espera'] = ['corto', {'no': 'largo'}]
+    definicion['reglas'][5]['si']['calidad'] = ['regular', 'mala']
+    definicion['reglas'].append({'nombre': 'regla10', 'conector': 'or',
+                                 'si': {'calidad': ['mala', 'regular'], 'tiempo_espera': 'largo'},
+                                 'entonces': {'satisfaccion': 'baja'}, 'peso': 0.5})
+    validar_definicion(definicion)
+
+    # Misma base con cada lista desplegada en reglas sueltas (max de min)
+    desplegada = copy.deepcopy(definicion)
+    desplegada['reglas'][0]['si']['tiempo_espera'] = 'corto'
+    desplegada['reglas'][5]['si']['calidad'] = 'regular'
+    desplegada['reglas'] += [
+        {'si': {'calidad': 'buena', 'tiempo_espera': {'no': 'largo'}},
+         'entonces': {'satisfaccion': 'alta'}},
+        {'si': {'calidad': 'mala', 'tiempo_espera': 'largo'},
+         'entonces': {'satisfaccion': 'baja'}},
+    ]
+
+    puntos = _puntos()
+    exacto = compilar(desplegada).motor().evaluar(puntos)
+    compilado = compilar(definicion)
+    for opciones in ({}, {'dispersa': True}):
+        np.testing.assert_allclose(compilado.motor(**opciones).evaluar(puntos), exacto,
+                                   atol=1e-9)
+
+    # skfuzzy agrega sobre un universo con los cruces insertados: la
+    # diferencia es la misma que en la definición sin listas
+    referencia = _skfuzzy(construir_control_system(definicion)[0], puntos)
+    np.testing.assert_allclose(exacto, referencia, atol=0.05)
+
+
+def test_definicion_minimizada_se_guarda_y_evalua_igual(tmp_path):
+    pytest.importorskip('skfuzzy')
+    from definicion_difusa import construir_control_system, guardar_definicion
+    from minimizacion_reglas import minimizar_definicion
+
+    definicion = cargar_definicion(RUTA_DEFINICION)
+    minimizada, informe = minimizar_definicion(definicion)
+    assert informe['reglas_minimizado'] < informe['reglas_original']
+    assert any(isinstance(t, list) for regla in minimizada['reglas'] for t in regla['si'].values())
+
+    ruta = str(tmp_path / 'minimizada.json')
+    guardar_definicion(ruta, minimizada)
+    cargada = cargar_definicion(ruta)
+
+    puntos = _puntos()
+    original = compilar(definicion).motor().evaluar(puntos)
+    np.testing.assert_allclose(compilar(cargada).motor().evaluar(puntos), original, atol=1e-9)
+    # El motor también se construye desde el ControlSystem con AND de grupos OR
+    sistema_control, _ = construir_control_system(cargada)
+    np.testing.assert_allclose(MotorMamdani(sistema_control).evaluar(puntos), original,
+                               atol=1e-9)
+
+
+def test_lista_vacia_no_es_valida():
+    definicion = copy.deepcopy(cargar_definicion(RUTA_DEFINICION))
+    definicion['reglas'][0]['si']['calidad'] = []
+    with pytest.raises(ValueError):
+        validar_definicion(definicion)
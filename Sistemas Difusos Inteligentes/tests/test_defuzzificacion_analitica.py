@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+# Defuzzificación analítica frente a skfuzzy.defuzz sobre un universo fino.
+
+import numpy as np
+import pytest
+
+from defuzzificacion_analitica import METODOS, bisector, evaluar_trapecios
+
+fuzz = pytest.importorskip('skfuzzy')
+
+# Conjuntos de salida del sistema de satisfacción (baja, media, alta)
+SATISFACCION = np.array([[0.0, 0.0, 0.0, 50.0],
+                         [25.0, 50.0, 50.0, 75.0],
+                         [50.0, 100.0, 100.0, 100.0]])
+
+# Cortes simétricos y con varios picos
+CORTES = [
+    [1.0, 0.0, 1.0],
+    [0.5, 0.2, 0.5],
+    [0.3, 0.7, 0.3],
+    [1.0, 1.0, 1.0],
+    [0.8, 0.3, 0.6],
+    [0.2, 0.0, 0.9],
+    [0.0, 0.4, 0.0],
+    [0.6, 0.0, 0.0],
+]
+
+
+def _referencia(trapecios, cortes, metodo, limites):
+    universo = np.linspace(limites[0], limites[1], 20001)
+    agregada = np.minimum(np.asarray(cortes)[:, None],
+                          evaluar_trapecios(universo, trapecios)).max(axis=0)
+    return fuzz.defuzz(universo, agregada, metodo)
+
+
+@pytest.mark.parametrize('metodo', ['centroid', 'bisector', 'mom'])
+@pytest.mark.parametrize('cortes', CORTES)
+def test_satisfaccion_contra_skfuzzy(metodo, cortes):
+    limites = (0.0, 100.0)
+    resultado = METODOS[metodo](SATISFACCION, [cortes], limites)[0]
+    assert resultado == pytest.approx(_referencia(SATISFACCION, cortes, metodo, limites),
+                                      abs=1e-2)
+
+
+@pytest.mark.parametrize('escala, desplazamiento', [(1.0, 0.0), (1.0 / 3.0, 0.0),
+                                                    (0.7, 0.1), (1e-3, 5.0)])
+def test_bisector_discriminante_nulo(escala, desplazamiento):
+    # La mitad del área cae justo donde el flanco de 'baja' llega a 0
+    trapecios = SATISFACCION * escala + desplazamiento
+    limites = (desplazamiento, 100.0 * escala + desplazamiento)
+    resultado = bisector(trapecios, [[1.0, 0.0, 1.0]], limites)[0]
+    assert np.isfinite(resultado)
+    assert resultado == pytest.approx(50.0 * escala + desplazamiento, abs=1e-5 * escala + 1e-9)
+
+
+def test_formas_aleatorias_contra_skfuzzy():
+    rng = np.random.default_rng(3)
+    limites = (0.0, 10.0)
+    for _ in range(20):
+        trapecios = np.sort(rng.uniform(*limites, (3, 4)), axis=1)
+        cortes = rng.choice([0.0, 0.25, 0.5, 1.0], 3)
+        if cortes.max() == 0:
+            continue
+        for metodo in ('centroid', 'bisector'):
+            resultado = METODOS[metodo](trapecios, [cortes], limites)[0]
+            assert resultado == pytest.approx(_referencia(trapecios, cortes, metodo, limites),
+                                              abs=1e-3)
+
+
+def test_sin_area_devuelve_nan():
+    for metodo in METODOS.values():
+        assert np.isnan(metodo(SATISFACCION, [[0.0, 0.0, 0.0]], (0.0, 100.0))[0])
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# El perfil de skfuzzy debe atribuir casi todo el tiempo de compute() a
+# etapas con nombre, y restaurar las funciones al salir.
+
+import numpy as np
+import pytest
+
+from instrumentacion import Perfilador, instrumentar_motor, instrumentar_skfuzzy
+
+
+def _etapas(perfil):
+    return {e['ruta']: e for e in perfil.metricas()['etapas']}
+
+
+def test_skfuzzy_tiempo_atribuido_y_restauracion():
+    ctrl = pytest.importorskip('skfuzzy.control')
+    from skfuzzy.control import controlsystem
+
+    from modelo_satisfaccion import construir_sistema_control
+
+    iterar_original = controlsystem.RuleOrderGenerator.__iter__
+    simulacion = ctrl.ControlSystemSimulation(construir_sistema_control(), cache=False)
+    with Perfilador() as perfil:
+        instrumentar_skfuzzy(perfil)
+        for calidad, tiempo in [(9, 10), (5, 30), (2, 50)] * 10:
+            simulacion.input['calidad'] = calidad
+            simulacion.input['tiempo_espera'] = tiempo
+            simulacion.compute()
+
+    etapas = _etapas(perfil)
+    assert 'compute/orden_reglas' in etapas and 'compute/reinicio' in etapas
+    assert etapas['compute']['propio_s'] < 0.2 * etapas['compute']['total_s']
+    assert perfil.metricas()['puntos'] == 30
+    assert controlsystem.RuleOrderGenerator.__iter__ is iterar_original
+
+
+def test_motor_reglas_disparadas_por_punto():
+    from modelo_satisfaccion import cargar_motor
+
+    motor = cargar_motor()
+    entradas = np.random.default_rng(0).uniform([0, 0], [10, 60], (1000, 2))
+    esperado = (motor.activaciones(motor.fuzzificar(entradas)) > 0).sum() / 1000.0
+    with Perfilador() as perfil:
+        instrumentar_motor(perfil, motor)
+        motor.evaluar(entradas[:400])
+        motor.evaluar(entradas[400:])
+    assert perfil.metricas()['por_punto']['reglas_disparadas'] == pytest.approx(esperado)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# La base minimizada debe dar la misma salida que la original en skfuzzy.
+
+import numpy as np
+import pytest
+
+ctrl = pytest.importorskip('skfuzzy.control')
+
+from minimizacion_reglas import (minimizar_control_system, minimizar_reglas,  # noqa: E402
+                                 verificar_equivalencia)
+
+
+def _variables():
+    x = ctrl.Antecedent(np.arange(0, 11, 1), 'x')
+    y = ctrl.Antecedent(np.arange(0, 11, 1), 'y')
+    s = ctrl.Consequent(np.arange(0, 101, 1), 's')
+    for variable in (x, y, s):
+        variable.automf(3)
+    return x, y, s
+
+
+def test_satisfaccion_exacta():
+    from modelo_satisfaccion import construir_sistema_control
+
+    _, informe = minimizar_control_system(construir_sistema_control(), muestras=100)
+    assert informe['reglas_minimizado'] < informe['reglas_original']
+    assert informe['verificacion']['error_max'] <= 1e-9
+
+
+@pytest.mark.parametrize('semilla', range(3))
+def test_base_aleatoria_con_negaciones_y_huecos(semilla):
+    # Reglas al azar con términos negados: hay regiones donde no dispara
+    # ninguna regla y la verificación debe dejarlas en NaN sin fallar
+    rng = np.random.default_rng(semilla)
+    x, y, s = _variables()
+    terminos = ['poor', 'average', 'good']
+    reglas = []
+    for r in range(9):
+        a = x[terminos[rng.integers(3)]]
+        b = y[terminos[rng.integers(3)]]
+        if rng.random() < 0.4:
+            a = ~a
+        reglas.append(ctrl.Rule(a & b, s[terminos[rng.integers(3)]], label='r{}'.format(r)))
+    sistema = ctrl.ControlSystem(reglas)
+    minimizado, informe = minimizar_control_system(sistema, muestras=121)
+    assert informe['verificacion']['error_max'] <= 1e-9
+    assert verificar_equivalencia(sistema, minimizado, muestras=121)['error_max'] <= 1e-9
+
+
+def test_fusion_y_reglas_no_min_max():
+    x, y, s = _variables()
+    reglas = [
+        ctrl.Rule(x['poor'] & y['poor'], s['poor'], label='a'),
+        ctrl.Rule(x['poor'] & y['average'], s['poor'], label='b'),
+        ctrl.Rule(x['good'] & y['poor'], s['good'], label='c', and_func=np.multiply),
+        ctrl.Rule(x['good'] & y['average'], s['good'], label='d', and_func=np.multiply),
+    ]
+    nuevas, fusiones = minimizar_reglas(reglas)
+    assert fusiones == [('a+b', ['a', 'b'])]
+    # Las reglas con producto no se fusionan
+    assert [r.label for r in nuevas] == ['a+b', 'c', 'd']
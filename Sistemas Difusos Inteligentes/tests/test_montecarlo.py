@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# Análisis Monte Carlo del seguidor frente a una evaluación directa de las
+# mismas lecturas con evaluar_lote().
+
+import numpy as np
+import pytest
+
+from controlador_seguidor import ControladorSeguidor
+from montecarlo import analizar_ruido
+
+# Low con ruido grande (lecturas saturadas en 0), Gray y High
+PUNTOS = np.array([[0.15, 30.0], [0.4, 15.0], [0.85, 100.0]])
+SIGMA = (0.2, 5.0)
+MUESTRAS = 4000
+
+
+def _directo(controlador, semilla=0):
+    semillas = np.random.SeedSequence(semilla).spawn(len(PUNTOS))
+    salidas = []
+    saturadas = []
+    for punto, semilla_punto in zip(PUNTOS, semillas):
+        lecturas = punto + np.random.default_rng(semilla_punto).standard_normal((MUESTRAS, 2)) \
+            * np.asarray(SIGMA)
+        salidas.append(controlador.evaluar_lote(lecturas[:, 0], lecturas[:, 1]))
+        saturadas.append(np.mean((lecturas[:, 0] <= 0) | (lecturas[:, 0] >= 1)))
+    return np.array(salidas), np.array(saturadas)
+
+
+def test_media_y_cuantiles_como_evaluacion_directa():
+    controlador = ControladorSeguidor()
+    resultado = analizar_ruido(controlador, PUNTOS, SIGMA, MUESTRAS, tamano_bloque=1000)
+    salidas, saturadas = _directo(controlador)
+
+    # Ninguna lectura queda fuera: las saturadas (~1/4 alrededor de Low)
+    # disparan Low o High
+    assert saturadas[0] > 0.2
+    assert np.isfinite(salidas).all()
+    np.testing.assert_array_equal(resultado['sin_reglas'], 0.0)
+    np.testing.assert_allclose(resultado['media'], salidas.mean(axis=1), rtol=1e-12)
+    np.testing.assert_allclose(resultado['varianza'], salidas.var(axis=1, ddof=1), rtol=1e-9)
+    # Cuantiles del histograma (intervalos de 0.05°): la fracción de
+    # salidas por debajo de cada uno es el nivel, salvo un intervalo
+    for p, cuantiles in enumerate(resultado['cuantiles']):
+        for nivel, q in zip(resultado['niveles'], cuantiles):
+            assert np.mean(salidas[p] < q - 0.05) <= nivel <= np.mean(salidas[p] <= q + 0.05)
+
+
+def test_mismo_resultado_con_varios_procesos():
+    controlador = ControladorSeguidor()
+    uno = analizar_ruido(controlador, PUNTOS, SIGMA, MUESTRAS, procesos=1)
+    dos = analizar_ruido(controlador, PUNTOS, SIGMA, MUESTRAS, procesos=2)
+    for clave in ('media', 'varianza', 'cuantiles', 'sin_reglas'):
+        np.testing.assert_array_equal(uno[clave], dos[clave])
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# Evaluación apilada de variantes (motor_apilado) frente al motor de cada
+# variante por separado, con defuzzificación muestreada y analítica.
+
+import numpy as np
+import pytest
+
+from definicion_difusa import cargar_definicion, compilar
+from modelo_satisfaccion import RUTA_DEFINICION
+from motor_apilado import MotorApilado, variante_definicion
+
+
+def _variantes():
+    base = cargar_definicion(RUTA_DEFINICION)
+    # Varias familias por entrada y de salida, y consecuentes distintos
+    return [variante_definicion(base, nombre='base'),
+            variante_definicion(base, nombre='largo', conjuntos={'tiempo_espera': {'largo': [35, 60, 60]}}),
+            variante_definicion(base, nombre='regla3', consecuentes={'regla3': 'baja'}),
+            variante_definicion(base, nombre='mixta',
+                                conjuntos={'calidad': {'buena': [6, 10, 10]},
+                                           'tiempo_espera': {'largo': [35, 60, 60]},
+                                           'satisfaccion': {'alta': [60, 100, 100]}},
+                                consecuentes={'regla6': 'media'})]
+
+
+def _puntos():
+    rng = np.random.default_rng(0)
+    aleatorios = rng.uniform([0, 0], [10, 60], (3000, 2))
+    calidad, tiempo = np.meshgrid([0, 3, 5, 6, 7, 10], [0, 10, 20, 30, 35, 40, 50, 60])
+    return np.vstack([aleatorios, np.column_stack([calidad.ravel(), tiempo.ravel()])])
+
+
+@pytest.mark.parametrize('analitica', [False, True])
+def test_igual_que_un_motor_por_variante(analitica):
+    definiciones = _variantes()
+    # Bloque pequeño para recorrer varios bloques de pares
+    apilado = MotorApilado.desde_definiciones(definiciones, tamano_bloque=1000,
+                                              analitica=analitica)
+    assert apilado.nombres == ['base', 'largo', 'regla3', 'mixta']
+    assert apilado.familias() == {'calidad': 2, 'tiempo_espera': 2}
+
+    puntos = _puntos()
+    por_separado = np.column_stack([compilar(d).motor(analitica=analitica).evaluar(puntos)
+                                    for d in definiciones])
+    np.testing.assert_allclose(apilado.evaluar(puntos), por_separado, rtol=0, atol=1e-9)
+
+    region = np.random.default_rng(1).integers(0, apilado.n_variantes, puntos.shape[0])
+    propia = por_separado[np.arange(puntos.shape[0]), region]
+    np.testing.assert_allclose(apilado.evaluar_por_variante(puntos, region), propia,
+                               rtol=0, atol=1e-9)
+    nombres = np.array(apilado.nombres)[region]
+    np.testing.assert_allclose(apilado.evaluar_por_variante(puntos, nombres), propia,
+                               rtol=0, atol=1e-9)
+    np.testing.assert_allclose(apilado.evaluar_por_variante(puntos, 'mixta'), por_separado[:, 3],
+                               rtol=0, atol=1e-9)
+
+
+def test_estructura_distinta_es_un_error():
+    base = cargar_definicion(RUTA_DEFINICION)
+    sin_regla = variante_definicion(base)
+    sin_regla['reglas'] = sin_regla['reglas'][:-1]
+    with pytest.raises(ValueError, match='reglas'):
+        MotorApilado.desde_definiciones([base, sin_regla])
+
+    otro_metodo = compilar(base).motor()
+    otro_metodo.metodo = 'mom'
+    with pytest.raises(ValueError, match='metodo'):
+        MotorApilado([compilar(base).motor(), otro_metodo])
+
+    with pytest.raises(ValueError):
+        MotorApilado([compilar(base).motor(), compilar(base).motor(dispersa=True)])
+    with pytest.raises(ValueError):
+        MotorApilado([compilar(base).motor(), compilar(base).motor(analitica=True)])
+    with pytest.raises(ValueError):
+        MotorApilado([])
+
+    apilado = MotorApilado.desde_definiciones([base, base])
+    with pytest.raises(ValueError):
+        apilado.evaluar_por_variante(_puntos(), [0, 1])
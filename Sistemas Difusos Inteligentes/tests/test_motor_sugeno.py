@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# Motor Sugeno (motor_sugeno): ajuste de consecuentes por mínimos
+# cuadrados y filas sin reglas activas.
+
+import numpy as np
+import pytest
+
+from definicion_difusa import cargar_definicion, construir_control_system
+from modelo_satisfaccion import RUTA_DEFINICION, cargar_motor
+from motor_sugeno import MotorSugeno, ajustar_consecuentes, consecuentes_centroide
+from motor_vectorizado import MotorMamdani
+
+
+# Motor Mamdani cuya "superficie" es un plano exacto: el
+# ajuste de orden 1 debe reproducirlo en todo el dominio
+class _Plano(MotorMamdani):
+
+    def evaluar(self, entradas, traza=None):
+        matriz = self._como_matriz(entradas)
+        return 3.0 + 2.0 * matriz[:, 0] - 0.5 * matriz[:, 1]
+
+
+def _puntos():
+    return np.random.default_rng(0).uniform([0, 0], [10, 60], (5000, 2))
+
+
+def _tres_reglas():
+    # Solo regla1..regla3 (calidad buena): con calidad baja no dispara ninguna
+    definicion = cargar_definicion(RUTA_DEFINICION)
+    definicion['reglas'] = definicion['reglas'][:3]
+    sistema_control, _ = construir_control_system(definicion)
+    return MotorMamdani(sistema_control)
+
+
+def test_objetivo_lineal_se_reproduce_exacto():
+    definicion = cargar_definicion(RUTA_DEFINICION)
+    sistema_control, _ = construir_control_system(definicion)
+    plano = _Plano(sistema_control)
+
+    sugeno = ajustar_consecuentes(plano, orden=1, puntos_por_eje=21)
+    assert sugeno.orden == 1 and sugeno.coeficientes.shape == (9, 3)
+    puntos = _puntos()
+    np.testing.assert_allclose(sugeno.evaluar(puntos), plano.evaluar(puntos), rtol=0, atol=1e-8)
+
+    # Con orden 0 un plano no se puede reproducir
+    constante = ajustar_consecuentes(plano, orden=0, puntos_por_eje=21)
+    assert np.abs(constante.evaluar(puntos) - plano.evaluar(puntos)).max() > 1.0
+
+
+@pytest.mark.parametrize('orden', [0, 1])
+def test_sin_reglas_activas_nan(orden):
+    mamdani = _tres_reglas()
+    puntos = _puntos()
+    esperado = mamdani.evaluar(puntos)
+    sin_reglas = np.isnan(esperado)
+    assert sin_reglas.any() and not sin_reglas.all()
+
+    # El ajuste ignora las filas NaN del objetivo
+    sugeno = ajustar_consecuentes(mamdani, orden=orden)
+    assert np.isfinite(sugeno.coeficientes).all()
+    resultado = sugeno.evaluar(puntos)
+    np.testing.assert_array_equal(np.isnan(resultado), sin_reglas)
+
+    centroides = MotorSugeno(mamdani, consecuentes_centroide(mamdani))
+    np.testing.assert_array_equal(np.isnan(centroides.evaluar(puntos)), sin_reglas)
+
+
+def test_coeficientes_de_forma_incorrecta():
+    motor = cargar_motor()
+    with pytest.raises(ValueError):
+        MotorSugeno(motor, np.zeros((9, 2)))
+    with pytest.raises(ValueError):
+        ajustar_consecuentes(motor, orden=2)
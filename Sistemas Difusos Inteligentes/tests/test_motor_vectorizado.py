@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# MotorMamdani (denso, disperso y analítico) frente a
+# ControlSystemSimulation.compute() de scikit-fuzzy.
+#
+# skfuzzy agrega sobre el universo discreto de salida (paso 1) e inserta
+# los cruces de los cortes; el motor denso no, así que su centroide difiere
+# en ~0.014 y el analítico (exacto) en ~0.007. La media de máximos de
+# skfuzzy solo ve los puntos del universo: difiere hasta en un paso.
+
+import functools
+
+import numpy as np
+import pytest
+
+from definicion_difusa import cargar_definicion, construir_control_system
+from modelo_satisfaccion import RUTA_DEFINICION
+from motor_vectorizado import MotorMamdani
+
+ctrl = pytest.importorskip('skfuzzy.control')
+
+MODOS = {
+    'densa': {},
+    'dispersa': {'dispersa': True},
+    'analitica': {'analitica': True},
+    'analitica_dispersa': {'analitica': True, 'dispersa': True},
+}
+TOLERANCIA = {'centroid': 0.05, 'bisector': 0.05, 'mom': 1.0}
+
+
+def _puntos():
+    rng = np.random.default_rng(0)
+    aleatorios = np.column_stack([rng.uniform(0, 10, 300), rng.uniform(0, 60, 300)])
+    # Esquinas y vértices de los conjuntos de entrada
+    calidad, tiempo = np.meshgrid([0, 3, 5, 7, 10], [0, 15, 30, 45, 60])
+    return np.vstack([aleatorios, np.column_stack([calidad.ravel(), tiempo.ravel()])])
+
+
+def _sistema(metodo='centroid', reglas=None):
+    definicion = cargar_definicion(RUTA_DEFINICION)
+    if reglas is not None:
+        definicion['reglas'] = definicion['reglas'][:reglas]
+    sistema_control, _ = construir_control_system(definicion)
+    for consecuente in sistema_control.consequents:
+        consecuente.defuzzify_method = metodo
+    return sistema_control
+
+
+# Referencia de skfuzzy, una vez por sistema (es la parte lenta)
+@functools.lru_cache(maxsize=None)
+def _skfuzzy(metodo='centroid', reglas=None):
+    puntos = _puntos()
+    simulacion = ctrl.ControlSystemSimulation(_sistema(metodo, reglas), cache=False)
+    resultado = np.full(puntos.shape[0], np.nan)
+    for i, (calidad, tiempo) in enumerate(puntos.tolist()):
+        simulacion.input['calidad'] = calidad
+        simulacion.input['tiempo_espera'] = tiempo
+        simulacion.compute()
+        resultado[i] = simulacion.output.get('satisfaccion', np.nan)
+    return resultado
+
+
+@pytest.mark.parametrize('modo', sorted(MODOS))
+def test_centroide_contra_skfuzzy(modo):
+    sistema_control = _sistema()
+    puntos = _puntos()
+    resultado = MotorMamdani(sistema_control, **MODOS[modo]).evaluar(puntos)
+    assert resultado == pytest.approx(_skfuzzy(), abs=TOLERANCIA['centroid'])
+
+
+@pytest.mark.parametrize('modo', ['analitica', 'analitica_dispersa'])
+@pytest.mark.parametrize('metodo', ['bisector', 'mom'])
+def test_otros_metodos_contra_skfuzzy(metodo, modo):
+    sistema_control = _sistema(metodo)
+    puntos = _puntos()
+    resultado = MotorMamdani(sistema_control, **MODOS[modo]).evaluar(puntos)
+    assert resultado == pytest.approx(_skfuzzy(metodo), abs=TOLERANCIA[metodo])
+
+
+@pytest.mark.parametrize('modo', sorted(MODOS))
+def test_sin_reglas_activas_nan_como_skfuzzy(modo):
+    # Con solo regla1..regla3 hay zonas donde no dispara ninguna regla
+    sistema_control = _sistema(reglas=3)
+    puntos = _puntos()
+    esperado = _skfuzzy(reglas=3)
+    assert np.isnan(esperado).any()
+    resultado = MotorMamdani(sistema_control, **MODOS[modo]).evaluar(puntos)
+    assert resultado == pytest.approx(esperado, abs=TOLERANCIA['centroid'], nan_ok=True)
+
+
+def test_dispersa_igual_a_densa():
+    sistema_control = _sistema()
+    puntos = _puntos()
+    for analitica in (False, True):
+        densa = MotorMamdani(sistema_control, analitica=analitica).evaluar(puntos)
+        dispersa = MotorMamdani(sistema_control, analitica=analitica, dispersa=True).evaluar(puntos)
+        np.testing.assert_allclose(dispersa, densa, rtol=0, atol=1e-9)
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+# Emuladores enteros de punto_fijo (paso y evaluar_codigos) frente a la
+# cabecera C exportada, compilada con el compilador del sistema.
+
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+from controlador_seguidor import ControladorSeguidor
+from punto_fijo import compilar_seguidor
+
+COMPILADOR = shutil.which('gcc') or shutil.which('cc')
+
+PROGRAMA = r'''
+#include <stdio.h>
+#include "seguidor_difuso.h"
+
+int main(void)
+{
+    uint16_t codigos[FZ_ENTRADAS];
+    unsigned a, b;
+    while (scanf("%u %u", &a, &b) == 2) {
+        codigos[0] = (uint16_t)a;
+        codigos[1] = (uint16_t)b;
+        printf("%ld\n", (long)fz_inferir(codigos));
+    }
+    return 0;
+}
+'''
+
+
+def _compilar(tmp_path, entero):
+    entero.exportar_c(str(tmp_path / 'seguidor_difuso.h'))
+    (tmp_path / 'prueba.c').write_text(PROGRAMA)
+    ejecutable = str(tmp_path / 'prueba')
+    subprocess.run([COMPILADOR, '-std=c99', '-O2', '-Wall', '-Werror', '-Wno-unused-function',
+                    '-o', ejecutable, str(tmp_path / 'prueba.c')], check=True)
+    return ejecutable
+
+
+def _ejecutar(ejecutable, codigos):
+    entrada = '\n'.join('{} {}'.format(a, b) for a, b in codigos.tolist())
+    salida = subprocess.run([ejecutable], input=entrada, capture_output=True, text=True,
+                            check=True).stdout
+    return np.array(salida.split(), dtype=np.int64)
+
+
+# Seguidor con un hueco en reflexión (0.4..0.6) donde no dispara ninguna
+# regla: el C devuelve -1
+def _con_hueco():
+    return ControladorSeguidor(params_reflexion={'Low': [0.0, 0.1, 0.2, 0.4],
+                                                 'Gray': [0.6, 0.7, 0.8, 0.9]},
+                               tabla_reglas={'Low': {'Media': 'Sin giro (0°)'},
+                                             'Gray': {'Media': 'Giro leve (45°)'}})
+
+
+@pytest.mark.skipif(COMPILADOR is None, reason='no hay compilador de C')
+@pytest.mark.parametrize('bits', [8, 16])
+@pytest.mark.parametrize('hueco', [False, True])
+def test_emuladores_iguales_al_c(tmp_path, bits, hueco):
+    entero = compilar_seguidor(_con_hueco() if hueco else ControladorSeguidor(), bits=bits)
+    ejecutable = _compilar(tmp_path, entero)
+
+    # Todas las combinaciones de códigos de entrada
+    reflexion, distancia = np.meshgrid(np.arange(entero.entradas[0].n_puntos),
+                                       np.arange(entero.entradas[1].n_puntos), indexing='ij')
+    codigos = np.column_stack([reflexion.ravel(), distancia.ravel()])
+    esperado = _ejecutar(ejecutable, codigos)
+    assert (esperado == -1).any() == hueco and (esperado >= 0).any()
+
+    q, activa = entero.evaluar_codigos(codigos)
+    np.testing.assert_array_equal(activa, esperado >= 0)
+    np.testing.assert_array_equal(q[activa], esperado[activa])
+
+    # Emulador escalar en una muestra (es Python puro); -1 como
+    # última salida para que 'ninguna regla' coincida con el C
+    muestra = np.random.default_rng(0).choice(codigos.shape[0], 3000, replace=False)
+    escalar = []
+    for a, b in codigos[muestra].tolist():
+        entero.ultima_salida = -1
+        escalar.append(entero.paso(a, b))
+    np.testing.assert_array_equal(escalar, esperado[muestra])
+
+
+@pytest.mark.parametrize('bits', [8, 16])
+def test_fondo_de_escala_dispara_reglas(bits):
+    entero = compilar_seguidor(ControladorSeguidor(), bits=bits)
+    reflexion, distancia = entero.entradas
+    extremos = [0, reflexion.n_puntos - 1]
+    assert reflexion.codigo(0.0) == 0 and reflexion.codigo(1.0) == reflexion.n_puntos - 1
+
+    codigos = np.array([(r, d) for r in extremos for d in (0, distancia.codigo(30.0),
+                                                           distancia.n_puntos - 1)])
+    _, activa = entero.evaluar_codigos(codigos)
+    assert activa.all()
+    for r, d in codigos.tolist():
+        entero.ultima_salida = -1
+        assert entero.paso(r, d) >= 0
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+# Puntuación por bloques (puntuacion_streaming): CSV y Parquet de ida y
+# vuelta con un bloque menor que el archivo.
+
+import numpy as np
+import pytest
+
+from modelo_satisfaccion import cargar_motor, clasificar
+from puntuacion_streaming import EscritorCSV, leer_bloques, puntuar_archivo
+
+FILAS = 1000
+BLOQUE = 128
+
+
+def _clientes():
+    rng = np.random.default_rng(0)
+    return np.column_stack([rng.integers(0, 11, FILAS), rng.integers(0, 61, FILAS)]).astype(float)
+
+
+def _escribir_entrada(ruta, clientes):
+    if str(ruta).endswith('.parquet'):
+        pa = pytest.importorskip('pyarrow')
+        import pyarrow.parquet as pq
+
+        pq.write_table(pa.table({'calidad': clientes[:, 0], 'tiempo_espera': clientes[:, 1]}),
+                       str(ruta), row_group_size=FILAS // 3)
+        return
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        # Columnas en otro orden y una extra que se ignora
+        archivo.write('id,tiempo_espera,calidad\n')
+        for i, (calidad, tiempo) in enumerate(clientes.tolist()):
+            archivo.write('{},{:g},{:g}\n'.format(i, tiempo, calidad))
+
+
+def _leer_salida(ruta):
+    if str(ruta).endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        tabla = pq.read_table(str(ruta))
+        return ({nombre: tabla.column(nombre).to_numpy() for nombre in tabla.column_names
+                 if nombre != 'nivel'}, tabla.column('nivel').to_pylist())
+    with open(ruta, encoding='utf-8') as archivo:
+        encabezado = archivo.readline().strip().split(',')
+        filas = [linea.strip().split(',') for linea in archivo]
+    columnas = {nombre: np.array([float(fila[k]) for fila in filas])
+                for k, nombre in enumerate(encabezado) if nombre != 'nivel'}
+    return columnas, [fila[encabezado.index('nivel')] for fila in filas]
+
+
+@pytest.mark.parametrize('entrada', ['clientes.csv', 'clientes.parquet'])
+@pytest.mark.parametrize('salida', ['puntajes.csv', 'puntajes.parquet'])
+def test_ida_y_vuelta_por_bloques(tmp_path, entrada, salida):
+    if 'parquet' in entrada + salida:
+        pytest.importorskip('pyarrow')
+    clientes = _clientes()
+    _escribir_entrada(tmp_path / entrada, clientes)
+
+    bloques = list(leer_bloques(str(tmp_path / entrada), BLOQUE))
+    assert len(bloques) > 1 and max(b.shape[0] for b in bloques) <= BLOQUE
+    np.testing.assert_array_equal(np.vstack(bloques), clientes)
+
+    motor = cargar_motor()
+    resumen = puntuar_archivo(str(tmp_path / entrada), str(tmp_path / salida), BLOQUE, motor=motor)
+    assert resumen['filas'] == FILAS
+
+    columnas, niveles = _leer_salida(tmp_path / salida)
+    esperado = motor.evaluar(clientes)
+    assert list(columnas) == ['calidad', 'tiempo_espera', motor.salida]
+    np.testing.assert_array_equal(columnas['calidad'], clientes[:, 0])
+    np.testing.assert_array_equal(columnas['tiempo_espera'], clientes[:, 1])
+    # El CSV guarda dos decimales
+    np.testing.assert_allclose(columnas[motor.salida], esperado,
+                               atol=0.005 if salida.endswith('.csv') else 0)
+    assert niveles == clasificar(esperado).tolist()
+
+
+def test_escritor_csv_con_otras_columnas(tmp_path):
+    ruta = tmp_path / 'salida.csv'
+    escritor = EscritorCSV(str(ruta), columnas=('a', 'b', 'c'), salida='puntaje')
+    escritor.escribir(np.array([[1.0, 2.5, 3.0], [4.0, 5.0, 6.25]]), np.array([10.0, 20.126]),
+                      np.array(['BAJA', 'BAJA']))
+    escritor.cerrar()
+    assert ruta.read_text(encoding='utf-8').splitlines() == [
+        'a,b,c,puntaje,nivel', '1,2.5,3,10.00,BAJA', '4,5,6.25,20.13,BAJA']
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+# Servicio de puntuación: respuestas de atender, Content-Length (400/413)
+# y micro-lotes con peticiones concurrentes.
+
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from definicion_difusa import cargar_definicion, construir_control_system
+from modelo_satisfaccion import RUTA_DEFINICION, cargar_motor
+from motor_vectorizado import MotorMamdani
+from servicio_puntuacion import ServicioPuntuacion
+
+
+def _json(datos):
+    return json.dumps(datos).encode('utf-8')
+
+
+# Ejecuta corrutina(servicio) con los micro-lotes en marcha
+def _con_servicio(servicio, corrutina):
+    async def ejecutar():
+        servicio.lotes.iniciar()
+        try:
+            return await corrutina(servicio)
+        finally:
+            await servicio.lotes.detener()
+    return asyncio.run(ejecutar())
+
+
+def test_atender_puntua_una_entrada_y_un_lote():
+    servicio = ServicioPuntuacion(cargar_motor())
+    puntos = np.array([[9.0, 10.0], [3.0, 50.0], [5.0, 30.0]])
+    esperado = servicio.motor.evaluar(puntos)
+
+    async def pedir(servicio):
+        unica = await servicio.atender('POST', '/puntuar', _json({'calidad': 9, 'tiempo_espera': 10}))
+        lote = await servicio.atender('POST', '/puntuar', _json({'entradas': puntos.tolist()}))
+        return unica, lote
+
+    (estado, unica), (estado_lote, lote) = _con_servicio(servicio, pedir)
+    assert estado == 200 and estado_lote == 200
+    assert unica == {'satisfaccion': round(esperado[0], 4), 'nivel': 'ALTA'}
+    assert lote['satisfaccion'] == [round(p, 4) for p in esperado.tolist()]
+    assert lote['nivel'] == ['ALTA', 'BAJA', 'MEDIA']
+
+
+@pytest.mark.parametrize('cuerpo', [
+    {'entradas': [1, 2, 3, 4]},
+    {'entradas': [[1, 2, 3]]},
+    {'entradas': [[[1, 2]]]},
+    {'calidad': 9},
+    {'calidad': 'alta', 'tiempo_espera': 10},
+])
+def test_atender_rechaza_entradas_mal_formadas(cuerpo):
+    servicio = ServicioPuntuacion(cargar_motor())
+    estado, respuesta = asyncio.run(servicio.atender('POST', '/puntuar', _json(cuerpo)))
+    assert estado == 400
+    assert respuesta['esperado'] == {'calidad': 0, 'tiempo_espera': 0}
+
+
+def test_atender_rutas_y_metodos():
+    servicio = ServicioPuntuacion(cargar_motor())
+    assert asyncio.run(servicio.atender('GET', '/salud', b'')) == (200, {'estado': 'ok'})
+    assert asyncio.run(servicio.atender('GET', '/otra', b''))[0] == 404
+    assert asyncio.run(servicio.atender('GET', '/puntuar', b''))[0] == 405
+
+
+def test_sin_reglas_activas_devuelve_null():
+    # Solo regla1..regla3 (calidad buena): con calidad 0 no dispara ninguna
+    definicion = cargar_definicion(RUTA_DEFINICION)
+    definicion['reglas'] = definicion['reglas'][:3]
+    sistema_control, _ = construir_control_system(definicion)
+    servicio = ServicioPuntuacion(MotorMamdani(sistema_control))
+
+    async def pedir(servicio):
+        return await servicio.atender('POST', '/puntuar', _json({'entradas': [[0, 0], [9, 10]]}))
+
+    estado, respuesta = _con_servicio(servicio, pedir)
+    assert estado == 200
+    assert respuesta['satisfaccion'][0] is None and respuesta['nivel'][0] is None
+    assert respuesta['satisfaccion'][1] is not None and respuesta['nivel'][1] == 'ALTA'
+
+
+def test_fallo_del_motor_devuelve_500():
+    servicio = ServicioPuntuacion(cargar_motor())
+
+    def fallar(matriz):
+        raise RuntimeError('motor caído')
+    servicio.lotes.evaluar = fallar
+
+    async def pedir(servicio):
+        return await servicio.atender('POST', '/puntuar', _json({'calidad': 9, 'tiempo_espera': 10}))
+
+    estado, respuesta = _con_servicio(servicio, pedir)
+    assert estado == 500 and 'motor caído' in respuesta['error']
+
+
+@pytest.mark.parametrize('cabeceras, esperado', [
+    ({}, (0, None)),
+    ({'content-length': '12'}, (12, None)),
+    ({'content-length': 'doce'}, 400),
+    ({'content-length': '-1'}, 400),
+    ({'content-length': '1025'}, 413),
+])
+def test_largo_cuerpo(cabeceras, esperado):
+    servicio = ServicioPuntuacion(cargar_motor(), maximo_cuerpo=1024)
+    largo, rechazo = servicio._largo_cuerpo(cabeceras)
+    if isinstance(esperado, tuple):
+        assert (largo, rechazo) == esperado
+    else:
+        assert largo is None and rechazo[0] == esperado
+
+
+def test_micro_lotes_juntan_peticiones_concurrentes():
+    servicio = ServicioPuntuacion(cargar_motor(), ventana_ms=50.0)
+    rng = np.random.default_rng(0)
+    puntos = np.column_stack([rng.uniform(0, 10, 64), rng.uniform(0, 60, 64)])
+
+    async def pedir(servicio):
+        return await asyncio.gather(*[
+            servicio.atender('POST', '/puntuar', _json({'calidad': c, 'tiempo_espera': t}))
+            for c, t in puntos.tolist()])
+
+    respuestas = _con_servicio(servicio, pedir)
+    esperado = servicio.motor.evaluar(puntos)
+    assert [r['satisfaccion'] for _, r in respuestas] == [round(p, 4) for p in esperado.tolist()]
+
+    # Cada petición recibe su propia fila aunque se evalúen juntas
+    estadisticas = servicio.lotes.estadisticas()
+    assert estadisticas['filas'] == 64
+    assert estadisticas['lotes'] < 64
+
+
+def test_conexion_responde_413_y_cierra():
+    servicio = ServicioPuntuacion(cargar_motor(), maximo_cuerpo=1024)
+
+    async def pedir(servicio):
+        servidor = await asyncio.start_server(servicio.conexion, '127.0.0.1', 0)
+        puerto = servidor.sockets[0].getsockname()[1]
+        async with servidor:
+            lector, escritor = await asyncio.open_connection('127.0.0.1', puerto)
+            escritor.write(b'POST /puntuar HTTP/1.1\r\nContent-Length: 4096\r\n\r\n')
+            await escritor.drain()
+            respuesta = await lector.read()
+            escritor.close()
+        return respuesta
+
+    respuesta = _con_servicio(servicio, pedir)
+    assert respuesta.startswith(b'HTTP/1.1 413 Payload Too Large\r\n')
+    assert b'Connection: close' in respuesta
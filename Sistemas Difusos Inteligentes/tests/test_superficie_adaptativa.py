@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+# Muestreo adaptativo (superficie_adaptativa): la verificación final
+# acerca el error real a la tolerancia pedida.
+
+import numpy as np
+
+from superficie_adaptativa import muestrear_adaptativo
+
+
+def test_verificacion_acota_el_error():
+    from modelo_satisfaccion import cargar_motor
+
+    motor = cargar_motor()
+    sin_verificar = muestrear_adaptativo(motor, tolerancia=0.5, verificacion=0)
+    superficie = muestrear_adaptativo(motor, tolerancia=0.5)
+
+    # Sin la verificación, el centro y los puntos medios dejaban ~2x
+    assert sin_verificar.medir_error(motor, semilla=5) > 0.75
+    assert superficie.medir_error(motor, semilla=5) < 0.5 * 1.3
+    assert superficie.evaluaciones < (2 ** 8 + 1) ** 2
+
+    # En los puntos de la verificación la tolerancia se cumple
+    # (salvo en hojas de nivel_maximo, que ya no se dividen)
+    puntos = np.random.default_rng(1).uniform(superficie.inferior, superficie.superior, (5000, 2))
+    error = np.abs(superficie.evaluar(puntos) - motor.evaluar(puntos))
+    _, fina = superficie._celdas(puntos)
+    divisibles = superficie.niveles[tuple(fina.T)] < superficie.nivel_maximo
+    assert np.nanmax(error[divisibles]) <= 0.5
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# Superficie compilada (superficie_compilada): índice de ejes no
+# uniformes, persistencia .npz y error máximo frente al motor.
+
+import numpy as np
+import pytest
+
+from modelo_satisfaccion import cargar_motor
+from superficie_compilada import SuperficieCompilada, _IndiceEje
+
+
+def _esperado(eje, x):
+    return np.clip(np.searchsorted(eje, x, side='right') - 1, 0, eje.size - 2)
+
+
+@pytest.mark.parametrize('eje', [
+    [0.0, 0.1, 0.1 + 0.2, 0.35, 1.0, 2.5, 2.6, 10.0],
+    [-3.0, -2.999, 0.0, 1e-3, 7.0, 7.001],
+    list(np.union1d(np.linspace(0, 60, 21), [0.375, 41.25, 59.0625])),
+])
+def test_indice_eje_no_uniforme(eje):
+    eje = np.asarray(eje)
+    indice = _IndiceEje(eje)
+
+    # Nodos, sus vecinos en punto flotante, medios y aleatorios
+    x = np.concatenate([eje, np.nextafter(eje, -np.inf), np.nextafter(eje, np.inf),
+                        (eje[:-1] + eje[1:]) / 2.0,
+                        np.random.default_rng(0).uniform(eje[0], eje[-1], 5000)])
+    x = np.clip(x, eje[0], eje[-1])
+    i = indice.buscar(x)
+    np.testing.assert_array_equal(i, _esperado(eje, x))
+    assert ((eje[i] <= x) & (x <= eje[i + 1])).all()
+
+
+def test_nodos_exactos_y_refinamiento():
+    motor = cargar_motor()
+    superficie = SuperficieCompilada.compilar(None, motor=motor)
+    sin_refinar = SuperficieCompilada.compilar(None, motor=motor, tolerancia=None)
+
+    # En los nodos la interpolación devuelve el valor del motor
+    malla = np.meshgrid(*superficie.ejes, indexing='ij')
+    nodos = np.column_stack([m.ravel() for m in malla])
+    np.testing.assert_allclose(superficie.evaluar(nodos), motor.evaluar(nodos),
+                               rtol=0, atol=1e-9)
+
+    assert any(np.ptp(np.diff(eje)) > 0 for eje in superficie.ejes)
+    assert superficie.error_maximo < sin_refinar.error_maximo / 2
+
+
+def test_error_maximo_frente_al_motor():
+    motor = cargar_motor()
+    superficie = SuperficieCompilada.compilar(None, motor=motor)
+    assert superficie.error_maximo == superficie.medir_error(motor)
+
+    # Con otros puntos el error real queda cerca del informado
+    puntos = np.random.default_rng(7).uniform([0, 0], [10, 60], (100000, 2))
+    real = np.nanmax(np.abs(superficie.evaluar(puntos) - motor.evaluar(puntos)))
+    assert real == pytest.approx(superficie.error_maximo, rel=0.1)
+
+
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+def test_guardar_y_cargar(tmp_path, dtype):
+    motor = cargar_motor()
+    superficie = SuperficieCompilada.compilar(None, motor=motor)
+    superficie.valores = superficie.valores.astype(dtype)
+    ruta = str(tmp_path / 'superficie.npz')
+    superficie.guardar(ruta)
+
+    cargada = SuperficieCompilada.cargar(ruta)
+    assert cargada.entradas == motor.entradas and cargada.salida == motor.salida
+    assert cargada.error_maximo == superficie.error_maximo
+    assert cargada.valores.dtype == dtype
+    for eje, eje_cargado in zip(superficie.ejes, cargada.ejes):
+        np.testing.assert_array_equal(eje_cargado, eje)
+    np.testing.assert_array_equal(cargada.valores, superficie.valores)
+
+    puntos = np.random.default_rng(0).uniform([0, 0], [10, 60], (2000, 2))
+    np.testing.assert_array_equal(cargada.evaluar(puntos), superficie.evaluar(puntos))
+
+    # Sin error medido se guarda NaN y se recupera None
+    superficie.error_maximo = None
+    superficie.guardar(ruta)
+    assert SuperficieCompilada.cargar(ruta).error_maximo is None
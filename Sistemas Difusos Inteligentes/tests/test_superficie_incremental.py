@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# Superficie incremental (superficie_incremental): tras cada edición la
+# superficie coincide con recalcularla entera con el sistema editado.
+
+import copy
+
+import numpy as np
+import pytest
+
+from definicion_difusa import cargar_definicion, compilar
+from modelo_satisfaccion import RUTA_DEFINICION
+from motor_apilado import variante_definicion
+from superficie_incremental import SuperficieIncremental
+
+MODOS = {
+    'densa': {},
+    'dispersa': {'dispersa': True},
+    'analitica': {'analitica': True},
+}
+
+
+def _antecedente(definicion, regla, terminos):
+    definicion = copy.deepcopy(definicion)
+    for r in definicion['reglas']:
+        if r['nombre'] == regla:
+            r['si'] = dict(terminos)
+    return definicion
+
+
+# (edición sobre la superficie, misma edición sobre la definición)
+EDICIONES = [
+    (lambda s: s.editar_conjunto('tiempo_espera', 'medio', [10, 25, 50]),
+     lambda d: variante_definicion(d, conjuntos={'tiempo_espera': {'medio': [10, 25, 50]}})),
+    (lambda s: s.editar_conjunto('calidad', 'regular', [3, 5.5, 7]),
+     lambda d: variante_definicion(d, conjuntos={'calidad': {'regular': [3, 5.5, 7]}})),
+    (lambda s: s.editar_consecuente('regla3', 'baja'),
+     lambda d: variante_definicion(d, consecuentes={'regla3': 'baja'})),
+    (lambda s: s.editar_conjunto('satisfaccion', 'alta', [60, 100, 100]),
+     lambda d: variante_definicion(d, conjuntos={'satisfaccion': {'alta': [60, 100, 100]}})),
+    (lambda s: s.editar_antecedente('regla5', {'calidad': 'regular'}),
+     lambda d: _antecedente(d, 'regla5', {'calidad': 'regular'})),
+    (lambda s: s.editar_conjunto('tiempo_espera', 'largo', [30, 45, 60, 60], tipo='trapmf'),
+     lambda d: variante_definicion(d, conjuntos={'tiempo_espera': {
+         'largo': {'tipo': 'trapmf', 'params': [30, 45, 60, 60]}}})),
+]
+
+
+@pytest.mark.parametrize('modo', sorted(MODOS))
+def test_cada_edicion_igual_a_recalcular(modo):
+    definicion = cargar_definicion(RUTA_DEFINICION)
+    motor = compilar(definicion).motor(**MODOS[modo])
+    ejes = [np.linspace(0, 10, 81), np.linspace(0, 60, 97)]
+    superficie = SuperficieIncremental(motor, ejes)
+    original = motor.evaluar(superficie.puntos)
+    np.testing.assert_allclose(superficie.salida, original, rtol=0, atol=1e-12)
+
+    for editar, editar_definicion in EDICIONES:
+        recalculadas = editar(superficie)
+        definicion = editar_definicion(definicion)
+        completo = compilar(definicion).motor(**MODOS[modo]).evaluar(superficie.puntos)
+        np.testing.assert_allclose(superficie.salida, completo, rtol=0, atol=1e-9)
+        # Solo una parte de las celdas se recalcula
+        assert 0 < recalculadas < superficie.puntos.shape[0]
+
+    # El motor original no se modifica
+    np.testing.assert_array_equal(motor.evaluar(superficie.puntos), original)
+    assert superficie.ediciones == len(EDICIONES)
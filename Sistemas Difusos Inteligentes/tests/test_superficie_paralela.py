@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+# Superficies y barridos en paralelo (superficie_paralela) frente a
+# MotorMamdani.evaluar en los mismos puntos.
+
+import numpy as np
+import pytest
+
+from definicion_difusa import cargar_definicion, construir_control_system
+from modelo_satisfaccion import RUTA_DEFINICION, construir_sistema_control
+from motor_vectorizado import MotorMamdani
+from superficie_paralela import barrido, superficie_paralela
+
+pytest.importorskip('skfuzzy')
+
+
+# Variante para el barrido (función de módulo: se envía a los procesos)
+def _sin_regla9():
+    definicion = cargar_definicion(RUTA_DEFINICION)
+    definicion['reglas'] = definicion['reglas'][:-1]
+    return construir_control_system(definicion)[0]
+
+
+def test_superficie_con_dos_procesos_igual_al_motor():
+    calidad_range = np.linspace(0, 10, 61)
+    tiempo_range = np.linspace(0, 60, 47)
+    # Tareas pequeñas para que ambos procesos reciban varias (el
+    # reparto en bloques cambia el redondeo en ~1e-14)
+    x, y, z = superficie_paralela(calidad_range, tiempo_range, procesos=2, tamano_tarea=100)
+
+    esperado_x, esperado_y = np.meshgrid(calidad_range, tiempo_range)
+    np.testing.assert_array_equal(x, esperado_x)
+    np.testing.assert_array_equal(y, esperado_y)
+    motor = MotorMamdani(construir_sistema_control())
+    esperado = motor.evaluar(np.column_stack([x.ravel(), y.ravel()])).reshape(x.shape)
+    np.testing.assert_allclose(z, esperado, rtol=0, atol=1e-9)
+
+
+def test_barrido_de_variantes():
+    puntos = np.random.default_rng(0).uniform([0, 0], [10, 60], (999, 2))
+    fabricas = [construir_sistema_control, _sin_regla9]
+    resultado = barrido(fabricas, puntos, procesos=2)
+    assert resultado.shape == (2, 999)
+    for fila, fabrica in zip(resultado, fabricas):
+        np.testing.assert_allclose(fila, MotorMamdani(fabrica()).evaluar(puntos),
+                                   rtol=0, atol=1e-9)
+    assert not np.array_equal(resultado[0], resultado[1])
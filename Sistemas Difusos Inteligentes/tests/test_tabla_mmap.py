@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+# Superficies abiertas con mapeo en memoria (tabla_mmap).
+
+import numpy as np
+import pytest
+
+from tabla_mmap import abrir_superficie, escribir_superficie
+
+
+@pytest.mark.parametrize('dtype', [np.float32, np.float64])
+def test_abrir_superficie_sin_copiar(tmp_path, dtype):
+    from modelo_satisfaccion import cargar_motor
+
+    motor = cargar_motor()
+    ejes = [np.linspace(u[0], u[-1], 11) for u in motor.universos]
+    ruta = str(tmp_path / 'sup.tabla')
+    escribir_superficie(ruta, motor, ejes, dtype=dtype)
+
+    superficie = abrir_superficie(ruta)
+    assert not superficie.valores.flags.owndata
+    assert superficie.valores.dtype == dtype
+
+    # Misma interpolación que la superficie en memoria (float64)
+    from superficie_compilada import SuperficieCompilada, _evaluar_rejilla
+
+    en_memoria = SuperficieCompilada(ejes, _evaluar_rejilla(motor, ejes), motor.entradas, motor.salida)
+    puntos = np.array([[7.0, 20.0], [2.5, 45.0]])
+    assert superficie.evaluar(puntos) == pytest.approx(en_memoria.evaluar(puntos), abs=1e-4)
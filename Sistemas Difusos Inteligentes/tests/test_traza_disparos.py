@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# Traza de disparo de reglas (traza_disparos): lo que se lee del archivo
+# (binario y Parquet) es lo que evaluar(..., traza=) entregó en cada bloque.
+
+import numpy as np
+import pytest
+
+from modelo_satisfaccion import cargar_motor
+from traza_disparos import (abrir_escritor_traza, cargar_traza, columnas_traza, leer_cabecera,
+                            resumir_traza)
+
+FILAS = 700
+BLOQUE = 256
+
+
+# Escritor de traza que solo guarda lo que recibe
+class _Grabador(object):
+
+    def __init__(self):
+        self.bloques = []
+
+    def escribir(self, entradas, grados, fuerza, salida):
+        self.bloques.append((entradas.copy(), grados.copy(), fuerza.copy(), salida.copy()))
+
+
+def _clientes():
+    rng = np.random.default_rng(0)
+    return np.column_stack([rng.uniform(0, 10, FILAS), rng.uniform(0, 60, FILAS)])
+
+
+def _esperado(motor, clientes):
+    grabador = _Grabador()
+    salida = motor.evaluar(clientes, traza=grabador)
+    assert len(grabador.bloques) == -(-clientes.shape[0] // motor.tamano_bloque)
+    entradas, grados, fuerza, salidas = (np.concatenate(partes) for partes in zip(*grabador.bloques))
+    np.testing.assert_array_equal(salidas, salida)
+    return entradas, grados, fuerza, salida
+
+
+@pytest.mark.parametrize('archivo', ['traza.traza', 'traza.parquet'])
+@pytest.mark.parametrize('dispersa', [False, True])
+@pytest.mark.parametrize('dtype', [np.float32, np.float64])
+def test_ida_y_vuelta(tmp_path, archivo, dispersa, dtype):
+    if archivo.endswith('.parquet'):
+        pytest.importorskip('pyarrow')
+    motor = cargar_motor(dispersa=dispersa, tamano_bloque=BLOQUE)
+    clientes = _clientes()
+    entradas, grados, fuerza, salida = _esperado(motor, clientes)
+    assert (fuerza > 0).any() and (fuerza == 0).any()
+
+    ruta = str(tmp_path / archivo)
+    with abrir_escritor_traza(ruta, motor, dtype) as traza:
+        np.testing.assert_array_equal(motor.evaluar(clientes, traza=traza), salida)
+
+    cabecera = leer_cabecera(ruta)
+    assert cabecera['completo'] and cabecera['filas'] == FILAS
+    columnas = columnas_traza(motor, dtype)
+    assert [c['nombre'] for c in cabecera['columnas']] == [nombre for nombre, _, _ in columnas]
+
+    leida = cargar_traza(ruta)
+    assert list(leida) == [nombre for nombre, _, _ in columnas]
+    por_tipo = {'entrada': entradas, 'grado': grados, 'regla': fuerza, 'salida': salida[:, None]}
+    vistas = dict.fromkeys(por_tipo, 0)
+    for nombre, tipo, tipo_dato in columnas:
+        assert leida[nombre].dtype == np.dtype(tipo_dato)
+        np.testing.assert_array_equal(leida[nombre],
+                                      por_tipo[tipo][:, vistas[tipo]].astype(tipo_dato))
+        vistas[tipo] += 1
+    assert vistas == {'entrada': 2, 'grado': grados.shape[1], 'regla': fuerza.shape[1],
+                      'salida': 1}
+
+    resumen, filas = resumir_traza(ruta)
+    assert filas == FILAS
+    for r, nombre in enumerate(motor.nombres_reglas):
+        assert resumen[nombre][0] == pytest.approx(np.mean(fuerza[:, r].astype(dtype) > 0))
+
+
+def test_traza_abortada_solo_con_permitir_incompleto(tmp_path):
+    motor = cargar_motor(tamano_bloque=BLOQUE)
+    clientes = _clientes()
+    ruta = str(tmp_path / 'traza.traza')
+
+    with pytest.raises(RuntimeError):
+        with abrir_escritor_traza(ruta, motor) as traza:
+            motor.evaluar(clientes, traza=traza)
+            raise RuntimeError('escritura interrumpida')
+
+    cabecera = leer_cabecera(ruta)
+    assert not cabecera['completo'] and cabecera['filas'] == 0
+    with pytest.raises(ValueError):
+        cargar_traza(ruta)
+    # Los bloques que llegaron a escribirse se pueden leer
+    parcial = cargar_traza(ruta, permitir_incompleto=True)
+    np.testing.assert_array_equal(parcial['calidad'], clientes[:, 0])
+
+
+def test_bloque_con_columnas_de_mas(tmp_path):
+    motor = cargar_motor()
+    entradas, grados, fuerza, salida = _esperado(motor, _clientes()[:10])
+    with abrir_escritor_traza(str(tmp_path / 'traza.traza'), motor) as traza:
+        with pytest.raises(ValueError):
+            traza.escribir(entradas, grados, np.hstack([fuerza, fuerza[:, :1]]), salida)